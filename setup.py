@@ -325,6 +325,9 @@ ext_data = dict(
                  "depends" : [],
                  "sources" : []},
         _smoothers_lowess = {"name" : "statsmodels/nonparametric/_smoothers_lowess.c",
+                 "depends" : [],
+                 "sources" : []},
+        _movstat = {"name" : "statsmodels/tsa/_movstat.c",
                  "depends" : [],
                  "sources" : []}
         )
@@ -0,0 +1,402 @@
+"""
+Elastic net regularized maximum likelihood by coordinate descent
+
+The penalized objective is
+
+.. math:: -\\frac{1}{n} \\ln L(\\beta) + \\sum_k \\alpha_k \\left(
+          L1\\_wt |\\beta_k| + \\frac{1 - L1\\_wt}{2} \\beta_k^2 \\right)
+
+where `alpha` is per parameter. It is minimized by proximal Newton steps:
+the log-likelihood is replaced by its quadratic approximation in the linear
+predictor, the penalized least squares problem is solved by cyclic
+coordinate descent on the weighted Gram matrix of the active parameters,
+and the step is halved until the objective decreases.
+
+Along a sequence of penalty weights the solution for the previous weight
+is the start for the next one, and the sequential strong rule of Tibshirani
+et al. (2012) excludes the parameters that are likely to be zero. The
+optimality conditions of the excluded parameters are checked at the
+solution, and violators are added to the active set.
+
+Models provide the method ``_loglike_index(linpred)``, which returns the
+log-likelihood, up to a constant, and its first derivative and negative
+second derivative with respect to the linear predictor. Models with
+several equations, like MNLogit, return one column per equation and the
+diagonal of the second derivative, so that the coordinate descent cycles
+over the equations.
+
+References
+----------
+Friedman, J., T. Hastie and R. Tibshirani. 2010. "Regularization Paths for
+    Generalized Linear Models via Coordinate Descent." Journal of
+    Statistical Software 33(1).
+
+Tibshirani, R., J. Bien, J. Friedman, T. Hastie, N. Simon, J. Taylor and
+    R. Tibshirani. 2012. "Strong rules for discarding predictors in
+    lasso-type problems." Journal of the Royal Statistical Society,
+    Series B, 74, 245-266.
+"""
+from statsmodels.compat.python import range
+import warnings
+import numpy as np
+from statsmodels.tools.sm_exceptions import ConvergenceWarning
+
+
+def _cd_quadratic(gram, c, params, l1, l2, maxiter, tol):
+    """
+    Coordinate descent for a penalized quadratic problem
+
+    Minimizes ``0.5 * b'Gb - c'b + sum(l1 * |b|) + 0.5 * sum(l2 * b**2)``
+    starting from `params`, which is modified in place. After each full
+    cycle the nonzero parameters are cycled until they converge.
+    """
+    diag = gram.diagonal()
+    denom = diag + l2
+    # negative gradient of the quadratic part
+    resid = c - np.dot(gram, params)
+    full_cycle = True
+    idx = np.arange(len(params))
+    for itr in range(maxiter):
+        max_change = 0.
+        for j in idx:
+            if denom[j] <= 0:
+                continue
+            old = params[j]
+            # soft thresholding on scalars
+            z = resid[j] + diag[j] * old
+            if z > l1[j]:
+                new = (z - l1[j]) / denom[j]
+            elif z < -l1[j]:
+                new = (z + l1[j]) / denom[j]
+            else:
+                new = 0.
+            if new != old:
+                params[j] = new
+                resid -= gram[:, j] * (new - old)
+                max_change = max(max_change,
+                                 abs(new - old) * np.sqrt(diag[j]))
+        if max_change < tol:
+            if full_cycle:
+                break
+            # nonzero parameters converged, check all parameters
+            idx = np.arange(len(params))
+            full_cycle = True
+        elif full_cycle:
+            idx = np.flatnonzero(params)
+            full_cycle = False
+    return params
+
+
+class _ElasticNetProblem(object):
+    """
+    Penalized objective of a model, the parameters are (k_exog, k_eq)
+    """
+
+    def __init__(self, model, exog, L1_wt):
+        self.model = model
+        self.exog = exog
+        self.nobs = exog.shape[0]
+        self.L1_wt = L1_wt
+
+    def derivs(self, linpred):
+        """log-likelihood and its derivatives wrt the linear predictor"""
+        if linpred.shape[1] == 1:
+            llf, score, weights = self.model._loglike_index(linpred[:, 0])
+            return llf, score[:, None], weights[:, None]
+        return self.model._loglike_index(linpred)
+
+    def objective(self, params, llf, alpha):
+        penalty = self.L1_wt * np.abs(params)
+        penalty += 0.5 * (1 - self.L1_wt) * params**2
+        return -llf / self.nobs + np.sum(alpha * penalty)
+
+    def gradient(self, score):
+        """gradient of the mean log-likelihood"""
+        return np.dot(self.exog.T, score) / self.nobs
+
+    def fit(self, params, alpha, active, state, maxiter, tol):
+        """
+        Minimize over the active parameters, the others are kept fixed
+
+        `state` holds (linpred, llf, score, weights) at `params`. Returns
+        the new params and state, whether the iterations converged and
+        the number of iterations.
+        """
+        exog = self.exog
+        nobs = self.nobs
+        l1 = alpha * self.L1_wt
+        l2 = alpha * (1 - self.L1_wt)
+        linpred, llf, score, weights = state
+        obj = self.objective(params, llf, alpha)
+        converged = False
+        for itr in range(1, maxiter + 1):
+            params_old = params.copy()
+            search_failed = False
+            for eq in range(params.shape[1]):
+                idx = np.flatnonzero(active[:, eq])
+                if len(idx) == 0:
+                    continue
+                exog_a = exog[:, idx]
+                gram = np.dot(exog_a.T * weights[:, eq], exog_a) / nobs
+                b_old = params[idx, eq]
+                c = (np.dot(exog_a.T, score[:, eq]) / nobs +
+                     np.dot(gram, b_old))
+                b = _cd_quadratic(gram, c, b_old.copy(), l1[idx, eq],
+                                  l2[idx, eq], 10 * maxiter, 0.1 * tol)
+                step = b - b_old
+                if not np.any(step):
+                    continue
+                dlinpred = np.dot(exog_a, step)
+                t = 1.
+                for _ in range(50):
+                    params_new = params.copy()
+                    params_new[idx, eq] += t * step
+                    linpred_new = linpred.copy()
+                    linpred_new[:, eq] += t * dlinpred
+                    derivs_new = self.derivs(linpred_new)
+                    obj_new = self.objective(params_new, derivs_new[0], alpha)
+                    if obj_new <= obj + 1e-12 * abs(obj):
+                        break
+                    t *= 0.5
+                else:
+                    # no decrease along the Newton direction, unchanged
+                    # params are then not a sign of convergence
+                    search_failed = True
+                    continue
+                params = params_new
+                linpred = linpred_new
+                llf, score, weights = derivs_new
+                obj = obj_new
+            change = np.max(np.abs(params - params_old))
+            if change < tol * max(1., np.max(np.abs(params))):
+                converged = not search_failed
+                break
+        return params, (linpred, llf, score, weights), converged, itr
+
+    def init_state(self, params):
+        linpred = np.dot(self.exog, params)
+        llf, score, weights = self.derivs(linpred)
+        if not np.isfinite(llf):
+            raise ValueError("the log-likelihood is not finite at the "
+                             "start params")
+        return linpred, llf, score, weights
+
+
+def _alpha_path(problem, params, state, pen_weight, n_alphas,
+                alpha_min_ratio):
+    """log-spaced alphas from the smallest alpha with all params zero"""
+    L1_wt = problem.L1_wt
+    if L1_wt == 0:
+        raise ValueError("alphas are required if L1_wt is 0")
+    penalized = pen_weight > 0
+    if not penalized.any():
+        raise ValueError("no parameter is penalized")
+    grad = problem.gradient(state[2])
+    alpha_max = np.max(np.abs(grad[penalized]) /
+                       (L1_wt * pen_weight[penalized]))
+    if alpha_max <= 0:
+        return np.zeros(n_alphas)
+    return alpha_max * np.logspace(0, np.log10(alpha_min_ratio), n_alphas)
+
+
+def fit_elasticnet(model, exog, alphas, L1_wt, start_params, maxiter=100,
+                   cnvrg_tol=1e-7, n_alphas=100, alpha_min_ratio=1e-3,
+                   pen_weight=None):
+    """
+    Elastic net estimates for a sequence of penalty weights
+
+    Parameters
+    ----------
+    model : model instance
+        model with method ``_loglike_index(linpred)``
+    exog : ndarray, (nobs, k_exog)
+        the design matrix
+    alphas : None or array_like
+        penalty weights on the scale of the mean log-likelihood. If None,
+        `n_alphas` weights are log-spaced between the smallest weight at
+        which all penalized parameters are zero and `alpha_min_ratio`
+        times this weight.
+    L1_wt : float
+        weight of the L1 penalty between 0 and 1, the remainder is the
+        weight of the ridge penalty
+    start_params : ndarray, (k_exog, k_eq)
+        starting values for the first alpha
+    maxiter : int
+        maximum number of Newton steps for each alpha
+    cnvrg_tol : float
+        convergence tolerance for the change in the parameters
+    pen_weight : None or ndarray, (k_exog, k_eq)
+        weight of each parameter in the penalty, zero for unpenalized
+        parameters. The default is 1 for all parameters.
+
+    Returns
+    -------
+    alphas : ndarray
+        the penalty weights
+    params : ndarray, (n_alphas, k_exog, k_eq)
+        the estimates for each alpha
+    converged : ndarray, bool
+        whether the iterations converged for each alpha
+    iterations : ndarray, int
+        number of Newton steps for each alpha
+    """
+    if not 0 <= L1_wt <= 1:
+        raise ValueError("L1_wt must be between 0 and 1")
+    problem = _ElasticNetProblem(model, exog, L1_wt)
+    params = np.array(start_params, dtype=float)
+    if pen_weight is None:
+        pen_weight = np.ones(params.shape)
+    pen_weight = pen_weight * np.ones(params.shape)
+    state = problem.init_state(params)
+    if alphas is None:
+        # start from the fit of the unpenalized parameters alone
+        unpenalized = pen_weight == 0
+        params[~unpenalized] = 0
+        state = problem.init_state(params)
+        if unpenalized.any():
+            params, state = problem.fit(params, np.zeros(params.shape),
+                                        unpenalized, state, maxiter,
+                                        cnvrg_tol)[:2]
+        alphas = _alpha_path(problem, params, state, pen_weight, n_alphas,
+                             alpha_min_ratio)
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    if alphas.min() < 0:
+        raise ValueError("alphas must be non-negative")
+
+    res_params = np.empty((len(alphas),) + params.shape)
+    converged = np.zeros(len(alphas), dtype=bool)
+    iterations = np.zeros(len(alphas), dtype=int)
+    alpha_prev = alphas[0] * pen_weight
+    for i, alpha in enumerate(alphas):
+        alpha = alpha * pen_weight
+        # sequential strong rule, the ridge penalty does not affect the
+        # gradient of zero parameters
+        grad = np.abs(problem.gradient(state[2]))
+        active = ((grad >= L1_wt * (2 * alpha - alpha_prev)) |
+                  (params != 0) | (alpha == 0))
+        n_iter = 0
+        while True:
+            params, state, conv, itr = problem.fit(params, alpha, active,
+                                                   state, maxiter, cnvrg_tol)
+            n_iter += itr
+            # optimality conditions of the excluded parameters
+            grad = np.abs(problem.gradient(state[2]))
+            violated = ~active & (grad > L1_wt * alpha * (1 + 1e-8))
+            if not violated.any():
+                break
+            active |= violated
+        res_params[i] = params
+        converged[i] = conv
+        iterations[i] = n_iter
+        alpha_prev = alpha
+    return alphas, res_params, converged, iterations
+
+
+def fit_elasticnet_mle(f, score, start_params, args, kwargs, disp=False,
+                       maxiter=100, callback=None, retall=False,
+                       full_output=False, hess=None, model=None):
+    """
+    Elastic net fit with the signature of the LikelihoodModel.fit solvers
+
+    The penalty weight is ``kwargs['alpha_rescaled']``, on the scale of the
+    mean log-likelihood, and the weight of the L1 penalty is
+    ``kwargs['L1_wt']``. The parameters are returned raveled in Fortran
+    order and ``retvals['trimmed']`` marks the penalized parameters that
+    are zero.
+    """
+    exog = model.exog
+    start_params = np.asarray(start_params, dtype=float).ravel('F')
+    k_params = len(start_params)
+    shape = (exog.shape[1], k_params // exog.shape[1])
+    start_params = start_params.reshape(shape, order='F')
+    # alpha is raveled as in fit_l1_slsqp
+    alpha = np.array(kwargs['alpha_rescaled'], dtype=float).ravel('F')
+    alpha = (alpha * np.ones(k_params)).reshape(shape, order='F')
+    L1_wt = kwargs.setdefault('L1_wt', 1.)
+    cnvrg_tol = kwargs.setdefault('cnvrg_tol', 1e-10)
+    _, params, converged, iterations = fit_elasticnet(
+        model, exog, [1.], L1_wt, start_params, maxiter=maxiter,
+        cnvrg_tol=cnvrg_tol, pen_weight=alpha)
+    params = params[0]
+    trimmed = ((params == 0) & (alpha > 0)).ravel('F')
+    params = params.ravel('F')
+    if not converged[0]:
+        warnings.warn("Elastic net iterations did not converge",
+                      ConvergenceWarning)
+    if full_output:
+        fopt = f(params, *args) + np.sum(alpha.ravel('F') *
+                                         (L1_wt * np.abs(params) +
+                                          0.5 * (1 - L1_wt) * params**2))
+        retvals = {'fopt': fopt, 'converged': converged[0],
+                   'iterations': iterations[0], 'gopt': float('nan'),
+                   'hopt': float('nan'), 'trimmed': trimmed}
+        return params, retvals
+    return params
+
+
+def fit_path(model, exog, start_params, alphas=None, L1_wt=1., n_alphas=100,
+             alpha_min_ratio=1e-3, pen_weight=None, maxiter=100,
+             cnvrg_tol=1e-7):
+    """
+    Regularization path of a model, the alphas are on the scale of the
+    log-likelihood
+
+    The default `pen_weight` excludes constant columns of `exog` from the
+    penalty. See `fit_elasticnet` for the other arguments.
+    """
+    if not hasattr(model, '_loglike_index'):
+        raise NotImplementedError("elastic net is not available for %s" %
+                                  model.__class__.__name__)
+    nobs = exog.shape[0]
+    start_params = np.asarray(start_params, dtype=float)
+    shape = start_params.shape
+    if start_params.ndim == 1:
+        start_params = start_params[:, None]
+    if pen_weight is None:
+        const = (np.ptp(exog, axis=0) == 0) & (exog[0] != 0)
+        pen_weight = np.where(const, 0., 1.)[:, None]
+    else:
+        pen_weight = np.asarray(pen_weight, dtype=float).reshape(
+            start_params.shape[0], -1)
+    if alphas is not None:
+        alphas = np.atleast_1d(np.asarray(alphas, dtype=float)) / nobs
+    alphas, params, converged, iterations = fit_elasticnet(
+        model, exog, alphas, L1_wt, start_params, maxiter=maxiter,
+        cnvrg_tol=cnvrg_tol, n_alphas=n_alphas,
+        alpha_min_ratio=alpha_min_ratio, pen_weight=pen_weight)
+    params = params.reshape((len(alphas),) + shape)
+    return ElasticNetPath(model, alphas * nobs, L1_wt, params, converged,
+                          iterations)
+
+
+class ElasticNetPath(object):
+    """
+    Elastic net estimates along a sequence of penalty weights
+
+    Attributes
+    ----------
+    alphas : ndarray
+        the penalty weights, on the scale of the log-likelihood
+    L1_wt : float
+        weight of the L1 penalty
+    params : ndarray
+        the estimates, the first axis corresponds to `alphas` and the
+        remaining axes to the parameters of the model
+    converged : ndarray, bool
+        whether the iterations converged for each alpha
+    iterations : ndarray, int
+        number of Newton steps for each alpha
+    """
+
+    def __init__(self, model, alphas, L1_wt, params, converged, iterations):
+        self.model = model
+        self.alphas = alphas
+        self.L1_wt = L1_wt
+        self.params = params
+        self.converged = converged
+        self.iterations = iterations
+
+    @property
+    def df(self):
+        """number of nonzero parameters for each alpha"""
+        return (self.params != 0).reshape(len(self.alphas), -1).sum(1)
@@ -260,6 +260,10 @@ class LikelihoodModel(Model):
             'newton'
                 tol : float
                     Relative error in params acceptable for convergence.
+                loglike_score_hessian : callable
+                    Function that returns the objective, the score and the
+                    Hessian at params in one evaluation, used instead of
+                    the separate functions.
             'nm' -- Nelder Mead
                 xtol : float
                     Relative error in params acceptable for convergence
@@ -1445,7 +1449,8 @@ class LikelihoodModelResults(Results):
             wipe(self, att)
 
         data_in_cache = getattr(self, 'data_in_cache', [])
-        data_in_cache += ['fittedvalues', 'resid', 'wresid']
+        data_in_cache = data_in_cache + ['fittedvalues', 'resid', 'wresid',
+                                         '_sandwich_arrays']
         for key in data_in_cache:
             try:
                 self._cache[key] = None
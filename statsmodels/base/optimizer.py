@@ -79,6 +79,10 @@ class Optimizer(object):
             'newton'
                 tol : float
                     Relative error in params acceptable for convergence.
+                loglike_score_hessian : callable
+                    Function that returns the objective, the score and the
+                    Hessian at params in one evaluation, used instead of
+                    the separate functions.
             'nm' -- Nelder Mead
                 xtol : float
                     Relative error in params acceptable for convergence
@@ -227,6 +231,8 @@ def _fit_newton(f, score, start_params, fargs, kwargs, disp=True,
                     maxiter=100, callback=None, retall=False,
                     full_output=True, hess=None):
     tol = kwargs.setdefault('tol', 1e-8)
+    # evaluates f, score and hess in one pass over the data
+    loglike_score_hessian = kwargs.get('loglike_score_hessian', None)
     iterations = 0
     oldparams = np.inf
     newparams = np.asarray(start_params)
@@ -234,16 +240,22 @@ def _fit_newton(f, score, start_params, fargs, kwargs, disp=True,
         history = [oldparams, newparams]
     while (iterations < maxiter and np.any(np.abs(newparams -
             oldparams) > tol)):
-        H = hess(newparams)
+        if loglike_score_hessian is not None:
+            G, H = loglike_score_hessian(newparams, *fargs)[1:]
+        else:
+            H = hess(newparams)
+            G = score(newparams)
         oldparams = newparams
-        newparams = oldparams - np.dot(np.linalg.inv(H),
-                score(oldparams))
+        newparams = oldparams - np.linalg.solve(H, G)
         if retall:
             history.append(newparams)
         if callback is not None:
             callback(newparams)
         iterations += 1
-    fval = f(newparams, *fargs)  # this is the negative likelihood
+    if loglike_score_hessian is not None:
+        fval, gopt, hopt = loglike_score_hessian(newparams, *fargs)
+    else:
+        fval = f(newparams, *fargs)  # this is the negative likelihood
     if iterations == maxiter:
         warnflag = 1
         if disp:
@@ -258,10 +270,9 @@ def _fit_newton(f, score, start_params, fargs, kwargs, disp=True,
             print("         Current function value: %f" % fval)
             print("         Iterations %d" % iterations)
     if full_output:
-        (xopt, fopt, niter,
-         gopt, hopt) = (newparams, f(newparams, *fargs),
-                        iterations, score(newparams),
-                        hess(newparams))
+        if loglike_score_hessian is None:
+            gopt, hopt = score(newparams), hess(newparams)
+        (xopt, fopt, niter) = (newparams, fval, iterations)
         converged = not warnflag
         retvals = {'fopt': fopt, 'iterations': niter, 'score': gopt,
                    'Hessian': hopt, 'warnflag': warnflag,
@@ -455,6 +466,9 @@ def _fit_ncg(f, score, start_params, fargs, kwargs, disp=True,
     fhess_p = kwargs.setdefault('fhess_p', None)
     avextol = kwargs.setdefault('avextol', 1.0000000000000001e-05)
     epsilon = kwargs.setdefault('epsilon', 1.4901161193847656e-08)
+    if fhess_p is not None:
+        # fmin_ncg uses the full Hessian if both are given
+        hess = None
     retvals = optimize.fmin_ncg(f, start_params, score, fhess_p=fhess_p,
                                 fhess=hess, args=fargs, avextol=avextol,
                                 epsilon=epsilon, maxiter=maxiter,
@@ -206,3 +206,24 @@ def _next_regular(target):
     if p5 < match:
         match = p5
     return match
+
+
+try:
+    from scipy.special import log_ndtr
+except ImportError:
+    # scipy < 0.14
+    def log_ndtr(x):
+        """
+        Logarithm of the standard normal cumulative distribution function.
+
+        Uses the asymptotic expansion of the Mills ratio in the lower tail,
+        where ndtr underflows.
+        """
+        from scipy.special import ndtr
+        x = np.asarray(x, dtype=float)
+        xc = np.minimum(x, -20.)
+        x2 = xc * xc
+        tail = (-0.5 * x2 - np.log(-xc) - 0.5 * np.log(2 * np.pi) +
+                np.log1p(-1. / x2 + 3. / x2**2 - 15. / x2**3))
+        with np.errstate(divide='ignore'):
+            return np.where(x < -20, tail, np.log(ndtr(x)))
@@ -143,24 +143,50 @@ def _get_margeff_exog(exog, at, atexog, ind):
         exog[0,~ind] = 1
     return exog
 
-def _get_count_effects(effects, exog, count_ind, method, model, params):
+def _dummy_change(x):
+    return np.zeros_like(x), np.ones_like(x)
+
+def _count_change(x):
+    return x - 1, x + 1
+
+def _changed_linpred(exog, params, ind, change):
     """
-    If there's a count variable, the predicted difference is taken by
-    subtracting one and adding one to exog then averaging the difference
+    Linear predictors at changed values of the columns ind of exog.
+
+    For each i in ind, yields i, the changed values x0, x1 of exog[:, i]
+    returned by change(exog[:, i]) and the linear predictors with exog[:, i]
+    replaced by x0 and by x1. The linear predictor of exog is computed once
+    and exog is not copied.
     """
-    # this is the index for the effect and the index for count col in exog
-    for i in count_ind:
-        exog0 = exog.copy()
-        exog0[:, i] -= 1
-        effect0 = model.predict(params, exog0)
-        exog0[:, i] += 2
-        effect1 = model.predict(params, exog0)
-        #NOTE: done by analogy with dummy effects but untested bc
-        # stata doesn't handle both count and eydx anywhere
+    params = params[:exog.shape[1]] # NegativeBinomial has extra params
+    linpred = np.dot(exog, params)
+    for i in ind:
+        x = exog[:, i]
+        x0, x1 = change(x)
+        yield (i, x0, x1, linpred + np.multiply.outer(x0 - x, params[i]),
+               linpred + np.multiply.outer(x1 - x, params[i]))
+
+def _get_discrete_effects(effects, exog, ind, change, method, model, params):
+    for i, _, _, linpred0, linpred1 in _changed_linpred(exog, params, ind,
+                                                        change):
+        effect0 = model._predict_index(linpred0)
+        effect1 = model._predict_index(linpred1)
         if 'ey' in method:
             effect0 = np.log(effect0)
             effect1 = np.log(effect1)
-        effects[:, i] = ((effect1 - effect0)/2)
+        effects[:, i] = effect1 - effect0
+    return effects
+
+def _get_count_effects(effects, exog, count_ind, method, model, params):
+    """
+    If there's a count variable, the predicted difference is taken by
+    subtracting one and adding one to exog then averaging the difference
+    """
+    #NOTE: done by analogy with dummy effects but untested bc
+    # stata doesn't handle both count and eydx anywhere
+    effects = _get_discrete_effects(effects, exog, count_ind, _count_change,
+                                    method, model, params)
+    effects[:, count_ind] /= 2
     return effects
 
 def _get_dummy_effects(effects, exog, dummy_ind, method, model, params):
@@ -168,19 +194,8 @@ def _get_dummy_effects(effects, exog, dummy_ind, method, model, params):
     If there's a dummy variable, the predicted difference is taken at
     0 and 1
     """
-    # this is the index for the effect and the index for dummy col in exog
-    for i in dummy_ind:
-        exog0 = exog.copy() # only copy once, can we avoid a copy?
-        exog0[:,i] = 0
-        effect0 = model.predict(params, exog0)
-        #fittedvalues0 = np.dot(exog0,params)
-        exog0[:,i] = 1
-        effect1 = model.predict(params, exog0)
-        if 'ey' in method:
-            effect0 = np.log(effect0)
-            effect1 = np.log(effect1)
-        effects[:, i] = (effect1 - effect0)
-    return effects
+    return _get_discrete_effects(effects, exog, dummy_ind, _dummy_change,
+                                 method, model, params)
 
 def _effects_at(effects, at):
     if at == 'all':
@@ -191,6 +206,52 @@ def _effects_at(effects, at):
         effects = effects[0,:]
     return effects
 
+def _margeff_cov_params_discrete(model, cov_margins, params, exog, ind,
+                                 change, method):
+    """
+    Rows of the Jacobian for discrete regressors of single index models.
+
+    The row for column i is the average of f(XB1)*X1 - f(XB0)*X0, where X0
+    and X1 are exog with column i changed by `change`. Only the changed
+    column differs from exog, so the rows are computed from the changed
+    linear predictors and one product with exog.
+    """
+    nobs, k_vars = exog.shape
+    for i, x0, x1, linpred0, linpred1 in _changed_linpred(exog, params, ind,
+                                                          change):
+        dfdxb0 = model._derivative_predict_index(linpred0)
+        dfdxb1 = model._derivative_predict_index(linpred1)
+        if 'ey' in method:
+            dfdxb0 /= model._predict_index(linpred0)
+            dfdxb1 /= model._predict_index(linpred1)
+        dfdb = np.dot(dfdxb1 - dfdxb0, exog)
+        dfdb[i] = np.dot(dfdxb1, x1) - np.dot(dfdxb0, x0)
+        cov_margins[i, :k_vars] = dfdb / nobs
+        cov_margins[i, k_vars:] = 0
+    return cov_margins
+
+def _margeff_jac_index(params, exog, pdf, dpdf, transform):
+    """
+    Jacobian of the marginal effects of single index models.
+
+    The marginal effects are pdf * params, multiplied by exog if 'ex' is
+    in transform, where pdf is the derivative of the prediction (or of its
+    log) with respect to the linear predictor and dpdf the derivative of
+    pdf. Returns the Jacobian with respect to params averaged over the rows
+    of exog, params can have additional elements that do not enter the
+    linear predictor.
+    """
+    nobs, k_vars = exog.shape
+    jac = np.zeros((len(params), len(params)))
+    if 'ex' in transform:
+        jac[:k_vars, :k_vars] = (params[:k_vars, None] *
+                                 np.dot(exog.T * dpdf, exog) / nobs)
+        jac[range(k_vars), range(k_vars)] += np.dot(pdf, exog) / nobs
+    else:
+        jac[:, :k_vars] = np.outer(params, np.dot(dpdf, exog) / nobs)
+        jac[range(len(params)), range(len(params))] += pdf.mean()
+    return jac
+
 def _margeff_cov_params_dummy(model, cov_margins, params, exog, dummy_ind,
         method, J):
     """
@@ -206,6 +267,9 @@ def _margeff_cov_params_dummy(model, cov_margins, params, exog, dummy_ind,
 
     Where F is the default prediction of the model.
     """
+    if J == 1:
+        return _margeff_cov_params_discrete(model, cov_margins, params, exog,
+                                            dummy_ind, _dummy_change, method)
     for i in dummy_ind:
         exog0 = exog.copy()
         exog1 = exog.copy()
@@ -238,6 +302,11 @@ def _margeff_cov_params_count(model, cov_margins, params, exog, count_ind,
 
     where F is the default prediction for the model.
     """
+    if J == 1:
+        cov_margins = _margeff_cov_params_discrete(model, cov_margins, params,
+                                        exog, count_ind, _count_change, method)
+        cov_margins[count_ind] /= 2
+        return cov_margins
     for i in count_ind:
         exog0 = exog.copy()
         exog0[:,i] -= 1
@@ -254,6 +323,21 @@ def _margeff_cov_params_count(model, cov_margins, params, exog, count_ind,
             cov_margins[i, :] = dfdb # how each F changes with change in B
     return cov_margins
 
+def _margeff_jac_numdiff(params, exog, at, derivative, method):
+    from statsmodels.tools.numdiff import approx_fprime_cs
+    try:
+        jacobian_mat = approx_fprime_cs(params, derivative,
+                                        args=(exog,method))
+    except TypeError:  # norm.cdf doesn't take complex values
+        from statsmodels.tools.numdiff import approx_fprime
+        jacobian_mat = approx_fprime(params, derivative,
+                                        args=(exog,method))
+    if at == 'overall':
+        jacobian_mat = np.mean(jacobian_mat, axis=1)
+    else:
+        jacobian_mat = jacobian_mat.squeeze()  # exog was 2d row vector
+    return jacobian_mat
+
 def margeff_cov_params(model, params, exog, cov_params, at, derivative,
                        dummy_ind, count_ind, method, J):
     """
@@ -302,23 +386,23 @@ def margeff_cov_params(model, params, exog, cov_params, at, derivative,
 
     where V is the parameter variance-covariance.
 
-    The outer Jacobians are computed via numerical differentiation if
-    derivative is a function.
+    If derivative is the `_derivative_exog` method of the model, then the
+    Jacobian of the continuous regressors is computed analytically by the
+    model's `_derivative_exog_params`, if the model implements it. Other
+    functions are differentiated numerically.
     """
     if callable(derivative):
-        from statsmodels.tools.numdiff import approx_fprime_cs
         params = params.ravel('F')  # for Multinomial
         try:
-            jacobian_mat = approx_fprime_cs(params, derivative,
-                                            args=(exog,method))
-        except TypeError:  # norm.cdf doesn't take complex values
-            from statsmodels.tools.numdiff import approx_fprime
-            jacobian_mat = approx_fprime(params, derivative,
-                                            args=(exog,method))
-        if at == 'overall':
-            jacobian_mat = np.mean(jacobian_mat, axis=1)
-        else:
-            jacobian_mat = jacobian_mat.squeeze()  # exog was 2d row vector
+            if (getattr(derivative, '__self__', None) is not model or
+                    getattr(derivative, '__func__', None) is not
+                    getattr(model._derivative_exog, '__func__', None) or
+                    not hasattr(model, '_derivative_exog_params')):
+                raise NotImplementedError
+            jacobian_mat = model._derivative_exog_params(params, exog, method)
+        except NotImplementedError:
+            jacobian_mat = _margeff_jac_numdiff(params, exog, at, derivative,
+                                                method)
         if dummy_ind is not None:
             jacobian_mat = _margeff_cov_params_dummy(model, jacobian_mat,
                                 params, exog, dummy_ind, method, J)
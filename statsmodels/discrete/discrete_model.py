@@ -19,6 +19,7 @@ W. Greene. `Econometric Analysis`. Prentice Hall, 5th. edition. 2003.
 __all__ = ["Poisson", "Logit", "Probit", "MNLogit", "NegativeBinomial"]
 
 from statsmodels.compat.python import lmap, lzip, range
+from functools import partial
 import numpy as np
 from scipy.special import gammaln
 from scipy import stats, special, optimize  # opt just for nbin
@@ -35,8 +36,10 @@ import statsmodels.base.model as base
 import statsmodels.regression.linear_model as lm
 import statsmodels.base.wrapper as wrap
 from statsmodels.compat.numpy import np_matrix_rank
+from statsmodels.compat.scipy import log_ndtr
 
 from statsmodels.base.l1_slsqp import fit_l1_slsqp
+from statsmodels.base.elastic_net import fit_elasticnet_mle, fit_path
 try:
     import cvxopt
     have_cvxopt = True
@@ -46,6 +49,7 @@ except ImportError:
 #TODO: When we eventually get user-settable precision, we need to change
 #      this
 FLOAT_EPS = np.finfo(float).eps
+_LOG_SQRT_2PI = 0.5 * np.log(2 * np.pi)
 
 #TODO: add options for the parameter covariance/variance
 # ie., OIM, EIM, and BHHH see Green 21.4
@@ -163,6 +167,10 @@ class DiscreteModel(base.LikelihoodModel):
         else:
             pass # make a function factory to have multiple call-backs
 
+        if method == 'newton' and hasattr(self, 'loglike_score_hessian'):
+            kwargs.setdefault('loglike_score_hessian',
+                              self._newton_loglike_score_hessian)
+
         mlefit = super(DiscreteModel, self).fit(start_params=start_params,
                 method=method, maxiter=maxiter, full_output=full_output,
                 disp=disp, callback=callback, **kwargs)
@@ -170,10 +178,17 @@ class DiscreteModel(base.LikelihoodModel):
 
     fit.__doc__ += base.LikelihoodModel.fit.__doc__
 
+    def _newton_loglike_score_hessian(self, params, *args):
+        # objective, score and Hessian scaled as in LikelihoodModel.fit
+        nobs = self.endog.shape[0]
+        llf, score, hess = self.loglike_score_hessian(params)
+        return -llf / nobs, score / nobs, hess / nobs
+
     def fit_regularized(self, start_params=None, method='l1',
             maxiter='defined_by_method', full_output=1, disp=True,
             callback=None, alpha=0, trim_mode='auto', auto_trim_tol=0.01,
-            size_trim_tol=1e-4, qc_tol=0.03, qc_verbose=False, **kwargs):
+            size_trim_tol=1e-4, qc_tol=0.03, qc_verbose=False, L1_wt=1.,
+            **kwargs):
         """
         Fit the model using a regularized maximum likelihood.
         The regularization method AND the solver used is determined by the
@@ -184,7 +199,7 @@ class DiscreteModel(base.LikelihoodModel):
         start_params : array-like, optional
             Initial guess of the solution for the loglikelihood maximization.
             The default is an array of zeros.
-        method : 'l1' or 'l1_cvxopt_cp'
+        method : 'l1', 'l1_cvxopt_cp' or 'elastic_net'
             See notes for details.
         maxiter : Integer or 'defined_by_method'
             Maximum number of iterations to perform.
@@ -220,6 +235,10 @@ class DiscreteModel(base.LikelihoodModel):
             violated by this much.
         qc_verbose : Boolean
             If true, print out a full QC report upon failure
+        L1_wt : float
+            Only for method 'elastic_net'. The penalty is
+            ``alpha * (L1_wt * |params| + (1 - L1_wt) / 2 * params**2)``,
+            L1_wt = 1 is the l1 penalty and L1_wt = 0 the ridge penalty.
 
         Notes
         -----
@@ -238,6 +257,10 @@ class DiscreteModel(base.LikelihoodModel):
                 refinement : int
                     number of iterative refinement steps when solving KKT
                     equations (default: 1).
+            'elastic_net'
+                cnvrg_tol : float
+                    convergence tolerance for the change in the parameters
+                    (default: 1e-10).
 
 
         Optimization methodology
@@ -263,13 +286,27 @@ class DiscreteModel(base.LikelihoodModel):
         (i) :math:`|\\partial_k L| = \\alpha_k`  and  :math:`\\beta_k \\neq 0`
         (ii) :math:`|\\partial_k L| \\leq \\alpha_k`  and  :math:`\\beta_k = 0`
 
+        The method 'elastic_net' solves the problem directly by coordinate
+        descent on a quadratic approximation of :math:`L`, see
+        `statsmodels.base.elastic_net`. It does not trim the parameters, the
+        parameters that are zero at the solution are exactly zero. The
+        model needs to implement the derivatives of the log-likelihood with
+        respect to the linear predictor, this is available for Logit,
+        Probit, Poisson and MNLogit.
+
         """
         ### Set attributes based on method
-        if method in ['l1', 'l1_cvxopt_cp']:
+        if method in ['l1', 'l1_cvxopt_cp', 'elastic_net']:
             cov_params_func = self.cov_params_func_l1
         else:
             raise Exception(
                     "argument method == %s, which is not handled" % method)
+        if method == 'elastic_net':
+            if not hasattr(self, '_loglike_index'):
+                raise NotImplementedError("elastic net is not available "
+                                          "for %s" % self.__class__.__name__)
+        elif L1_wt != 1:
+            raise ValueError("L1_wt is only used by method 'elastic_net'")
 
         ### Bundle up extra kwargs for the dictionary kwargs.  These are
         ### passed through super(...).fit() as kwargs and unpacked at
@@ -286,6 +323,7 @@ class DiscreteModel(base.LikelihoodModel):
         kwargs['auto_trim_tol'] = auto_trim_tol
         kwargs['qc_tol'] = qc_tol
         kwargs['qc_verbose'] = qc_verbose
+        kwargs['L1_wt'] = L1_wt
 
         ### Define default keyword arguments to be passed to super(...).fit()
         if maxiter == 'defined_by_method':
@@ -293,11 +331,15 @@ class DiscreteModel(base.LikelihoodModel):
                 maxiter = 1000
             elif method == 'l1_cvxopt_cp':
                 maxiter = 70
+            elif method == 'elastic_net':
+                maxiter = 100
 
         ## Parameters to pass to super(...).fit()
         # For the 'extra' parameters, pass all that are available,
         # even if we know (at this point) we will only use one.
-        extra_fit_funcs = {'l1': fit_l1_slsqp}
+        extra_fit_funcs = {'l1': fit_l1_slsqp,
+                           'elastic_net': partial(fit_elasticnet_mle,
+                                                  model=self)}
         if have_cvxopt and method == 'l1_cvxopt_cp':
             from statsmodels.base.l1_cvxopt import fit_l1_cvxopt_cp
             extra_fit_funcs['l1_cvxopt_cp'] = fit_l1_cvxopt_cp
@@ -342,6 +384,62 @@ class DiscreteModel(base.LikelihoodModel):
 
         return cov_params
 
+    def fit_regularized_path(self, alphas=None, L1_wt=1., n_alphas=100,
+                             alpha_min_ratio=1e-3, pen_weight=None,
+                             start_params=None, maxiter=100, cnvrg_tol=1e-7):
+        """
+        Elastic net estimates for a sequence of penalty weights
+
+        Parameters
+        ----------
+        alphas : None or array_like
+            The penalty weights, on the same scale as `alpha` in
+            `fit_regularized`. If None, `n_alphas` weights are log-spaced
+            from the smallest weight at which all penalized parameters are
+            zero down to `alpha_min_ratio` times this weight.
+        L1_wt : float
+            The penalty is
+            ``alpha * (L1_wt * |params| + (1 - L1_wt) / 2 * params**2)``.
+            If L1_wt is 0, alphas are required.
+        n_alphas : int
+            number of penalty weights if alphas is None
+        alpha_min_ratio : float
+            ratio of the smallest to the largest penalty weight if alphas
+            is None
+        pen_weight : None or array_like
+            weight of each parameter in the penalty, zero for unpenalized
+            parameters. The default is 1, except for a constant which is
+            not penalized.
+        start_params : array_like, optional
+            starting values for the first alpha, the default is zero
+        maxiter : int
+            maximum number of Newton steps for each alpha
+        cnvrg_tol : float
+            convergence tolerance for the change in the parameters
+
+        Returns
+        -------
+        path : ElasticNetPath
+            The estimates for all alphas are in the attribute `params`, the
+            first axis corresponds to the alphas. The estimate for each
+            alpha is the start for the next one.
+
+        Notes
+        -----
+        The estimates solve the same problem as ``fit_regularized`` with
+        method 'elastic_net', see `statsmodels.base.elastic_net`. Sequential
+        strong rules restrict the iterations to the parameters that are
+        likely to be nonzero, so that long paths of sparse estimates are
+        cheap.
+        """
+        if start_params is None:
+            start_params = np.zeros(self.exog.shape[1])
+        return fit_path(self, self.exog, start_params, alphas=alphas,
+                        L1_wt=L1_wt, n_alphas=n_alphas,
+                        alpha_min_ratio=alpha_min_ratio,
+                        pen_weight=pen_weight, maxiter=maxiter,
+                        cnvrg_tol=cnvrg_tol)
+
     def predict(self, params, exog=None, linear=False):
         """
         Predict response variable of a model given exogenous variables.
@@ -355,6 +453,13 @@ class DiscreteModel(base.LikelihoodModel):
         """
         raise NotImplementedError
 
+    def _derivative_exog_params(self, params, exog, transform='dydx'):
+        """
+        This should implement the Jacobian with respect to params of the
+        marginal effects averaged over the rows of exog
+        """
+        raise NotImplementedError
+
 class BinaryModel(DiscreteModel):
     def predict(self, params, exog=None, linear=False):
         """
@@ -392,7 +497,7 @@ class BinaryModel(DiscreteModel):
                 full_output=full_output, disp=disp, callback=callback,
                 alpha=alpha, trim_mode=trim_mode, auto_trim_tol=auto_trim_tol,
                 size_trim_tol=size_trim_tol, qc_tol=qc_tol, **kwargs)
-        if method in ['l1', 'l1_cvxopt_cp']:
+        if method in ['l1', 'l1_cvxopt_cp', 'elastic_net']:
             discretefit = L1BinaryResults(self, bnryfit)
         else:
             raise Exception(
@@ -418,6 +523,35 @@ class BinaryModel(DiscreteModel):
             dF /= self.predict(params, exog)[:,None]
         return dF
 
+    def _predict_index(self, linpred):
+        """predicted values given the linear predictor"""
+        return self.cdf(linpred)
+
+    def _derivative_predict_index(self, linpred):
+        """derivative of the predicted values wrt the linear predictor"""
+        return self.pdf(linpred)
+
+    def _derivative_pdf(self, X):
+        """derivative of the pdf wrt the linear predictor"""
+        raise NotImplementedError
+
+    def _derivative_exog_params(self, params, exog, transform='dydx'):
+        """
+        For computing marginal effects standard errors.
+
+        Returns the Jacobian of the marginal effects dF(XB) / dX, averaged
+        over the rows of exog, with respect to params. Uses the analytic
+        derivative of the pdf, `_derivative_pdf`.
+        """
+        from statsmodels.discrete.discrete_margins import _margeff_jac_index
+        XB = np.dot(exog, params)
+        pdf = self.pdf(XB)
+        dpdf = self._derivative_pdf(XB)
+        if 'ey' in transform:
+            pdf /= self.cdf(XB)
+            dpdf = dpdf / self.cdf(XB) - pdf**2
+        return _margeff_jac_index(params, exog, pdf, dpdf, transform)
+
     def _derivative_exog(self, params, exog=None, transform='dydx',
             dummy_idx=None, count_idx=None):
         """
@@ -466,6 +600,13 @@ class MultinomialModel(BinaryModel):
         self._ynames_map = ynames
         self.wendog = wendog    # don't drop first category
         self.J = float(wendog.shape[1])
+        # the column of wendog of the choice of each observation
+        self._endog_ix = wendog.argmax(1)
+        # X'wendog for the choices 1, ..., J-1, the part of the score that
+        # does not depend on params
+        self._score_endog = np.array([np.bincount(self._endog_ix, weights=x,
+                                                  minlength=wendog.shape[1])
+                                      for x in self.exog.T])[:, 1:]
         self.K = float(self.exog.shape[1])
         self.df_model *= (self.J-1) # for each J - 1 equation.
         self.df_resid = self.exog.shape[0] - self.df_model - (self.J-1)
@@ -538,6 +679,16 @@ class MultinomialModel(BinaryModel):
         return L1MultinomialResultsWrapper(mnfit)
     fit_regularized.__doc__ = DiscreteModel.fit_regularized.__doc__
 
+    def fit_regularized_path(self, alphas=None, start_params=None, **kwargs):
+        if start_params is None:
+            start_params = np.zeros((self.K, int(self.J) - 1))
+        else:
+            start_params = np.asarray(start_params).reshape(self.K, -1,
+                                                            order='F')
+        return DiscreteModel.fit_regularized_path(
+                self, alphas=alphas, start_params=start_params, **kwargs)
+    fit_regularized_path.__doc__ = DiscreteModel.fit_regularized_path.__doc__
+
 
     def _derivative_predict(self, params, exog=None, transform='dydx'):
         """
@@ -580,6 +731,57 @@ class MultinomialModel(BinaryModel):
             dFdX /= self.predict(params, exog)[:, :, None]
         return dFdX
 
+    def _derivative_exog_params(self, params, exog, transform='dydx'):
+        """
+        For computing marginal effects standard errors.
+
+        Returns the Jacobian of the marginal effects dF(XB) / dX, averaged
+        over the rows of exog, with respect to params. The rows are ordered
+        as the columns of `_derivative_exog` and the columns as
+        params.ravel('F').
+
+        Notes
+        -----
+        With D[k, j] = params[k, j] - sum_m P[m] * params[k, m], the
+        marginal effect is P[j] * D[k, j] for 'dydx' and D[k, j] for 'eydx',
+        and the derivative of D[k, j] with respect to params[l, m] is
+
+        delta(k, l) * (delta(j, m) - P[m]) - x[l] * P[m] * D[k, m]
+        """
+        J = int(self.J)
+        K = int(self.K)
+        nobs = exog.shape[0]
+        params = params.reshape(K, J-1, order='F')
+        zeroparams = np.c_[np.zeros(K), params]
+        P = self.cdf(np.dot(exog, params))
+        P1 = P[:, 1:]
+        D = zeroparams[None, :, :] - np.dot(P, zeroparams.T)[:, :, None]
+        # W is the factor of the derivative of D in the marginal effects
+        if 'ey' in transform:
+            W = np.ones((nobs, K, J))
+        else:
+            W = np.repeat(P[:, None, :], K, axis=1)
+        if 'ex' in transform:
+            W *= exog[:, :, None]
+        XP = (exog[:, :, None] * P1[:, None, :]).reshape(nobs, -1)
+
+        jac = np.zeros((K, J, K, J-1))
+        mean_WP = np.dot(W.reshape(nobs, -1).T, P1).reshape(K, J, J-1) / nobs
+        mean_W = W.mean(0)
+        for k in range(K):
+            jac[k, :, k, :] -= mean_WP[k]
+            jac[k, range(1, J), k, range(J-1)] += mean_W[k, 1:]
+            XPD = (exog[:, :, None] * (P1 * D[:, k, 1:])[:, None, :])
+            jac[k] -= np.dot(W[:, k, :].T, XPD.reshape(nobs, -1)).reshape(
+                                                        J, K, J-1) / nobs
+            if 'ey' not in transform:
+                # derivative of P[j]
+                A = W[:, k, :] * D[:, k, :]
+                jac[k, range(1, J), :, range(J-1)] += np.dot(A.T,
+                                                        exog)[1:] / nobs
+                jac[k] -= np.dot(A.T, XP).reshape(J, K, J-1) / nobs
+        return jac.transpose(1, 0, 3, 2).reshape(J*K, -1)
+
     def _derivative_exog(self, params, exog=None, transform='dydx',
             dummy_idx=None, count_idx=None):
         """
@@ -715,6 +917,29 @@ class CountModel(DiscreteModel):
             dF /= self.predict(params, exog)[:,None]
         return dF
 
+    def _predict_index(self, linpred):
+        """predicted values given the linear predictor"""
+        return np.exp(linpred)
+
+    def _derivative_predict_index(self, linpred):
+        """derivative of the predicted values wrt the linear predictor"""
+        return np.exp(linpred)
+
+    def _derivative_exog_params(self, params, exog, transform='dydx'):
+        """
+        For computing marginal effects standard errors.
+
+        Returns the Jacobian of the marginal effects dF(XB) / dX, averaged
+        over the rows of exog, with respect to params.
+        """
+        from statsmodels.discrete.discrete_margins import _margeff_jac_index
+        if 'ey' in transform:
+            mu = np.ones(exog.shape[0])
+            dmu = np.zeros(exog.shape[0])
+        else:
+            mu = dmu = self.predict(params, exog)
+        return _margeff_jac_index(params, exog, mu, dmu, transform)
+
     def _derivative_exog(self, params, exog=None, transform="dydx",
             dummy_idx=None, count_idx=None):
         """
@@ -767,7 +992,7 @@ class CountModel(DiscreteModel):
                 full_output=full_output, disp=disp, callback=callback,
                 alpha=alpha, trim_mode=trim_mode, auto_trim_tol=auto_trim_tol,
                 size_trim_tol=size_trim_tol, qc_tol=qc_tol, **kwargs)
-        if method in ['l1', 'l1_cvxopt_cp']:
+        if method in ['l1', 'l1_cvxopt_cp', 'elastic_net']:
             discretefit = L1CountResults(self, cntfit)
         else:
             raise Exception(
@@ -927,7 +1152,7 @@ class Poisson(CountModel):
                 full_output=full_output, disp=disp, callback=callback,
                 alpha=alpha, trim_mode=trim_mode, auto_trim_tol=auto_trim_tol,
                 size_trim_tol=size_trim_tol, qc_tol=qc_tol, **kwargs)
-        if method in ['l1', 'l1_cvxopt_cp']:
+        if method in ['l1', 'l1_cvxopt_cp', 'elastic_net']:
             discretefit = L1PoissonResults(self, cntfit)
         else:
             raise Exception(
@@ -1088,6 +1313,47 @@ class Poisson(CountModel):
         L = np.exp(np.dot(X,params) + exposure + offset)
         return -np.dot(L*X.T, X)
 
+    def loglike_score_hessian(self, params):
+        """
+        Poisson model log-likelihood, score and Hessian
+
+        Parameters
+        ----------
+        params : array-like
+            The parameters of the model
+
+        Returns
+        -------
+        loglike : float
+            The log-likelihood function evaluated at `params`
+        score : ndarray, 1-D
+            The score vector evaluated at `params`
+        hess : ndarray, (k_vars, k_vars)
+            The Hessian evaluated at `params`
+
+        Notes
+        -----
+        The linear predictor and the mean are computed once and shared by
+        the three results. This is used by the 'newton' method in `fit`.
+        """
+        X = self.exog
+        llf, score_factor, weights = self._loglike_index(np.dot(X, params))
+        return llf, np.dot(score_factor, X), -np.dot(weights * X.T, X)
+
+    def _loglike_index(self, XB):
+        """
+        log-likelihood and its first and negative second derivative with
+        respect to the linear predictor XB, without offset and exposure,
+        used by the elastic net
+        """
+        offset = getattr(self, "offset", 0)
+        exposure = getattr(self, "exposure", 0)
+        endog = self.endog
+        XB = XB + offset + exposure
+        L = np.exp(XB)
+        llf = np.sum(endog * XB - L - gammaln(endog + 1))
+        return llf, endog - L, L
+
 class Logit(BinaryModel):
     __doc__ = """
     Binary choice logit model
@@ -1150,6 +1416,21 @@ class Logit(BinaryModel):
         X = np.asarray(X)
         return np.exp(-X)/(1+np.exp(-X))**2
 
+    def _derivative_pdf(self, X):
+        """derivative of the logistic pdf wrt the linear predictor"""
+        L = self.cdf(X)
+        return L * (1 - L) * (1 - 2 * L)
+
+    def _logcdf(self, X):
+        """log of the logistic cdf
+
+        Overflow-safe for real X. Complex X, used by complex step
+        derivatives, takes the log of the cdf directly.
+        """
+        if np.iscomplexobj(X):
+            return np.log(self.cdf(X))
+        return -(np.log1p(np.exp(-np.abs(X))) + np.maximum(-X, 0))
+
     def loglike(self, params):
         """
         Log-likelihood of logit model.
@@ -1174,7 +1455,7 @@ class Logit(BinaryModel):
         """
         q = 2*self.endog - 1
         X = self.exog
-        return np.sum(np.log(self.cdf(q*np.dot(X,params))))
+        return np.sum(self._logcdf(q*np.dot(X,params)))
 
     def loglikeobs(self, params):
         """
@@ -1202,7 +1483,7 @@ class Logit(BinaryModel):
         """
         q = 2*self.endog - 1
         X = self.exog
-        return np.log(self.cdf(q*np.dot(X,params)))
+        return self._logcdf(q*np.dot(X,params))
 
     def score(self, params):
         """
@@ -1280,6 +1561,47 @@ class Logit(BinaryModel):
         L = self.cdf(np.dot(X,params))
         return -np.dot(L*(1-L)*X.T,X)
 
+    def loglike_score_hessian(self, params):
+        """
+        Logit model log-likelihood, score and Hessian
+
+        Parameters
+        ----------
+        params : array-like
+            The parameters of the model
+
+        Returns
+        -------
+        loglike : float
+            The log-likelihood function evaluated at `params`
+        score : ndarray, 1-D
+            The score vector evaluated at `params`
+        hess : ndarray, (k_vars, k_vars)
+            The Hessian evaluated at `params`
+
+        Notes
+        -----
+        The linear predictor and the probabilities are computed once and
+        shared by the three results. This is used by the 'newton' method in
+        `fit`.
+        """
+        X = self.exog
+        llf, score_factor, weights = self._loglike_index(np.dot(X, params))
+        return llf, np.dot(score_factor, X), -np.dot(weights*X.T, X)
+
+    def _loglike_index(self, XB):
+        """
+        log-likelihood and its first and negative second derivative with
+        respect to the linear predictor XB, used by the elastic net
+        """
+        y = self.endog
+        # exp(-|XB|) does not overflow
+        E = np.exp(-np.abs(XB))
+        llf = -np.sum(np.log1p(E) + np.where((2*y - 1) * XB < 0,
+                                             np.abs(XB), 0))
+        L = np.where(XB >= 0, 1, E) / (1 + E)
+        return llf, y - L, L*(1-L)
+
     def fit(self, start_params=None, method='newton', maxiter=35,
             full_output=1, disp=1, callback=None, **kwargs):
         bnryfit = super(Logit, self).fit(start_params=start_params,
@@ -1347,6 +1669,11 @@ class Probit(BinaryModel):
         X = np.asarray(X)
         return stats.norm._pdf(X)
 
+    def _derivative_pdf(self, X):
+        """derivative of the normal pdf wrt the linear predictor"""
+        X = np.asarray(X)
+        return -X * stats.norm._pdf(X)
+
 
     def loglike(self, params):
         """
@@ -1373,8 +1700,7 @@ class Probit(BinaryModel):
 
         q = 2*self.endog - 1
         X = self.exog
-        return np.sum(np.log(np.clip(self.cdf(q*np.dot(X,params)),
-            FLOAT_EPS, 1)))
+        return np.sum(log_ndtr(q*np.dot(X,params)))
 
     def loglikeobs(self, params):
         """
@@ -1403,7 +1729,7 @@ class Probit(BinaryModel):
 
         q = 2*self.endog - 1
         X = self.exog
-        return np.log(np.clip(self.cdf(q*np.dot(X,params)), FLOAT_EPS, 1))
+        return log_ndtr(q*np.dot(X,params))
 
 
     def score(self, params):
@@ -1428,12 +1754,8 @@ class Probit(BinaryModel):
         Where :math:`q=2y-1`. This simplification comes from the fact that the
         normal distribution is symmetric.
         """
-        y = self.endog
         X = self.exog
-        XB = np.dot(X,params)
-        q = 2*y - 1
-        # clip to get rid of invalid divide complaint
-        L = q*self.pdf(q*XB)/np.clip(self.cdf(q*XB), FLOAT_EPS, 1 - FLOAT_EPS)
+        L = self._mills(np.dot(X,params))
         return np.dot(L,X)
 
     def jac(self, params):
@@ -1460,12 +1782,8 @@ class Probit(BinaryModel):
         Where :math:`q=2y-1`. This simplification comes from the fact that the
         normal distribution is symmetric.
         """
-        y = self.endog
         X = self.exog
-        XB = np.dot(X,params)
-        q = 2*y - 1
-        # clip to get rid of invalid divide complaint
-        L = q*self.pdf(q*XB)/np.clip(self.cdf(q*XB), FLOAT_EPS, 1 - FLOAT_EPS)
+        L = self._mills(np.dot(X,params))
         return L[:,None] * X
 
     def hessian(self, params):
@@ -1495,10 +1813,52 @@ class Probit(BinaryModel):
         """
         X = self.exog
         XB = np.dot(X,params)
-        q = 2*self.endog - 1
-        L = q*self.pdf(q*XB)/self.cdf(q*XB)
+        L = self._mills(XB)
         return np.dot(-L*(L+XB)*X.T,X)
 
+    def loglike_score_hessian(self, params):
+        """
+        Probit model log-likelihood, score and Hessian
+
+        Parameters
+        ----------
+        params : array-like
+            The parameters of the model
+
+        Returns
+        -------
+        loglike : float
+            The log-likelihood function evaluated at `params`
+        score : ndarray, 1-D
+            The score vector evaluated at `params`
+        hess : ndarray, (k_vars, k_vars)
+            The Hessian evaluated at `params`
+
+        Notes
+        -----
+        The linear predictor and the log of the normal cdf are computed once
+        and shared by the three results. This is used by the 'newton' method
+        in `fit`.
+        """
+        X = self.exog
+        llf, score_factor, weights = self._loglike_index(np.dot(X, params))
+        return llf, np.dot(score_factor, X), -np.dot(weights*X.T, X)
+
+    def _loglike_index(self, XB):
+        """
+        log-likelihood and its first and negative second derivative with
+        respect to the linear predictor XB, used by the elastic net
+        """
+        q = 2*self.endog - 1
+        logcdf = log_ndtr(q*XB)
+        L = q*np.exp(-0.5*XB**2 - _LOG_SQRT_2PI - logcdf)
+        return np.sum(logcdf), L, L*(L+XB)
+
+    def _mills(self, XB):
+        """q * pdf(q * XB) / cdf(q * XB) computed on the log scale"""
+        q = 2*self.endog - 1
+        return q*np.exp(-0.5*XB**2 - _LOG_SQRT_2PI - log_ndtr(q*XB))
+
     def fit(self, start_params=None, method='newton', maxiter=35,
             full_output=1, disp=1, callback=None, **kwargs):
         bnryfit = super(Probit, self).fit(start_params=start_params,
@@ -1549,8 +1909,29 @@ class MNLogit(MultinomialModel):
     Notes
     -----
     See developer notes for further information on `MNLogit` internals.
+
+    The loglikelihood, score and Hessian are accumulated over chunks of
+    observations, so that the probabilities of all observations and
+    choices are not held in memory at the same time.  With
+    ``method='ncg'`` the Newton-CG iterations only use products of the
+    Hessian with a vector, with ``method='lbfgs'`` the loglikelihood and
+    score are computed together, and neither forms the Hessian during
+    the optimization.
     """ % {'extra_params' : base._missing_param_doc}
 
+    # number of observations in a chunk
+    _chunksize = 2**12
+
+    def _chunks(self):
+        nobs = self.exog.shape[0]
+        for start in range(0, nobs, self._chunksize):
+            yield slice(start, start + self._chunksize)
+
+    def _log_normalizer(self, XB):
+        """log(1 + sum(exp(XB), 1)) without overflow"""
+        m = np.maximum(XB.max(1), 0)
+        return m + np.log(np.exp(-m) + np.exp(XB - m[:, None]).sum(1))
+
     def pdf(self, eXB):
         """
         NotImplemented
@@ -1576,7 +1957,8 @@ class MNLogit(MultinomialModel):
         In the multinomial logit model.
         .. math:: \\frac{\\exp\\left(\\beta_{j}^{\\prime}x_{i}\\right)}{\\sum_{k=0}^{J}\\exp\\left(\\beta_{k}^{\\prime}x_{i}\\right)}
         """
-        eXB = np.column_stack((np.ones(len(X)), np.exp(X)))
+        m = np.maximum(X.max(1), 0)[:, None]
+        eXB = np.column_stack((np.exp(-m), np.exp(X - m)))
         return eXB/eXB.sum(1)[:,None]
 
     def loglike(self, params):
@@ -1602,9 +1984,27 @@ class MNLogit(MultinomialModel):
         if not.
         """
         params = params.reshape(self.K, -1, order='F')
-        d = self.wendog
-        logprob = np.log(self.cdf(np.dot(self.exog,params)))
-        return np.sum(d * logprob)
+        llf = 0.
+        for chunk in self._chunks():
+            XB = np.dot(self.exog[chunk], params)
+            ix = self._endog_ix[chunk]
+            XB_chosen = np.column_stack((np.zeros(len(XB)), XB))[
+                np.arange(len(XB)), ix]
+            llf += np.sum(XB_chosen - self._log_normalizer(XB))
+        return llf
+
+    def _loglike_index(self, XB):
+        """
+        log-likelihood and its first derivative with respect to the linear
+        predictors XB, (nobs, J-1), and the diagonal of the negative second
+        derivative for each observation, used by the elastic net
+        """
+        ix = self._endog_ix
+        XB_chosen = np.column_stack((np.zeros(len(XB)), XB))[
+            np.arange(len(XB)), ix]
+        llf = np.sum(XB_chosen - self._log_normalizer(XB))
+        P = self.cdf(XB)[:, 1:]
+        return llf, self.wendog[:, 1:] - P, P * (1 - P)
 
     def loglikeobs(self, params):
         """
@@ -1632,7 +2032,9 @@ class MNLogit(MultinomialModel):
         """
         params = params.reshape(self.K, -1, order='F')
         d = self.wendog
-        logprob = np.log(self.cdf(np.dot(self.exog,params)))
+        XB = np.dot(self.exog, params)
+        logprob = (np.column_stack((np.zeros(len(XB)), XB)) -
+                   self._log_normalizer(XB)[:, None])
         return d * logprob
 
     def score(self, params):
@@ -1660,11 +2062,7 @@ class MNLogit(MultinomialModel):
         In the multinomial model the score matrix is K x J-1 but is returned
         as a flattened array to work with the solvers.
         """
-        params = params.reshape(self.K, -1, order='F')
-        firstterm = self.wendog[:,1:] - self.cdf(np.dot(self.exog,
-                                                  params))[:,1:]
-        #NOTE: might need to switch terms if params is reshaped
-        return np.dot(firstterm.T, self.exog).flatten()
+        return self.loglike_and_score(params)[1]
 
     def loglike_and_score(self, params):
         """
@@ -1675,11 +2073,57 @@ class MNLogit(MultinomialModel):
 
         """
         params = params.reshape(self.K, -1, order='F')
-        cdf_dot_exog_params = self.cdf(np.dot(self.exog, params))
-        loglike_value = np.sum(self.wendog * np.log(cdf_dot_exog_params))
-        firstterm = self.wendog[:, 1:] - cdf_dot_exog_params[:, 1:]
-        score_array = np.dot(firstterm.T, self.exog).flatten()
-        return loglike_value, score_array
+        loglike_value = 0.
+        score_array = self._score_endog
+        for chunk in self._chunks():
+            X = self.exog[chunk]
+            XB = np.dot(X, params)
+            ix = self._endog_ix[chunk]
+            log_normalizer = self._log_normalizer(XB)
+            XB_chosen = np.column_stack((np.zeros(len(XB)), XB))[
+                np.arange(len(XB)), ix]
+            loglike_value += np.sum(XB_chosen - log_normalizer)
+            # out of place, params can be complex for numerical derivatives
+            score_array = score_array - np.dot(X.T,
+                                    np.exp(XB - log_normalizer[:, None]))
+        return loglike_value, score_array.T.flatten()
+
+    def hessian_vector_product(self, params, vec):
+        """
+        Product of the Hessian of the log-likelihood with a vector
+
+        Parameters
+        ----------
+        params : array-like
+            The parameters of the model
+        vec : array-like
+            A vector with the same shape as the flattened params
+
+        Returns
+        -------
+        hessvec : ndarray, (K * (J-1),)
+            np.dot(self.hessian(params), vec), computed without forming the
+            Hessian.
+
+        Notes
+        -----
+        With V the K x (J-1) matrix of `vec` and P the probabilities of the
+        choices 1, ..., J-1, the product is -X'U with
+
+        .. math:: U = P * \\left(XV - \\left(P * XV\\right) 1 1'\\right)
+
+        elementwise, which requires two products with `exog`.
+        """
+        params = params.reshape(self.K, -1, order='F')
+        vec = np.asarray(vec).reshape(self.K, -1, order='F')
+        hessvec = 0.
+        for chunk in self._chunks():
+            X = self.exog[chunk]
+            pr = self.cdf(np.dot(X, params))[:, 1:]
+            XV = np.dot(X, vec)
+            U = pr * (XV - (pr * XV).sum(1)[:, None])
+            hessvec -= np.dot(X.T, U)
+        return hessvec.T.flatten()
 
     def jac(self, params):
         """
@@ -1738,27 +2182,41 @@ class MNLogit(MultinomialModel):
         The actual Hessian matrix has J**2 * K x K elements. Our Hessian
         is reshaped to be square (J*K, J*K) so that the solvers can use it.
 
-        This implementation does not take advantage of the symmetry of
-        the Hessian and could probably be refactored for speed.
+        The Hessian is computed as Z'Z minus the block diagonal of the
+        X'diag(P[j])X, where the rows of Z are the Kronecker products of
+        the probabilities P[j] of the choices and the rows of X.  See
+        `hessian_vector_product` for the product with a vector that does
+        not form the Hessian.
         """
         params = params.reshape(self.K, -1, order='F')
-        X = self.exog
-        pr = self.cdf(np.dot(X,params))
-        partials = []
         J = self.wendog.shape[1] - 1
         K = self.exog.shape[1]
-        for i in range(J):
-            for j in range(J): # this loop assumes we drop the first col.
-                if i == j:
-                    partials.append(\
-                        -np.dot(((pr[:,i+1]*(1-pr[:,j+1]))[:,None]*X).T,X))
-                else:
-                    partials.append(-np.dot(((pr[:,i+1]*-pr[:,j+1])[:,None]*X).T,X))
-        H = np.array(partials)
-        # the developer's notes on multinomial should clear this math up
-        H = np.transpose(H.reshape(J,J,K,K), (0,2,1,3)).reshape(J*K,J*K)
+        H = np.zeros((J*K, J*K))
+        for chunk in self._chunks():
+            X = self.exog[chunk]
+            pr = self.cdf(np.dot(X, params))[:, 1:]
+            Z = (pr[:, :, None] * X[:, None, :]).reshape(len(X), J*K)
+            H += np.dot(Z.T, Z)
+            for j in range(J):
+                H[j*K:(j+1)*K, j*K:(j+1)*K] -= np.dot(X.T * pr[:, j], X)
         return H
 
+    def fit(self, start_params=None, method='newton', maxiter=35,
+            full_output=1, disp=1, callback=None, **kwargs):
+        nobs = self.endog.shape[0]
+        if method == 'ncg':
+            kwargs.setdefault('fhess_p', lambda params, vec, *args:
+                              -self.hessian_vector_product(params, vec) / nobs)
+        elif method == 'lbfgs':
+            # same scale as the objective in LikelihoodModel.fit, -llf / nobs,
+            # _fit_lbfgs negates
+            kwargs.setdefault('loglike_and_score', lambda params, *args:
+                    tuple(v / nobs for v in self.loglike_and_score(params)))
+        return super(MNLogit, self).fit(start_params=start_params,
+                method=method, maxiter=maxiter, full_output=full_output,
+                disp=disp, callback=callback, **kwargs)
+    fit.__doc__ = DiscreteModel.fit.__doc__
+
 
 #TODO: Weibull can replaced by a survival analsysis function
 # like stat's streg (The cox model as well)
@@ -1859,6 +2317,8 @@ class NegativeBinomial(CountModel):
                                                missing=missing)
         self.loglike_method = loglike_method
         self._initialize()
+        self._endog_cache = None
+        self._data_attr.append('_endog_cache')
         if loglike_method in ['nb2', 'nb1']:
             self.exog_names.append('alpha')
         # store keys for extras if we need to recreate model instance
@@ -1896,14 +2356,37 @@ class NegativeBinomial(CountModel):
         self.__dict__.update(indict)
         self._initialize()
 
+    def _endog_terms(self):
+        """
+        Terms that only depend on endog, computed once
+
+        Returns the distinct values of endog, the index of each observation
+        in them, their counts and log(endog!) for each observation. The
+        special functions of 1/alpha + endog in NB2 are only evaluated at the
+        distinct values.
+        """
+        if self._endog_cache is not None:
+            return self._endog_cache
+        uniq, idx = np.unique(self.endog, return_inverse=True)
+        counts = np.bincount(idx)
+        self._endog_cache = (uniq, idx, counts, gammaln(uniq + 1)[idx])
+        return self._endog_cache
+
     def _ll_nbin(self, params, alpha, Q=0):
         endog = self.endog
-        mu = self.predict(params)
-        size = 1/alpha * mu**Q
-        prob = size/(size+mu)
-        coeff = (gammaln(size+endog) - gammaln(endog+1) -
-                 gammaln(size))
-        llf = coeff + size*np.log(prob) + endog*np.log(1-prob)
+        linpred = self.predict(params, linear=True)
+        mu = np.exp(linpred)
+        uniq, idx, _, lgamma_endog = self._endog_terms()
+        if Q:
+            size = mu / alpha
+            coeff = gammaln(size + endog) - gammaln(size)
+        else:
+            # size is constant, evaluate at the distinct counts only
+            size = 1. / alpha
+            coeff = (gammaln(size + uniq) - gammaln(size))[idx]
+        # size*log(prob) + endog*log(1-prob) with prob = size/(size+mu)
+        llf = (coeff - lgamma_endog - size * np.log1p(mu / size) +
+               endog * (linpred - np.log(size + mu)))
         return llf
 
     def _ll_nb2(self, params):
@@ -1961,12 +2444,33 @@ class NegativeBinomial(CountModel):
         llf = np.sum(self.loglikeobs(params))
         return llf
 
+    def _dalpha_nb2(self, alpha, mu, hessian=True):
+        """
+        First and, if `hessian` is true, second derivative of the NB2
+        loglikelihood with respect to alpha at the mean `mu`
+        """
+        y = self.endog
+        uniq, _, counts, _ = self._endog_terms()
+        nobs = y.shape[0]
+        a1 = 1. / alpha
+        mu_a1 = mu + a1
+        # derivatives with respect to a1
+        d1 = (np.dot(counts, special.digamma(a1 + uniq)) -
+              nobs * special.digamma(a1) +
+              np.sum((mu - y) / mu_a1 - np.log1p(alpha * mu)))
+        da1 = -alpha**-2
+        if not hessian:
+            return da1 * d1
+        d2 = (np.dot(counts, special.polygamma(1, a1 + uniq)) -
+              nobs * special.polygamma(1, a1) +
+              np.sum(alpha - 1. / mu_a1 + (y - mu) / mu_a1**2))
+        da2 = 2 * alpha**-3
+        return da1 * d1, da2 * d1 + da1**2 * d2
+
     def _score_geom(self, params):
-        exog = self.exog
-        y = self.endog[:,None]
-        mu = self.predict(params)[:,None]
-        dparams = exog * (y-mu)/(mu+1)
-        return dparams.sum(0)
+        y = self.endog
+        mu = self.predict(params)
+        return np.dot((y - mu) / (mu + 1), self.exog)
 
     def _score_nbin(self, params, Q=0):
         """
@@ -1978,55 +2482,34 @@ class NegativeBinomial(CountModel):
             alpha = params[-1]
         params = params[:-1]
         exog = self.exog
-        y = self.endog[:,None]
-        mu = self.predict(params)[:,None]
-        a1 = 1/alpha * mu**Q
+        y = self.endog
+        mu = self.predict(params)
         if Q: # nb1
-            dparams = exog*mu/alpha*(np.log(1/(alpha + 1)) +
-                       special.digamma(y + mu/alpha) -
-                       special.digamma(mu/alpha))
-            dalpha = ((alpha*(y - mu*np.log(1/(alpha + 1)) -
-                              mu*(special.digamma(y + mu/alpha) -
-                              special.digamma(mu/alpha) + 1)) -
-                       mu*(np.log(1/(alpha + 1)) +
-                           special.digamma(y + mu/alpha) -
-                           special.digamma(mu/alpha)))/
-                       (alpha**2*(alpha + 1))).sum()
+            a1 = mu / alpha
+            dgterm = (special.digamma(y + a1) - special.digamma(a1) -
+                      np.log1p(alpha))
+            dparams = np.dot(a1 * dgterm, exog)
+            dalpha = (np.sum(y - mu) / (alpha + 1) - np.dot(a1, dgterm)) / alpha
 
         else: # nb2
-            dparams = exog*a1 * (y-mu)/(mu+a1)
-            da1 = -alpha**-2
-            dalpha = (special.digamma(a1+y) - special.digamma(a1) + np.log(a1)
-                        - np.log(a1+mu) - (a1+y)/(a1+mu) + 1).sum()*da1
+            a1 = 1. / alpha
+            dparams = np.dot(a1 * (y - mu) / (mu + a1), exog)
+            dalpha = self._dalpha_nb2(alpha, mu, hessian=False)
 
-        #multiply above by constant outside sum to reduce rounding error
         if self._transparams:
-            return np.r_[dparams.sum(0), dalpha*alpha]
+            return np.r_[dparams, dalpha*alpha]
         else:
-            return np.r_[dparams.sum(0), dalpha]
+            return np.r_[dparams, dalpha]
 
     def _score_nb1(self, params):
         return self._score_nbin(params, Q=1)
 
     def _hessian_geom(self, params):
         exog = self.exog
-        y = self.endog[:,None]
-        mu = self.predict(params)[:,None]
-
-        # for dl/dparams dparams
-        dim = exog.shape[1]
-        hess_arr = np.empty((dim, dim))
-        const_arr = mu*(1+y)/(mu+1)**2
-        for i in range(dim):
-            for j in range(dim):
-                if j > i:
-                    continue
-                hess_arr[i,j] = np.sum(-exog[:,i,None] * exog[:,j,None] *
-                                       const_arr, axis=0)
-        tri_idx = np.triu_indices(dim, k=1)
-        hess_arr[tri_idx] = hess_arr.T[tri_idx]
-        return hess_arr
-
+        y = self.endog
+        mu = self.predict(params)
+        const_arr = mu * (1 + y) / (mu + 1)**2
+        return -np.dot(exog.T * const_arr, exog)
 
     def _hessian_nb1(self, params):
         """
@@ -2039,58 +2522,31 @@ class NegativeBinomial(CountModel):
 
         params = params[:-1]
         exog = self.exog
-        y = self.endog[:,None]
-        mu = self.predict(params)[:,None]
+        y = self.endog
+        mu = self.predict(params)
 
-        a1 = mu/alpha
+        a1 = mu / alpha
+        dgterm = (special.digamma(y + a1) - special.digamma(a1) -
+                  np.log1p(alpha))
+        trigamma = special.polygamma(1, a1 + y) - special.polygamma(1, a1)
 
-        # for dl/dparams dparams
         dim = exog.shape[1]
-        hess_arr = np.empty((dim+1,dim+1))
-        #const_arr = a1*mu*(a1+y)/(mu+a1)**2
-        # not all of dparams
-        dparams = exog/alpha*(np.log(1/(alpha + 1)) +
-                              special.digamma(y + mu/alpha) -
-                              special.digamma(mu/alpha))
-
-        dmudb = exog*mu
-        xmu_alpha = exog*mu/alpha
-        trigamma = (special.polygamma(1, mu/alpha + y) -
-                    special.polygamma(1, mu/alpha))
-        for i in range(dim):
-            for j in range(dim):
-                if j > i:
-                    continue
-                hess_arr[i,j] = np.sum(dparams[:,i,None] * dmudb[:,j,None] +
-                                 xmu_alpha[:,i,None] * xmu_alpha[:,j,None] *
-                                 trigamma, axis=0)
-        tri_idx = np.triu_indices(dim, k=1)
-        hess_arr[tri_idx] = hess_arr.T[tri_idx]
+        hess_arr = np.empty((dim+1, dim+1))
+        # for dl/dparams dparams
+        hess_arr[:-1,:-1] = np.dot(exog.T * (a1 * (dgterm + a1 * trigamma)),
+                                   exog)
 
         # for dl/dparams dalpha
-        da1 = -alpha**-2
-        dldpda = np.sum(-mu/alpha * dparams + exog*mu/alpha *
-                        (-trigamma*mu/alpha**2 - 1/(alpha+1)), axis=0)
-
+        dldpda = np.dot(a1 * (-(dgterm + a1 * trigamma) / alpha -
+                              1 / (alpha + 1)), exog)
         hess_arr[-1,:-1] = dldpda
         hess_arr[:-1,-1] = dldpda
 
         # for dl/dalpha dalpha
-        digamma_part = (special.digamma(y + mu/alpha) -
-                        special.digamma(mu/alpha))
-
-        log_alpha = np.log(1/(alpha+1))
-        alpha3 = alpha**3
-        alpha2 = alpha**2
-        mu2 = mu**2
-        dada = ((alpha3*mu*(2*log_alpha + 2*digamma_part + 3) -
-                2*alpha3*y + alpha2*mu2*trigamma +
-                4*alpha2*mu*(log_alpha + digamma_part) +
-                alpha2 * (2*mu - y) +
-                2*alpha*mu2*trigamma +
-                2*alpha*mu*(log_alpha + digamma_part) +
-                mu2*trigamma)/(alpha**4*(alpha2 + 2*alpha + 1)))
-        hess_arr[-1,-1] = dada.sum()
+        dada = (np.dot(a1, a1 * trigamma + 2 * dgterm) +
+                np.sum(mu * (3 * alpha + 2) - y * (2 * alpha + 1)) /
+                (alpha + 1)**2) / alpha**2
+        hess_arr[-1,-1] = dada
 
         return hess_arr
 
@@ -2106,47 +2562,223 @@ class NegativeBinomial(CountModel):
         params = params[:-1]
 
         exog = self.exog
-        y = self.endog[:,None]
-        mu = self.predict(params)[:,None]
+        y = self.endog
+        mu = self.predict(params)
 
-        # for dl/dparams dparams
         dim = exog.shape[1]
-        hess_arr = np.empty((dim+1,dim+1))
-        const_arr = a1*mu*(a1+y)/(mu+a1)**2
-        for i in range(dim):
-            for j in range(dim):
-                if j > i:
-                    continue
-                hess_arr[i,j] = np.sum(-exog[:,i,None] * exog[:,j,None] *
-                                       const_arr, axis=0)
-        tri_idx = np.triu_indices(dim, k=1)
-        hess_arr[tri_idx] = hess_arr.T[tri_idx]
+        hess_arr = np.empty((dim+1, dim+1))
+        # for dl/dparams dparams
+        mu_a1 = mu + a1
+        const_arr = a1 * mu * (a1 + y) / mu_a1**2
+        hess_arr[:-1,:-1] = -np.dot(exog.T * const_arr, exog)
 
         # for dl/dparams dalpha
         da1 = -alpha**-2
-        dldpda = np.sum(mu*exog*(y-mu)*da1/(mu+a1)**2 , axis=0)
+        dldpda = np.dot(mu * (y - mu) * da1 / mu_a1**2, exog)
         hess_arr[-1,:-1] = dldpda
         hess_arr[:-1,-1] = dldpda
 
         # for dl/dalpha dalpha
-        #NOTE: polygamma(1,x) is the trigamma function
-        da2 = 2*alpha**-3
-        dalpha = da1 * (special.digamma(a1+y) - special.digamma(a1) +
-                    np.log(a1) - np.log(a1+mu) - (a1+y)/(a1+mu) + 1)
-        dada = (da2 * dalpha/da1 + da1**2 * (special.polygamma(1, a1+y) -
-                    special.polygamma(1, a1) + 1/a1 - 1/(a1 + mu) +
-                    (y - mu)/(mu + a1)**2)).sum()
-        hess_arr[-1,-1] = dada
+        hess_arr[-1,-1] = self._dalpha_nb2(alpha, mu)[1]
 
         return hess_arr
 
-    #TODO: replace this with analytic where is it used?
     def jac(self, params):
-        sc = approx_fprime_cs(params, self.loglikeobs)
-        return sc
+        """
+        Score of each observation
+
+        Parameters
+        ----------
+        params : array-like
+            The parameters of the model
+
+        Returns
+        -------
+        score_obs : ndarray, (nobs, k_vars)
+            The derivative of the loglikelihood of each observation with
+            respect to the parameters. For nb1 and nb2 the last column is
+            the derivative with respect to alpha, or log(alpha) during fit.
+        """
+        y = self.endog
+        if self.loglike_method == 'geometric':
+            mu = self.predict(params)
+            return self.exog * ((y - mu) / (mu + 1))[:,None]
+
+        if self._transparams: # lnalpha came in during fit
+            alpha = np.exp(params[-1])
+        else:
+            alpha = params[-1]
+        mu = self.predict(params[:-1])
+        if self.loglike_method == 'nb1':
+            a1 = mu / alpha
+            dgterm = (special.digamma(y + a1) - special.digamma(a1) -
+                      np.log1p(alpha))
+            dparams = a1 * dgterm
+            dalpha = ((y - mu) / (alpha + 1) - a1 * dgterm) / alpha
+        else:
+            uniq, idx, _, _ = self._endog_terms()
+            a1 = 1. / alpha
+            mu_a1 = mu + a1
+            dparams = a1 * (y - mu) / mu_a1
+            dalpha = -alpha**-2 * ((special.digamma(a1 + uniq) -
+                                    special.digamma(a1))[idx] +
+                                   (mu - y) / mu_a1 - np.log1p(alpha * mu))
+        if self._transparams:
+            dalpha *= alpha
+        return np.column_stack((self.exog * dparams[:,None], dalpha))
+
+    def _fit_irls(self, start_params=None, maxiter=35, tol=1e-8, disp=1):
+        """
+        Fit NB2 or geometric by IRLS for the mean parameters with alpha
+        profiled out
+
+        Each iteration is one iteratively reweighted least squares step for
+        the mean parameters with the weights mu / (1 + alpha * mu), followed
+        by a one dimensional Newton maximization of the loglikelihood in
+        log(alpha) at the new mean. The expected information of NB2 is block
+        diagonal in the mean parameters and alpha, so that only few
+        iterations are needed.
+
+        alpha is bounded below by 1e-6. Closer to the Poisson limit the
+        loglikelihood loses its precision, a ConvergenceWarning is issued if
+        the estimate is at the bound.
+        """
+        import warnings
+        from statsmodels.tools.sm_exceptions import ConvergenceWarning
+        alpha_min = 1e-6
+        nb2 = self.loglike_method == 'nb2'
+        if not nb2 and self.loglike_method != 'geometric':
+            raise ValueError("method 'irls' is only available for nb2 and "
+                             "geometric")
+        self._transparams = False
+        endog = self.endog
+        exog = self.exog
+        nobs = endog.shape[0]
+        k_exog = exog.shape[1]
+        offset = getattr(self, 'offset', 0) + getattr(self, 'exposure', 0)
+
+        if start_params is None:
+            # one weighted least squares step from the data as in GLM
+            mu = (endog + endog.mean()) / 2.
+            wexog = exog.T * mu
+            params = np.linalg.solve(np.dot(wexog, exog),
+                                     np.dot(wexog, np.log(mu) - offset +
+                                                   (endog - mu) / mu))
+            alpha = 1.
+            if nb2:
+                # moment estimate at the start mean
+                mu = np.exp(np.dot(exog, params) + offset)
+                alpha = np.sum((endog - mu)**2 - endog) / np.sum(mu**2)
+                alpha = max(alpha, 0.1)
+        else:
+            params = np.asarray(start_params, dtype=float)
+            alpha = max(params[-1], alpha_min) if nb2 else 1.
+            params = params[:k_exog]
+
+        linpred = np.dot(exog, params) + offset
+        mu = np.exp(linpred)
+        llf = np.sum(self._ll_nbin(params, alpha))
+        converged = False
+        for iteration in range(1, maxiter + 1):
+            params_old, alpha_old = params, alpha
+
+            # weighted least squares step for the mean parameters
+            wexog = exog.T * (mu / (1 + alpha * mu))
+            step = np.linalg.solve(np.dot(wexog, exog),
+                                   np.dot(exog.T, (endog - mu) /
+                                                  (1 + alpha * mu)))
+            for _ in range(20):
+                params = params_old + step
+                llf_new = np.sum(self._ll_nbin(params, alpha))
+                if llf_new >= llf or np.max(np.abs(step)) < tol:
+                    break
+                step = step / 2.
+            else:
+                # halving the step does not improve the loglikelihood
+                params = params_old
+                warnings.warn("The line search in the mean parameters "
+                              "failed to improve the loglikelihood.",
+                              ConvergenceWarning)
+                break
+            llf = llf_new
+            linpred = np.dot(exog, params) + offset
+            mu = np.exp(linpred)
+
+            if nb2:
+                # Newton iterations for log(alpha) with the mean fixed
+                for _ in range(maxiter):
+                    d1, d2 = self._dalpha_nb2(alpha, mu)
+                    grad = alpha * d1
+                    hess = alpha**2 * d2 + grad
+                    if hess < 0:
+                        step_alpha = np.clip(-grad / hess, -2, 2)
+                    else:
+                        step_alpha = np.sign(grad)
+                    step_alpha = max(step_alpha, np.log(alpha_min / alpha))
+                    for _ in range(20):
+                        alpha_new = alpha * np.exp(step_alpha)
+                        llf_new = np.sum(self._ll_nbin(params, alpha_new))
+                        if llf_new >= llf:
+                            break
+                        step_alpha = step_alpha / 2.
+                    else:
+                        break
+                    alpha, llf = alpha_new, llf_new
+                    if np.abs(step_alpha) < tol:
+                        break
+
+            change = np.max(np.abs(np.r_[params - params_old,
+                                         np.log(alpha / alpha_old)]))
+            if change < tol:
+                converged = True
+                break
+
+        fval = -llf / nobs
+        if disp:
+            if converged:
+                print("Optimization terminated successfully.")
+            else:
+                print("Warning: Maximum number of iterations has been "
+                      "exceeded.")
+            print("         Current function value: %f" % fval)
+            print("         Iterations: %d" % iteration)
+
+        if nb2:
+            if alpha <= alpha_min * (1 + tol):
+                warnings.warn("alpha is at its lower bound %g, the data do "
+                              "not show overdispersion, use Poisson instead."
+                              % alpha_min, ConvergenceWarning)
+            params = np.r_[params, alpha]
+        Hinv = np.linalg.inv(-self.hessian(params))
+        mlefit = base.LikelihoodModelResults(self, params, Hinv, scale=1.)
+        mlefit.mle_retvals = {'fopt': fval, 'iterations': iteration,
+                              'converged': converged}
+        mlefit.mle_settings = {'optimizer': 'irls', 'start_params':
+                               start_params, 'maxiter': maxiter, 'tol': tol,
+                               'callback': None}
+        if nb2:
+            nbinfit = NegativeBinomialAncillaryResults(self, mlefit)
+            return NegativeBinomialAncillaryResultsWrapper(nbinfit)
+        return CountResultsWrapper(CountResults(self, mlefit))
 
     def fit(self, start_params=None, method='bfgs', maxiter=35,
             full_output=1, disp=1, callback=None, **kwargs):
+        """
+        Fit the model using maximum likelihood.
+
+        method='irls' is available for nb2 and geometric. It alternates
+        iteratively reweighted least squares steps for the mean parameters
+        with a Newton maximization over alpha. The last element of
+        `start_params` is alpha instead of log(alpha), and the keyword `tol`
+        is the convergence tolerance for the change in the parameters.
+
+        The rest of the docstring is from
+        statsmodels.LikelihoodModel.fit
+        """
+        if method == 'irls':
+            return self._fit_irls(start_params=start_params, maxiter=maxiter,
+                                  tol=kwargs.get('tol', 1e-8), disp=disp)
+
         if self.loglike_method.startswith('nb') and method not in ['newton',
                                                                    'ncg']:
             self._transparams = True # in case same Model instance is refit
@@ -2174,6 +2806,7 @@ class NegativeBinomial(CountModel):
             return NegativeBinomialAncillaryResultsWrapper(nbinfit)
         else:
             return mlefit
+    fit.__doc__ += base.LikelihoodModel.fit.__doc__
 
 ### Results Class ###
 
@@ -2196,6 +2829,8 @@ class DiscreteResults(base.LikelihoodModelResults):
         try:
             #remove unpicklable callback
             self.mle_settings['callback'] = None
+            if 'loglike_score_hessian' in self.mle_settings:
+                self.mle_settings['loglike_score_hessian'] = None
         except (AttributeError, KeyError):
             pass
         return self.__dict__
@@ -20,6 +20,7 @@ from statsmodels.discrete.discrete_model import (Logit, Probit, MNLogit,
 from statsmodels.discrete.discrete_margins import _iscount, _isdummy
 import statsmodels.api as sm
 from nose import SkipTest
+from statsmodels.tools.numdiff import approx_fprime, approx_fprime_cs
 from .results.results_discrete import Spector, DiscreteL1, RandHIE, Anes
 from statsmodels.tools.sm_exceptions import PerfectSeparationError
 
@@ -488,6 +489,139 @@ class TestLogitL1(CheckLikelihoodModelL1):
                 self.res1.cov_params(), self.res2.cov_params, DECIMAL_4)
 
 
+class TestProbitElasticNet(TestProbitL1):
+    @classmethod
+    def setupClass(cls):
+        data = sm.datasets.spector.load()
+        data.exog = sm.add_constant(data.exog, prepend=True)
+        alpha = np.array([0.1, 0.2, 0.3, 10])
+        cls.res1 = Probit(data.endog, data.exog).fit_regularized(
+            method="elastic_net", alpha=alpha, disp=0)
+        res2 = DiscreteL1()
+        res2.probit()
+        cls.res2 = res2
+
+
+class TestMNLogitElasticNet(CheckLikelihoodModelL1):
+    @classmethod
+    def setupClass(cls):
+        anes_data = sm.datasets.anes96.load()
+        anes_exog = anes_data.exog
+        anes_exog = sm.add_constant(anes_exog, prepend=False)
+        mlogit_mod = sm.MNLogit(anes_data.endog, anes_exog)
+        alpha = 10. * np.ones((mlogit_mod.J - 1, mlogit_mod.K))
+        alpha[-1,:] = 0
+        cls.res1 = mlogit_mod.fit_regularized(
+                method='elastic_net', alpha=alpha, disp=0)
+        res2 = DiscreteL1()
+        res2.mnlogit()
+        cls.res2 = res2
+
+
+class TestLogitElasticNet(TestLogitL1):
+    @classmethod
+    def setupClass(cls):
+        data = sm.datasets.spector.load()
+        data.exog = sm.add_constant(data.exog, prepend=True)
+        cls.alpha = 3 * np.array([0., 1., 1., 1.])
+        cls.res1 = Logit(data.endog, data.exog).fit_regularized(
+            method="elastic_net", alpha=cls.alpha, disp=0)
+        res2 = DiscreteL1()
+        res2.logit()
+        cls.res2 = res2
+
+
+def _check_elastic_net_kkt(model, params, alpha, L1_wt):
+    # optimality conditions of the penalized log-likelihood
+    params = np.asarray(params).ravel('F')
+    alpha = alpha * np.ones(len(params))
+    score = model.score(params)
+    nz = params != 0
+    grad = score[nz] - alpha[nz] * (L1_wt * np.sign(params[nz]) +
+                                    (1 - L1_wt) * params[nz])
+    assert_allclose(grad, 0, atol=1e-5)
+    assert_array_less(np.abs(score[~nz]), L1_wt * alpha[~nz] + 1e-5)
+
+
+def test_elastic_net_path():
+    np.random.seed(987125)
+    nobs, k_vars = 300, 12
+    exog = sm.add_constant(np.random.randn(nobs, k_vars), prepend=True)
+    linpred = exog[:, :4].sum(1) * 0.5
+    endogs = {Logit: (np.random.rand(nobs) < 1 / (1 + np.exp(-linpred))),
+              Probit: (np.random.rand(nobs) < 1 / (1 + np.exp(-linpred))),
+              Poisson: np.random.poisson(np.exp(linpred)),
+              MNLogit: np.random.randint(0, 3, size=nobs)}
+    for klass, endog in endogs.items():
+        model = klass(endog * 1., exog)
+        for L1_wt in [1, 0.5]:
+            path = model.fit_regularized_path(L1_wt=L1_wt, n_alphas=20)
+            assert_(path.converged.all())
+            assert_equal(len(path.alphas), 20)
+            assert_equal(path.params.shape[1:],
+                         np.shape(model.fit(disp=0).params))
+            # only the constant is nonzero at the largest alpha
+            k_eq = 1 if path.params.ndim == 2 else path.params.shape[2]
+            assert_allclose(path.params[0, 1:], 0, atol=1e-8)
+            assert_(path.df[-1] > path.df[1])
+            pen_weight = np.ones(exog.shape[1])
+            pen_weight[0] = 0
+            if k_eq > 1:
+                pen_weight = np.column_stack([pen_weight] * k_eq).ravel('F')
+            for i in [5, 12, 19]:
+                _check_elastic_net_kkt(model, path.params[i],
+                                      path.alphas[i] * pen_weight, L1_wt)
+
+            # warm starts give the same estimates as single fits
+            alpha = path.alphas[12] * pen_weight
+            res = model.fit_regularized(method='elastic_net', alpha=alpha,
+                                        L1_wt=L1_wt, disp=0)
+            assert_allclose(res.params, path.params[12], rtol=1e-5,
+                            atol=1e-6)
+
+        # ridge penalty needs explicit alphas
+        path = model.fit_regularized_path(alphas=[10., 1.], L1_wt=0)
+        assert_(np.all(path.params[:, 1:] != 0))
+        _check_elastic_net_kkt(model, path.params[1], pen_weight, 0)
+        assert_raises(ValueError, model.fit_regularized_path, L1_wt=0)
+
+    model = NegativeBinomial(endogs[Poisson], exog)
+    assert_raises(NotImplementedError, model.fit_regularized_path)
+    assert_raises(NotImplementedError, model.fit_regularized, alpha=1.,
+                  method='elastic_net')
+
+
+def test_elastic_net_line_search_failure():
+    # a failed line search is not reported as convergence
+    from statsmodels.base.elastic_net import _ElasticNetProblem
+    np.random.seed(987125)
+    exog = sm.add_constant(np.random.randn(100, 3), prepend=True)
+    endog = (np.random.rand(100) < 0.5) * 1.
+    problem = _ElasticNetProblem(Logit(endog, exog), exog, 1.)
+    # any step away from zero increases the objective
+    problem.objective = lambda params, llf, alpha: np.abs(params).sum()
+    params = np.zeros((4, 1))
+    state = problem.init_state(params)
+    params, state, converged, itr = problem.fit(
+        params, np.zeros((4, 1)), np.ones((4, 1), bool), state, 20, 1e-8)
+    assert_equal(params, 0)
+    assert_(not converged)
+
+
+def test_elastic_net_convergence_warning():
+    import warnings
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog, prepend=True)
+    alpha = np.array([0.1, 0.2, 0.3, 10])
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter('always')
+        res = Logit(data.endog, exog).fit_regularized(
+            method="elastic_net", alpha=alpha, maxiter=1, disp=0)
+    assert_(not res.mle_retvals['converged'])
+    assert_(any(issubclass(wi.category, ConvergenceWarning) for wi in w))
+
+
 class TestCVXOPT(object):
     @classmethod
     def setupClass(self):
@@ -871,6 +1005,22 @@ class TestNegativeBinomialNB2Newton(CheckModelResults):
 
     test_jac = no_info
 
+class TestNegativeBinomialNB2IRLS(TestNegativeBinomialNB2Newton):
+    @classmethod
+    def setupClass(cls):
+        data = sm.datasets.randhie.load()
+        exog = sm.add_constant(data.exog, prepend=False)
+        cls.res1 = NegativeBinomial(data.endog, exog, 'nb2').fit(method='irls',
+                                                                 disp=0)
+        res2 = RandHIE()
+        res2.negativebinomial_nb2_bfgs()
+        cls.res2 = res2
+
+    def test_converged(self):
+        assert_(self.res1.mle_retvals['converged'])
+        assert_(self.res1.mle_retvals['iterations'] < 10)
+
+
 class TestNegativeBinomialNB1Newton(CheckModelResults):
     @classmethod
     def setupClass(cls):
@@ -1063,6 +1213,64 @@ class TestNegativeBinomialGeometricBFGS(CheckModelResults):
     test_jac = no_info
 
 
+class TestNegativeBinomialGeometricIRLS(TestNegativeBinomialGeometricBFGS):
+    @classmethod
+    def setupClass(cls):
+        data = sm.datasets.randhie.load()
+        exog = sm.add_constant(data.exog, prepend=False)
+        cls.res1 = NegativeBinomial(data.endog, exog, 'geometric').fit(
+                                                    method='irls', disp=0)
+        res2 = RandHIE()
+        res2.negativebinomial_geometric_bfgs()
+        cls.res2 = res2
+
+
+def test_negativebinomial_derivatives():
+    np.random.seed(987125)
+    nobs = 200
+    exog = sm.add_constant(np.random.randn(nobs, 2))
+    exposure = np.random.uniform(1, 3, size=nobs)
+    mu = np.exp(np.dot(exog, [0.5, 0.3, -0.2])) * exposure
+    endog = np.random.negative_binomial(2, 1 / (1 + 0.5 * mu))
+    for loglike_method in ['nb2', 'nb1', 'geometric']:
+        mod = NegativeBinomial(endog, exog, loglike_method=loglike_method,
+                               exposure=exposure)
+        params = np.array([0.4, 0.2, -0.1, 0.6])
+        if loglike_method == 'geometric':
+            params = params[:-1]
+        for transparams in [False, True]:
+            mod._transparams = transparams
+            jac = mod.jac(params)
+            assert_allclose(jac, approx_fprime_cs(params, mod.loglikeobs),
+                            rtol=1e-10, atol=1e-12)
+            assert_allclose(mod.score(params), jac.sum(0), rtol=1e-10)
+        mod._transparams = False
+        assert_allclose(mod.hessian(params),
+                        approx_fprime(params, mod.score, centered=True),
+                        rtol=1e-6)
+
+
+def test_negativebinomial_irls_equidispersed():
+    # alpha goes to the Poisson limit, irls stops at the lower bound
+    import warnings
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+    np.random.seed(0)
+    nobs = 2000
+    exog = sm.add_constant(np.random.randn(nobs))
+    endog = np.random.binomial(6, 0.5, size=nobs)
+    mod = NegativeBinomial(endog, exog)
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter('always')
+        res = mod.fit(method='irls', disp=0)
+    assert_(any(issubclass(wi.category, ConvergenceWarning) for wi in w))
+    assert_allclose(res.params[-1], 1e-6)
+    res_poi = sm.Poisson(endog, exog).fit(disp=0)
+    res_bfgs = NegativeBinomial(endog, exog).fit(maxiter=200, disp=0)
+    assert_allclose(res.params[:-1], res_poi.params, rtol=1e-4)
+    assert_(res.llf <= res_poi.llf)
+    assert_allclose(res.llf, res_bfgs.llf, rtol=1e-6)
+
+
 class CheckMNLogitBaseZero(CheckModelResults):
 
     def test_margeff_overall(self):
@@ -1200,6 +1408,51 @@ class TestMNLogitLBFGSBaseZero(CheckMNLogitBaseZero):
         res2.mnlogit_basezero()
         cls.res2 = res2
 
+class TestMNLogitNCGBaseZero(CheckMNLogitBaseZero):
+    @classmethod
+    def setupClass(cls):
+        data = sm.datasets.anes96.load()
+        cls.data = data
+        exog = data.exog
+        exog = sm.add_constant(exog, prepend=False)
+        # Newton-CG with Hessian-vector products
+        cls.res1 = MNLogit(data.endog, exog).fit(method="ncg", disp=0,
+                                                 maxiter=100, avextol=1e-12)
+        res2 = Anes()
+        res2.mnlogit_basezero()
+        cls.res2 = res2
+
+
+def test_mnlogit_chunks():
+    data = sm.datasets.anes96.load()
+    exog = sm.add_constant(data.exog, prepend=False)
+    mod = MNLogit(data.endog, exog)
+    params = np.random.RandomState(0).randn(exog.shape[1] * 6) * 0.1
+    vec = np.linspace(-1, 1, len(params))
+    llf, score, hess = (mod.loglike(params), mod.score(params),
+                        mod.hessian(params))
+    assert_almost_equal(np.dot(hess, vec),
+                        mod.hessian_vector_product(params, vec), decimal=8)
+    assert_almost_equal(approx_fprime(params, mod.loglike, centered=True),
+                        score, decimal=4)
+
+    mod._chunksize = 100
+    assert_almost_equal(mod.loglike(params), llf, decimal=8)
+    assert_almost_equal(mod.score(params), score, decimal=8)
+    assert_almost_equal(mod.hessian(params), hess, decimal=8)
+
+
+def test_mnlogit_lbfgs_default():
+    # default loglike_and_score is on the same scale as the objective
+    data = sm.datasets.anes96.load()
+    exog = sm.add_constant(data.exog, prepend=False)
+    mod = MNLogit(data.endog, exog)
+    res_newton = mod.fit(method="newton", disp=0)
+    res_lbfgs = mod.fit(method="lbfgs", disp=0, maxiter=5000, m=40,
+                        pgtol=1e-10, factr=5e0)
+    assert_allclose(res_lbfgs.params, res_newton.params, rtol=1e-5, atol=1e-5)
+    assert_allclose(res_lbfgs.llf, res_newton.llf, rtol=1e-10)
+
 
 def test_perfect_prediction():
     cur_dir = os.path.dirname(os.path.abspath(__file__))
@@ -1245,6 +1498,59 @@ def test_poisson_newton():
     res = mod.fit(start_params=-np.ones(4), method='newton', disp=0)
     assert_(not res.mle_retvals['converged'])
 
+def test_loglike_score_hessian():
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog, prepend=False)
+    params = np.array([2.8, 0.1, 2.4, -13.])
+    for model in [Logit(data.endog, exog), Probit(data.endog, exog),
+                  Poisson(data.endog, exog, exposure=np.ones(32) * 2)]:
+        llf, score, hess = model.loglike_score_hessian(params / 2)
+        assert_almost_equal(llf, model.loglike(params / 2), decimal=10)
+        assert_almost_equal(score, model.score(params / 2), decimal=10)
+        assert_almost_equal(hess, model.hessian(params / 2), decimal=10)
+        res1 = model.fit(disp=0)
+        res2 = model.fit(disp=0, loglike_score_hessian=None)
+        assert_almost_equal(res1.params, res2.params, decimal=10)
+        assert_almost_equal(res1.bse, res2.bse, decimal=10)
+
+    # far in the tails the log-likelihood and score stay finite
+    params = np.array([0, 0, 0, 100.])
+    for model in [Logit(data.endog, exog), Probit(data.endog, exog)]:
+        llf, score, hess = model.loglike_score_hessian(params)
+        assert_almost_equal(llf, model.loglike(params), decimal=8)
+        assert_(np.isfinite(llf))
+        assert_(np.all(np.isfinite(score)))
+        assert_almost_equal(score, model.score(params), decimal=8)
+    assert_almost_equal(Logit(data.endog, exog).loglike(params),
+                        -100 * (data.endog == 0).sum(), decimal=8)
+
+
+def test_margeff_jacobian():
+    from statsmodels.discrete.discrete_margins import _margeff_jac_numdiff
+    data = sm.datasets.spector.load()
+    exog = sm.add_constant(data.exog, prepend=False)
+    endog_count = np.array([0, 1, 3, 0, 2, 1, 0, 1] * 4)
+    anes = sm.datasets.anes96.load()
+    models = [(Logit(data.endog, exog), np.array([2.8, 0.1, 2.4, -13.])),
+              (Probit(data.endog, exog), np.array([1.6, 0.05, 1.4, -7.5])),
+              (Poisson(endog_count, exog), np.array([0.3, 0.01, -0.2, -1])),
+              (NegativeBinomial(endog_count, exog),
+               np.array([0.3, 0.01, -0.2, -1, 0.5])),
+              (MNLogit(anes.endog[:200], sm.add_constant(anes.exog[:200, :3],
+                                                         prepend=False)),
+               np.linspace(-0.1, 0.1, 24))]
+    for model, params in models:
+        for method in ['dydx', 'eydx', 'dyex', 'eyex']:
+            if (isinstance(model, (NegativeBinomial, MNLogit)) and
+                    'ex' in method):
+                continue
+            for exog_at in [model.exog, model.exog.mean(0)[None, :]]:
+                jac = model._derivative_exog_params(params, exog_at, method)
+                jac_num = _margeff_jac_numdiff(params, exog_at, 'overall',
+                                               model._derivative_exog, method)
+                assert_allclose(jac, jac_num, rtol=1e-6, atol=1e-10)
+
+
 def test_issue_339():
     # make sure MNLogit summary works for J != K.
     data = sm.datasets.anes96.load()
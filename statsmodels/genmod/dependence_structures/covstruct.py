@@ -1,6 +1,7 @@
-from statsmodels.compat.python import iterkeys, itervalues, zip, range
+from statsmodels.compat.python import iterkeys, itervalues, zip, range, lzip
 import numpy as np
 from scipy import linalg as spl
+from statsmodels.tools.grouputils import group_sums, combine_indices
 
 
 class CovStruct(object):
@@ -127,6 +128,51 @@ class CovStruct(object):
         soln = [spl.cho_solve(vco, x) for x in rhs]
         return soln
 
+    def covariance_matrix_solve_all(self, expval, stdev, rhs):
+        """
+        Solves the matrix equations `covmat * soln = rhs` of all
+        clusters.
+
+        Parameters
+        ----------
+        expval: array-like
+           The expected value of endog for each observation, with the
+           clusters stacked in the order of `model.endog_li`.
+        stdev : array-like
+            The standard deviation of endog for each observation, in
+            the same order as `expval`.
+        rhs : list/tuple of array-like
+            A set of right-hand sides, the rows are in the same order
+            as `expval`.
+
+        Returns
+        -------
+        soln : list/tuple of array-like
+            The solutions to the matrix equations, the rows are in the
+            same order as `expval`.
+
+        Notes
+        -----
+        Returns None if the solver fails for any cluster.
+
+        This is a default implementation that calls
+        `covariance_matrix_solve` for each cluster.  Subclasses can
+        reimplement it to solve the equations of all clusters at
+        once.
+        """
+
+        bounds = self.model._group_bounds
+        soln = [np.empty(x.shape, dtype=np.float64) for x in rhs]
+        for i in range(len(bounds) - 1):
+            ii = slice(bounds[i], bounds[i + 1])
+            rslt = self.covariance_matrix_solve(expval[ii], i, stdev[ii],
+                                                [x[ii] for x in rhs])
+            if rslt is None:
+                return None
+            for y, x in zip(soln, rslt):
+                y[ii] = x
+        return soln
+
     def summary(self):
         """
         Returns a text summary of the current estimate of the
@@ -158,9 +204,14 @@ class Independence(CovStruct):
                 rslt.append(x / v[:, None])
         return rslt
 
+    def covariance_matrix_solve_all(self, expval, stdev, rhs):
+        return self.covariance_matrix_solve(expval, None, stdev, rhs)
+
     update.__doc__ = CovStruct.update.__doc__
     covariance_matrix.__doc__ = CovStruct.covariance_matrix.__doc__
     covariance_matrix_solve.__doc__ = CovStruct.covariance_matrix_solve.__doc__
+    covariance_matrix_solve_all.__doc__ = \
+        CovStruct.covariance_matrix_solve_all.__doc__
 
     def summary(self):
         return "Observations within a cluster are independent."
@@ -180,28 +231,27 @@ class Exchangeable(CovStruct):
 
     def update(self, params):
 
-        endog = self.model.endog_li
+        endog = self.model._endog_all
+        group_ix = self.model._group_ix
+        ngrp = self.model._group_sizes
 
         nobs = self.model.nobs
         dim = len(params)
 
         varfunc = self.model.family.variance
 
-        cached_means = self.model.cached_means
-
-        residsq_sum, scale, nterm = 0, 0, 0
-        for i in range(self.model.num_group):
-
-            expval, _ = cached_means[i]
-            stdev = np.sqrt(varfunc(expval))
-            resid = (endog[i] - expval) / stdev
+        expval, _ = self.model._cached_means_all
+        stdev = np.sqrt(varfunc(expval))
+        resid = (endog - expval) / stdev
 
-            ngrp = len(resid)
-            residsq = np.outer(resid, resid)
-            scale += np.trace(residsq)
-            residsq = np.tril(residsq, -1)
-            residsq_sum += residsq.sum()
-            nterm += 0.5 * ngrp * (ngrp - 1)
+        # The sum of the products of all pairs of residuals in a
+        # cluster, from the cluster sums of the residuals and of their
+        # squares
+        rsum, rsumsq = group_sums(np.column_stack((resid, resid**2)),
+                                  group_ix)
+        scale = rsumsq.sum()
+        residsq_sum = 0.5 * (rsum**2 - rsumsq).sum()
+        nterm = 0.5 * (ngrp * (ngrp - 1)).sum()
 
         scale /= (nobs - dim)
         self.dep_params = residsq_sum / (scale * (nterm - dim))
@@ -233,9 +283,34 @@ class Exchangeable(CovStruct):
 
         return rslt
 
+    def covariance_matrix_solve_all(self, expval, stdev, rhs):
+
+        group_ix = self.model._group_ix
+        k = self.model._group_sizes
+        c = self.dep_params / (1. - self.dep_params)
+        c /= 1. + self.dep_params * (k - 1)
+        c = c[group_ix]
+
+        rslt = []
+        for x in rhs:
+            x1 = x / stdev if x.ndim == 1 else x / stdev[:, None]
+            x1sum = group_sums(x1, group_ix).T[group_ix]
+            y = x1 / (1. - self.dep_params)
+            if x.ndim == 1:
+                y -= c * x1sum[:, 0]
+                y /= stdev
+            else:
+                y -= c[:, None] * x1sum
+                y /= stdev[:, None]
+            rslt.append(y)
+
+        return rslt
+
     update.__doc__ = CovStruct.update.__doc__
     covariance_matrix.__doc__ = CovStruct.covariance_matrix.__doc__
     covariance_matrix_solve.__doc__ = CovStruct.covariance_matrix_solve.__doc__
+    covariance_matrix_solve_all.__doc__ = \
+        CovStruct.covariance_matrix_solve_all.__doc__
 
     def summary(self):
         return ("The correlation between two observations in the " +
@@ -282,26 +357,36 @@ class Nested(CovStruct):
 
     Notes
     -----
-    The calculations for this dependence structure involve all pairs
-    of observations within a group (that is, within the top level
-    `group` structure passed to GEE).  Large group sizes will result
-    in slow iterations.
-
     The variance components are estimated using least squares
     regression of the products r*r', for standardized residuals r and
     r' in the same group, on a vector of indicators defining which
     variance components are shared by r and r'.
+
+    The variance components shared by two observations are given by
+    the number of columns of `dep_data` in which they agree.  If
+    agreeing in a column implies agreeing in all columns to its left,
+    the working correlation matrix of a cluster is a diagonal matrix
+    plus one constant block for each subgroup.  The regression is
+    then computed from subgroup sums of the residuals and the
+    correlation matrices are inverted by the Sherman-Morrison formula
+    level by level, so that the calculations are linear in the group
+    sizes.  Otherwise they involve all pairs of observations within a
+    group, and large group sizes will result in slow iterations.
     """
 
     def initialize(self, model):
         """
         Called on the first call to update
 
-        `ilabels` is a list of n_i x n_i matrices containing integer
-        labels that correspond to specific correlation parameters.
-        Two elements of ilabels[i] with the same label share identical
-        variance components.
+        `level_ix` is a list of arrays with the integer label of the
+        subgroup at each level of nesting for the stacked observations
+        of the model, the first level are the clusters.  It is None if
+        the labels in `dep_data` are not nested.
 
+        For labels that are not nested, `ilabels` is a list of n_i x
+        n_i matrices containing integer labels that correspond to
+        specific correlation parameters.  Two elements of ilabels[i]
+        with the same label share identical variance components.
         `designx` is a matrix, with each row containing dummy
         variables indicating which variance components are associated
         with the corresponding element of QY.
@@ -315,12 +400,34 @@ class Nested(CovStruct):
             id_matrix = id_matrix[:,None]
         self.id_matrix = id_matrix
 
-        endog = self.model.endog_li
-        designx, ilabels = [], []
-
         # The number of layers of nesting
         n_nest = self.id_matrix.shape[1]
 
+        # The labels of the stacked observations
+        rows = np.concatenate([self.model.group_indices[glab]
+                               for glab in self.model.group_labels])
+        id_stacked = self.id_matrix[rows, :]
+        group_ix = self.model._group_ix
+
+        # The subgroups at level k are the observations that agree in
+        # the first k columns, they are nested if they are also the
+        # observations that agree in column k.
+        self.level_ix = [group_ix]
+        for k in range(1, n_nest + 1):
+            level = combine_indices((group_ix, id_stacked[:, :k]))[0]
+            column = combine_indices((group_ix, id_stacked[:, k-1]))[0]
+            if level.max() != column.max():
+                self.level_ix = None
+                break
+            self.level_ix.append(level)
+
+        self.ilabels = self.designx = None
+        if self.level_ix is not None:
+            return
+
+        endog = self.model.endog_li
+        designx, ilabels = [], []
+
         for i in range(self.model.num_group):
             ngrp = len(endog[i])
             glab = self.model.group_labels[i]
@@ -357,40 +464,48 @@ class Nested(CovStruct):
 
     def update(self, params):
 
-        endog = self.model.endog_li
-        offset = self.model.offset_li
-
         nobs = self.model.nobs
         dim = len(params)
 
-        if self.designx is None:
-            self._compute_design(self.model)
-
-        cached_means = self.model.cached_means
-
         varfunc = self.model.family.variance
 
-        dvmat = []
-        scale = 0.
-        for i in range(self.model.num_group):
-
-            expval, _ = cached_means[i]
-
-            stdev = np.sqrt(varfunc(expval))
-            resid = (endog[i] - offset[i] - expval) / stdev
-
-            ix1, ix2 = np.tril_indices(len(resid), -1)
-            dvmat.append(resid[ix1] * resid[ix2])
-
-            scale += np.sum(resid**2)
-
-        dvmat = np.concatenate(dvmat)
-        scale /= (nobs - dim)
+        expval, _ = self.model._cached_means_all
+        stdev = np.sqrt(varfunc(expval))
+        resid = (self.model._endog_all - self.model._offset_all -
+                 expval) / stdev
+
+        scale = np.sum(resid**2) / (nobs - dim)
+
+        if self.level_ix is not None:
+            # The sum of the products of the residuals of all pairs of
+            # observations and the number of pairs in the subgroups of
+            # each level.  A pair in the same subgroup at level k
+            # shares the variance components 0, ..., k, so that the
+            # least squares regression only needs these sums.
+            n_level = len(self.level_ix)
+            npair, prsum = np.zeros(n_level), np.zeros(n_level)
+            for k, ix in enumerate(self.level_ix):
+                rsum, rsumsq = group_sums(np.column_stack((resid,
+                                                           resid**2)), ix)
+                ngrp = np.bincount(ix)
+                npair[k] = 0.5 * (ngrp * (ngrp - 1)).sum()
+                prsum[k] = 0.5 * (rsum**2 - rsumsq).sum()
+            kk = np.arange(n_level)
+            xtx = npair[np.maximum(kk[:, None], kk[None, :])]
+            vcomp_coeff = np.dot(np.linalg.pinv(xtx), prsum)
+        else:
+            bounds = self.model._group_bounds
+            dvmat = []
+            for i in range(self.model.num_group):
+                resid_i = resid[bounds[i]:bounds[i + 1]]
+                ix1, ix2 = np.tril_indices(len(resid_i), -1)
+                dvmat.append(resid_i[ix1] * resid_i[ix2])
+            dvmat = np.concatenate(dvmat)
 
-        # Use least squares regression to estimate the variance
-        # components
-        vcomp_coeff = np.dot(self.designx_v, np.dot(self.designx_u.T,
-                                dvmat) / self.designx_s)
+            # Use least squares regression to estimate the variance
+            # components
+            vcomp_coeff = np.dot(self.designx_v, np.dot(self.designx_u.T,
+                                    dvmat) / self.designx_s)
 
         self.vcomp_coeff = np.clip(vcomp_coeff, 0, np.inf)
         self.scale = scale
@@ -405,15 +520,60 @@ class Nested(CovStruct):
         if self.dep_params is None:
             return np.eye(dim, dtype=np.float64), True
 
-        ilabel = self.ilabels[index]
+        if self.ilabels is not None:
+            ilabel = self.ilabels[index]
+        else:
+            # The number of levels shared by each pair of observations
+            bounds = self.model._group_bounds
+            ii = slice(bounds[index], bounds[index + 1])
+            ilabel = np.zeros((dim, dim), dtype=np.int32)
+            for ix in self.level_ix:
+                ilabel += ix[ii][:, None] == ix[ii][None, :]
+            ilabel[np.diag_indices(dim)] = 0
 
         c = np.r_[self.scale, np.cumsum(self.vcomp_coeff)]
         vmat = c[ilabel]
         vmat /= self.scale
         return vmat, True
 
+    def covariance_matrix_solve_all(self, expval, stdev, rhs):
+
+        if self.level_ix is None:
+            return super(Nested, self).covariance_matrix_solve_all(
+                expval, stdev, rhs)
+
+        if self.dep_params is None:
+            return [x / stdev**2 if x.ndim == 1 else
+                    x / stdev[:, None]**2 for x in rhs]
+
+        # The correlation matrix is diag * I plus vcomp_coeff[k] /
+        # scale times a block of ones for each subgroup at level k.
+        # It is inverted from the innermost level outwards, adding one
+        # level at a time with the Sherman-Morrison formula.
+        coeff = self.vcomp_coeff / self.scale
+        diag = 1. - coeff.sum()
+        if diag <= 0:
+            return None
+
+        rslt = []
+        for x in rhs:
+            x1 = x / stdev if x.ndim == 1 else x / stdev[:, None]
+            x1 = x1.reshape(x.shape[0], -1)
+            # the solutions for x1 and for a vector of ones
+            y = np.column_stack((x1, np.ones(x.shape[0]))) / diag
+            for ix, a in reversed(lzip(self.level_ix, coeff)):
+                ysum = group_sums(y, ix).T[ix]
+                y -= (a * y[:, -1] / (1. + a * ysum[:, -1]))[:, None] * ysum
+            y = y[:, :-1]
+            y /= stdev[:, None]
+            rslt.append(y.reshape(x.shape))
+
+        return rslt
+
     update.__doc__ = CovStruct.update.__doc__
     covariance_matrix.__doc__ = CovStruct.covariance_matrix.__doc__
+    covariance_matrix_solve_all.__doc__ = \
+        CovStruct.covariance_matrix_solve_all.__doc__
 
     def summary(self):
         """
@@ -429,7 +589,6 @@ class Nested(CovStruct):
         return msg
 
 
-
 class Autoregressive(CovStruct):
     """
     An autoregressive working dependence structure.
@@ -455,6 +614,20 @@ class Autoregressive(CovStruct):
        A function that computes the distance between the two
        observations based on their `time` values.
 
+    Notes
+    -----
+    The least squares criterion only depends on the sums of the
+    squares and cross products of the residuals of the pairs of
+    observations at the same distance.  These are accumulated by lag,
+    the number of positions between the observations in a cluster,
+    so that the pairs of observations are not stored.  The default
+    distance is computed for all observations at once, a `dist_func`
+    is called for each pair of observations.
+
+    The working correlation matrix of a cluster is the AR(1)
+    correlation matrix of the positions of the observations, its
+    inverse is tri-diagonal.
+
     Reference
     ---------
     B Rosner, A Munoz.  Autoregressive modeling for the analysis of
@@ -467,69 +640,77 @@ class Autoregressive(CovStruct):
         super(Autoregressive, self).__init__()
 
         # The function for determining distances based on time
-        if dist_func is None:
-            self.dist_func = lambda x, y: np.abs(x - y).sum()
-        else:
-            self.dist_func = dist_func
+        self.dist_func = dist_func
 
+        # The distinct distances between pairs of observations
         self.designx = None
 
         # The autocorrelation parameter
         self.dep_params = 0.
 
-    def update(self, params):
+    def initialize(self, model):
 
-        endog = self.model.endog_li
-        time = self.model.time_li
+        super(Autoregressive, self).initialize(model)
 
-        # Only need to compute this once
-        if self.designx is not None:
-            designx = self.designx
-        else:
-            designx = []
-            for i in range(self.model.num_group):
+        bounds = model._group_bounds
+        self._position = (np.arange(len(model._group_ix)) -
+                          bounds[model._group_ix])
+        self._time_all = np.concatenate(model.time_li, axis=0)
+        self.designx = None
 
-                ngrp = len(endog[i])
-                if ngrp == 0:
-                    continue
+    def _lag_pairs(self):
+        """
+        Yields the rows of the later and the earlier observation and
+        their distances of the pairs of observations for each lag.
+        """
 
-                # Loop over pairs of observations within a cluster
-                for j1 in range(ngrp):
-                    for j2 in range(j1):
-                        designx.append(self.dist_func(time[i][j1, :],
-                                                      time[i][j2, :]))
+        time = self._time_all
+        for lag in range(1, self.model._group_sizes.max()):
+            ix1 = np.flatnonzero(self._position >= lag)
+            ix2 = ix1 - lag
+            if self.dist_func is None:
+                dist = np.abs(time[ix1] - time[ix2]).sum(1)
+            else:
+                dist = np.array([self.dist_func(time[j1], time[j2])
+                                 for j1, j2 in zip(ix1, ix2)])
+            yield ix1, ix2, dist
+
+    def update(self, params):
 
-            designx = np.array(designx)
-            self.designx = designx
+        # Only need to compute this once
+        if self.designx is None:
+            dists = [dist for _, _, dist in self._lag_pairs()]
+            self.designx = np.unique(np.concatenate(dists + [[]]))
+        designx = self.designx
 
         scale = self.model.estimate_scale()
         varfunc = self.model.family.variance
-        cached_means = self.model.cached_means
+        expval, _ = self.model._cached_means_all
+        stdev = np.sqrt(scale * varfunc(expval))
+        resid = (self.model._endog_all - expval) / stdev
+
+        # The number of pairs and the sums of squares and cross
+        # products of their residuals, for each distance
+        ndist = len(designx)
+        npair = np.zeros(ndist)
+        sum11, sum12, sum22 = np.zeros(ndist), np.zeros(ndist), np.zeros(ndist)
+        for ix1, ix2, dist in self._lag_pairs():
+            jj = np.searchsorted(designx, dist)
+            npair += np.bincount(jj, minlength=ndist)
+            sum11 += np.bincount(jj, resid[ix1]**2, ndist)
+            sum12 += np.bincount(jj, resid[ix1] * resid[ix2], ndist)
+            sum22 += np.bincount(jj, resid[ix2]**2, ndist)
 
         # Weights
         var = 1. - self.dep_params**(2*designx)
         var /= 1. - self.dep_params**2
         wts = 1. / var
-        wts /= wts.sum()
-
-        residmat = []
-        for i in range(self.model.num_group):
-
-            expval, _ = cached_means[i]
-            stdev = np.sqrt(scale * varfunc(expval))
-            resid = (endog[i] - expval) / stdev
-
-            ngrp = len(resid)
-            for j1 in range(ngrp):
-                for j2 in range(j1):
-                    residmat.append([resid[j1], resid[j2]])
-
-        residmat = np.array(residmat)
+        wts /= np.dot(npair, wts)
 
         # Need to minimize this
         def fitfunc(a):
-            dif = residmat[:, 0] - (a**designx)*residmat[:, 1]
-            return np.dot(dif**2, wts)
+            ad = a**designx
+            return np.dot(sum11 - 2 * ad * sum12 + ad**2 * sum22, wts)
 
         # Left bracket point
         b_lft, f_lft = 0., fitfunc(0.)
@@ -563,68 +744,53 @@ class Autoregressive(CovStruct):
         cmat = self.dep_params**np.abs(idx[:, None] - idx[None, :])
         return cmat, True
 
-    def covariance_matrix_solve(self, expval, index, stdev, rhs):
-        # The inverse of an AR(1) covariance matrix is tri-diagonal.
+    def _solve(self, stdev, rhs, first, last):
+        """
+        Solves with the inverse of the AR(1) correlation matrix, which
+        is tri-diagonal, for stacked clusters.  `first` and `last`
+        indicate the first and last observation of each cluster.
+        """
 
-        k = len(expval)
-        soln = []
+        # The diagonal of the inverse is 1 / (1 - r^2) for the first
+        # and last observation, (1 + r^2) / (1 - r^2) for the others
+        # and 1 for clusters of size one.  The sub/super diagonal is
+        # -r / (1 - r^2) within the clusters.
+        r = self.dep_params
+        nneighbor = 2. - first - last
+        c0 = (1. + r**2 * (nneighbor - 1)) / (1. - r**2)
+        c2 = -r / (1. - r**2)
+        c2_prev = c2 * ~first[1:]
+        c2_next = c2 * ~last[:-1]
 
-        # LHS has 1 column
-        if k == 1:
-            return [x / stdev**2 for x in rhs]
-
-        # LHS has 2 columns
-        if k == 2:
-            mat = np.array([[1, -self.dep_params], [-self.dep_params, 1]])
-            mat /= (1. - self.dep_params**2)
-            for x in rhs:
-                if x.ndim == 1:
-                    x1 = x / stdev
-                else:
-                    x1 = x / stdev[:, None]
-                x1 = np.dot(mat, x1)
-                if x.ndim == 1:
-                    x1 /= stdev
-                else:
-                    x1 /= stdev[:, None]
-                soln.append(x1)
-            return soln
-
-        # LHS has >= 3 columns: values c0, c1, c2 defined below give
-        # the inverse.  c0 is on the diagonal, except for the first
-        # and last position.  c1 is on the first and last position of
-        # the diagonal.  c2 is on the sub/super diagonal.
-        c0 = (1. + self.dep_params**2) / (1. - self.dep_params**2)
-        c1 = 1. / (1. - self.dep_params**2)
-        c2 = -self.dep_params / (1. - self.dep_params**2)
         soln = []
         for x in rhs:
-            flatten = False
-            if x.ndim == 1:
-                x = x[:, None]
-                flatten = True
-            x1 = x / stdev[:, None]
-
-            z0 = np.zeros((1, x.shape[1]))
-            rhs1 = np.concatenate((x[1:,:], z0), axis=0)
-            rhs2 = np.concatenate((z0, x[0:-1,:]), axis=0)
+            x1 = x / stdev if x.ndim == 1 else x / stdev[:, None]
+            x1 = x1.reshape(x.shape[0], -1)
+            y = c0[:, None] * x1
+            y[1:] += c2_prev[:, None] * x1[:-1]
+            y[:-1] += c2_next[:, None] * x1[1:]
+            y /= stdev[:, None]
+            soln.append(y.reshape(x.shape))
 
-            y = c0*x + c2*rhs1 + c2*rhs2
-            y[0, :] = c1*x[0, :] + c2*x[1, :]
-            y[-1, :] = c1*x[-1, :] + c2*x[-2, :]
+        return soln
 
-            y /= stdev[:, None]
+    def covariance_matrix_solve(self, expval, index, stdev, rhs):
 
-            if flatten:
-                y = np.squeeze(y)
+        k = len(expval)
+        first = np.arange(k) == 0
+        return self._solve(stdev, rhs, first, first[::-1])
 
-            soln.append(y)
+    def covariance_matrix_solve_all(self, expval, stdev, rhs):
 
-        return soln
+        first = self._position == 0
+        last = np.r_[first[1:], True]
+        return self._solve(stdev, rhs, first, last)
 
     update.__doc__ = CovStruct.update.__doc__
     covariance_matrix.__doc__ = CovStruct.covariance_matrix.__doc__
     covariance_matrix_solve.__doc__ = CovStruct.covariance_matrix_solve.__doc__
+    covariance_matrix_solve_all.__doc__ = \
+        CovStruct.covariance_matrix_solve_all.__doc__
 
     def summary(self):
 
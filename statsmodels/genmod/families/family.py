@@ -291,7 +291,9 @@ class Poisson(Family):
         -----
         resid_dev = sign(Y-mu)*sqrt(2*Y*log(Y/mu)-2*(Y-mu))
         """
-        return np.sign(Y-mu) * np.sqrt(2*Y*np.log(Y/mu)-2*(Y-mu))/scale
+        # Y*log(Y/mu) is zero at Y = 0
+        ylogy = Y*np.log(np.where(Y > 0, Y, 1.)/mu)
+        return np.sign(Y-mu) * np.sqrt(2*ylogy-2*(Y-mu))/scale
 
     def deviance(self, Y, mu, scale=1.):
         '''
@@ -1178,7 +1180,8 @@ class NegativeBinomial(Family):
         notzero = 1 - iszero
         tmp=np.zeros(len(Y))
         tmp = iszero*2*np.log(1+self.alpha*mu)/self.alpha
-        tmp += notzero*(2*Y*np.log(Y/mu)-2/self.alpha*(1+self.alpha*Y)*\
+        tmp += notzero*(2*Y*np.log(np.where(notzero, Y, 1.)/mu)-\
+                2/self.alpha*(1+self.alpha*Y)*\
                 np.log((1+self.alpha*Y)/(1+self.alpha*mu)))
         return np.sign(Y-mu)*np.sqrt(tmp)/scale
 
@@ -30,6 +30,8 @@ import pandas as pd
 from statsmodels.tools.decorators import (cache_readonly,
     resettable_cache)
 import statsmodels.base.model as base
+from statsmodels.compat.scipy import NumpyVersion
+from statsmodels.tools.grouputils import group_sums
 from statsmodels.genmod import families
 from statsmodels.genmod import dependence_structures
 from statsmodels.genmod.dependence_structures import CovStruct
@@ -60,6 +62,16 @@ def block_diag(dblocks, format=None):
     return bmat(blocks, format)
 
 
+def _solve_stacked(amat, rhs):
+    """
+    Solves the systems amat[i] * x[i] = rhs[i] for a stack of square
+    matrices `amat` and vectors `rhs`.
+    """
+    if NumpyVersion(np.__version__) >= '1.8.0':
+        return np.linalg.solve(amat, rhs)
+    return np.array([np.linalg.solve(a, b) for a, b in zip(amat, rhs)])
+
+
 class ParameterConstraint(object):
     """
     A class for managing linear equality constraints for a parameter
@@ -246,7 +258,7 @@ class GEE(base.Model):
     """ % {'extra_params': base._missing_param_doc}
 
     fit_history = None
-    cached_means = None
+    _cached_means_all = None
 
     def __init__(self, endog, exog, groups, time=None, family=None,
                        cov_struct=None, missing='none', offset=None,
@@ -350,6 +362,18 @@ class GEE(base.Model):
             self.time = np.concatenate(self.time_li)
 
         self.offset_li = self.cluster_list(self.offset)
+
+        # The data with the clusters stacked in the order of the
+        # cluster lists, used to compute the estimating equations of
+        # all clusters at once.
+        self._group_sizes = np.array([len(y) for y in self.endog_li])
+        self._group_bounds = np.r_[0, np.cumsum(self._group_sizes)]
+        self._group_ix = np.repeat(np.arange(self.num_group),
+                                   self._group_sizes)
+        self._endog_all = np.concatenate(self.endog_li)
+        self._exog_all = np.concatenate(self.exog_li, axis=0)
+        self._offset_all = np.concatenate(self.offset_li)
+
         if constraint is not None:
             self.constraint.exog_fulltrans_li = \
                 self.cluster_list(self.constraint.exog_fulltrans)
@@ -420,29 +444,18 @@ class GEE(base.Model):
         current parameter value.
         """
 
-        endog = self.endog_li
-        exog = self.exog_li
-        offset = self.offset_li
-
-        cached_means = self.cached_means
+        endog = self._endog_all
+        offset = self._offset_all
+        expval, _ = self._cached_means_all
 
         nobs = self.nobs
-        exog_dim = exog[0].shape[1]
+        exog_dim = self._exog_all.shape[1]
 
         varfunc = self.family.variance
 
-        scale = 0.
-        for i in range(self.num_group):
-
-            if len(endog[i]) == 0:
-                continue
-
-            expval, _ = cached_means[i]
-
-            sdev = np.sqrt(varfunc(expval))
-            resid = (endog[i] - offset[i] - expval) / sdev
-
-            scale += np.sum(resid**2)
+        sdev = np.sqrt(varfunc(expval))
+        resid = (endog - offset - expval) / sdev
+        scale = np.sum(resid**2)
 
         scale /= (nobs - exog_dim)
 
@@ -462,29 +475,19 @@ class GEE(base.Model):
             incorporate the scale.
         """
 
-        endog = self.endog_li
-        exog = self.exog_li
-
-        cached_means = self.cached_means
-
-        varfunc = self.family.variance
-
-        bmat, score = 0, 0
-        for i in range(self.num_group):
+        expval, lpr = self._cached_means_all
+        resid = self._endog_all - expval
+        dmat = self.mean_deriv(self._exog_all, lpr)
+        sdev = np.sqrt(self.family.variance(expval))
 
-            expval, lpr = cached_means[i]
-            resid = endog[i] - expval
-            dmat = self.mean_deriv(exog[i], lpr)
-            sdev = np.sqrt(varfunc(expval))
-
-            rslt = self.cov_struct.covariance_matrix_solve(expval, i,
-                                                sdev, (dmat, resid))
-            if rslt is None:
-                return None, None
-            vinv_d, vinv_resid = tuple(rslt)
+        rslt = self.cov_struct.covariance_matrix_solve_all(expval, sdev,
+                                                           (dmat, resid))
+        if rslt is None:
+            return None, None
+        vinv_d, vinv_resid = tuple(rslt)
 
-            bmat += np.dot(dmat.T, vinv_d)
-            score += np.dot(dmat.T, vinv_resid)
+        bmat = np.dot(dmat.T, vinv_d)
+        score = np.dot(dmat.T, vinv_resid)
 
         update = np.linalg.solve(bmat, score)
 
@@ -498,23 +501,26 @@ class GEE(base.Model):
         keep the cached means up to date.
         """
 
-        endog = self.endog_li
-        exog = self.exog_li
-        offset = self.offset_li
-
-        linkinv = self.family.link.inverse
-
-        self.cached_means = []
+        lpr = self._offset_all + np.dot(self._exog_all, mean_params)
+        expval = self.family.link.inverse(lpr)
 
-        for i in range(self.num_group):
+        self._cached_means_all = (expval, lpr)
+        self._cached_means_li = None
 
-            if len(endog[i]) == 0:
-                continue
-
-            lpr = offset[i] + np.dot(exog[i], mean_params)
-            expval = linkinv(lpr)
-
-            self.cached_means.append((expval, lpr))
+    @property
+    def cached_means(self):
+        """
+        List of the (expval, lpr) tuples of the clusters, split from
+        the stacked values on first access after an update.
+        """
+        if self._cached_means_all is None:
+            return None
+        if self._cached_means_li is None:
+            expval, lpr = self._cached_means_all
+            bounds = self._group_bounds
+            self._cached_means_li = [(expval[a:b], lpr[a:b]) for a, b
+                                     in zip(bounds[:-1], bounds[1:])]
+        return self._cached_means_li
 
     def _covmat(self):
         """
@@ -539,31 +545,24 @@ class GEE(base.Model):
            obtaining score test results.
         """
 
-        endog = self.endog_li
-        exog = self.exog_li
-
-        varfunc = self.family.variance
-        cached_means = self.cached_means
+        group_ix = self._group_ix
+        expval, lpr = self._cached_means_all
+        resid = self._endog_all - expval
+        dmat = self.mean_deriv(self._exog_all, lpr)
+        sdev = np.sqrt(self.family.variance(expval))
 
         # Calculate the naive (model-based) and robust (sandwich)
         # covariances.
-        bmat, cmat = 0, 0
-        for i in range(self.num_group):
-
-            expval, lpr = cached_means[i]
-            resid = endog[i] - expval
-            dmat = self.mean_deriv(exog[i], lpr)
-            sdev = np.sqrt(varfunc(expval))
+        rslt = self.cov_struct.covariance_matrix_solve_all(expval, sdev,
+                                                           (dmat, resid))
+        if rslt is None:
+            return None, None, None, None
+        vinv_d, vinv_resid = tuple(rslt)
 
-            rslt = self.cov_struct.covariance_matrix_solve(expval, i,
-                                                sdev, (dmat, resid))
-            if rslt is None:
-                return None, None, None, None
-            vinv_d, vinv_resid = tuple(rslt)
-
-            bmat += np.dot(dmat.T, vinv_d)
-            dvinv_resid = np.dot(dmat.T, vinv_resid)
-            cmat += np.outer(dvinv_resid, dvinv_resid)
+        bmat = np.dot(dmat.T, vinv_d)
+        # D' V^-1 resid of each cluster, in the columns
+        dvinv_resid = group_sums(dmat * vinv_resid[:, None], group_ix)
+        cmat = np.dot(dvinv_resid, dvinv_resid.T)
 
         scale = self.estimate_scale()
 
@@ -572,34 +571,23 @@ class GEE(base.Model):
         robust_covariance = np.dot(bmati, np.dot(cmat, bmati))
 
         # Calculate the bias-corrected sandwich estimate of Mancl and
-        # DeRouen (requires naive_covariance so cannot be calculated
-        # in the previous loop).
-        bcm = 0
-        for i in range(self.num_group):
-
-            expval, lpr = cached_means[i]
-            resid = endog[i] - expval
-            dmat = self.mean_deriv(exog[i], lpr)
-            sdev = np.sqrt(varfunc(expval))
-
-            rslt = self.cov_struct.covariance_matrix_solve(expval,
-                                                  i, sdev, (dmat,))
-            if rslt is None:
-                return None, None, None, None
-            vinv_d = rslt[0]
-            vinv_d /= scale
-
-            hmat = np.dot(vinv_d, naive_covariance)
-            hmat = np.dot(hmat, dmat.T).T
-
-            aresid = np.linalg.solve(np.eye(len(resid)) - hmat, resid)
-            rslt = self.cov_struct.covariance_matrix_solve(expval, i,
-                                                     sdev, (aresid,))
-            if rslt is None:
-                return None, None, None, None
-            srt = rslt[0]
-            srt = np.dot(dmat.T, srt) / scale
-            bcm += np.outer(srt, srt)
+        # DeRouen.  The adjusted residuals of a cluster are
+        # (I - H)^-1 resid with H = D naive_covariance D' V^-1 / scale,
+        # which by the Woodbury identity only requires solving a p x p
+        # system per cluster with the matrix D' V^-1 D of the cluster.
+        k_params = dmat.shape[1]
+        dvinv_d = np.empty((self.num_group, k_params, k_params))
+        for j in range(k_params):
+            dvinv_d[:, j, :] = group_sums(dmat[:, j:j+1] * vinv_d,
+                                          group_ix).T
+        amat = np.eye(k_params) - np.einsum('ij,gjk->gik',
+                                             naive_covariance,
+                                             dvinv_d) / scale
+        rhs = np.dot(naive_covariance, dvinv_resid).T / scale
+        srt = dvinv_resid.T + np.einsum('gij,gj->gi', dvinv_d,
+                                        _solve_stacked(amat, rhs))
+        srt /= scale
+        bcm = np.dot(srt.T, srt)
 
         robust_covariance_bc = np.dot(naive_covariance,
                                       np.dot(bcm, naive_covariance))
@@ -822,9 +810,10 @@ class GEE(base.Model):
 
         # Get the score vector under the full model.
         save_exog_li = self.exog_li
+        save_exog_all = self._exog_all
         self.exog_li = self.constraint.exog_fulltrans_li
-        import copy
-        save_cached_means = copy.deepcopy(self.cached_means)
+        self._exog_all = np.concatenate(self.exog_li, axis=0)
+        save_cached_means_all = self._cached_means_all
         self.update_cached_means(mean_params0)
         _, score = self._update_mean_params()
 
@@ -867,7 +856,9 @@ class GEE(base.Model):
         bcov = self.constraint.unpack_cov(bcov)
 
         self.exog_li = save_exog_li
-        self.cached_means = save_cached_means
+        self._exog_all = save_exog_all
+        self._cached_means_all = save_cached_means_all
+        self._cached_means_li = None
         self.exog = self.constraint.restore_exog()
 
         return mean_params, bcov
@@ -916,6 +907,14 @@ class GEE(base.Model):
                     self, params)
         return margeff
 
+    def _predict_index(self, linpred):
+        """predicted values given the linear predictor"""
+        return self.family.link.inverse(linpred)
+
+    def _derivative_predict_index(self, linpred):
+        """derivative of the predicted values wrt the linear predictor"""
+        return self.family.link.inverse_deriv(linpred)
+
 
     def setup_ordinal(self):
         """
@@ -18,13 +18,16 @@ McCullagh, P. and Nelder, J.A.  1989.  "Generalized Linear Models." 2nd ed.
     Chapman & Hall, Boca Rotan.
 """
 
+from statsmodels.compat.python import range
 import numpy as np
 from . import families
 from statsmodels.tools.decorators import cache_readonly, resettable_cache
+from statsmodels.tools.grouputils import combine_indices
 
 import statsmodels.base.model as base
 import statsmodels.regression.linear_model as lm
 import statsmodels.base.wrapper as wrap
+from statsmodels.base.elastic_net import fit_elasticnet, fit_path
 from statsmodels.compat.numpy import np_matrix_rank
 
 from statsmodels.tools.sm_exceptions import PerfectSeparationError
@@ -37,6 +40,85 @@ def _check_convergence(criterion, iteration, tol, maxiter):
                 and iteration <= maxiter)
 
 
+class _DataChunks(object):
+    """
+    Re-iterable chunks of the data of a GLM
+
+    Iterating gives tuples (endog, exog, offset) of arrays, offset is 0 if
+    the data source has no offset.
+
+    Parameters
+    ----------
+    data_source : callable or tuple of arrays
+        See `GLM.fit_chunked`.
+    chunksize : int
+        Number of rows in a chunk if data_source is a tuple of arrays.
+    """
+
+    def __init__(self, data_source, chunksize):
+        if callable(data_source):
+            self._source = data_source
+        else:
+            arrays = data_source
+            nobs = len(arrays[0])
+
+            def source():
+                for start in range(0, nobs, chunksize):
+                    yield tuple(arr[start:start + chunksize]
+                                if arr is not None else None
+                                for arr in arrays)
+            self._source = source
+
+    def __iter__(self):
+        for chunk in self._source():
+            endog = np.asarray(chunk[0], dtype=float)
+            exog = np.asarray(chunk[1], dtype=float)
+            if exog.ndim == 1:
+                exog = exog[:, None]
+            offset = 0.
+            if len(chunk) > 2 and chunk[2] is not None:
+                offset = np.asarray(chunk[2], dtype=float)
+            yield endog, exog, offset
+
+    def first(self):
+        """the first chunk as returned by the data source"""
+        return next(iter(self._source()))
+
+
+def _prepare_endog(family, endog):
+    """data weights and endog of a chunk as in GLM.fit
+
+    This sets `family.n` of a Binomial family to the number of trials in the
+    chunk, passes over the chunks restore it with `_restore_family_n`.
+    """
+    if endog.ndim > 1 and endog.shape[1] == 2:
+        data_weights = endog.sum(1)  # weights are total trials
+    else:
+        data_weights = np.ones((endog.shape[0]))
+    if isinstance(family, families.Binomial):
+        endog = family.initialize(endog)
+    return data_weights, endog
+
+
+def _restore_family_n(family, n):
+    """restore `family.n` after a pass over the chunks"""
+    if n is not None:
+        family.n = n
+
+
+def _weighted_deviance(family, endog, mu, weights):
+    """
+    Deviance of observations that are repeated `weights` times
+
+    The endog of the Binomial family are proportions and the weights are
+    the numbers of trials.
+    """
+    if isinstance(family, families.Binomial):
+        return 2*np.sum(weights*(endog*np.log(endog/mu+1e-200) +
+                                 (1-endog)*np.log((1-endog)/(1-mu)+1e-200)))
+    return np.sum(weights*family.resid_dev(endog, mu)**2)
+
+
 class GLM(base.LikelihoodModel):
     __doc__ = """
     Generalized Linear Models class
@@ -185,6 +267,8 @@ class GLM(base.LikelihoodModel):
         available after fit is called.  See statsmodels.families.family for
         the specific distribution weighting functions.
     """ % {'extra_params' : base._missing_param_doc}
+    # number of rows of exog that are weighted at a time in IRLS
+    _irls_blocksize = 2**16
 
     def __init__(self, endog, exog, family=None, offset=None, exposure=None,
                  missing='none'):
@@ -214,8 +298,9 @@ class GLM(base.LikelihoodModel):
         self.normalized_cov_params = np.dot(self.pinv_wexog,
                                             np.transpose(self.pinv_wexog))
 
-        self.df_model = np_matrix_rank(self.exog)-1
-        self.df_resid = self.exog.shape[0] - np_matrix_rank(self.exog)
+        rank = np_matrix_rank(self.exog)
+        self.df_model = rank - 1
+        self.df_resid = self.exog.shape[0] - rank
 
     def _check_inputs(self, family, offset, exposure, endog):
 
@@ -261,14 +346,6 @@ class GLM(base.LikelihoodModel):
         """
         raise NotImplementedError
 
-    def _update_history(self, tmp_result, mu, history):
-        """
-        Helper method to update history during iterative fit.
-        """
-        history['params'].append(tmp_result.params)
-        history['deviance'].append(self.family.deviance(self.endog, mu))
-        return history
-
     def estimate_scale(self, mu):
         """
         Estimates the dispersion/scale.
@@ -383,7 +460,7 @@ class GLM(base.LikelihoodModel):
             return self.family.fitted(linpred)
 
     def fit(self, start_params=None, maxiter=100, method='IRLS', tol=1e-8,
-            scale=None):
+            scale=None, compress=False):
         """
         Fits a generalized linear model for a given family.
 
@@ -408,37 +485,41 @@ class GLM(base.LikelihoodModel):
             The default is family-specific and is given by the
             ``family.starting_mu(endog)``. If start_params is given then the
             initial mean will be calculated as ``np.dot(exog, start_params)``.
+        compress : bool, optional
+            If True, observations with identical rows of exog, and identical
+            offset and exposure, are collapsed into one pattern before the
+            iterations. The IRLS steps only depend on the data weighted
+            sums of endog in each pattern, so the estimates are the same as
+            without compression, but each iteration is proportional to the
+            number of distinct patterns instead of the number of
+            observations. This is useful for categorical exog. The fitted
+            values of all observations are taken from their pattern after
+            convergence, and the deviances in `fit_history` are those of
+            the collapsed data.
         """
         endog = self.endog
-        if endog.ndim > 1 and endog.shape[1] == 2:
-            data_weights = endog.sum(1)  # weights are total trials
+        self._setup_fit(scale)
+        data_weights = self.data_weights
+        offset = self._offset_exposure()
+        exog = self.exog
+        endog_fit = self.endog
+        if compress:
+            exog, endog_fit, data_weights, offset, pattern = self._compress(
+                offset)
+
+            def deviance(mu):
+                return _weighted_deviance(self.family, endog_fit, mu,
+                                          data_weights)
         else:
-            data_weights = np.ones((endog.shape[0]))
-        self.data_weights = data_weights
-        if np.shape(self.data_weights) == () and self.data_weights > 1:
-            self.data_weights = self.data_weights * np.ones((endog.shape[0]))
-        self.scaletype = scale
-        if isinstance(self.family, families.Binomial):
-        # this checks what kind of data is given for Binomial.
-        # family will need a reference to endog if this is to be removed from
-        # preprocessing
-            self.endog = self.family.initialize(self.endog)
+            def deviance(mu):
+                return self.family.deviance(endog_fit, mu)
 
-        # Construct a combined offset/exposure term.  Note that
-        # exposure has already been logged if present.
-        offset = 0.
-        if hasattr(self, 'offset'):
-            offset = self.offset.copy()
-        if hasattr(self, 'exposure'):
-            offset += self.exposure
-
-        wlsexog = self.exog
         if start_params is None:
-            mu = self.family.starting_mu(self.endog)
+            mu = self.family.starting_mu(endog_fit)
         else:
-            mu = self.predict(start_params)
+            mu = self.family.fitted(np.dot(exog, start_params) + offset)
         eta = self.family.predict(mu)
-        dev = self.family.deviance(self.endog, mu)
+        dev = deviance(mu)
         if np.isnan(dev):
             raise ValueError("The first guess on the deviance function "
                              "returned a nan.  This could be a boundary "
@@ -450,28 +531,378 @@ class GLM(base.LikelihoodModel):
         iteration = 0
         converged = 0
         criterion = history['deviance']
+        # the weighted least squares problems are solved without creating
+        # WLS models, the buffers of the solver are reused
+        solver = lm._WLSSolver(exog,
+                               full_rank=self.df_model + 1 == exog.shape[1],
+                               blocksize=self._irls_blocksize)
         while not converged:
-            self.weights = data_weights*self.family.weights(mu)
-            wlsendog = (eta + self.family.link.deriv(mu) * (self.endog-mu)
+            weights = data_weights*self.family.weights(mu)
+            wlsendog = (eta + self.family.link.deriv(mu) * (endog_fit-mu)
                         - offset)
-            wls_results = lm.WLS(wlsendog, wlsexog, self.weights).fit()
-            eta = np.dot(self.exog, wls_results.params) + offset
+            params = solver.solve(wlsendog, weights)
+            eta = np.dot(exog, params) + offset
             mu = self.family.fitted(eta)
-            history = self._update_history(wls_results, mu, history)
-            self.scale = self.estimate_scale(mu)
+            history['params'].append(params)
+            history['deviance'].append(deviance(mu))
             iteration += 1
-            if endog.squeeze().ndim == 1 and np.allclose(mu - endog, 0):
+            if endog.squeeze().ndim == 1 and np.allclose(mu - endog_fit, 0):
                 msg = "Perfect separation detected, results not available"
                 raise PerfectSeparationError(msg)
             converged = _check_convergence(criterion, iteration, tol, maxiter)
+        if compress:
+            # expand to the observations
+            mu = mu[pattern]
+            weights = self.data_weights*self.family.weights(mu)
+        self.weights = weights
         self.mu = mu
-        glm_results = GLMResults(self, wls_results.params,
-                                 wls_results.normalized_cov_params,
+        self.scale = self.estimate_scale(mu)
+        glm_results = GLMResults(self, params,
+                                 solver.normalized_cov_params(),
                                  self.scale)
         history['iteration'] = iteration
         glm_results.fit_history = history
         return GLMResultsWrapper(glm_results)
 
+    def _compress(self, offset):
+        """
+        Collapse observations with identical exog and offset
+
+        Returns exog, data weighted mean endog, summed data weights and
+        offset of the patterns, and the pattern of each observation.
+        """
+        exog = self.exog
+        if np.ndim(offset) == 0:
+            keys = exog + 0.  # also replaces -0. by 0.
+        else:
+            keys = np.column_stack((exog, offset)) + 0.
+        # the rows are compared as bytes, this is much faster than sorting
+        # on each column
+        keys = np.ascontiguousarray(keys, dtype=float)
+        keys = keys.view(np.dtype((np.void, keys.itemsize * keys.shape[1])))
+        pattern, first, _ = combine_indices(keys.ravel())
+        data_weights = np.bincount(pattern, weights=self.data_weights)
+        endog = np.bincount(pattern,
+                            weights=self.data_weights*self.endog) / data_weights
+        if np.ndim(offset) > 0:
+            offset = offset[first]
+        return exog[first], endog, data_weights, offset, pattern
+
+    def _setup_fit(self, scale):
+        """data weights, scale type and Binomial endog for the fit methods"""
+        endog = self.endog
+        if endog.ndim > 1 and endog.shape[1] == 2:
+            data_weights = endog.sum(1)  # weights are total trials
+        elif hasattr(self, 'data_weights'):
+            # endog has been converted to proportions by a previous fit
+            data_weights = self.data_weights
+        else:
+            data_weights = np.ones((endog.shape[0]))
+        self.data_weights = data_weights
+        if np.shape(self.data_weights) == () and self.data_weights > 1:
+            self.data_weights = self.data_weights * np.ones((endog.shape[0]))
+        self.scaletype = scale
+        if isinstance(self.family, families.Binomial):
+        # this checks what kind of data is given for Binomial.
+        # family will need a reference to endog if this is to be removed from
+        # preprocessing
+            self.endog = self.family.initialize(self.endog)
+
+    def _offset_exposure(self):
+        """combined offset and exposure, exposure is already logged"""
+        offset = 0.
+        if hasattr(self, 'offset'):
+            offset = self.offset.copy()
+        if hasattr(self, 'exposure'):
+            offset += self.exposure
+        return offset
+
+    def _loglike_index(self, linpred):
+        """
+        Log-likelihood with scale 1 and its first derivative and expected
+        negative second derivative with respect to the linear predictor
+        without offset and exposure, used by the elastic net.
+        """
+        eta = linpred + self._offset_exposure()
+        mu = self.family.fitted(eta)
+        if isinstance(self.family, families.NegativeBinomial):
+            llf = self.family.loglike(self.endog, fittedvalues=np.log(mu))
+        else:
+            llf = self.family.loglike(self.endog, mu, scale=1.)
+        score = (self.data_weights * (self.endog - mu) /
+                 (self.family.variance(mu) * self.family.link.deriv(mu)))
+        return llf, score, self.data_weights * self.family.weights(mu)
+
+    def _regularized_start(self):
+        """zero params, except for the constant at the mean of endog"""
+        exog = self.exog
+        start_params = np.zeros(exog.shape[1])
+        const = (np.ptp(exog, axis=0) == 0) & (exog[0] != 0)
+        if const.any():
+            j = np.flatnonzero(const)[0]
+            mu = np.average(self.endog, weights=self.data_weights)
+            start_params[j] = self.family.predict(mu) / exog[0, j]
+        return start_params
+
+    def fit_regularized(self, method='elastic_net', alpha=0., L1_wt=1.,
+                        start_params=None, maxiter=100, cnvrg_tol=1e-8,
+                        scale=None):
+        """
+        Fit a GLM with an elastic net penalty
+
+        The penalized objective is the negative log-likelihood with scale 1
+        plus the penalty
+
+        ``sum(alpha * (L1_wt * |params| + (1 - L1_wt) / 2 * params**2))``.
+
+        Parameters
+        ----------
+        method : 'elastic_net'
+            Coordinate descent on a quadratic approximation of the
+            log-likelihood, see `statsmodels.base.elastic_net`.
+        alpha : non-negative scalar or array_like
+            The penalty weight, if an array it has one weight per
+            parameter.
+        L1_wt : float
+            Weight of the L1 penalty between 0 and 1, L1_wt = 1 is the lasso
+            and L1_wt = 0 the ridge penalty.
+        start_params : array_like, optional
+            Starting values, the default is zero except for a constant which
+            starts at the mean of endog.
+        maxiter : int
+            Maximum number of Newton steps.
+        cnvrg_tol : float
+            Convergence tolerance for the change in the parameters.
+        scale : string or float, optional
+            The scale as in `fit`, estimated at the penalized estimate.
+
+        Returns
+        -------
+        results : GLMResults
+            The covariance of the parameters is computed as in `fit` for the
+            nonzero parameters and is nan for the parameters that are zero.
+            It does not account for the penalization.
+        """
+        if method != 'elastic_net':
+            raise ValueError("method %s not understood" % method)
+        self._setup_fit(scale)
+        if start_params is None:
+            start_params = self._regularized_start()
+        nobs = self.exog.shape[0]
+        alpha = np.asarray(alpha, dtype=float) * np.ones(self.exog.shape[1])
+        if alpha.min() < 0:
+            raise ValueError("alpha must be non-negative")
+        _, params, converged, iterations = fit_elasticnet(
+            self, self.exog, [1.], L1_wt,
+            np.asarray(start_params, dtype=float)[:, None], maxiter=maxiter,
+            cnvrg_tol=cnvrg_tol, pen_weight=alpha[:, None] / nobs)
+        params = params[0, :, 0]
+
+        self.mu = self.predict(params)
+        self.weights = self.data_weights * self.family.weights(self.mu)
+        self.scale = self.estimate_scale(self.mu)
+        nz_idx = np.flatnonzero(params)
+        cov_p = np.nan * np.ones((len(params), len(params)))
+        if len(nz_idx) > 0:
+            exog_nz = self.exog[:, nz_idx]
+            cov_p[nz_idx[:, None], nz_idx] = np.linalg.inv(
+                np.dot(exog_nz.T * self.weights, exog_nz))
+        glm_results = GLMResults(self, params, cov_p, self.scale)
+        glm_results.fit_history = {'iteration': iterations[0],
+                                   'converged': converged[0]}
+        return GLMResultsWrapper(glm_results)
+
+    def fit_regularized_path(self, alphas=None, L1_wt=1., n_alphas=100,
+                             alpha_min_ratio=1e-3, pen_weight=None,
+                             start_params=None, maxiter=100, cnvrg_tol=1e-7):
+        """
+        Elastic net estimates for a sequence of penalty weights
+
+        Parameters
+        ----------
+        alphas : None or array_like
+            The penalty weights, on the same scale as `alpha` in
+            `fit_regularized`. If None, `n_alphas` weights are log-spaced
+            from the smallest weight at which all penalized parameters are
+            zero down to `alpha_min_ratio` times this weight.
+        L1_wt : float
+            Weight of the L1 penalty, if it is 0 alphas are required.
+        n_alphas : int
+            number of penalty weights if alphas is None
+        alpha_min_ratio : float
+            ratio of the smallest to the largest penalty weight if alphas
+            is None
+        pen_weight : None or array_like
+            weight of each parameter in the penalty, zero for unpenalized
+            parameters. The default is 1, except for a constant which is
+            not penalized.
+        start_params : array_like, optional
+            starting values for the first alpha, the default is zero except
+            for a constant which starts at the mean of endog.
+        maxiter : int
+            maximum number of Newton steps for each alpha
+        cnvrg_tol : float
+            convergence tolerance for the change in the parameters
+
+        Returns
+        -------
+        path : ElasticNetPath
+            The estimates for all alphas are in the attribute `params`, the
+            first axis corresponds to the alphas. The estimate for each
+            alpha is the start for the next one.
+        """
+        self._setup_fit(None)
+        if start_params is None:
+            start_params = self._regularized_start()
+        return fit_path(self, self.exog, start_params, alphas=alphas,
+                        L1_wt=L1_wt, n_alphas=n_alphas,
+                        alpha_min_ratio=alpha_min_ratio,
+                        pen_weight=pen_weight, maxiter=maxiter,
+                        cnvrg_tol=cnvrg_tol)
+
+    @classmethod
+    def fit_chunked(cls, data_source, family=None, chunksize=2**16,
+                    start_params=None, maxiter=100, tol=1e-8, scale=None):
+        """
+        Fits a generalized linear model to data that is read in chunks
+
+        Parameters
+        ----------
+        data_source : callable or tuple of arrays
+            If callable, ``data_source()`` returns a new iterator over the
+            chunks of the data, tuples (endog, exog) or (endog, exog,
+            offset) of arrays with the same number of rows. Otherwise a
+            tuple of arrays (endog, exog) or (endog, exog, offset) that
+            support slicing, for example numpy memmaps, which is read in
+            chunks of `chunksize` rows. Exposure is included as the log of
+            the exposure in the offset.
+        family : family class instance
+            The default is Gaussian.
+        chunksize : int
+            Number of rows of the chunks if data_source is a tuple of
+            arrays.
+        start_params, maxiter, tol, scale
+            See `GLM.fit`.
+
+        Returns
+        -------
+        results : GLMChunkedResults
+
+        Notes
+        -----
+        Each IRLS iteration is one pass over the data. The triangular factor
+        of the weighted least squares problem is accumulated over the
+        chunks, together with the deviance and Pearson chi2 that are used
+        for the convergence check and the scale, so that only one chunk is
+        in memory at a time. exog needs to have full column rank.
+
+        The names of the variables are taken from the first chunk, which
+        can be a pandas DataFrame. The returned model does not hold the
+        data. Per observation attributes of the results such as `mu` and the
+        residuals are computed in another pass over the data on first
+        access. If no start_params are given, the starting values of the
+        mean are computed for each chunk.
+        """
+        chunks = _DataChunks(data_source, chunksize)
+        first = chunks.first()
+        offset = first[2] if len(first) > 2 else None
+        if np.ndim(offset) == 0:
+            offset = None
+        # model instance for names and family, does not keep the data
+        model = cls(first[0], first[1], family=family, offset=offset)
+        model._data_chunks = chunks
+        model._data_attr.append('_data_chunks')
+        model.endog = model.exog = None
+        model.pinv_wexog = model.normalized_cov_params = None
+        if offset is not None:
+            del model.offset
+        return model._fit_chunked(start_params, maxiter, tol, scale)
+
+    def _fit_chunked(self, start_params, maxiter, tol, scale):
+        family = self.family
+        k_aug = len(self.exog_names) + 1
+        buffer = np.empty((self._irls_blocksize + k_aug, k_aug))
+
+        def irls_pass(params):
+            # statistics of params and the R factor of the next WLS step
+            r = np.zeros((k_aug, k_aug))
+            nobs, dev, chi2, chi2_unweighted = 0, 0., 0., 0.
+            perfect = True
+            family_n = getattr(family, 'n', None)
+            try:
+                for endog, exog, offset in self._data_chunks:
+                    data_weights, endog = _prepare_endog(family, endog)
+                    if params is None:
+                        mu = family.starting_mu(endog)
+                        eta = family.predict(mu)
+                    else:
+                        eta = np.dot(exog, params) + offset
+                        mu = family.fitted(eta)
+                    dev += family.deviance(endog, mu)
+                    resid2 = (endog - mu)**2 / family.variance(mu)
+                    chi2 += (data_weights * resid2).sum()
+                    chi2_unweighted += resid2.sum()
+                    perfect = perfect and endog.ndim == 1 and np.allclose(
+                                                            mu - endog, 0)
+                    nobs += endog.shape[0]
+                    weights = data_weights * family.weights(mu)
+                    wlsendog = (eta + family.link.deriv(mu) * (endog - mu)
+                                - offset)
+                    r = lm._wls_qr_update(r, exog, np.sqrt(weights),
+                                          wlsendog, buffer)
+            finally:
+                _restore_family_n(family, family_n)
+            return r, nobs, dev, chi2, chi2_unweighted, perfect
+
+        history = dict(params=[None, start_params], deviance=[np.inf])
+        criterion = history['deviance']
+        params = start_params
+        iteration = 0
+        while True:
+            r, nobs, dev, chi2, chi2_unweighted, perfect = irls_pass(params)
+            if np.isnan(dev) and iteration == 0:
+                raise ValueError("The first guess on the deviance function "
+                                 "returned a nan.  This could be a boundary "
+                                 " problem and should be reported.")
+            criterion.append(dev)
+            if iteration > 0:
+                history['params'].append(params)
+                if perfect:
+                    msg = "Perfect separation detected, results not available"
+                    raise PerfectSeparationError(msg)
+                if _check_convergence(criterion, iteration, tol, maxiter):
+                    break
+            if iteration == 0:
+                r_exog = r[:-1, :-1]
+                rank = np_matrix_rank(r_exog, tol=np.abs(r_exog).max() *
+                                      nobs * np.finfo(float).eps)
+                if rank < k_aug - 1:
+                    raise ValueError("exog is rank deficient, fit_chunked "
+                                     "requires full column rank")
+                self.df_model = rank - 1
+                self.df_resid = nobs - rank
+            params, cov_params = lm._wls_solve_r(r)
+            iteration += 1
+
+        self.scaletype = scale
+        if not scale and isinstance(family, (families.Binomial,
+                                             families.Poisson)):
+            self.scale = 1.
+        elif isinstance(scale, float):
+            self.scale = np.array(scale)
+        elif not scale or scale.lower() == 'x2':
+            self.scale = chi2_unweighted / self.df_resid
+        elif scale.lower() == 'dev':
+            self.scale = dev / self.df_resid
+        else:
+            raise ValueError("Scale %s with type %s not understood" %
+                             (scale, type(scale)))
+
+        results = GLMChunkedResults(self, params, cov_params, self.scale,
+                                    nobs, dev, chi2)
+        history['iteration'] = iteration
+        results.fit_history = history
+        return results
 
     def fit_constrained(self, constraints, start_params=None, **fit_kwds):
         """fit the model subject to linear equality constraints
@@ -848,6 +1279,112 @@ class GLMResults(base.LikelihoodModelResults):
         return smry
 
 
+class GLMChunkedResults(GLMResults):
+    """
+    Results of `GLM.fit_chunked`
+
+    Statistics that sum over the observations, the deviance and Pearson
+    chi2, are computed during the fit. Per observation attributes, `mu`,
+    `fittedvalues`, the residuals and `null`, as well as `llf` are computed
+    in another pass over the data on first access.
+
+    See Also
+    --------
+    GLMResults
+    """
+
+    def __init__(self, model, params, normalized_cov_params, scale, nobs,
+                 deviance, pearson_chi2):
+        base.LikelihoodModelResults.__init__(self, model, params,
+                                         normalized_cov_params=
+                                         normalized_cov_params, scale=scale)
+        self.family = model.family
+        self.nobs = nobs
+        self.df_resid = model.df_resid
+        self.df_model = model.df_model
+        self._cache = resettable_cache()
+        self._cache['deviance'] = deviance
+        self._cache['pearson_chi2'] = pearson_chi2
+        self.data_in_cache = ['null', '_observations']
+
+    @cache_readonly
+    def _observations(self):
+        """endog, data weights and mean of all observations"""
+        family = self.family
+        endog, data_weights, mu = [], [], []
+        family_n = getattr(family, 'n', None)
+        try:
+            for chunk_endog, exog, offset in self.model._data_chunks:
+                chunk_weights, chunk_endog = _prepare_endog(family,
+                                                            chunk_endog)
+                endog.append(chunk_endog)
+                data_weights.append(chunk_weights)
+                mu.append(family.fitted(np.dot(exog, self.params) + offset))
+            n_trials = np.shape(getattr(family, 'n', None))
+        finally:
+            _restore_family_n(family, family_n)
+        endog, data_weights = np.concatenate(endog), np.concatenate(data_weights)
+        if isinstance(family, families.Binomial) and n_trials:
+            # the residuals of GLMResults use the trials of all observations
+            family.n = data_weights
+        return endog, data_weights, np.concatenate(mu)
+
+    @cache_readonly
+    def _endog(self):
+        return self._observations[0]
+
+    @cache_readonly
+    def _data_weights(self):
+        return self._observations[1]
+
+    @cache_readonly
+    def mu(self):
+        return self._observations[2]
+
+    @cache_readonly
+    def llf(self):
+        family = self.family
+        link = family.link
+        if (isinstance(family, families.Gaussian) and
+                isinstance(link, families.links.Power) and link.power == 1):
+            # profile loglikelihood of OLS, not a sum over the observations
+            nobs2 = self.nobs / 2.
+            return (-np.log(self.deviance) * nobs2 -
+                    (1 + np.log(np.pi / nobs2)) * nobs2)
+        llf = 0.
+        family_n = getattr(family, 'n', None)
+        try:
+            for endog, exog, offset in self.model._data_chunks:
+                endog = _prepare_endog(family, endog)[1]
+                eta = np.dot(exog, self.params) + offset
+                if isinstance(family, families.NegativeBinomial):
+                    llf += family.loglike(endog, fittedvalues=eta - offset)
+                else:
+                    llf += family.loglike(endog, family.fitted(eta),
+                                          scale=self.scale)
+        finally:
+            _restore_family_n(family, family_n)
+        return llf
+
+    @cache_readonly
+    def _null_results(self):
+        chunks = self.model._data_chunks
+
+        def null_source():
+            for endog, exog, offset in chunks:
+                yield endog, np.ones((exog.shape[0], 1)), offset
+
+        return GLM.fit_chunked(null_source, family=self.family)
+
+    @cache_readonly
+    def null(self):
+        return self._null_results.mu
+
+    @cache_readonly
+    def null_deviance(self):
+        return self._null_results.deviance
+
+
 class GLMResultsWrapper(lm.RegressionResultsWrapper):
     _attrs = {
         'resid_anscombe' : 'rows',
@@ -12,7 +12,7 @@ from __future__ import print_function
 from statsmodels.compat import lrange
 import numpy as np
 import os
-from numpy.testing import assert_almost_equal
+from numpy.testing import assert_almost_equal, assert_
 from statsmodels.genmod.generalized_estimating_equations import (GEE,
     GEEMargins, Multinomial)
 from statsmodels.genmod.families import Gaussian, Binomial, Poisson
@@ -627,6 +627,28 @@ class TestGEE(object):
         assert_almost_equal(sml.params.values, md.params, decimal=10)
 
 
+    def test_margins_dummy_count(self):
+
+        np.random.seed(4324)
+        n = 200
+        exog = np.ones((n, 3))
+        exog[:,1] = np.random.normal(size=n)
+        exog[:,2] = 1*(np.random.uniform(size=n) < 0.5)
+        groups = np.kron(np.arange(n/4), np.ones(4))
+        endog = 1*(np.random.uniform(size=n) < 0.5)
+
+        mdf = GEE(endog, exog, groups, family=Binomial(),
+                  cov_struct=Independence()).fit()
+        from statsmodels.discrete.discrete_model import Logit
+        sml = Logit(endog, exog).fit(disp=False)
+
+        for kwds in [dict(dummy=True), dict(count=True)]:
+            marg = GEEMargins(mdf, (), kwds)
+            marg_l = sml.get_margeff(**kwds)
+            assert_almost_equal(marg.margeff, marg_l.margeff, decimal=8)
+            assert_(np.all(np.isfinite(marg.margeff_se)))
+
+
     def test_compare_poisson(self):
 
         vs = Independence()
@@ -647,6 +669,62 @@ class TestGEE(object):
 
         assert_almost_equal(sml.params.values, md.params, decimal=10)
 
+    def test_solve_all(self):
+
+        np.random.seed(3482)
+        n = 200
+        exog = np.random.normal(size=(n, 3))
+        endog = np.random.poisson(np.exp(0.2 * exog.sum(1)))
+        groups = np.random.randint(0, 40, size=n)
+        subgroups = np.random.randint(0, 6, size=n)
+        dep_data = np.column_stack((subgroups // 3, subgroups))
+
+        for cov_struct in (Independence(), Exchangeable(),
+                           Autoregressive(), Nested()):
+            md = GEE(endog, exog, groups, family=Poisson(),
+                     cov_struct=cov_struct, dep_data=dep_data)
+            mdf = md.fit()
+
+            # bias-corrected covariance with the adjusted residuals of
+            # each cluster
+            scale = mdf.scale
+            ncov = mdf.naive_covariance
+            bcm = 0
+            for i in range(md.num_group):
+                expval, lpr = md.cached_means[i]
+                dmat = md.mean_deriv(md.exog_li[i], lpr)
+                sdev = np.sqrt(md.family.variance(expval))
+                vinv_d = cov_struct.covariance_matrix_solve(expval, i, sdev,
+                                                            (dmat,))[0]
+                hmat = np.dot(dmat, np.dot(ncov, vinv_d.T)) / scale
+                aresid = np.linalg.solve(np.eye(len(expval)) - hmat,
+                                         md.endog_li[i] - expval)
+                srt = np.dot(vinv_d.T, aresid) / scale
+                bcm += np.outer(srt, srt)
+            assert_almost_equal(mdf.robust_covariance_bc,
+                                np.dot(ncov, np.dot(bcm, ncov)), decimal=10)
+
+            # the stacked solves agree with the solves of the correlation
+            # matrices of the clusters
+            if isinstance(cov_struct, Autoregressive):
+                cov_struct.dep_params = 0.4
+            elif isinstance(cov_struct, Nested):
+                cov_struct.vcomp_coeff = np.r_[0.3, 0.2, 0.1]
+                cov_struct.scale = 1.5
+                cov_struct.dep_params = cov_struct.vcomp_coeff.copy()
+            expval, lpr = md._cached_means_all
+            sdev = np.sqrt(md.family.variance(expval))
+            rhs = (md.mean_deriv(md._exog_all, lpr), md._endog_all - expval)
+            soln = cov_struct.covariance_matrix_solve_all(expval, sdev, rhs)
+            bounds = md._group_bounds
+            for i in range(md.num_group):
+                ii = slice(bounds[i], bounds[i + 1])
+                vmat = cov_struct.covariance_matrix(expval[ii], i)[0]
+                vmat = vmat * np.outer(sdev[ii], sdev[ii])
+                for x, y in zip(rhs, soln):
+                    assert_almost_equal(np.dot(vmat, y[ii]), x[ii],
+                                        decimal=10)
+
 
 if  __name__=="__main__":
 
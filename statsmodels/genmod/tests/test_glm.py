@@ -4,7 +4,8 @@ Test functions for models.GLM
 
 import os
 import numpy as np
-from numpy.testing import assert_almost_equal, assert_equal, assert_raises
+from numpy.testing import (assert_, assert_almost_equal, assert_equal,
+                           assert_raises)
 from scipy import stats
 import statsmodels.api as sm
 from statsmodels.genmod.generalized_linear_model import GLM
@@ -603,6 +604,167 @@ def test_glm_start_params():
     res = mod.fit(start_params=[-4, -5])
     np.testing.assert_almost_equal(res.params, [-4.60305022, -5.29634545], 6)
 
+
+def test_irls_blocks_rank_deficient():
+    data = sm.datasets.cpunish.load()
+    exog = add_constant(data.exog, prepend=False)
+    endog = data.endog
+    res1 = GLM(endog, exog, family=sm.families.Poisson()).fit()
+
+    # accumulating the QR decomposition over blocks of rows
+    mod = GLM(endog, exog, family=sm.families.Poisson())
+    mod._irls_blocksize = 3
+    res2 = mod.fit()
+    np.testing.assert_allclose(res2.params, res1.params, rtol=1e-10)
+    np.testing.assert_allclose(res2.bse, res1.bse, rtol=1e-10)
+
+    # duplicate column, the minimum norm solution splits the coefficient
+    exog_dup = np.column_stack((exog, exog[:, 0]))
+    res3 = GLM(endog, exog_dup, family=sm.families.Poisson()).fit()
+    params = res3.params
+    assert_almost_equal(params[0], params[-1], 8)
+    assert_almost_equal(params[0] + params[-1], res1.params[0], 6)
+    assert_almost_equal(res3.deviance, res1.deviance, 6)
+
+
+def test_fit_chunked():
+    data = sm.datasets.cpunish.load()
+    exog = add_constant(data.exog, prepend=False)
+    endog = data.endog
+    offset = np.log(np.arange(1, len(endog) + 1) / 5.)
+    attrs = ['params', 'bse', 'deviance', 'pearson_chi2', 'scale', 'llf',
+             'mu', 'resid_deviance', 'resid_pearson', 'null_deviance',
+             'df_model', 'df_resid']
+    for family, kwds in [(sm.families.Poisson(), {}),
+                         (sm.families.Poisson(), {'offset': offset}),
+                         (sm.families.Gaussian(), {}),
+                         (sm.families.Gamma(), {'scale': 'dev'})]:
+        res1 = GLM(endog + 1, exog, family=family,
+                   offset=kwds.get('offset')).fit(scale=kwds.get('scale'))
+        source = (endog + 1, exog, kwds.get('offset'))
+        res2 = GLM.fit_chunked(source, family=family, chunksize=4,
+                               scale=kwds.get('scale'))
+        for attr in attrs:
+            np.testing.assert_allclose(getattr(res2, attr),
+                                       getattr(res1, attr), rtol=1e-7,
+                                       err_msg=attr)
+
+    # binomial with two column endog from a callable
+    data = sm.datasets.star98.load()
+    exog = add_constant(data.exog, prepend=False)
+    endog = data.endog
+
+    def source():
+        for start in range(0, len(endog), 100):
+            yield endog[start:start + 100], exog[start:start + 100]
+
+    res1 = GLM(endog, exog, family=sm.families.Binomial()).fit()
+    res2 = GLM.fit_chunked(source, family=sm.families.Binomial())
+    for attr in attrs + ['aic', 'bic']:
+        np.testing.assert_allclose(getattr(res2, attr), getattr(res1, attr),
+                                   rtol=1e-7, err_msg=attr)
+
+    # chunk passes do not leave the trials of the last chunk in family.n
+    res3 = GLM.fit_chunked(source, family=sm.families.Binomial())
+    for attr in ['resid_deviance', 'llf', 'resid_anscombe', 'llf']:
+        np.testing.assert_allclose(getattr(res3, attr), getattr(res1, attr),
+                                   rtol=1e-7, err_msg=attr)
+
+    exog_dup = np.column_stack((exog, exog[:, 0]))
+    assert_raises(ValueError, GLM.fit_chunked, (endog, exog_dup),
+                  family=sm.families.Binomial())
+
+
+def test_fit_regularized():
+    data = sm.datasets.star98.load()
+    exog = add_constant(data.exog[:, :5], prepend=True)
+    exog[:, 1:] = (exog[:, 1:] - exog[:, 1:].mean(0)) / exog[:, 1:].std(0)
+    endog = data.endog
+    alpha = 2e4 * np.ones(exog.shape[1])
+    alpha[0] = 0
+
+    # proportions and trials as in fit, no penalty
+    mod = GLM(endog, exog, family=sm.families.Binomial())
+    res1 = mod.fit()
+    res2 = mod.fit_regularized(alpha=0)
+    np.testing.assert_allclose(res2.params, res1.params, rtol=1e-6)
+    np.testing.assert_allclose(res2.bse, res1.bse, rtol=1e-6)
+
+    # the discrete Poisson model with exposure solves the same problem
+    counts = endog[:, 0]
+    exposure = endog.sum(1) / 100.
+    res1 = sm.Poisson(counts, exog, exposure=exposure).fit_regularized(
+        method='elastic_net', alpha=alpha, disp=0)
+    mod = GLM(counts, exog, family=sm.families.Poisson(), exposure=exposure)
+    res2 = mod.fit_regularized(alpha=alpha)
+    np.testing.assert_allclose(res2.params, res1.params, rtol=1e-6,
+                               atol=1e-8)
+    assert_equal(np.isnan(res2.bse), res2.params == 0)
+    assert_(np.isnan(res2.bse).any())
+
+    path = mod.fit_regularized_path(L1_wt=0.5, n_alphas=10)
+    assert_(path.converged.all())
+    np.testing.assert_allclose(path.params[0, 1:], 0, atol=1e-8)
+    res3 = mod.fit_regularized(alpha=path.alphas[5] * (alpha > 0),
+                               L1_wt=0.5)
+    np.testing.assert_allclose(res3.params, path.params[5], rtol=1e-5)
+
+    # Gaussian with the ridge penalty has a closed form
+    endog = np.log(counts + 1)
+    mod = GLM(endog, exog)
+    res = mod.fit_regularized(alpha=alpha, L1_wt=0)
+    xtx = np.dot(exog.T, exog)
+    params = np.linalg.solve(xtx + np.diag(alpha), np.dot(exog.T, endog))
+    np.testing.assert_allclose(res.params, params, rtol=1e-6)
+
+    assert_raises(ValueError, mod.fit_regularized, method='l1')
+
+
+def test_fit_compress():
+    np.random.seed(85123)
+    nobs = 2000
+    groups = np.random.randint(0, 4, size=(nobs, 2))
+    exog = np.column_stack([groups[:, 0] == i for i in range(4)] +
+                           [groups[:, 1] == i for i in range(1, 4)]) * 1.
+    linpred = np.dot(exog, np.linspace(-0.5, 0.5, exog.shape[1]))
+    offset = 0.1 * (np.arange(nobs) % 2)
+    trials = np.random.randint(1, 5, size=nobs)
+    successes = np.random.binomial(trials, 1 / (1 + np.exp(-linpred)))
+    attrs = ['params', 'bse', 'deviance', 'pearson_chi2', 'scale', 'llf',
+             'mu', 'resid_deviance', 'resid_pearson', 'df_resid']
+    for family, endog, kwds in [
+            (sm.families.Poisson(), np.random.poisson(np.exp(linpred)), {}),
+            (sm.families.Poisson(), np.random.poisson(np.exp(linpred)),
+             {'offset': offset}),
+            (sm.families.Binomial(), (successes > 0) * 1., {}),
+            (sm.families.Binomial(),
+             np.column_stack((successes, trials - successes)), {}),
+            (sm.families.Gaussian(), linpred + np.random.randn(nobs), {}),
+            (sm.families.Gamma(sm.families.links.log),
+             np.exp(linpred) * np.random.gamma(2, size=nobs), {})]:
+        res1 = GLM(endog, exog, family=family, **kwds).fit()
+        mod = GLM(endog, exog, family=family, **kwds)
+        res2 = mod.fit(compress=True)
+        for attr in attrs:
+            # the deviance residuals are sqrt(0) for some observations
+            np.testing.assert_allclose(getattr(res2, attr),
+                                       getattr(res1, attr), rtol=1e-7,
+                                       atol=1e-6, err_msg=attr)
+        # 16 patterns, twice as many with the offset
+        pattern = mod._compress(mod._offset_exposure())[-1]
+        assert_equal(pattern.max() + 1, 32 if kwds else 16)
+
+    # zero counts have finite deviance residuals
+    assert_(np.isfinite(res1.resid_deviance).all())
+    family = sm.families.Poisson()
+    endog = np.array([0., 1, 2])
+    mu = np.array([0.5, 1, 1.5])
+    resid_dev = family.resid_dev(endog, mu)
+    assert_almost_equal(resid_dev[0], -1, 12)
+    assert_(np.isfinite(sm.families.NegativeBinomial().resid_dev(endog,
+                                                                 mu)).all())
+
+
 if __name__=="__main__":
     #run_module_suite()
     #taken from Fernando Perez:
@@ -15,6 +15,7 @@ try:
 except ImportError:
     has_joblib = False
 
+from statsmodels.tools.grouputils import combine_indices
 from . import kernels
 
 
@@ -516,3 +517,100 @@ def gpke(bw, data, data_predict, var_type, ckertype='gaussian',
         return dens.sum(axis=0)
     else:
         return dens
+
+
+def _discrete_kernel_table(func, h, data, data_predict):
+    """
+    Kernel values of a discrete variable for all pairs of levels.
+
+    The kernel of a discrete variable only depends on the level of the
+    training observation and on the evaluation value, so it is evaluated
+    once for each pair of unique values and looked up afterwards.
+
+    Returns
+    -------
+    idx : ndarray, (nobs,)
+        index of the level of each training observation
+    idx_predict : ndarray, (npredict,)
+        index of the unique evaluation value of each evaluation point
+    table : ndarray, (nlevels, nvalues)
+        kernel values for the unique levels and evaluation values
+    """
+    levels, idx = np.unique(data, return_inverse=True)
+    values, idx_predict = np.unique(data_predict, return_inverse=True)
+    # the kernels count the levels in the data, these are the same for the
+    # unique levels
+    table = np.column_stack([func(h, levels, x) for x in values])
+    return idx, idx_predict, table
+
+
+def gpke_matrix(bw, data, data_predict, var_type, ckertype='gaussian',
+                okertype='wangryzin', ukertype='aitchisonaitken'):
+    """
+    Generalized product kernel for all pairs of data and evaluation points.
+
+    Parameters
+    ----------
+    bw: 1-D ndarray
+        The user-specified bandwidth parameters.
+    data: 2-D ndarray
+        The training data, (nobs, k_vars).
+    data_predict: 2-D ndarray
+        The evaluation points, (npredict, k_vars).
+    var_type: str
+        The variable type (continuous, ordered, unordered).
+    ckertype: str, optional
+        The kernel used for the continuous variables.
+    okertype: str, optional
+        The kernel used for the ordered discrete variables.
+    ukertype: str, optional
+        The kernel used for the unordered discrete variables.
+
+    Returns
+    -------
+    dens: ndarray, (nobs, npredict)
+        Column j is ``gpke(bw, data, data_predict[j], var_type,
+        tosum=False)``.
+
+    Notes
+    -----
+    The training observations are grouped by their cell, the combination of
+    levels of the discrete variables, and the evaluation points by their
+    discrete values. The product of the discrete kernels is computed once
+    for each pair of cells from per variable lookup tables and is then
+    expanded to the observations, so that only the continuous kernels are
+    evaluated for every pair of points.
+    """
+    kertypes = dict(c=ckertype, o=okertype, u=ukertype)
+    nobs = data.shape[0]
+    npredict = data_predict.shape[0]
+    dens = np.ones((nobs, npredict))
+    discrete = []
+    for ii, vtype in enumerate(var_type):
+        func = kernel_func[kertypes[vtype]]
+        if vtype == 'c':
+            dens *= func(bw[ii], data[:, ii][:, None],
+                         data_predict[:, ii][None, :])
+        else:
+            discrete.append(_discrete_kernel_table(func, bw[ii], data[:, ii],
+                                                   data_predict[:, ii]))
+
+    if discrete:
+        idx = np.column_stack([d[0] for d in discrete])
+        idx_predict = np.column_stack([d[1] for d in discrete])
+        # cells of the discrete variables in the data and evaluation points
+        cells, cell_idx = _unique_rows(idx)
+        pcells, pcell_idx = _unique_rows(idx_predict)
+        dens_cells = np.ones((cells.shape[0], pcells.shape[0]))
+        for jj, (_, _, table) in enumerate(discrete):
+            dens_cells *= table[cells[:, jj]][:, pcells[:, jj]]
+        dens *= dens_cells[cell_idx][:, pcell_idx]
+
+    iscontinuous = np.array([c == 'c' for c in var_type])
+    return dens / np.prod(bw[iscontinuous])
+
+
+def _unique_rows(idx):
+    """unique rows of a 2-D integer array and the row index of each row"""
+    uni_inv, _, uni = combine_indices(idx)
+    return uni, uni_inv
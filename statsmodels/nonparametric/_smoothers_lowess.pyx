@@ -5,6 +5,10 @@
 '''
 Univariate lowess function, like in R.
 
+The smoothing itself is done by C level functions that do not hold the GIL,
+so that ``lowess_batch`` can smooth many series in one call and several
+calls can run concurrently in a thread pool.
+
 References
 ----------
 Hastie, Tibshirani, Friedman. (2009) The Elements of Statistical Learning: Data
@@ -16,21 +20,25 @@ Scatterplots". Journal of the American Statistical Association 74 (368): 829-836
 
 cimport numpy as np
 import numpy as np
-from cpython cimport bool
 cimport cython
+from libc.math cimport fabs
+from libc.stdlib cimport malloc, free
 
 # there's no fmax in math.h with windows SDK apparently
-cdef inline double fmax(double x, double y): return x if x >= y else y
+cdef inline double fmax(double x, double y) nogil: return x if x >= y else y
 
 DTYPE = np.double
 ctypedef np.double_t DTYPE_t
 
+
 def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
            np.ndarray[DTYPE_t, ndim = 1] exog,
            double frac = 2.0 / 3.0,
            Py_ssize_t it = 3,
-           double delta = 0.0):
-    '''lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0)
+           double delta = 0.0,
+           weights = None,
+           xvals = None):
+    '''lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, weights=None, xvals=None)
     LOWESS (Locally Weighted Scatterplot Smoothing)
 
     A lowess function that outs smoothed estimates of endog
@@ -51,13 +59,21 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
     delta: float
         Distance within which to use linear-interpolation
         instead of weighted regression.
+    weights: None or 1-D numpy array
+        Non-negative prior weights of the observations. They multiply the
+        distance and residual weights in each local regression.
+    xvals: None or 1-D numpy array
+        Increasing values at which the final fit is evaluated. If given,
+        the robustifying iterations are done at exog and the last local
+        regressions are evaluated at xvals.
 
     Returns
     -------
     out: numpy array
-        A numpy array with two columns. The first column
-        is the sorted x values and the second column the
-        associated estimated y-values.
+        If xvals is None, a numpy array with two columns. The first column
+        is the sorted x values and the second column the associated
+        estimated y-values. Otherwise, the 1-D array of estimated y-values
+        at xvals.
 
     Notes
     -----
@@ -86,7 +102,7 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
     are skipped for points closer than delta. The next regression is
     fit for the farthest point within delta of x_i and all points in
     between are estimated by linearly interpolating between the two
-    regression fits.
+    regression fits. delta is not used for the evaluation at xvals.
 
     Judicious choice of delta can cut computation time considerably
     for large data (N > 5000). A good choice is delta = 0.01 *
@@ -126,24 +142,91 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
     >>> w = lowess(y, x, frac=1./3)
 
     '''
-    cdef:
-        Py_ssize_t n
-        int k
-        Py_ssize_t robiter, i, left_end, right_end
-        int last_fit_i,
-        np.ndarray[DTYPE_t, ndim = 1] x, y
-        np.ndarray[DTYPE_t, ndim = 1] y_fit
-        np.ndarray[DTYPE_t, ndim = 1] weights
-        np.ndarray[DTYPE_t, ndim = 1] resid_weights
+    cdef np.ndarray[DTYPE_t, ndim = 1] yhat
+
+    if weights is not None:
+        weights = np.ascontiguousarray(weights, dtype=DTYPE).reshape(1, -1)
+    if xvals is not None:
+        xvals = np.ascontiguousarray(xvals, dtype=DTYPE).reshape(1, -1)
+
+    yhat = lowess_batch(np.ascontiguousarray(endog).reshape(1, -1),
+                        np.ascontiguousarray(exog).reshape(1, -1),
+                        frac=frac, it=it, delta=delta, weights=weights,
+                        xvals=xvals)[0]
+    if xvals is not None:
+        return yhat
+    return np.array([exog, yhat]).T
+
+
+def lowess_batch(double[:, ::1] endog,
+                 double[:, ::1] exog,
+                 double frac = 2.0 / 3.0,
+                 Py_ssize_t it = 3,
+                 double delta = 0.0,
+                 double[:, ::1] weights = None,
+                 double[:, ::1] xvals = None):
+    '''lowess_batch(endog, exog, frac=2.0/3.0, it=3, delta=0.0, weights=None, xvals=None)
+    Lowess smoothing of the rows of a 2-D array.
+
+    Parameters
+    ----------
+    endog: 2-D numpy array, (nseries, nobs)
+        Each row is a series of y-values.
+    exog: 2-D numpy array, (1, nobs) or (nseries, nobs)
+        The x-values, either shared by all series or one row per series.
+        Each row has to be increasing.
+    frac, it, delta:
+        See ``lowess``.
+    weights: None or 2-D numpy array, (1, nobs) or (nseries, nobs)
+        Non-negative prior weights of the observations.
+    xvals: None or 2-D numpy array, (1, nxvals) or (nseries, nxvals)
+        Increasing evaluation points of the final fit.
 
-    y = endog   # now just alias
-    x = exog
+    Returns
+    -------
+    yhat: 2-D numpy array
+        The smoothed values, (nseries, nobs) if xvals is None and
+        (nseries, nxvals) otherwise.
 
-    n = x.shape[0]
+    Notes
+    -----
+    All arrays have to be C-contiguous float64 arrays. The loop over series
+    runs without the GIL.
+    '''
+    cdef:
+        Py_ssize_t nseries = endog.shape[0]
+        Py_ssize_t n = endog.shape[1]
+        Py_ssize_t m, k, s
+        Py_ssize_t sx, sw, sv
+        double *work
+        double *px
+        double *pw
+        double *pv
+        double[:, ::1] out
+
+    if exog.shape[1] != n:
+        raise ValueError('exog and endog must have same length')
+    if exog.shape[0] != 1 and exog.shape[0] != nseries:
+        raise ValueError('exog needs to have one row or one row per series')
+    if weights is not None and (weights.shape[1] != n or
+            (weights.shape[0] != 1 and weights.shape[0] != nseries)):
+        raise ValueError('weights needs to have the same number of '
+                         'observations as endog and one or nseries rows')
+    if xvals is not None and xvals.shape[0] != 1 and \
+            xvals.shape[0] != nseries:
+        raise ValueError('xvals needs to have one row or one row per series')
+
+    m = n if xvals is None else xvals.shape[1]
+    out_arr = np.zeros((nseries, m), dtype=DTYPE)
+    if nseries == 0 or n == 0:
+        if xvals is not None:
+            out_arr.fill(np.nan)
+        return out_arr
+    out = out_arr
 
     # The number of neighbors in each regression.
     # round up if close to integer
-    k =  int(frac * n + 1e-10)
+    k = <Py_ssize_t>(frac * n + 1e-10)
 
     # frac should be set, so that 2 <= k <= n.
     # Conform them instead of throwing error.
@@ -152,340 +235,270 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
     if k > n:
         k = n
 
-    y_fit = np.zeros(n, dtype = DTYPE)
-    resid_weights = np.zeros(n, dtype = DTYPE)
+    # row strides, 0 if the row is shared across series
+    sx = 0 if exog.shape[0] == 1 else n
+    sw = 0
+    pw = NULL
+    if weights is not None:
+        sw = 0 if weights.shape[0] == 1 else n
+        pw = &weights[0, 0]
+    sv = 0
+    pv = NULL
+    if xvals is not None and m > 0:
+        sv = 0 if xvals.shape[0] == 1 else m
+        pv = &xvals[0, 0]
+    px = &exog[0, 0]
+
+    # regression weights, residual weights, scratch and fitted at exog
+    work = <double *>malloc(4 * n * sizeof(double))
+    if work == NULL:
+        raise MemoryError()
+    try:
+        with nogil:
+            for s in range(nseries):
+                _lowess_1d(px + s * sx, &endog[s, 0],
+                           pw + s * sw if pw != NULL else NULL, n,
+                           pv + s * sv if pv != NULL else NULL, m,
+                           k, it, delta, &out[s, 0], work)
+    finally:
+        free(work)
+
+    return out_arr
+
+
+cdef void _lowess_1d(double *x, double *y, double *prior_w, Py_ssize_t n,
+                     double *xvals, Py_ssize_t m, Py_ssize_t k,
+                     Py_ssize_t it, double delta, double *out,
+                     double *work) nogil:
+    '''
+    Lowess of one series, writes the fitted values into out.
 
-    it += 1 # Add one to it for initial run.
-    for robiter in xrange(it):
-        i = 0
-        last_fit_i = -1
-        left_end = 0
-        right_end = k
-        y_fit = np.zeros(n, dtype = DTYPE)
+    If xvals is NULL, then out has length n and holds the fit at x,
+    otherwise out has length m and holds the fit at xvals. work needs
+    room for 4 * n doubles.
+    '''
+    cdef:
+        Py_ssize_t robiter, n_xfits
+        double *weights = work
+        double *resid_weights = work + n
+        double *scratch = work + 2 * n
+        double *y_fit = work + 3 * n
+
+    if xvals == NULL:
+        y_fit = out
+        # the last fit at x are the returned values
+        n_xfits = it + 1
+    else:
+        # the last fit is evaluated at xvals instead
+        n_xfits = it
 
-        # 'do' Fit y[i]'s 'until' the end of the regression
-        while True:
-            # Re-initialize the weights for each point x[i].
-            weights = np.zeros(n, dtype = DTYPE)
-
-            # Describe the neighborhood around the current x[i].
-            left_end, right_end, radius = update_neighborhood(x, i, n,
-                                                              left_end,
-                                                              right_end)
-
-            # Calculate the weights for the regression in this neighborhood.
-            # Determine if at least some weights are positive, so a regression
-            # is ok.
-            reg_ok = calculate_weights(x, weights, resid_weights, i, left_end,
-                                       right_end, radius, robiter > 0)
-
-            # If ok, run the regression
-            calculate_y_fit(x, y, i, y_fit, weights, left_end, right_end,
-                            reg_ok)
-
-            # If we skipped some points (because of how delta was set), go back
-            # and fit them by linear interpolation.
-            if last_fit_i < (i - 1):
-                interpolate_skipped_fits(x, y_fit, i, last_fit_i)
-
-            # Update the last fit counter to indicate we've now fit this point.
-            # Find the next i for which we'll run a regression.
-            i, last_fit_i = update_indices(x, y_fit, delta, i, n, last_fit_i)
-
-            if last_fit_i >= n-1:
-                break
+    for robiter in range(n_xfits):
+        _fit_at_x(x, y, prior_w, resid_weights, n, k, delta, robiter > 0,
+                  weights, y_fit)
 
         # Calculate residual weights, but don't bother on the last iteration.
-        if robiter < it - 1:
-            resid_weights = calculate_residual_weights(y, y_fit)
+        if robiter < it:
+            _residual_weights(y, y_fit, prior_w, n, resid_weights, scratch)
 
+    if xvals != NULL:
+        _fit_at_xvals(x, y, prior_w, resid_weights, n, k, xvals, m, it > 0,
+                      weights, out)
 
-    return np.array([x, y_fit]).T
 
-
-def update_neighborhood(np.ndarray[DTYPE_t, ndim = 1] x,
-                        Py_ssize_t i,
-                        Py_ssize_t n,
-                        Py_ssize_t left_end,
-                        Py_ssize_t right_end):
+cdef void _fit_at_x(double *x, double *y, double *prior_w,
+                    double *resid_weights, Py_ssize_t n, Py_ssize_t k,
+                    double delta, bint use_resid_weights, double *weights,
+                    double *y_fit) nogil:
     '''
-    Find the indices bounding the k-nearest-neighbors of the current point.
-
-    Parameters
-    ----------
-    x: 1-D numpy array
-        The input x-values
-    i: indexing integer
-        The index of the point currently being fit.
-    n: indexing integer
-        The length of the input vectors, x and y.
-    left_end: indexing integer
-        The index of the left-most point in the neighborhood
-        of x[i-1] (the previously-fit point).
-    right_end: indexing integer
-        The index of the right-most point in the neighborhood
-        of x[i-1]. Non-inclusive, s.t. the neighborhood is
-        x[left_end] <= x < x[right_end].
-    radius: float
-        The radius of the current neighborhood. The larger of
-        distances between x[i] and its left-most or right-most
-        neighbor.
+    One pass of local regressions at all points of x.
 
-    Returns
-    -------
-    left_end: indexing integer
-        The index of the left-most point in the neighborhood
-              of x[i] (the current point).
-    right_end: indexing integer
-        The index of the right-most point in the neighborhood
-               of x[i]. Non-inclusive, s.t. the neighborhood is
-               x[left_end] <= x < x[right_end].
-    radius: float
-        The radius of the current neighborhood. The larger of
-        distances between x[i] and its left-most or right-most
-        neighbor.
+    Regressions are skipped for points within delta of the last fit point,
+    these are linearly interpolated.
     '''
-
-    cdef double radius
-    # A subtle loop. Start from the current neighborhood range:
-    # [left_end, right_end). Shift both ends rightwards by one
-    # (so that the neighborhood still contains k points), until
-    # the current point is in the center (or just to the left of
-    # the center) of the neighborhood. This neighborhood will
-    # contain the k-nearest neighbors of x[i].
-    #
-    # Once the right end hits the end of the data, hold the
-    # neighborhood the same for the remaining x[i]s.
+    cdef:
+        Py_ssize_t i = 0, j
+        Py_ssize_t last_fit_i = -1
+        Py_ssize_t left_end = 0
+        Py_ssize_t right_end = k
+        double radius, a
+        bint reg_ok
+
+    # 'do' Fit y[i]'s 'until' the end of the regression
     while True:
-        if right_end < n:
-
-            if (x[i] > (x[left_end] + x[right_end]) / 2.0):
-                left_end += 1
-                right_end += 1
-            else:
-                break
+        # Describe the neighborhood around the current x[i].
+        _update_neighborhood(x, x[i], n, &left_end, &right_end)
+        radius = fmax(x[i] - x[left_end], x[right_end - 1] - x[i])
+
+        # Calculate the weights for the regression in this neighborhood.
+        # Determine if at least some weights are positive, so a regression
+        # is ok.
+        reg_ok = _calculate_weights(x, x[i], prior_w, resid_weights,
+                                    left_end, right_end, radius,
+                                    use_resid_weights, weights)
+
+        # If ok, run the regression
+        if reg_ok:
+            y_fit[i] = _local_fit(x, y, x[i], weights, left_end, right_end)
         else:
-            break
-
-    radius = fmax(x[i] - x[left_end], x[right_end-1] - x[i])
+            y_fit[i] = y[i]
 
-    return left_end, right_end, radius
+        # If we skipped some points (because of how delta was set), go back
+        # and fit them by linear interpolation.
+        if last_fit_i < (i - 1):
+            for j in range(last_fit_i + 1, i):
+                a = x[j] - x[last_fit_i]
+                a = a / (x[i] - x[last_fit_i])
+                y_fit[j] = a * y_fit[i] + (1.0 - a) * y_fit[last_fit_i]
 
-cdef bool calculate_weights(np.ndarray[DTYPE_t, ndim = 1] x,
-                            np.ndarray[DTYPE_t, ndim = 1] weights,
-                            np.ndarray[DTYPE_t, ndim = 1] resid_weights,
-                            Py_ssize_t i,
-                            Py_ssize_t left_end,
-                            Py_ssize_t right_end,
-                            double radius,
-                            bool use_resid_weights):
-    '''
+        # Update the last fit counter to indicate we've now fit this point.
+        # Find the next i for which we'll run a regression.
+        _update_indices(x, y_fit, delta, n, &i, &last_fit_i)
 
-    Parameters
-    ----------
-    x: 1-D vector
-        The input x-values.
-    weights: 1-D numpy array
-        The vector of regression weights.
-    resid_weights: 1-D numpy array
-        The vector of residual weights from the last iteration.
-    i: indexing integer
-        The index of the point currently being fit.
-    left_end: indexing integer
-        The index of the left-most point in the neighborhood of
-        x[i].
-    right_end: indexing integer
-        The index of the right-most point in the neighborhood
-        of x[i]. Non-inclusive, s.t. the neighborhood is
-        x[left_end] <= x < x[right_end].
-    radius: float
-        The radius of the current neighborhood. The larger of
-        distances between x[i] and its left-most or right-most
-        neighbor.
-    use_resid_weights: boolean
-        If True, multiply the x-distance weights by the residual
-        weights from the last iteration of regressions. Set to
-        False on the first iteration (since there are no residuals
-        yet) and True on the subsequent ``robustifying`` iterations.
+        if last_fit_i >= n - 1:
+            break
 
 
-    Returns
-    -------
-    reg_ok: boolean
-        If True, at least some points have positive weight, and the
-        regression will be run. If False, the regression is skipped
-        and y_fit[i] is set to equal y[i].
-    Also, changes elements of weights in-place.
+cdef void _fit_at_xvals(double *x, double *y, double *prior_w,
+                        double *resid_weights, Py_ssize_t n, Py_ssize_t k,
+                        double *xvals, Py_ssize_t m, bint use_resid_weights,
+                        double *weights, double *out) nogil:
     '''
+    Local regressions at the increasing evaluation points xvals.
 
+    The fit is nan if all weights in the neighborhood of a point are zero.
+    '''
     cdef:
-        np.ndarray[DTYPE_t, ndim = 1] x_j = x[left_end:right_end]
-        np.ndarray[DTYPE_t, ndim = 1] dist_i_j = np.abs(x_j - x[i]) / radius
-        bool reg_ok = True
-        double sum_weights
-
-    # Assign the distance measure to the weights, then apply the tricube
-    # function to change in-place.
-    # use_resid_weights will be False on the first iteration, then True
-    # on the subsequent ones, after some residuals have been calculated.
-    weights[left_end:right_end] = dist_i_j
-    if use_resid_weights == False:
-        tricube(weights[left_end:right_end])
-    if use_resid_weights == True:
-        tricube(weights[left_end:right_end])
-        weights[left_end:right_end] = (weights[left_end:right_end] *
-                                          resid_weights[left_end:right_end])
-
-    sum_weights = np.sum(weights[left_end:right_end])
-
-    if sum_weights <= 0.0:
-        reg_ok = False
-    else:
-        weights[left_end:right_end] = weights[left_end:right_end] / sum_weights
-
-    return reg_ok
+        Py_ssize_t i
+        Py_ssize_t left_end = 0
+        Py_ssize_t right_end = k
+        double radius, xv
+
+    for i in range(m):
+        xv = xvals[i]
+        _update_neighborhood(x, xv, n, &left_end, &right_end)
+        radius = fmax(xv - x[left_end], x[right_end - 1] - xv)
+        if _calculate_weights(x, xv, prior_w, resid_weights, left_end,
+                              right_end, radius, use_resid_weights, weights):
+            out[i] = _local_fit(x, y, xv, weights, left_end, right_end)
+        else:
+            out[i] = 0.0 / 0.0
 
 
-cdef void calculate_y_fit(np.ndarray[DTYPE_t, ndim = 1] x,
-                          np.ndarray[DTYPE_t, ndim = 1] y,
-                          Py_ssize_t i,
-                          np.ndarray[DTYPE_t, ndim = 1] y_fit,
-                          np.ndarray[DTYPE_t, ndim = 1] weights,
-                          Py_ssize_t left_end,
-                          Py_ssize_t right_end,
-                          bool reg_ok):
+cdef inline void _update_neighborhood(double *x, double xi, Py_ssize_t n,
+                                      Py_ssize_t *left_end,
+                                      Py_ssize_t *right_end) nogil:
     '''
-    Calculate smoothed/fitted y-value by weighted regression.
+    Find the indices bounding the k-nearest-neighbors of the point xi.
 
-    Parameters
-    ----------
-    x: 1-D numpy array
-        The vector of input x-values.
-    y: 1-D numpy array
-        The vector of input y-values.
-    i: indexing integer
-        The index of the point currently being fit.
-    y_fit: 1-D numpy array
-        The vector of fitted y-values.
-    weights: 1-D numpy array
-        The vector of regression weights.
-    left_end: indexing integer
-        The index of the left-most point in the neighborhood of
-        x[i].
-    right_end: indexing integers
-        The index of the right-most point in the neighborhood
-        of x[i]. Non-inclusive, s.t. the neighborhood is
-        x[left_end] <= x < x[right_end].
-    reg_ok: boolean
-        If True, at least some points have positive weight, and the
-        regression will be run. If False, the regression is skipped
-        and y_fit[i] is set to equal y[i].
-
-    Returns
-    -------
-    Nothing. Changes y_fit[i] in-place.
+    A subtle loop. Start from the current neighborhood range:
+    [left_end, right_end). Shift both ends rightwards by one
+    (so that the neighborhood still contains k points), until
+    the current point is in the center (or just to the left of
+    the center) of the neighborhood. This neighborhood will
+    contain the k-nearest neighbors of xi.
 
-    Notes
-    -----
-    No regression function (e.g. lstsq) is called. Instead "projection
-    vector" p_i_j is calculated, and y_fit[i] = sum(p_i_j * y[j]) = y_fit[i]
-    for j s.t. x[j] is in the neighborhood of x[i]. p_i_j is a function of
-    the weights, x[i], and its neighbors.
+    Once the right end hits the end of the data, hold the
+    neighborhood the same for the remaining points.
     '''
+    while right_end[0] < n:
+        if xi > (x[left_end[0]] + x[right_end[0]]) / 2.0:
+            left_end[0] += 1
+            right_end[0] += 1
+        else:
+            break
 
-    cdef:
-       double sum_weighted_x = 0, weighted_sqdev_x = 0, p_i_j
 
-    if reg_ok == False:
-        y_fit[i] = y[i]
-    else:
-        for j in xrange(left_end, right_end):
-            sum_weighted_x += weights[j] * x[j]
-        for j in xrange(left_end, right_end):
-            weighted_sqdev_x += weights[j] * (x[j] - sum_weighted_x) ** 2
-        for j in xrange(left_end, right_end):
-            p_i_j = weights[j] * (1.0 + (x[i] - sum_weighted_x) *
-                             (x[j] - sum_weighted_x) / weighted_sqdev_x)
-            y_fit[i] += p_i_j * y[j]
-
-cdef void interpolate_skipped_fits(np.ndarray[DTYPE_t, ndim = 1] x,
-                                   np.ndarray[DTYPE_t, ndim = 1] y_fit,
-                                   Py_ssize_t i,
-                                   Py_ssize_t last_fit_i):
+cdef bint _calculate_weights(double *x, double xi, double *prior_w,
+                             double *resid_weights, Py_ssize_t left_end,
+                             Py_ssize_t right_end, double radius,
+                             bint use_resid_weights, double *weights) nogil:
     '''
-    Calculate smoothed/fitted y by linear interpolation between the current
-    and previous y fitted by weighted regression.
-    Called only if delta > 0.
+    Normalized regression weights in the neighborhood [left_end, right_end).
 
-    Parameters
-    ----------
-    x: 1-D numpy array
-        The vector of input x-values.
-    y_fit: 1-D numpy array
-        The vector of fitted y-values
-    i: indexing integer
-        The index of the point currently being fit by weighted
-        regression.
-    last_fit_i: indexing integer
-        The index of the last point fit by weighted regression.
+    The weights are the tricube function of the distance to xi in units of
+    the radius, times the residual weights from the last iteration if
+    use_resid_weights, times the prior weights if they are not NULL.
 
-    Returns
-    -------
-    Nothing: changes elements of y_fit in-place.
+    Returns False if no weight is positive, in which case the regression
+    is skipped.
     '''
+    cdef:
+        Py_ssize_t j
+        double d, sum_weights = 0.0
+
+    for j in range(left_end, right_end):
+        if radius > 0:
+            # tricube (1 - d**3)**3
+            d = fabs(x[j] - xi) / radius
+            d = d * (d * d)
+            d = 1.0 - d
+            d = d * (d * d)
+        else:
+            # all points are tied with xi
+            d = 1.0
+        if use_resid_weights:
+            d = d * resid_weights[j]
+        if prior_w != NULL:
+            d = d * prior_w[j]
+        weights[j] = d
+        sum_weights += d
 
-    cdef np.ndarray[DTYPE_t, ndim = 1] a
+    if sum_weights <= 0.0:
+        return False
 
-    a = x[(last_fit_i + 1): i] - x[last_fit_i]
-    a =  a / (x[i] - x[last_fit_i])
-    y_fit[(last_fit_i + 1): i] = a * y_fit[i] + (1.0 - a) * y_fit[last_fit_i]
+    for j in range(left_end, right_end):
+        weights[j] = weights[j] / sum_weights
+    return True
 
 
-def update_indices(np.ndarray[DTYPE_t, ndim = 1] x,
-                   np.ndarray[DTYPE_t, ndim = 1] y_fit,
-                   double delta,
-                   Py_ssize_t i,
-                   Py_ssize_t n,
-                   Py_ssize_t last_fit_i):
+cdef double _local_fit(double *x, double *y, double xi, double *weights,
+                       Py_ssize_t left_end, Py_ssize_t right_end) nogil:
     '''
-    Update the counters of the local regression.
-
-    Parameters
-    ----------
-    x: 1-D numpy array
-        The vector of input x-values.
-    y_fit: 1-D numpy array
-        The vector of fitted y-values
-    delta: float
-        Indicates the range of x values within which linear
-        interpolation should be used to estimate y_fit instead
-        of weighted regression.
-    i: indexing integer
-        The index of the current point being fit.
-    n: indexing integer
-        The length of the input vectors, x and y.
-    last_fit_i: indexing integer
-        The last point at which y_fit was calculated.
+    Calculate smoothed/fitted y-value at xi by weighted regression.
 
-    Returns
-    -------
-    i: indexing integer
-        The next point at which to run a weighted regression.
-    last_fit_i: indexing integer
-        The updated last point at which y_fit was calculated
+    No regression function (e.g. lstsq) is called. Instead "projection
+    vector" p_i_j is calculated, and y_fit[i] = sum(p_i_j * y[j]) = y_fit[i]
+    for j s.t. x[j] is in the neighborhood of x[i]. p_i_j is a function of
+    the weights, x[i], and its neighbors.
 
-    Notes
-    -----
-    The relationship between the outputs is s.t. x[i+1] >
-    x[last_fit_i] + delta.
+    If all x in the neighborhood are tied, then this is the weighted mean.
+    '''
+    cdef:
+        Py_ssize_t j
+        double sum_weighted_x = 0, weighted_sqdev_x = 0, p_i_j
+        double y_fit = 0
+
+    for j in range(left_end, right_end):
+        sum_weighted_x += weights[j] * x[j]
+    for j in range(left_end, right_end):
+        weighted_sqdev_x += weights[j] * (x[j] - sum_weighted_x) ** 2
+    if weighted_sqdev_x <= 0:
+        for j in range(left_end, right_end):
+            y_fit += weights[j] * y[j]
+        return y_fit
+    for j in range(left_end, right_end):
+        p_i_j = weights[j] * (1.0 + (xi - sum_weighted_x) *
+                         (x[j] - sum_weighted_x) / weighted_sqdev_x)
+        y_fit += p_i_j * y[j]
+    return y_fit
+
+
+cdef void _update_indices(double *x, double *y_fit, double delta,
+                          Py_ssize_t n, Py_ssize_t *i,
+                          Py_ssize_t *last_fit_i) nogil:
+    '''
+    Update the counters of the local regression.
 
+    On return, i is the next point at which to run a weighted regression
+    and last_fit_i the last point at which y_fit was calculated. The
+    relationship between them is s.t. x[i+1] > x[last_fit_i] + delta.
     '''
     cdef:
-        Py_ssize_t k
+        Py_ssize_t k, kk
         double cutpoint
 
-    last_fit_i = i
-    k = last_fit_i
+    last_fit_i[0] = i[0]
+    k = last_fit_i[0]
     # For most points within delta of the current point, we skip the
     # weighted linear regression (which save much computation of
     # weights and fitted points). Instead, we'll jump to the last
@@ -494,116 +507,112 @@ def update_indices(np.ndarray[DTYPE_t, ndim = 1] x,
 
     # This loop increments until we fall just outside of delta distance,
     # copying the results for any repeated x's along the way.
-    cutpoint = x[last_fit_i] + delta
-    for k in range(last_fit_i + 1, n):
+    cutpoint = x[last_fit_i[0]] + delta
+    for kk in range(last_fit_i[0] + 1, n):
+        k = kk
         if x[k] > cutpoint:
             break
-        if x[k] == x[last_fit_i]:
+        if x[k] == x[last_fit_i[0]]:
             # if tied with previous x-value, just use the already
             # fitted y, and update the last-fit counter.
-            y_fit[k] = y_fit[last_fit_i]
-            last_fit_i = k
+            y_fit[k] = y_fit[last_fit_i[0]]
+            last_fit_i[0] = k
 
     # i, which indicates the next point to fit the regression at, is
     # either one prior to k (since k should be the first point outside
     # of delta) or is just incremented + 1 if k = i+1. This insures we
     # always step forward.
-    i = max(k-1, last_fit_i + 1)
-
-    return i, last_fit_i
+    if k - 1 > last_fit_i[0] + 1:
+        i[0] = k - 1
+    else:
+        i[0] = last_fit_i[0] + 1
 
 
-def calculate_residual_weights(np.ndarray[DTYPE_t, ndim = 1] y,
-                              np.ndarray[DTYPE_t, ndim = 1] y_fit):
+cdef void _residual_weights(double *y, double *y_fit, double *prior_w,
+                            Py_ssize_t n, double *resid_weights,
+                            double *scratch) nogil:
     '''
     Calculate residual weights for the next `robustifying` iteration.
 
-    Parameters
-    ----------
-    y: 1-D numpy array
-        The vector of actual input y-values.
-    y_fit: 1-D numpy array
-        The vector of fitted y-values from the current
-        iteration.
-
-    Returns
-    -------
-    resid_weights: 1-D numpy array
-        The vector of residual weights, to be used in the
-        next iteration of regressions.
+    These are the bi-square function (1 - r**2)**2 of the absolute residuals
+    r in units of 6 times their median. Observations with zero prior weight
+    are not used for the median.
     '''
-
-    std_resid = np.abs(y - y_fit)
-    std_resid /= 6.0 * np.median(std_resid)
-
-    # Some trimming of outlier residuals.
-    std_resid[std_resid >= 1.0] = 1.0
-    #std_resid[std_resid >= 0.999] = 1.0
-    #std_resid[std_resid <= 0.001] = 0.0
-
-    resid_weights = bisquare(std_resid)
-
-    return resid_weights
-
-
-cdef void tricube(np.ndarray[DTYPE_t, ndim = 1] x):
-    '''
-    The tri-cubic function (1 - x**3)**3. Used to weight neighboring
-    points along the x-axis based on their distance to the current point.
-
-    Parameters
-    ----------
-    x: 1-D numpy array
-        A vector of neighbors` distances from the current point,
-        in units of the neighborhood radius.
-
-    Returns
-    -------
-    Nothing. Changes array elements in-place
-    '''
-
-    # fast_array_cube is an elementwise, in-place cubed-power
-    # operator.
-    fast_array_cube(x)
-    x[:] = np.negative(x)
-    x += 1
-    fast_array_cube(x)
-
-
-cdef void fast_array_cube(np.ndarray[DTYPE_t, ndim = 1] x):
+    cdef:
+        Py_ssize_t j, nvalid = 0
+        double r, scale
+
+    for j in range(n):
+        r = fabs(y[j] - y_fit[j])
+        resid_weights[j] = r
+        if prior_w == NULL or prior_w[j] > 0:
+            scratch[nvalid] = r
+            nvalid += 1
+
+    if nvalid == 0:
+        for j in range(n):
+            resid_weights[j] = 1.0
+        return
+
+    scale = 6.0 * _median_inplace(scratch, nvalid)
+    for j in range(n):
+        r = resid_weights[j] / scale
+        # Some trimming of outlier residuals.
+        if r >= 1.0:
+            r = 1.0
+        r = 1.0 - r * r
+        resid_weights[j] = r * r
+
+
+cdef double _median_inplace(double *a, Py_ssize_t n) nogil:
     '''
-    A fast, elementwise, in-place cube operator. Called by the
-    tricube function.
-
-    Parameters
-    ----------
-    x: 1-D numpy array
-
-    Returns
-    -------
-    Nothing. Changes array elements in-place.
+    Median of the n values in a by selection, reorders a.
     '''
+    cdef:
+        Py_ssize_t j, half = n // 2
+        double upper, lower
 
-    x2 = x*x
-    x *= x2
+    upper = _select_inplace(a, n, half)
+    if n % 2 == 1:
+        return upper
+    # after the selection a[:half] holds the smaller values
+    lower = a[0]
+    for j in range(1, half):
+        if a[j] > lower:
+            lower = a[j]
+    return (lower + upper) / 2.0
 
 
-def bisquare(np.ndarray[DTYPE_t, ndim = 1] x):
+cdef double _select_inplace(double *a, Py_ssize_t n, Py_ssize_t kth) nogil:
     '''
-    The bi-square function (1 - x**2)**2.
+    kth smallest value of a by Wirth's selection algorithm.
 
-    Used to weight the residuals in the `robustifying`
-    iterations. Called by the calculate_residual_weights function.
-
-    Parameters
-    ----------
-    x: 1-D numpy array
-        A vector of absolute regression residuals, in units of
-        6 times the median absolute residual.
-
-    Returns
-    -------
-    A 1-D numpy array of residual weights.
+    On return a[kth] holds the kth smallest value, the values before it are
+    not larger and the values after it are not smaller.
     '''
+    cdef:
+        Py_ssize_t left = 0, right = n - 1, i, j
+        double pivot, tmp
 
-    return (1.0 - x**2)**2
+    while left < right:
+        pivot = a[kth]
+        i = left
+        j = right
+        while True:
+            while a[i] < pivot:
+                i += 1
+            while pivot < a[j]:
+                j -= 1
+            if i <= j:
+                tmp = a[i]
+                a[i] = a[j]
+                a[j] = tmp
+                i += 1
+                j -= 1
+            if i > j:
+                break
+        if j < kth:
+            left = i
+        if kth < i:
+            right = j
+    return a[kth]
@@ -111,6 +111,8 @@ class KDEUnivariate(object):
             - "normal_reference" - C * A * nobs ** (-1/5.), where C is
                calculated from the kernel. Equivalent (up to 2 dp) to the
                "scott" bandwidth for gaussian kernels. See bandwidths.py
+            - "sj" - Sheather-Jones solve-the-equation plug-in bandwidth
+            - "lscv" - least squares cross-validation bandwidth
             - If a float is given, it is the bandwidth.
 
         fft : bool
@@ -295,6 +297,8 @@ def kdensity(X, kernel="gau", bw="normal_reference", weights=None, gridsize=None
     bw : str, float
         "scott" - 1.059 * A * nobs ** (-1/5.), where A is min(std(X),IQR/1.34)
         "silverman" - .9 * A * nobs ** (-1/5.), where A is min(std(X),IQR/1.34)
+        "sj" - Sheather-Jones plug-in, see bandwidths.bw_sj
+        "lscv" - least squares cross-validation, see bandwidths.bw_lscv
         If a float is given, it is the bandwidth.
     weights : array or None
         Optional  weights. If the X value is clipped, then this weight is
@@ -408,6 +412,8 @@ def kdensityfft(X, kernel="gau", bw="normal_reference", weights=None, gridsize=N
     bw : str, float
         "scott" - 1.059 * A * nobs ** (-1/5.), where A is min(std(X),IQR/1.34)
         "silverman" - .9 * A * nobs ** (-1/5.), where A is min(std(X),IQR/1.34)
+        "sj" - Sheather-Jones plug-in, see bandwidths.bw_sj
+        "lscv" - least squares cross-validation, see bandwidths.bw_lscv
         If a float is given, it is the bandwidth.
     weights : array or None
         WEIGHTS ARE NOT CURRENTLY IMPLEMENTED.
@@ -35,7 +35,7 @@ import numpy as np
 
 from . import kernels
 from ._kernel_base import GenericKDE, EstimatorSettings, gpke, \
-    LeaveOneOut, _adjust_shape
+    gpke_matrix, LeaveOneOut, _adjust_shape
 
 
 __all__ = ['KDEMultivariate', 'KDEMultivariateConditional', 'EstimatorSettings']
@@ -432,6 +432,9 @@ class KDEMultivariateConditional(GenericKDE):
         rpr += "BW selection method: " + self._bw_method + "\n"
         return rpr
 
+    # maximum number of elements of the kernel matrices in pdf and cdf
+    _max_kernel_size = 2**20
+
     def loo_likelihood(self, bw, func=lambda x: x):
         """
         Returns the leave-one-out conditional likelihood of the data.
@@ -511,17 +514,7 @@ class KDEMultivariateConditional(GenericKDE):
         else:
             exog_predict = _adjust_shape(exog_predict, self.k_indep)
 
-        pdf_est = []
-        data_predict = np.column_stack((endog_predict, exog_predict))
-        for i in range(np.shape(data_predict)[0]):
-            f_yx = gpke(self.bw, data=self.data,
-                        data_predict=data_predict[i, :],
-                        var_type=(self.dep_type + self.indep_type))
-            f_x = gpke(self.bw[self.k_dep:], data=self.exog,
-                       data_predict=exog_predict[i, :],
-                       var_type=self.indep_type)
-            pdf_est.append(f_yx / f_x)
-
+        pdf_est = self._conditional_kernel_ratio(endog_predict, exog_predict)
         return np.squeeze(pdf_est)
 
     def cdf(self, endog_predict=None, exog_predict=None):
@@ -565,28 +558,35 @@ class KDEMultivariateConditional(GenericKDE):
         else:
             exog_predict = _adjust_shape(exog_predict, self.k_indep)
 
-        N_data_predict = np.shape(exog_predict)[0]
-        cdf_est = np.empty(N_data_predict)
-        for i in range(N_data_predict):
-            mu_x = gpke(self.bw[self.k_dep:], data=self.exog,
-                        data_predict=exog_predict[i, :],
-                        var_type=self.indep_type) / self.nobs
-            mu_x = np.squeeze(mu_x)
-            cdf_endog = gpke(self.bw[0:self.k_dep], data=self.endog,
-                             data_predict=endog_predict[i, :],
-                             var_type=self.dep_type,
-                             ckertype="gaussian_cdf",
-                             ukertype="aitchisonaitken_cdf",
-                             okertype='wangryzin_cdf', tosum=False)
-
-            cdf_exog = gpke(self.bw[self.k_dep:], data=self.exog,
-                            data_predict=exog_predict[i, :],
-                            var_type=self.indep_type, tosum=False)
-            S = (cdf_endog * cdf_exog).sum(axis=0)
-            cdf_est[i] = S / (self.nobs * mu_x)
-
+        cdf_est = self._conditional_kernel_ratio(
+            endog_predict, exog_predict, ckertype="gaussian_cdf",
+            ukertype="aitchisonaitken_cdf", okertype='wangryzin_cdf')
         return cdf_est
 
+    def _conditional_kernel_ratio(self, endog_predict, exog_predict,
+                                  **dep_kertypes):
+        """
+        Ratio of the joint to the marginal kernel sums at each point.
+
+        The joint sum multiplies the kernels of the dependent variables,
+        using the kernel types in `dep_kertypes`, with the kernels of the
+        independent variables. The kernels of the independent variables are
+        computed once for both sums. Evaluation points are processed in
+        blocks to limit the memory of the (nobs, block) kernel matrices.
+        """
+        npredict = exog_predict.shape[0]
+        res = np.empty(npredict)
+        block = max(1, self._max_kernel_size // self.nobs)
+        for start in range(0, npredict, block):
+            sl = slice(start, start + block)
+            k_exog = gpke_matrix(self.bw[self.k_dep:], self.exog,
+                                 exog_predict[sl], self.indep_type)
+            k_endog = gpke_matrix(self.bw[:self.k_dep], self.endog,
+                                  endog_predict[sl], self.dep_type,
+                                  **dep_kertypes)
+            res[sl] = (k_endog * k_exog).sum(0) / k_exog.sum(0)
+        return res
+
     def imse(self, bw):
         r"""
         The integrated mean square error for the conditional KDE.
@@ -36,9 +36,12 @@ import copy
 import numpy as np
 from scipy import optimize
 from scipy.stats.mstats import mquantiles
+from statsmodels.tools.parallel import map_blocks
+from statsmodels.tools.tools import check_random_state
 
 from ._kernel_base import GenericKDE, EstimatorSettings, gpke, \
-    LeaveOneOut, _get_type_pos, _adjust_shape, _compute_min_std_IQR
+    gpke_matrix, LeaveOneOut, _get_type_pos, _adjust_shape, \
+    _compute_min_std_IQR
 
 
 
@@ -90,6 +93,9 @@ class KernelReg(GenericKDE):
     fit : calculates the conditional mean and marginal effects.
 
     """
+    # maximum number of elements of the temporary kernel arrays in `fit`
+    _max_kernel_size = 2**20
+
     def __init__(self, endog, exog, var_type, reg_type='ll', bw='cv_ls',
                  defaults=EstimatorSettings()):
         self.var_type = var_type
@@ -361,7 +367,6 @@ class KernelReg(GenericKDE):
             The marginal effects, i.e. the partial derivatives of the mean.
 
         """
-        func = self.est[self.reg_type]
         if data_predict is None:
             data_predict = self.exog
         else:
@@ -370,16 +375,73 @@ class KernelReg(GenericKDE):
         N_data_predict = np.shape(data_predict)[0]
         mean = np.empty((N_data_predict,))
         mfx = np.empty((N_data_predict, self.k_vars))
-        for i in range(N_data_predict):
-            mean_mfx = func(self.bw, self.endog, self.exog,
-                            data_predict=data_predict[i, :])
-            mean[i] = mean_mfx[0]
-            mfx_c = np.squeeze(mean_mfx[1])
-            mfx[i, :] = mfx_c
+        endog = self.endog[:, 0]
+        blocksize = self._max_kernel_size // (self.nobs * (self.k_vars + 1))
+        for sl in _blocks(N_data_predict, blocksize):
+            L_mean, L_mfx = self._smoother(data_predict[sl])
+            mean[sl] = L_mean.dot(endog)
+            mfx[sl] = L_mfx.dot(endog)
 
         return mean, mfx
 
-    def sig_test(self, var_pos, nboot=50, nested_res=25, pivot=False):
+    def _kernel_weights(self, data_predict):
+        """
+        Kernel weights of the observations at data_predict, (npredict, nobs)
+
+        Returns the kernel weights and, for the local constant estimator,
+        the weights of the derivative of the kernel (None for 'll').
+        """
+        ker = gpke_matrix(self.bw, self.exog, data_predict, self.var_type).T
+        if self.reg_type == 'll':
+            return ker, None
+        ker_d = gpke_matrix(self.bw, self.exog, data_predict, self.var_type,
+                            ckertype='d_gaussian').T
+        return ker, ker_d
+
+    def _smoother(self, data_predict, weights=None, kernels=None):
+        """
+        Linear smoother matrices of the mean and the marginal effects.
+
+        For given bandwidth and exog the estimates are linear in endog,
+        ``fit(data_predict)`` is ``(L_mean.dot(endog), L_mfx.dot(endog))``.
+
+        Parameters
+        ----------
+        data_predict : 2-D ndarray
+            Points at which the mean and marginal effects are estimated.
+        weights : 1-D ndarray, optional
+            Frequency weights of the observations, for example the number
+            of times that an observation is drawn in a resample.
+        kernels : tuple, optional
+            The result of ``_kernel_weights(data_predict)``, to reuse the
+            kernel weights with different `weights`.
+
+        Returns
+        -------
+        L_mean : ndarray, (npredict, nobs)
+        L_mfx : ndarray, (npredict, k_vars, nobs)
+        """
+        if kernels is None:
+            kernels = self._kernel_weights(data_predict)
+        ker, ker_d = kernels
+        if weights is not None:
+            ker = ker * weights
+        if self.reg_type == 'll':
+            return _smoother_loc_linear(ker, self.exog, data_predict)
+
+        if weights is not None:
+            ker_d = ker_d * weights
+        sum_ker = ker.sum(axis=1)[:, None]
+        L_mean = ker / sum_ker
+        # see `_est_loc_constant`, the derivative does not depend on the
+        # variable
+        L_d = (sum_ker * ker_d - ker_d.sum(axis=1)[:, None] * ker)
+        L_d /= self.nobs * sum_ker**2
+        L_mfx = np.repeat(L_d[:, None, :], self.k_vars, axis=1)
+        return L_mean, L_mfx
+
+    def sig_test(self, var_pos, nboot=50, nested_res=25, pivot=False,
+                 random_state=None, n_jobs=1):
         """
         Significance test for the variables in the regression.
 
@@ -387,6 +449,20 @@ class KernelReg(GenericKDE):
         ----------
         var_pos: sequence
             The position of the variable in exog to be tested.
+        nboot : int
+            Number of bootstrap replications.
+        nested_res : int
+            Number of nested resamples for the standard error of the test
+            statistic if pivot is True, continuous variables only.
+        pivot : bool
+            Whether to divide the statistic of continuous variables by its
+            standard error.
+        random_state : None, int or np.random.RandomState
+            Source of the random numbers of the bootstrap. If None, the
+            global numpy random number generator is used.
+        n_jobs : int
+            Number of threads for the bootstrap replications, -1 uses all
+            CPUs. The results do not depend on n_jobs.
 
         Returns
         -------
@@ -405,9 +481,11 @@ class KernelReg(GenericKDE):
             if np.any(ix_ord[var_pos]) or np.any(ix_unord[var_pos]):
                 raise ValueError("Discrete variable in hypothesis. Must be continuous")
 
-            Sig = TestRegCoefC(self, var_pos, nboot, nested_res, pivot)
+            Sig = TestRegCoefC(self, var_pos, nboot, nested_res, pivot,
+                               random_state=random_state, n_jobs=n_jobs)
         else:
-            Sig = TestRegCoefD(self, var_pos, nboot)
+            Sig = TestRegCoefD(self, var_pos, nboot,
+                               random_state=random_state, n_jobs=n_jobs)
 
         return Sig.sig
 
@@ -697,6 +775,11 @@ class TestRegCoefC(object):
         Significantly increases computational time. But pivot statistics
         have more desirable properties
         (See references)
+    random_state : None, int or np.random.RandomState
+        Source of the random numbers. If None, the global numpy random
+        number generator is used.
+    n_jobs : int
+        Number of threads for the bootstrap replications, -1 uses all CPUs.
 
     Attributes
     ----------
@@ -713,6 +796,14 @@ class TestRegCoefC(object):
     This class allows testing of joint hypothesis as long as all variables
     are continuous.
 
+    For the fixed bandwidth of the model the marginal effects are linear in
+    the dependent variable, their smoother matrix is computed once and
+    applied to all bootstrap samples. The bootstrap samples add resampled
+    residuals of the restricted model to its fitted values. The nested
+    resamples of the pivot reweight the kernel weights of the model with
+    the counts of the observations in the resample, the same nested
+    resamples are used for all bootstrap samples.
+
     References
     ----------
     Racine, J.: "Consistent Significance Testing for Nonparametric Regression"
@@ -724,7 +815,7 @@ class TestRegCoefC(object):
     # Racine: Consistent Significance Testing for Nonparametric Regression
     # Journal of Business & Economics Statistics
     def __init__(self, model, test_vars, nboot=400, nested_res=400,
-                 pivot=False):
+                 pivot=False, random_state=None, n_jobs=1):
         self.nboot = nboot
         self.nres = nested_res
         self.test_vars = test_vars
@@ -737,40 +828,64 @@ class TestRegCoefC(object):
         self.gx = model.est[model.reg_type]
         self.test_vars = test_vars
         self.pivot = pivot
+        self.random_state = check_random_state(random_state)
+        self.n_jobs = n_jobs
         self.run()
 
     def run(self):
-        self.test_stat = self._compute_test_stat(self.endog, self.exog)
+        n = self.exog.shape[0]
+        blocksize = self.model._max_kernel_size // (n * (self.k_vars + 1))
+        # the kernel weights are the same for all nested resamples, only
+        # the frequency weights of the observations change
+        self._kernel_blocks = [(sl, self.model._kernel_weights(self.exog[sl]))
+                               for sl in _blocks(n, blocksize)]
+        self._mfx_smoother = self._compute_mfx_smoother()
+        if self.pivot:
+            idx = self.random_state.randint(0, n, size=(self.nres, n))
+            self._resample_counts = np.array([np.bincount(ii, minlength=n)
+                                              for ii in idx])
+        Y = np.column_stack((self.endog, self._bootstrap_endog()))
+        # the nested resamples are already processed in threads
+        n_jobs = 1 if self.pivot else self.n_jobs
+        t = np.concatenate(map_blocks(
+            lambda start, stop: self._compute_test_stat(Y[:, start:stop]),
+            Y.shape[1], n_jobs))
+        self.test_stat = t[0]
+        self.t_dist = t[1:]
         self.sig = self._compute_sig()
 
-    def _compute_test_stat(self, Y, X):
+    def _compute_mfx_smoother(self, weights=None):
+        """Smoother of the marginal effects of the test variables"""
+        n = self.exog.shape[0]
+        test_vars = np.atleast_1d(self.test_vars)
+        L = np.empty((n, len(test_vars), n))
+        for sl, kernels in self._kernel_blocks:
+            L[sl] = self.model._smoother(self.exog[sl], weights,
+                                         kernels)[1][:, test_vars]
+        return L.reshape(-1, n)
+
+    def _compute_test_stat(self, Y):
         """
-        Computes the test statistic.  See p.371 in [8].
+        Computes the test statistic for each column of Y.  See p.371 in [8].
         """
-        lam = self._compute_lambda(Y, X)
+        lam = self._compute_lambda(Y)
         t = lam
         if self.pivot:
-            se_lam = self._compute_se_lambda(Y, X)
-            t = lam / float(se_lam)
+            se_lam = self._compute_se_lambda(Y)
+            t = lam / se_lam
 
         return t
 
-    def _compute_lambda(self, Y, X):
+    def _compute_lambda(self, Y):
         """Computes only lambda -- the main part of the test statistic"""
-        n = np.shape(X)[0]
-        Y = _adjust_shape(Y, 1)
-        X = _adjust_shape(X, self.k_vars)
-        b = KernelReg(Y, X, self.var_type, self.model.reg_type, self.bw,
-                        defaults = EstimatorSettings(efficient=False)).fit()[1]
-
-        b = b[:, self.test_vars]
-        b = np.reshape(b, (n, len(self.test_vars)))
+        n = np.shape(Y)[0]
+        b = self._mfx_smoother.dot(Y)
         #fct = np.std(b)  # Pivot the statistic by dividing by SE
         fct = 1.  # Don't Pivot -- Bootstrapping works better if Pivot
-        lam = ((b / fct) ** 2).sum() / float(n)
+        lam = ((b / fct) ** 2).sum(axis=0) / float(n)
         return lam
 
-    def _compute_se_lambda(self, Y, X):
+    def _compute_se_lambda(self, Y):
         """
         Calculates the SE of lambda by nested resampling
         Used to pivot the statistic.
@@ -778,25 +893,26 @@ class TestRegCoefC(object):
         but slows down computation significantly.
         """
         n = np.shape(Y)[0]
-        lam = np.empty(shape=(self.nres, ))
-        for i in range(self.nres):
-            ind = np.random.random_integers(0, n-1, size=(n,1))
-            Y1 = Y[ind, 0]
-            X1 = X[ind, :]
-            lam[i] = self._compute_lambda(Y1, X1)
-
-        se_lambda = np.std(lam)
+        counts = self._resample_counts
+        ntest = len(np.atleast_1d(self.test_vars))
+
+        def lam_resamples(start, stop):
+            lam = np.empty((stop - start, Y.shape[1]))
+            for i in range(start, stop):
+                c = counts[i]
+                b = self._compute_mfx_smoother(weights=c).dot(Y)
+                lam[i - start] = np.repeat(c, ntest).dot(b**2) / float(n)
+            return lam
+
+        lam = np.concatenate(map_blocks(lam_resamples, self.nres,
+                                         self.n_jobs))
+        se_lambda = np.std(lam, axis=0)
         return se_lambda
 
-    def _compute_sig(self):
+    def _bootstrap_endog(self):
         """
-        Computes the significance value for the variable(s) tested.
-
-        The empirical distribution of the test statistic is obtained through
-        bootstrapping the sample.  The null hypothesis is rejected if the test
-        statistic is larger than the 90, 95, 99 percentiles.
+        Bootstrap samples of endog under the null hypothesis, (nobs, nboot)
         """
-        t_dist = np.empty(shape=(self.nboot, ))
         Y = self.endog
         X = copy.deepcopy(self.exog)
         n = np.shape(Y)[0]
@@ -808,13 +924,18 @@ class TestRegCoefC(object):
         M = np.reshape(M, (n, 1))
         e = Y - M
         e = e - np.mean(e)  # recenter residuals
-        for i in range(self.nboot):
-            ind = np.random.random_integers(0, n-1, size=(n,1))
-            e_boot = e[ind, 0]
-            Y_boot = M + e_boot
-            t_dist[i] = self._compute_test_stat(Y_boot, self.exog)
+        ind = self.random_state.randint(0, n, size=(self.nboot, n))
+        return M + e[ind.T, 0]
+
+    def _compute_sig(self):
+        """
+        Computes the significance value for the variable(s) tested.
 
-        self.t_dist = t_dist
+        The empirical distribution of the test statistic is obtained through
+        bootstrapping the sample.  The null hypothesis is rejected if the test
+        statistic is larger than the 90, 95, 99 percentiles.
+        """
+        t_dist = self.t_dist
         sig = "Not Significant"
         if self.test_stat > mquantiles(t_dist, 0.9):
             sig = "*"
@@ -843,6 +964,11 @@ class TestRegCoefD(TestRegCoefC):
     nboot: int
         Number of bootstrap samples used to determine the distribution
         of the test statistic in a finite sample. Default is 400
+    random_state : None, int or np.random.RandomState
+        Source of the random numbers. If None, the global numpy random
+        number generator is used.
+    n_jobs : int
+        Number of threads for the bootstrap replications, -1 uses all CPUs.
 
     Attributes
     ----------
@@ -859,81 +985,115 @@ class TestRegCoefD(TestRegCoefC):
     This class currently doesn't allow joint hypothesis.
     Only one variable can be tested at a time
 
+    The smoother matrices of the mean at each level of the test variable
+    are computed once and applied to all wild bootstrap samples.
+
     References
     ----------
     See [9] and chapter 12 in [1].
     """
+    def __init__(self, model, test_vars, nboot=400, random_state=None,
+                 n_jobs=1):
+        super(TestRegCoefD, self).__init__(model, test_vars, nboot=nboot,
+                                           pivot=False,
+                                           random_state=random_state,
+                                           n_jobs=n_jobs)
 
-    def _compute_test_stat(self, Y, X):
-        """Computes the test statistic"""
-
-        dom_x = np.sort(np.unique(self.exog[:, self.test_vars]))
-
-        n = np.shape(X)[0]
-        model = KernelReg(Y, X, self.var_type, self.model.reg_type, self.bw,
-                          defaults = EstimatorSettings(efficient=False))
-        X1 = copy.deepcopy(X)
-        X1[:, self.test_vars] = 0
-
-        m0 = model.fit(data_predict=X1)[0]
-        m0 = np.reshape(m0, (n, 1))
-        I = np.zeros((n, 1))
-        for i in dom_x[1:] :
-            X1[:, self.test_vars] = i
-            m1 = model.fit(data_predict=X1)[0]
-            m1 = np.reshape(m1, (n, 1))
-            I += (m1 - m0) ** 2
+    def run(self):
+        self.dom_x = np.sort(np.unique(self.exog[:, self.test_vars]))
+        # smoother of the mean with the test variable set to each level,
+        # the test statistic compares with the level 0
+        levels = np.union1d([0], self.dom_x)
+        self._mean_smoothers = dict((lev, self._compute_mean_smoother(lev))
+                                    for lev in levels)
+        self._diff_smoother = np.vstack([self._mean_smoothers[lev] -
+                                         self._mean_smoothers[0]
+                                         for lev in self.dom_x[1:]])
+        Y = np.column_stack((self.endog, self._bootstrap_endog()))
+        t = np.concatenate(map_blocks(
+            lambda start, stop: self._compute_test_stat(Y[:, start:stop]),
+            Y.shape[1], self.n_jobs))
+        self.test_stat = t[0]
+        self.t_dist = t[1:]
+        self.sig = self._compute_sig()
 
-        I = I.sum(axis=0) / float(n)
+    def _compute_mean_smoother(self, level):
+        """Smoother of the mean with the test variable set to level"""
+        n = self.exog.shape[0]
+        X1 = copy.deepcopy(self.exog)
+        X1[:, self.test_vars] = level
+        L = np.empty((n, n))
+        blocksize = self.model._max_kernel_size // (n * (self.k_vars + 1))
+        for sl in _blocks(n, blocksize):
+            L[sl] = self.model._smoother(X1[sl])[0]
+        return L
+
+    def _compute_test_stat(self, Y):
+        """Computes the test statistic for each column of Y"""
+        n = np.shape(Y)[0]
+        I = (self._diff_smoother.dot(Y) ** 2).sum(axis=0) / float(n)
         return I
 
-    def _compute_sig(self):
-        """Calculates the significance level of the variable tested"""
-
+    def _bootstrap_endog(self):
+        """
+        Bootstrap samples of endog under the null hypothesis, (nobs, nboot)
+        """
         m = self._est_cond_mean()
         Y = self.endog
-        X = self.exog
-        n = np.shape(X)[0]
         u = Y - m
         u = u - np.mean(u)  # center
-        fct1 = (1 - 5**0.5) / 2.
-        fct2 = (1 + 5**0.5) / 2.
-        u1 = fct1 * u
-        u2 = fct2 * u
-        r = fct2 / (5 ** 0.5)
-        I_dist = np.empty((self.nboot,1))
-        for j in range(self.nboot):
-            u_boot = copy.deepcopy(u2)
-
-            prob = np.random.uniform(0,1, size = (n,1))
-            ind = prob < r
-            u_boot[ind] = u1[ind]
-            Y_boot = m + u_boot
-            I_dist[j] = self._compute_test_stat(Y_boot, X)
-
-        sig = "Not Significant"
-        if self.test_stat > mquantiles(I_dist, 0.9):
-            sig = "*"
-        if self.test_stat > mquantiles(I_dist, 0.95):
-            sig = "**"
-        if self.test_stat > mquantiles(I_dist, 0.99):
-            sig = "***"
-
-        return sig
+        return m + _wild_residuals(u, self.nboot, self.random_state)
 
     def _est_cond_mean(self):
         """
         Calculates the expected conditional mean
         m(X, Z=l) for all possible l
         """
-        self.dom_x = np.sort(np.unique(self.exog[:, self.test_vars]))
-        X = copy.deepcopy(self.exog)
-        m=0
+        m = 0
         for i in self.dom_x:
-            X[:, self.test_vars]  = i
-            m += self.model.fit(data_predict = X)[0]
+            m += self._mean_smoothers[i].dot(self.endog)
 
         m = m / float(len(self.dom_x))
-        m = np.reshape(m, (np.shape(self.exog)[0], 1))
         return m
 
+
+def _smoother_loc_linear(ker, exog, data_predict):
+    """
+    Smoother matrices of the local linear estimator.
+
+    `ker` are the kernel weights, (npredict, nobs). See `_est_loc_linear`
+    for the estimator at a single point.
+    """
+    npredict, nobs = ker.shape
+    k_vars = exog.shape[1]
+    Z = np.empty((npredict, nobs, k_vars + 1))
+    Z[:, :, 0] = 1
+    Z[:, :, 1:] = exog[None, :, :] - data_predict[:, None, :]
+    KZ = Z * ker[:, :, None]
+    M = np.einsum('ija,ijb->iab', KZ, Z)
+    M_inv = np.array([np.linalg.pinv(M_i) for M_i in M])
+    L = np.einsum('iab,ijb->iaj', M_inv, KZ)
+    return L[:, 0], L[:, 1:]
+
+
+def _wild_residuals(u, nboot, random_state):
+    """
+    Wild bootstrap residuals, (nobs, nboot)
+
+    Uses Mammen's two point distribution, u times (1 - sqrt(5)) / 2 with
+    probability (1 + sqrt(5)) / (2 sqrt(5)) and u times (1 + sqrt(5)) / 2
+    otherwise.
+    """
+    n = u.shape[0]
+    fct1 = (1 - 5**0.5) / 2.
+    fct2 = (1 + 5**0.5) / 2.
+    r = fct2 / (5 ** 0.5)
+    prob = random_state.uniform(0, 1, size=(nboot, n)).T
+    return np.where(prob < r, fct1, fct2) * u.reshape(n, 1)
+
+
+def _blocks(n, blocksize):
+    """slices of consecutive blocks of range(n)"""
+    blocksize = max(int(blocksize), 1)
+    return [slice(start, min(start + blocksize, n))
+            for start in range(0, n, blocksize)]
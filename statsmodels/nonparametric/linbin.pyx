@@ -24,15 +24,21 @@ def fast_linbin(np.ndarray[DOUBLE] X, double a, double b, int M, int trunc=1):
         double delta = (b - a)/(M - 1)
         np.ndarray[DOUBLE] gcnts = np.zeros(M, np.float)
         np.ndarray[DOUBLE] lxi = (X - a)/delta
-        np.ndarray[INT] li = lxi.astype(int)
+        np.ndarray[INT] li = np.floor(lxi).astype(int)
         np.ndarray[DOUBLE] rem = lxi - li
 
 
     for i in range(nobs):
         li_i = li[i]
-        if li_i > 1 and li_i < M:
+        if li_i >= 0 and li_i < M - 1:
             gcnts[li_i] = gcnts[li_i] + 1 - rem[i]
             gcnts[li_i+1] = gcnts[li_i+1] + rem[i]
-        if li_i > M and trunc == 0:
-            gcnts[M] = gcnts[M] + 1
+        elif li_i == M - 1 and rem[i] == 0:
+            # observation at the upper end point b
+            gcnts[li_i] = gcnts[li_i] + 1
+        elif trunc == 0:
+            if li_i < 0:
+                gcnts[0] = gcnts[0] + 1
+            else:
+                gcnts[M - 1] = gcnts[M - 1] + 1
     return gcnts
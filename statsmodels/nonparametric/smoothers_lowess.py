@@ -8,10 +8,12 @@ Author : Josef Perktold
 """
 
 import numpy as np
+from statsmodels.tools.parallel import map_blocks
 from ._smoothers_lowess import lowess as _lowess
+from ._smoothers_lowess import lowess_batch as _lowess_batch
 
 def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
-           missing='drop', return_sorted=True):
+           missing='drop', return_sorted=True, weights=None, xvals=None):
     '''LOWESS (Locally Weighted Scatterplot Smoothing)
 
     A lowess function that outs smoothed estimates of endog
@@ -56,6 +58,8 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
         the associated estimated y (endog) values.
         If return_sorted is False, then only the fitted values are returned,
         and the observations will be in the same order as the input arrays.
+        If xvals is provided, then the 1-D array of smoothed values at
+        xvals is returned.
 
     Notes
     -----
@@ -92,6 +96,13 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
     Some experimentation is likely required to find a good
     choice of `frac` and `iter` for a particular dataset.
 
+    If `xvals` is given, then the robustifying iterations are computed at
+    the observed exog, and the final local regressions are evaluated at
+    xvals using the last residual weights. Evaluating at the observed exog
+    reproduces the fitted values if delta is zero. `delta` is not used in
+    the evaluation at xvals. Points of xvals for which all weights in the
+    neighborhood are zero have a nan estimate.
+
     References
     ----------
     Cleveland, W.S. (1979) "Robust Locally Weighted Regression
@@ -135,10 +146,23 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
         raise ValueError('endog must be a vector')
     if endog.shape[0] != exog.shape[0] :
         raise ValueError('exog and endog must have same length')
+    if weights is not None:
+        weights = np.asarray(weights, float)
+        if weights.shape != endog.shape:
+            raise ValueError('weights must have the same shape as endog')
+        if np.any(weights < 0):
+            raise ValueError('weights must be non-negative')
+    if xvals is not None:
+        xvals = np.asarray(xvals, float)
+        if xvals.ndim != 1:
+            raise ValueError('xvals must be a vector')
 
+    w = weights
     if missing in ['drop', 'raise']:
         # Cut out missing values
         mask_valid = (np.isfinite(exog) & np.isfinite(endog))
+        if weights is not None:
+            mask_valid &= np.isfinite(weights)
         all_valid = np.all(mask_valid)
         if all_valid:
             y = endog
@@ -147,6 +171,8 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
             if missing == 'drop':
                 x = exog[mask_valid]
                 y = endog[mask_valid]
+                if weights is not None:
+                    w = weights[mask_valid]
             else:
                 raise ValueError('nan or inf found in data')
     elif missing == 'none':
@@ -161,8 +187,19 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
         sort_index = np.argsort(x)
         x = np.array(x[sort_index])
         y = np.array(y[sort_index])
+        if w is not None:
+            w = np.array(w[sort_index])
+
+    if xvals is not None:
+        # evaluation points are sorted for the neighborhood search
+        xvals_index = np.argsort(xvals)
+        yfitted = _lowess(y, x, frac=frac, it=it, delta=delta, weights=w,
+                          xvals=xvals[xvals_index])
+        yfitted_ = np.empty_like(yfitted)
+        yfitted_[xvals_index] = yfitted
+        return yfitted_
 
-    res = _lowess(y, x, frac=frac, it=it, delta=delta)
+    res = _lowess(y, x, frac=frac, it=it, delta=delta, weights=w)
     _, yfitted = res.T
 
     if return_sorted:
@@ -186,3 +223,138 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
 
         # we don't need to return exog anymore
         return yfitted
+
+
+def _broadcast_rows(arr, nseries, nobs, name):
+    """2-D C-contiguous array with one shared row or one row per series
+    """
+    arr = np.ascontiguousarray(arr, dtype=float)
+    if arr.ndim == 1:
+        arr = arr.reshape(1, -1)
+    if arr.ndim != 2 or arr.shape[0] not in (1, nseries):
+        raise ValueError('%s must be 1-D or have one row per series' % name)
+    if nobs is not None and arr.shape[1] != nobs:
+        raise ValueError('%s and endog must have same number of '
+                         'observations' % name)
+    return arr
+
+
+def lowess_batch(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
+                 weights=None, xvals=None, n_jobs=1):
+    '''LOWESS smoothing of many series in one call
+
+    Parameters
+    ----------
+    endog : 2-D array_like, (nseries, nobs)
+        Each row holds the y-values of one series.
+    exog : array_like
+        The x-values, either a 1-D array of length nobs that is shared by
+        all series or a 2-D array with one row per series.
+    frac : float
+        Between 0 and 1. The fraction of the data used
+        when estimating each y-value.
+    it : int
+        The number of residual-based reweightings
+        to perform.
+    delta : float
+        Distance within which to use linear-interpolation
+        instead of weighted regression.
+    is_sorted : bool
+        If False (default), then each series is sorted by its exog before
+        calculating lowess. If True, then it is assumed that exog (and
+        xvals) are already increasing in each row.
+    weights : None or array_like
+        Non-negative prior weights, 1-D shared by all series or 2-D with one
+        row per series.
+    xvals : None or array_like
+        Evaluation points, 1-D shared by all series or 2-D with one row per
+        series.
+    n_jobs : int
+        Number of threads that smooth blocks of series concurrently. -1
+        uses one thread per CPU. The smoothing loop releases the GIL.
+
+    Returns
+    -------
+    yhat : ndarray, (nseries, nobs) or (nseries, nxvals)
+        The smoothed values in the order of the observations of each row
+        of endog, or at xvals in the order of xvals if they are given.
+
+    Notes
+    -----
+    This computes the same fit as `lowess` for each row, see `lowess` for
+    the description of the options. Missing values are not allowed. An
+    observation can be excluded from the fit of a series by giving it a
+    zero weight.
+
+    See Also
+    --------
+    lowess
+
+    Examples
+    --------
+    >>> x = np.linspace(0, 10, 50)
+    >>> y = np.sin(x) + np.random.normal(size=(1000, 50))
+    >>> yhat = lowess_batch(y, x, frac=0.3, it=1, n_jobs=4)
+    '''
+    endog = np.ascontiguousarray(endog, dtype=float)
+    if endog.ndim != 2:
+        raise ValueError('endog must be 2-D with one row per series')
+    nseries, nobs = endog.shape
+    exog = _broadcast_rows(exog, nseries, nobs, 'exog')
+    if weights is not None:
+        weights = _broadcast_rows(weights, nseries, nobs, 'weights')
+        if np.any(weights < 0):
+            raise ValueError('weights must be non-negative')
+    if xvals is not None:
+        xvals = _broadcast_rows(xvals, nseries, None, 'xvals')
+
+    for arr in (endog, exog, weights, xvals):
+        if arr is not None and not np.all(np.isfinite(arr)):
+            raise ValueError('nan or inf found in data')
+
+    if not is_sorted:
+        sort_index = np.argsort(exog, axis=1)
+
+        def permute(arr):
+            # apply the observation permutation of each series to arr
+            if arr is None:
+                return None
+            if sort_index.shape[0] == 1:
+                return np.ascontiguousarray(arr[:, sort_index[0]])
+            if arr.shape[0] == 1:
+                return np.ascontiguousarray(arr[0][sort_index])
+            return np.ascontiguousarray(arr[np.arange(nseries)[:, None],
+                                            sort_index])
+
+        exog = permute(exog)
+        endog = permute(endog)
+        weights = permute(weights)
+        if xvals is not None:
+            xvals_index = np.argsort(xvals, axis=1)
+            xvals = np.ascontiguousarray(
+                xvals[np.arange(xvals.shape[0])[:, None], xvals_index])
+
+    def smooth(start, stop):
+        def sub(arr):
+            if arr is None or arr.shape[0] == 1:
+                return arr
+            return arr[start:stop]
+        return _lowess_batch(endog[start:stop], sub(exog), frac=frac,
+                             it=it, delta=delta, weights=sub(weights),
+                             xvals=sub(xvals))
+
+    yhat = np.vstack(map_blocks(smooth, nseries, n_jobs))
+
+    if not is_sorted:
+        # undo the sorting, rows of the result follow the sorted arrays
+        yhat_ = np.empty_like(yhat)
+        if xvals is not None:
+            idx, nrows = xvals_index, xvals.shape[0]
+        else:
+            idx, nrows = sort_index, exog.shape[0]
+        if nrows == 1:
+            yhat_[:, idx[0]] = yhat
+        else:
+            yhat_[np.arange(nseries)[:, None], idx] = yhat
+        yhat = yhat_
+    return yhat
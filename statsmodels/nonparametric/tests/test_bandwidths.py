@@ -7,12 +7,13 @@ Author: Padarn Wilson
 """
 
 import numpy as np
-from scipy import stats
+from scipy import stats, optimize
 
 from statsmodels.sandbox.nonparametric import kernels
 from statsmodels.distributions.mixture_rvs import mixture_rvs
 from statsmodels.nonparametric.kde import KDEUnivariate as KDE
 from statsmodels.nonparametric.bandwidths import select_bandwidth
+from statsmodels.nonparametric import bandwidths
 
 
 
@@ -41,6 +42,67 @@ class TestBandwidthCalculation(object):
         assert_allclose(bw_expected, bw_calc)
 
 
+class TestDataDrivenBandwidth(object):
+    # compare the binned selectors with direct computation on all pairs
+
+    @classmethod
+    def setup_class(cls):
+        cls.diff = Xi[:, None] - Xi
+        cls.nobs = len(Xi)
+
+    def psi(self, h, r):
+        z = self.diff / h
+        if r == 4:
+            poly = z**4 - 6 * z**2 + 3
+        else:
+            poly = z**6 - 15 * z**4 + 45 * z**2 - 15
+        n = self.nobs
+        return (poly * stats.norm.pdf(z)).sum() / (n * (n - 1) * h**(r + 1))
+
+    def test_sj(self):
+        n = self.nobs
+        scale = bandwidths._select_sigma(Xi)
+        a = 1.24 * scale * n ** (-1 / 7.)
+        b = 1.23 * scale * n ** (-1 / 9.)
+        alpha2 = 1.357 * (self.psi(a, 4) / -self.psi(b, 6)) ** (1 / 7.)
+        c1 = 1. / (2 * np.sqrt(np.pi) * n)
+        fsd = lambda h: (c1 / self.psi(alpha2 * h**(5 / 7.), 4))**0.2 - h
+        bw_expected = optimize.brentq(fsd, 0.01, 1)
+
+        bw = select_bandwidth(Xi, 'sj', kernels.Gaussian())
+        assert_allclose(bw, bw_expected, rtol=1e-4)
+
+        kde = KDE(Xi)
+        kde.fit(bw='sj')
+        assert_allclose(kde.bw, bw, rtol=1e-13)
+
+        # rescaled to the canonical bandwidth of other kernels
+        kern = kernels.Epanechnikov()
+        bw_epa = select_bandwidth(Xi, 'sj', kern)
+        ratio = kern.normal_reference_constant / 1.0592
+        assert_allclose(bw_epa, bw * ratio, rtol=1e-3)
+
+    def test_lscv(self):
+        n = self.nobs
+
+        def lscv(h):
+            z = self.diff / h
+            sq = np.exp(-z**2 / 4).sum() / np.sqrt(4 * np.pi) / (n**2 * h)
+            loo = stats.norm.pdf(z).sum() - n * stats.norm.pdf(0)
+            return sq - 2 * loo / (n * (n - 1) * h)
+
+        bw_expected = optimize.fminbound(lscv, 0.1, 0.3, xtol=1e-6)
+        bw = select_bandwidth(Xi, 'lscv', kernels.Gaussian())
+        assert_allclose(bw, bw_expected, rtol=2e-3)
+
+    def test_large_sample(self):
+        # both are close to the normal reference for normal data
+        x = np.random.RandomState(0).randn(200000)
+        bw_ref = bandwidths.bw_scott(x)
+        assert_allclose(bandwidths.bw_sj(x), bw_ref, rtol=0.05)
+        assert_allclose(bandwidths.bw_lscv(x), bw_ref, rtol=0.2)
+
+
 class CheckNormalReferenceConstant(object):
 
     def test_calculate_normal_reference_constant(self):
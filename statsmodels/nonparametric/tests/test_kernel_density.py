@@ -352,6 +352,38 @@ class TestKDEMultivariateConditional(MyTest):
         expected = [0.83378885, 0.97684477, 0.90655143, 0.79393161, 0.43629083]
         npt.assert_allclose(sm_result, expected, atol=0, rtol=1e-5)
 
+    def test_pdf_cdf_mixed_gpke(self):
+        # compare with evaluating gpke at each point
+        from statsmodels.nonparametric._kernel_base import gpke
+        bw = np.array([0.5, 0.3, 0.4, 0.2, 0.6])
+        dens = nparam.KDEMultivariateConditional(endog=[self.c1, self.o],
+            exog=[self.c2, self.o2, self.o], dep_type='co',
+            indep_type='cou', bw=bw)
+        # use several blocks of evaluation points
+        dens._max_kernel_size = 7 * dens.nobs
+        endog_predict = dens.endog[:20].copy()
+        exog_predict = dens.exog[:20].copy()
+        endog_predict[::3, 1] = 3
+        exog_predict[::4, 2] = 1
+
+        pdf = dens.pdf(endog_predict, exog_predict)
+        cdf = dens.cdf(endog_predict, exog_predict)
+        for i in range(20):
+            data_predict = np.concatenate((endog_predict[i], exog_predict[i]))
+            f_yx = gpke(bw, dens.data, data_predict, 'cocou')
+            f_x = gpke(bw[2:], dens.exog, exog_predict[i], 'cou')
+            npt.assert_allclose(pdf[i], f_yx / f_x, rtol=1e-13)
+
+            k_endog = gpke(bw[:2], dens.endog, endog_predict[i], 'co',
+                           ckertype="gaussian_cdf",
+                           ukertype="aitchisonaitken_cdf",
+                           okertype='wangryzin_cdf', tosum=False)
+            k_exog = gpke(bw[2:], dens.exog, exog_predict[i], 'cou',
+                          tosum=False)
+            npt.assert_allclose(cdf[i],
+                                (k_endog * k_exog).sum() / k_exog.sum(),
+                                rtol=1e-13)
+
     @dec.slow
     def test_continuous_cvml_efficient(self):
         nobs = 500
@@ -327,6 +327,46 @@ class TestKernelReg(MyTest):
         # Bandwidth
         npt.assert_equal(model.bw, bw_user)
 
+    def test_significance_pivot(self):
+        # the statistic and nested resamples reuse the smoother matrix of
+        # the model, compare with refitting the model on the resamples
+        from statsmodels.nonparametric.kernel_regression import TestRegCoefC
+        nobs = 50
+        rs = np.random.RandomState(1234)
+        C1 = rs.normal(size=nobs)
+        C2 = rs.normal(size=nobs)
+        Y = C1 + rs.normal(size=nobs)
+        settings = nparam.EstimatorSettings(efficient=False)
+        for reg_type in ['ll', 'lc']:
+            model = nparam.KernelReg(endog=[Y], exog=[C1, C2], var_type='cc',
+                                     reg_type=reg_type, bw=[0.5, 0.7])
+            sig = TestRegCoefC(model, [0, 1], nboot=10, nested_res=8,
+                               pivot=True, random_state=5)
+            lam = []
+            ind = np.random.RandomState(5).randint(0, nobs, size=(8, nobs))
+            for ii in ind:
+                mod = nparam.KernelReg(Y[ii], model.exog[ii], 'cc',
+                                       reg_type, model.bw, defaults=settings)
+                lam.append((mod.fit()[1] ** 2).sum() / nobs)
+            lam0 = (model.fit()[1] ** 2).sum() / nobs
+            npt.assert_allclose(sig.test_stat, lam0 / np.std(lam),
+                                rtol=1e-10)
+
+            # threads and the seed give the same bootstrap distribution
+            sig2 = TestRegCoefC(model, [0, 1], nboot=10, nested_res=8,
+                                pivot=True, random_state=5, n_jobs=3)
+            npt.assert_allclose(sig2.t_dist, sig.t_dist, rtol=1e-13)
+
+    def test_significance_random_state(self):
+        from statsmodels.nonparametric.kernel_regression import TestRegCoefD
+        model = nparam.KernelReg(endog=[self.y2], exog=[self.o, self.c1],
+                                 var_type='oc', reg_type='ll', bw=[0.3, 0.5])
+        sig1 = TestRegCoefD(model, [0], nboot=20, random_state=12)
+        sig2 = TestRegCoefD(model, [0], nboot=20, random_state=12, n_jobs=2)
+        npt.assert_allclose(sig2.t_dist, sig1.t_dist, rtol=1e-13)
+        npt.assert_equal(model.sig_test([0], nboot=20, random_state=12),
+                         sig1.sig)
+
 
 if __name__ == "__main__":
     import nose
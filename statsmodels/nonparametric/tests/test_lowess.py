@@ -14,7 +14,7 @@ import numpy as np
 from numpy.testing import (assert_almost_equal, assert_, assert_raises,
                            assert_equal)
 #import statsmodels.api as sm
-from statsmodels.nonparametric.smoothers_lowess import lowess
+from statsmodels.nonparametric.smoothers_lowess import lowess, lowess_batch
 
 # Number of decimals to test equality with.
 # The default is 7.
@@ -157,6 +157,81 @@ class  TestLowess(object):
 
 
 
+    def test_weights(self):
+        rfile = os.path.join(rpath, 'test_lowess_simple.csv')
+        test_data = np.genfromtxt(open(rfile, 'rb'),
+                                  delimiter = ',', names = True)
+        y, x = test_data['y'], test_data['x']
+
+        # unit weights are the same as no weights
+        res = lowess(y, x, weights=np.ones(len(y)))
+        assert_almost_equal(res, lowess(y, x), decimal=13)
+
+        # observations with zero weight do not influence the fit
+        w = np.ones(len(y))
+        w[[3, 10]] = 0
+        y2 = y.copy()
+        y2[[3, 10]] = 1e5
+        res = lowess(y, x, weights=w)
+        res2 = lowess(y2, x, weights=w)
+        assert_almost_equal(res, res2, decimal=13)
+
+        assert_raises(ValueError, lowess, y, x, weights=-w)
+
+    def test_xvals(self):
+        rfile = os.path.join(rpath, 'test_lowess_delta.csv')
+        test_data = np.genfromtxt(open(rfile, 'rb'),
+                                  delimiter = ',', names = True)
+        y, x = test_data['y'], test_data['x']
+        res = lowess(y, x, frac=0.1)
+
+        # evaluating at the data reproduces the fit
+        yhat = lowess(y, x, frac=0.1, xvals=x)
+        assert_almost_equal(yhat, res[:, 1], decimal=13)
+
+        # order of xvals is preserved, new points between the data
+        xvals = np.array([x.max(), 10.5, x.min(), x[20]])
+        yhat = lowess(y, x, frac=0.1, xvals=xvals)
+        assert_almost_equal(yhat[[0, 2, 3]], res[[-1, 0, 20], 1],
+                            decimal=13)
+        assert_(res[:, 1].min() <= yhat[1] <= res[:, 1].max())
+
+    def test_batch(self):
+        np.random.seed(12345)
+        nobs, nseries = 30, 7
+        x = np.sort(np.random.uniform(0, 10, size=nobs))
+        y = np.sin(x) + np.random.standard_t(3, size=(nseries, nobs))
+        w = np.random.uniform(0.5, 1.5, size=(nseries, nobs))
+        xvals = np.linspace(1, 9, 11)
+
+        expected = np.array([lowess(yi, x, frac=0.4, return_sorted=False)
+                             for yi in y])
+        assert_almost_equal(lowess_batch(y, x, frac=0.4), expected,
+                            decimal=13)
+        assert_almost_equal(lowess_batch(y, x, frac=0.4, n_jobs=3), expected,
+                            decimal=13)
+
+        # per-series exog in random order, weights and xvals
+        perm = np.array([np.random.permutation(nobs) for _ in range(nseries)])
+        rows = np.arange(nseries)[:, None]
+        xx = x[perm]
+        expected = np.array([lowess(y[i], x, frac=0.4, weights=w[i],
+                                    xvals=xvals) for i in range(nseries)])
+        res = lowess_batch(y[rows, perm], xx, frac=0.4, weights=w[rows, perm],
+                           xvals=xvals, n_jobs=2)
+        assert_almost_equal(res, expected, decimal=13)
+
+        expected = np.array([lowess(y[i], xx[i], frac=0.4,
+                                    return_sorted=False)
+                             for i in range(nseries)])
+        assert_almost_equal(lowess_batch(y, xx, frac=0.4), expected,
+                            decimal=13)
+
+        yy = y.copy()
+        yy[2, 3] = np.nan
+        assert_raises(ValueError, lowess_batch, yy, x)
+        assert_raises(ValueError, lowess_batch, y, x[:-1])
+
 
 if __name__ == "__main__":
     import nose
@@ -40,6 +40,7 @@ __docformat__ = 'restructuredtext en'
 __all__ = ['GLS', 'WLS', 'OLS', 'GLSAR']
 
 import numpy as np
+from scipy import linalg
 from scipy.linalg import toeplitz
 from scipy import stats
 from scipy.stats.stats import ss
@@ -730,6 +731,128 @@ class GLSAR(GLS):
         return _X[self.order:]
 
 
+def _wls_qr_update(r, exog, sqrt_weights, wlsendog, buffer):
+    """
+    Update the R factor of the weighted least squares problem with new rows
+
+    `r` is the triangular factor of the QR decomposition of the augmented
+    matrix [sqrt(W) X, sqrt(W) z] of the previous rows. The new rows are
+    weighted blockwise in `buffer`, so that no copy of exog is made.
+    """
+    nobs, k_exog = exog.shape
+    k_aug = k_exog + 1
+    blocksize = buffer.shape[0] - k_aug
+    for start in range(0, nobs, blocksize):
+        stop = min(start + blocksize, nobs)
+        aug = buffer[:k_aug + stop - start]
+        aug[:k_aug] = r
+        np.multiply(exog[start:stop], sqrt_weights[start:stop, None],
+                    out=aug[k_aug:, :k_exog])
+        np.multiply(wlsendog[start:stop], sqrt_weights[start:stop],
+                    out=aug[k_aug:, k_exog])
+        r = np.linalg.qr(aug, mode='r')
+    return r
+
+
+def _wls_solve_r(r):
+    """
+    Parameters and normalized covariance from the augmented R factor
+
+    Raises LinAlgError if the triangular factor is singular.
+    """
+    k_exog = r.shape[0] - 1
+    r_exog = r[:k_exog, :k_exog]
+    params = linalg.solve_triangular(r_exog, r[:k_exog, k_exog])
+    r_inv = linalg.solve_triangular(r_exog, np.eye(k_exog))
+    return params, np.dot(r_inv, r_inv.T)
+
+
+class _WLSSolver(object):
+    """
+    Weighted least squares steps of IRLS, used by GLM and RLM
+
+    X'WX and X'Wy are accumulated over blocks of rows in a preallocated
+    buffer and solved by a Cholesky decomposition. If X'WX is numerically
+    singular, for example because many weights are zero, the QR
+    decomposition of the weighted exog is accumulated over the same blocks
+    instead, and the pseudoinverse is used as in WLS if exog does not have
+    full column rank.
+
+    Parameters
+    ----------
+    exog : ndarray
+        The design matrix.
+    full_rank : bool
+        Whether exog has full column rank.
+    blocksize : int
+        Number of rows of exog that are weighted at a time.
+    """
+
+    def __init__(self, exog, full_rank=True, blocksize=2**16):
+        self.exog = exog
+        self.full_rank = full_rank
+        self.blocksize = min(blocksize, exog.shape[0])
+        self._buffer = np.empty((self.blocksize, exog.shape[1]))
+        self._qr_buffer = None
+        # factorization of the last solve, see normalized_cov_params
+        self._factor = None
+
+    def _cross_products(self, endog, weights):
+        exog = self.exog
+        nobs, k_exog = exog.shape
+        blocksize = self.blocksize
+        xtwx = np.zeros((k_exog, k_exog))
+        xtwy = np.zeros(k_exog)
+        for start in range(0, nobs, blocksize):
+            stop = min(start + blocksize, nobs)
+            wexog = self._buffer[:stop - start]
+            np.multiply(exog[start:stop], weights[start:stop, None],
+                        out=wexog)
+            xtwx += np.dot(wexog.T, exog[start:stop])
+            xtwy += np.dot(endog[start:stop], wexog)
+        return xtwx, xtwy
+
+    def solve(self, endog, weights):
+        """parameters of the WLS regression of endog on exog"""
+        exog = self.exog
+        sqrt_weights = np.sqrt(weights)
+        if self.full_rank:
+            xtwx, xtwy = self._cross_products(endog, weights)
+            try:
+                c_and_lower = linalg.cho_factor(xtwx)
+                # squared diagonal of the factor relative to the diagonal
+                # of X'WX is one minus the R-squared of each column on the
+                # previous ones. The normal equations square the condition
+                # number, collinear designs use the QR decomposition.
+                diag = np.diag(c_and_lower[0])**2 / np.diag(xtwx)
+                if np.min(diag) > 1e-6:
+                    self._factor = ('cholesky', c_and_lower)
+                    return linalg.cho_solve(c_and_lower, xtwy)
+            except linalg.LinAlgError:
+                pass
+            k_aug = exog.shape[1] + 1
+            if self._qr_buffer is None:
+                self._qr_buffer = np.empty((self.blocksize + k_aug, k_aug))
+            r = _wls_qr_update(np.zeros((k_aug, k_aug)), exog, sqrt_weights,
+                               endog, self._qr_buffer)
+            diag_r = np.abs(np.diag(r)[:-1])
+            if np.min(diag_r) > 1e-12 * np.max(np.abs(r[:-1, :-1])):
+                self._factor = ('qr', r)
+                return _wls_solve_r(r)[0]
+        pinv_wexog = np.linalg.pinv(exog * sqrt_weights[:, None])
+        self._factor = ('pinv', pinv_wexog)
+        return np.dot(pinv_wexog, sqrt_weights * endog)
+
+    def normalized_cov_params(self):
+        """inverse of X'WX of the last solve"""
+        method, factor = self._factor
+        if method == 'cholesky':
+            return linalg.cho_solve(factor, np.eye(self.exog.shape[1]))
+        elif method == 'qr':
+            return _wls_solve_r(factor)[1]
+        return np.dot(factor, factor.T)
+
+
 def yule_walker(X, order=1, method="unbiased", df=None, inv=False, demean=True):
     """
     Estimate AR(p) parameters from a sequence X using Yule-Walker equation.
@@ -962,6 +1085,10 @@ class RegressionResults(base.LikelihoodModelResults):
         self.cov_kwds = {'description' : 'Standard Errors assume that the ' +
                          'covariance matrix of the errors is correctly ' +
                          'specified.'}
+        # covariances by cov_type are computed from the results of the
+        # original fit, instances of get_robustcov_results refer to them
+        self._robustcov_base = self
+        self._robustcov_cache = {}
 
         self.df_model = model.df_model
         self.df_resid = model.df_resid
@@ -1187,10 +1314,7 @@ class RegressionResults(base.LikelihoodModelResults):
         See statsmodels.RegressionResults
         """
 
-        # probably could be optimized
-        h = np.diag(chain_dot(self.model.wexog,
-                              self.normalized_cov_params,
-                              self.model.wexog.T))
+        h = self._leverage
         self.het_scale = self.wresid**2/(1-h)
         cov_HC2 = self._HCCM(self.het_scale)
         return cov_HC2
@@ -1202,15 +1326,80 @@ class RegressionResults(base.LikelihoodModelResults):
         See statsmodels.RegressionResults
         """
 
-        # above probably could be optimized to only calc the diag
-        h = np.diag(chain_dot(self.model.wexog,
-                              self.normalized_cov_params,
-                              self.model.wexog.T))
+        h = self._leverage
         self.het_scale=(self.wresid/(1-h))**2
         cov_HC3 = self._HCCM(self.het_scale)
         return cov_HC3
 
 
+    @cache_readonly
+    def _leverage(self):
+        # diagonal of the hat matrix without forming it
+        wexog = self.model.wexog
+        return (np.dot(wexog, self.normalized_cov_params) * wexog).sum(1)
+
+    @cache_readonly
+    def _sandwich_arrays(self):
+        # scores and bread of the sandwich, shared by all cov_types
+        import statsmodels.stats.sandwich_covariance as sw
+        return sw._get_sandwich_arrays(self)
+
+    def cov_params_by_cov(self, cov_type='nonrobust', **kwds):
+        """covariance matrix of the parameters for a cov_type
+
+        Parameters
+        ----------
+        cov_type : string
+            'nonrobust' or one of the covariance types of
+            `get_robustcov_results`
+        kwds : depends on cov_type
+            Arguments of the covariance type, see `get_robustcov_results`.
+
+        Returns
+        -------
+        cov : ndarray
+            covariance matrix of the parameter estimates
+
+        Notes
+        -----
+        Each covariance is computed when it is first requested and then
+        cached, and the scores and the bread of the sandwich are computed only
+        once for all covariance types. The covariances are always computed
+        from the results of the original fit, with its scale and df_resid,
+        so that results instances created by `get_robustcov_results` share
+        the cache with this instance. Array arguments are identified by the
+        array object, not by its values.
+
+        See Also
+        --------
+        bse_by_cov
+        """
+        key = [cov_type]
+        for name in sorted(kwds):
+            value = kwds[name]
+            try:
+                hash(value)
+            except TypeError:
+                value = id(value)
+            key.append((name, value))
+        key = tuple(key)
+        base = self._robustcov_base
+        if key not in base._robustcov_cache:
+            if cov_type not in _robust_cov_funcs:
+                raise ValueError('cov_type not recognized. See docstring ' +
+                                 'for available options and spelling')
+            cov = _robust_cov_funcs[cov_type](base, **kwds)
+            # the arguments are kept so that ids are not reused
+            base._robustcov_cache[key] = (kwds, cov)
+        return base._robustcov_cache[key][1]
+
+    def bse_by_cov(self, cov_type='nonrobust', **kwds):
+        """standard errors of the parameters for a cov_type
+
+        see `cov_params_by_cov` for the arguments
+        """
+        return np.sqrt(np.diag(self.cov_params_by_cov(cov_type, **kwds)))
+
     @cache_readonly
     def HC0_se(self):
         """
@@ -1579,7 +1768,8 @@ class RegressionResults(base.LikelihoodModelResults):
         - 'cluster' and required keyword `groups`, integer group indicator
 
             - `groups` array_like, integer (required) :
-                  index of clusters or groups
+                  index of clusters or groups. A 2-dimensional array with
+                  one column for each clustering gives multiway clustering.
             - `use_correction` bool (optional) :
                   If True the sandwich covariance is calulated with a small
                   sample correction.
@@ -1636,6 +1826,10 @@ class RegressionResults(base.LikelihoodModelResults):
         TODO: Currently there is no check for extra or misspelled keywords,
         except in the case of cov_type `HCx`
 
+        The covariance matrix is cached and shared with this instance, see
+        `cov_params_by_cov` and `bse_by_cov` to compare several covariance
+        types without creating new results instances.
+
         """
 
         import statsmodels.stats.sandwich_covariance as sw
@@ -1647,6 +1841,9 @@ class RegressionResults(base.LikelihoodModelResults):
         res.cov_type = cov_type = cov_type
         res.cov_kwds = {'use_t':use_t}
         res.use_t = use_t
+        res._robustcov_base = self._robustcov_base
+        cov_kwds = dict((k, v) for k, v in kwds.items()
+                        if k != 'df_correction')
 
         adjust_df = False
         if cov_type in ['cluster', 'nw-panel', 'nw-groupsum']:
@@ -1668,9 +1865,7 @@ class RegressionResults(base.LikelihoodModelResults):
                                  'does not use keywords')
             res.cov_kwds['description'] = ('Standard Errors are heteroscedasticity ' +
                                            'robust ' + '(' + cov_type + ')')
-            # TODO cannot access cov without calling se first
-            getattr(self, cov_type.upper() + '_se')
-            res.cov_params_default = getattr(self, 'cov_' + cov_type.upper())
+            res.cov_params_default = self.cov_params_by_cov(cov_type)
         elif cov_type == 'HAC':
             maxlags = kwds['maxlags']   # required?, default in cov_hac_simple
             res.cov_kwds['maxlags'] = maxlags
@@ -1680,8 +1875,8 @@ class RegressionResults(base.LikelihoodModelResults):
                  'and autocorrelation robust (HAC) using %d lags and %s small ' +
                  'sample correction') % (maxlags, ['without', 'with'][use_correction])
 
-            res.cov_params_default = sw.cov_hac_simple(self, nlags=maxlags,
-                                                 use_correction=use_correction)
+            res.cov_params_default = self.cov_params_by_cov(cov_type,
+                                                            **cov_kwds)
         elif cov_type == 'cluster':
             #cluster robust standard errors, one- or two-way
             groups = kwds['groups']
@@ -1695,23 +1890,18 @@ class RegressionResults(base.LikelihoodModelResults):
                     # need to find number of groups
                     # duplicate work
                     self.n_groups = n_groups = len(np.unique(groups))
-                res.cov_params_default = sw.cov_cluster(self, groups,
-                                                 use_correction=use_correction)
 
             elif groups.ndim == 2:
                 if adjust_df:
                     # need to find number of groups
                     # duplicate work
-                    n_groups0 = len(np.unique(groups[:,0]))
-                    n_groups1 = len(np.unique(groups[:, 1]))
-                    self.n_groups = (n_groups0, n_groups1)
-                    n_groups = min(n_groups0, n_groups1) # use for adjust_df
-
-                # Note: sw.cov_cluster_2groups has 3 returns
-                res.cov_params_default = sw.cov_cluster_2groups(self, groups,
-                                             use_correction=use_correction)[0]
+                    self.n_groups = tuple(len(np.unique(groups[:, i]))
+                                          for i in range(groups.shape[1]))
+                    n_groups = min(self.n_groups) # use for adjust_df
             else:
-                raise ValueError('only two groups are supported')
+                raise ValueError('groups needs to be 1 or 2-dimensional')
+            res.cov_params_default = self.cov_params_by_cov(cov_type,
+                                                            **cov_kwds)
             res.cov_kwds['description'] = ('Standard Errors are robust to' +
                                 'cluster correlation ' + '(' + cov_type + ')')
 
@@ -1731,9 +1921,8 @@ class RegressionResults(base.LikelihoodModelResults):
             tt = (np.nonzero(np.diff(time) < 0)[0] + 1).tolist()
             groupidx = lzip([0] + tt, tt + [len(time)])
             self.n_groups = n_groups = len(groupidx)
-            res.cov_params_default = sw.cov_nw_panel(self, maxlags, groupidx,
-                                                weights_func=weights_func,
-                                                use_correction=use_correction)
+            res.cov_params_default = self.cov_params_by_cov(cov_type,
+                                                            **cov_kwds)
             res.cov_kwds['description'] = ('Standard Errors are robust to' +
                                 'cluster correlation ' + '(' + cov_type + ')')
         elif cov_type == 'nw-groupsum':
@@ -1752,9 +1941,8 @@ class RegressionResults(base.LikelihoodModelResults):
                 # need to find number of groups
                 tt = (np.nonzero(np.diff(time) < 0)[0] + 1)
                 self.n_groups = n_groups = len(tt) + 1
-            res.cov_params_default = sw.cov_nw_groupsum(self, maxlags, time,
-                                            weights_func=weights_func,
-                                            use_correction=use_correction)
+            res.cov_params_default = self.cov_params_by_cov(cov_type,
+                                                            **cov_kwds)
             res.cov_kwds['description'] = (
                         'Driscoll and Kraay Standard Errors are robust to ' +
                         'cluster correlation ' + '(' + cov_type + ')')
@@ -1766,6 +1954,9 @@ class RegressionResults(base.LikelihoodModelResults):
             # Note: we leave model.df_resid unchanged at original
             res.df_resid = n_groups - 1
 
+        if self._cache.get('_sandwich_arrays') is not None:
+            res._cache['_sandwich_arrays'] = self._sandwich_arrays
+
         return res
 
 
@@ -2231,6 +2422,72 @@ class OLSResults(RegressionResults):
         return (lowerl, upperl)
 
 
+def _cov_nonrobust(results, **kwds):
+    return results.normalized_cov_params * results.scale
+
+
+def _cov_hc(cov_type):
+    def cov_func(results, **kwds):
+        if kwds:
+            raise ValueError('heteroscedasticity robust covarians ' +
+                             'does not use keywords')
+        return getattr(results, 'cov_' + cov_type)
+    return cov_func
+
+
+def _cov_hac(results, maxlags, use_correction=False, **kwds):
+    import statsmodels.stats.sandwich_covariance as sw
+    return sw.cov_hac_simple(results._sandwich_arrays, nlags=maxlags,
+                             use_correction=use_correction)
+
+
+def _cov_cluster(results, groups, use_correction=True, **kwds):
+    import statsmodels.stats.sandwich_covariance as sw
+    if not hasattr(groups, 'shape'):
+        groups = np.asarray(groups).T
+    if groups.ndim == 1:
+        return sw.cov_cluster(results._sandwich_arrays, groups,
+                              use_correction=use_correction)
+    elif groups.ndim == 2:
+        return sw.cov_cluster_multiway(results._sandwich_arrays, groups,
+                                       use_correction=use_correction)
+    raise ValueError('groups needs to be 1 or 2-dimensional')
+
+
+def _cov_nw_panel(results, time, maxlags, use_correction='hac',
+                  weights_func=None, **kwds):
+    import statsmodels.stats.sandwich_covariance as sw
+    if weights_func is None:
+        weights_func = sw.weights_bartlett
+    tt = (np.nonzero(np.diff(time) < 0)[0] + 1).tolist()
+    groupidx = lzip([0] + tt, tt + [len(time)])
+    return sw.cov_nw_panel(results._sandwich_arrays, maxlags, groupidx,
+                           weights_func=weights_func,
+                           use_correction=use_correction)
+
+
+def _cov_nw_groupsum(results, time, maxlags, use_correction='cluster',
+                     weights_func=None, **kwds):
+    import statsmodels.stats.sandwich_covariance as sw
+    if weights_func is None:
+        weights_func = sw.weights_bartlett
+    return sw.cov_nw_groupsum(results._sandwich_arrays, maxlags, time,
+                              weights_func=weights_func,
+                              use_correction=use_correction)
+
+
+# covariance types of RegressionResults.cov_params_by_cov
+_robust_cov_funcs = {'nonrobust': _cov_nonrobust,
+                     'HC0': _cov_hc('HC0'),
+                     'HC1': _cov_hc('HC1'),
+                     'HC2': _cov_hc('HC2'),
+                     'HC3': _cov_hc('HC3'),
+                     'HAC': _cov_hac,
+                     'cluster': _cov_cluster,
+                     'nw-panel': _cov_nw_panel,
+                     'nw-groupsum': _cov_nw_groupsum}
+
+
 class RegressionResultsWrapper(wrap.ResultsWrapper):
 
     _attrs = {
@@ -2250,7 +2507,10 @@ class RegressionResultsWrapper(wrap.ResultsWrapper):
     _wrap_attrs = wrap.union_dicts(base.LikelihoodResultsWrapper._attrs,
                                    _attrs)
 
-    _methods = {}
+    _methods = {
+        'bse_by_cov' : 'columns',
+        'cov_params_by_cov' : 'cov',
+    }
 
     _wrap_methods = wrap.union_dicts(
                         base.LikelihoodResultsWrapper._wrap_methods,
@@ -3,8 +3,9 @@
 '''
 Quantile regression model
 
-Model parameters are estimated using iterated reweighted least squares. The
-asymptotic covariance matrix estimated using kernel density estimation.
+Model parameters are estimated using iterated reweighted least squares or a
+Frisch-Newton interior point method. The asymptotic covariance matrix
+estimated using kernel density estimation.
 
 Author: Vincent Arel-Bundock
 License: BSD-3
@@ -21,9 +22,10 @@ from statsmodels.compat.python import range
 import numpy as np
 import warnings
 import scipy.stats as stats
-from scipy.linalg import pinv
+from scipy.linalg import pinv, cho_factor, cho_solve, solve_triangular
 from scipy.stats import norm
-from statsmodels.tools.tools import chain_dot
+from statsmodels.tools.tools import chain_dot, check_random_state
+from statsmodels.tools.parallel import map_blocks
 from statsmodels.compat.numpy import np_matrix_rank
 from statsmodels.tools.decorators import cache_readonly
 from statsmodels.regression.linear_model import (RegressionModel,
@@ -36,7 +38,7 @@ class QuantReg(RegressionModel):
     '''Quantile Regression
 
     Estimate a quantile regression model using iterative reweighted least
-    squares.
+    squares or an interior point method.
 
     Parameters
     ----------
@@ -63,6 +65,15 @@ class QuantReg(RegressionModel):
     * Koenker, R. (2005). Quantile Regression. New York: Cambridge University Press.
     * LeSage, J. P.(1999). Applied Econometrics Using MATLAB,
 
+    Interior point method (used by the fit and fit_quantiles methods):
+
+    * Portnoy, S. and R. Koenker (1997). The Gaussian hare and the Laplacian tortoise: computability of squared-error versus absolute-error estimators. Statistical Science 12: 279-300.
+
+    Bootstrap covariance (used by the fit method):
+
+    * He, X. and F. Hu (2002). Markov chain marginal bootstrap. Journal of the American Statistical Association 97: 783-795.
+    * Kocherginsky, M., X. He and Y. Mu (2005). Practical confidence intervals for regression quantiles. Journal of Computational and Graphical Statistics 14: 41-55.
+
     Kernels (used by the fit method):
 
     * Green (2008) Table 14.2
@@ -87,8 +98,9 @@ class QuantReg(RegressionModel):
         return data
 
     def fit(self, q=.5, vcov='robust', kernel='epa', bandwidth='hsheather',
-            max_iter=1000, p_tol=1e-6, **kwargs):
-        '''Solve by Iterative Weighted Least Squares
+            max_iter=1000, p_tol=None, method='irls', n_boot=200,
+            random_state=None, n_jobs=1, **kwargs):
+        '''Solve by Iterative Weighted Least Squares or by interior point
 
         Parameters
         ----------
@@ -100,6 +112,9 @@ class QuantReg(RegressionModel):
             - robust : heteroskedasticity robust standard errors (as suggested
               in Greene 6th edition)
             - iid : iid errors (as in Stata 12)
+            - bootstrap : xy-pair bootstrap
+            - mcmb : Markov chain marginal bootstrap (MCMB-A, Kocherginsky,
+              He and Mu 2005)
 
         kernel : string, kernel to use in the kernel density estimation for the
             asymptotic covariance matrix:
@@ -116,37 +131,176 @@ class QuantReg(RegressionModel):
             - hsheather: Hall-Sheather (1988)
             - bofinger: Bofinger (1975)
             - chamberlain: Chamberlain (1994)
+
+        max_iter : int
+            Maximum number of iterations of the solver.
+        p_tol : float
+            Convergence tolerance. For ``irls`` this is the largest absolute
+            change in the parameters (default 1e-6), for ``interior_point``
+            the duality gap relative to the objective (default 1e-10).
+        method : string, solver for the linear program:
+
+            - irls : iteratively reweighted least squares (default)
+            - interior_point : Frisch-Newton primal-dual interior point
+              method with Mehrotra's predictor-corrector steps (Koenker and
+              Portnoy 1997). Each iteration only needs the Cholesky
+              factorization of a k x k matrix, which makes it the method of
+              choice for large nobs. q has to be strictly between 0 and 1.
+        n_boot : int
+            Number of bootstrap replications, or length of the Markov chain,
+            if vcov is ``bootstrap`` or ``mcmb``.
+        random_state : None, int or RandomState
+            Seed for the bootstrap.
+        n_jobs : int
+            Number of threads for the xy-pair bootstrap replications. -1
+            uses all cpus.
+
+        Notes
+        -----
+        The bootstrap replications of the xy-pair bootstrap are weighted
+        fits of the distinct resampled observations. They start from the
+        full sample estimate, which determines the observations that the
+        preprocessing of Portnoy and Koenker (1997) collapses, see
+        `fit_quantiles`. The parameter draws are attached to the results as
+        `bootstrap_results`.
+
+        See Also
+        --------
+        QuantReg.fit_quantiles : fit several quantiles at once
         '''
 
         if q < 0 or q > 1:
             raise Exception('p must be between 0 and 1')
 
-        kern_names = ['biw', 'cos', 'epa', 'gau', 'par']
-        if kernel not in kern_names:
-            raise Exception("kernel must be one of " + ', '.join(kern_names))
-        else:
-            kernel = kernels[kernel]
-
-        if bandwidth == 'hsheather':
-            bandwidth = hall_sheather
-        elif bandwidth == 'bofinger':
-            bandwidth = bofinger
-        elif bandwidth == 'chamberlain':
-            bandwidth = chamberlain
+        kernel, bandwidth = _check_kernel_bandwidth(kernel, bandwidth)
+        if vcov not in ('robust', 'iid', 'bootstrap', 'mcmb'):
+            raise Exception("vcov must be 'robust', 'iid', 'bootstrap' or "
+                            "'mcmb'")
+
+        exog_rank = np_matrix_rank(self.exog)
+        self.rank = exog_rank
+        self.df_model = float(self.rank - self.k_constant)
+        self.df_resid = self.nobs - self.rank
+
+        if method == 'irls':
+            if p_tol is None:
+                p_tol = 1e-6
+            beta, n_iter, history = self._fit_irls(q, max_iter, p_tol)
+        elif method == 'interior_point':
+            if q <= 0 or q >= 1:
+                raise ValueError('q must be strictly between 0 and 1 for '
+                                 'the interior point method')
+            if p_tol is None:
+                p_tol = 1e-10
+            beta, n_iter, converged, history = _interior_point(
+                self.endog, self.exog, q, max_iter=max_iter, tol=p_tol)
+            if not converged:
+                warnings.warn("Maximum number of iterations (%d) reached."
+                              % max_iter, IterationLimitWarning)
         else:
-            raise Exception("bandwidth must be in 'hsheather', 'bofinger', 'chamberlain'")
+            raise ValueError("method must be 'irls' or 'interior_point'")
+
+        return self._make_results(beta, q, vcov, kernel, bandwidth, n_iter,
+                                  history, n_boot, random_state, n_jobs)
+
+    def fit_quantiles(self, qs, vcov='robust', kernel='epa',
+                      bandwidth='hsheather', max_iter=100, p_tol=1e-10,
+                      preprocess=None, random_state=None, n_boot=200,
+                      n_jobs=1):
+        '''Fit several quantiles with the interior point method
+
+        Parameters
+        ----------
+        qs : array-like
+            Quantiles, each strictly between 0 and 1.
+        vcov, kernel, bandwidth : string
+            Options for the covariance of the parameters, see `fit`.
+        max_iter : int
+            Maximum number of interior point iterations per solve.
+        p_tol : float
+            Tolerance for the duality gap relative to the objective.
+        preprocess : bool or None
+            Whether to use the preprocessing of Portnoy and Koenker (1997).
+            The linear program is solved on a subset of about
+            ``((k + 1) * nobs)**(2/3)`` observations close to the quantile
+            hyperplane, the observations above and below it are collapsed
+            into two pseudo-observations. Observations whose residual sign
+            is wrong at the solution are added back until the solution is
+            optimal for the full sample. The default None preprocesses when
+            nobs is larger than 100000.
+        random_state : None, int or RandomState
+            Seed for the subsample drawn to start the preprocessing, only
+            the first quantile uses a subsample, and for the bootstrap.
+        n_boot, n_jobs : int
+            Options for the bootstrap covariance, see `fit`.
+
+        Returns
+        -------
+        results : list
+            QuantRegResults instances in the order of `qs`.
+
+        Notes
+        -----
+        The quantiles are solved in sorted order and each solution is the
+        starting point for the next quantile. With preprocessing the previous
+        solution also determines the observations that are collapsed, so
+        that only the first quantile needs a subsample fit.
+
+        References
+        ----------
+        Portnoy, S. and R. Koenker (1997). The Gaussian hare and the
+        Laplacian tortoise: computability of squared-error versus
+        absolute-error estimators. Statistical Science 12: 279-300.
+        '''
+        qs = np.atleast_1d(np.asarray(qs, dtype=float))
+        if np.any(qs <= 0) or np.any(qs >= 1):
+            raise ValueError('quantiles must be strictly between 0 and 1')
+        kernel, bandwidth = _check_kernel_bandwidth(kernel, bandwidth)
+        if vcov not in ('robust', 'iid', 'bootstrap', 'mcmb'):
+            raise Exception("vcov must be 'robust', 'iid', 'bootstrap' or "
+                            "'mcmb'")
+        random_state = check_random_state(random_state)
 
         endog = self.endog
         exog = self.exog
-        nobs = self.nobs
-        exog_rank = np_matrix_rank(self.exog)
-        self.rank = exog_rank
+        self.rank = np_matrix_rank(exog)
         self.df_model = float(self.rank - self.k_constant)
         self.df_resid = self.nobs - self.rank
+
+        if preprocess is None:
+            preprocess = self.nobs > 100000
+        if preprocess:
+            # the band of the preprocessing only needs X'X, which is shared
+            # by all quantiles
+            xx_chol = np.linalg.cholesky(np.dot(exog.T, exog))
+
+        results = [None] * len(qs)
+        beta = None
+        for i in np.argsort(qs):
+            q = qs[i]
+            if preprocess:
+                beta, n_iter, converged, history = _preprocessed(
+                    endog, exog, q, xx_chol, beta, max_iter, p_tol,
+                    random_state)
+            else:
+                beta, n_iter, converged, history = _interior_point(
+                    endog, exog, q, max_iter=max_iter, tol=p_tol)
+            if not converged:
+                warnings.warn("Maximum number of iterations (%d) reached "
+                              "for q=%g." % (max_iter, q),
+                              IterationLimitWarning)
+            results[i] = self._make_results(beta, q, vcov, kernel, bandwidth,
+                                            n_iter, history, n_boot,
+                                            random_state, n_jobs)
+        return results
+
+    def _fit_irls(self, q, max_iter, p_tol):
+        endog = self.endog
+        exog = self.exog
         n_iter = 0
         xstar = exog
 
-        beta = np.ones(exog_rank)
+        beta = np.ones(self.rank)
         # TODO: better start, initial beta is used only for convergence check
 
         # Note the following doesn't work yet,
@@ -192,6 +346,14 @@ class QuantReg(RegressionModel):
             warnings.warn("Maximum number of iterations (1000) reached.",
                           IterationLimitWarning)
 
+        return beta, n_iter, history
+
+    def _make_results(self, beta, q, vcov, kernel, bandwidth, n_iter,
+                      history, n_boot=200, random_state=None, n_jobs=1):
+        endog = self.endog
+        exog = self.exog
+        nobs = self.nobs
+
         e = endog - np.dot(exog, beta)
         # Greene (2008, p.407) writes that Stata 6 uses this bandwidth:
         # h = 0.9 * np.std(e) / (nobs**0.2)
@@ -203,15 +365,30 @@ class QuantReg(RegressionModel):
 
         fhat0 = 1. / (nobs * h) * np.sum(kernel(e / h))
 
+        boot_params = None
         if vcov == 'robust':
-            d = np.where(e > 0, (q/fhat0)**2, ((1-q)/fhat0)**2)
-            xtxi = pinv(np.dot(exog.T, exog))
-            xtdx = np.dot(exog.T * d[np.newaxis, :], exog)
+            # the weights only take two values, q**2 / fhat0**2 for positive
+            # and (1 - q)**2 / fhat0**2 for other residuals
+            xtx = np.dot(exog.T, exog)
+            xtxi = pinv(xtx)
+            exog_pos = exog[e > 0]
+            xtdx = ((1 - q)**2 * xtx + (2 * q - 1) *
+                    np.dot(exog_pos.T, exog_pos)) / fhat0**2
             vcov = chain_dot(xtxi, xtdx, xtxi)
         elif vcov == 'iid':
             vcov = (1. / fhat0)**2 * q * (1 - q) * pinv(np.dot(exog.T, exog))
+        elif vcov == 'bootstrap':
+            random_state = check_random_state(random_state)
+            boot_params = _xy_bootstrap(endog, exog, q, beta, n_boot,
+                                        random_state, n_jobs)
+            vcov = np.atleast_2d(np.cov(boot_params, rowvar=0))
+        elif vcov == 'mcmb':
+            random_state = check_random_state(random_state)
+            boot_params = _mcmb(endog, exog, q, beta, n_boot, random_state)
+            vcov = np.atleast_2d(np.cov(boot_params, rowvar=0))
         else:
-            raise Exception("vcov must be 'robust' or 'iid'")
+            raise Exception("vcov must be 'robust', 'iid', 'bootstrap' or "
+                            "'mcmb'")
 
         lfit = QuantRegResults(self, beta, normalized_cov_params=vcov)
 
@@ -220,10 +397,269 @@ class QuantReg(RegressionModel):
         lfit.sparsity = 1. / fhat0
         lfit.bandwidth = h
         lfit.history = history
+        if boot_params is not None:
+            lfit.bootstrap_results = boot_params
 
         return RegressionResultsWrapper(lfit)
 
 
+def _check_kernel_bandwidth(kernel, bandwidth):
+    kern_names = ['biw', 'cos', 'epa', 'gau', 'par']
+    if kernel not in kern_names:
+        raise Exception("kernel must be one of " + ', '.join(kern_names))
+    else:
+        kernel = kernels[kernel]
+
+    if bandwidth == 'hsheather':
+        bandwidth = hall_sheather
+    elif bandwidth == 'bofinger':
+        bandwidth = bofinger
+    elif bandwidth == 'chamberlain':
+        bandwidth = chamberlain
+    else:
+        raise Exception("bandwidth must be in 'hsheather', 'bofinger', 'chamberlain'")
+    return kernel, bandwidth
+
+
+def _step_length(x, dx, beta=0.99995):
+    """Largest step in [0, 1] that keeps x + step * dx nonnegative"""
+    # the binding component has the most negative dx / x, the dual slacks
+    # can start at exactly zero
+    ratio = np.min(dx / np.maximum(x, 1e-300))
+    if ratio >= 0:
+        return 1.
+    return min(-beta / ratio, 1.)
+
+
+def _interior_point(endog, exog, q, max_iter=100, tol=1e-10):
+    """
+    Frisch-Newton interior point solver for quantile regression
+
+    Solves the dual linear program
+
+        max_a endog'a  s.t.  exog'a = (1 - q) * exog'1,  0 <= a <= 1
+
+    with the primal-dual predictor-corrector method of Mehrotra, following
+    rqfnb in R's quantreg. The parameters are minus the dual variables of
+    the equality constraints. The predictor and the corrector step share
+    one Cholesky factorization of the k x k matrix exog' D exog.
+
+    Returns
+    -------
+    params, n_iter, converged, history
+    """
+    nobs = exog.shape[0]
+    # primal variables a = x, slack s = 1 - x
+    x = np.empty(nobs)
+    x.fill(1. - q)
+    s = 1. - x
+    b = np.dot(exog.T, x)
+    # start the dual at minus the least squares estimate, dual slacks z, w
+    # with z - w = -(endog - exog params)
+    y = -np.dot(pinv(np.dot(exog.T, exog)), np.dot(exog.T, endog))
+    r = np.dot(exog, -y) - endog
+    r[r == 0] = 0.001
+    z = np.maximum(r, 0)
+    w = z - r
+    gap = -np.dot(endog, x) - np.dot(y, b) + w.sum()
+
+    history = dict(params=[], gap=[])
+    n_iter = 0
+    converged = False
+    while n_iter < max_iter:
+        obj = np.abs(np.dot(endog, x))
+        if gap <= tol * (1. + obj):
+            converged = True
+            break
+        n_iter += 1
+
+        # affine scaling (predictor) step
+        d = 1. / (z / x + w / s)
+        r = z - w
+        xdx = np.dot(exog.T * d, exog)
+        try:
+            cho = cho_factor(xdx, lower=True)
+            solve = lambda rhs: cho_solve(cho, rhs)
+        except np.linalg.LinAlgError:
+            xdx_inv = pinv(xdx)
+            solve = lambda rhs: np.dot(xdx_inv, rhs)
+        rhs = b - np.dot(exog.T, x) + np.dot(exog.T, d * r)
+        dy = solve(rhs)
+        dx = d * (np.dot(exog, dy) - r)
+        ds = -dx
+        dz = -z * (dx / x + 1)
+        dw = -w * (ds / s + 1)
+        fp = min(_step_length(x, dx), _step_length(s, ds))
+        fd = min(_step_length(w, dw), _step_length(z, dz))
+
+        if min(fp, fd) < 1:
+            # centering (corrector) step with the same factorization
+            mu = np.dot(z, x) + np.dot(w, s)
+            g = (np.dot(z + fd * dz, x + fp * dx) +
+                 np.dot(w + fd * dw, s + fp * ds))
+            mu = mu * (g / mu)**3 / (2. * nobs)
+            dxdz = dx * dz
+            dsdw = ds * dw
+            xinv = 1. / x
+            sinv = 1. / s
+            xi = mu * (xinv - sinv)
+            rhs += np.dot(exog.T, d * (dxdz - dsdw - xi))
+            dy = solve(rhs)
+            dx = d * (np.dot(exog, dy) + xi - r - dxdz + dsdw)
+            ds = -dx
+            dz = mu * xinv - z - xinv * z * dx - dxdz
+            dw = mu * sinv - w - sinv * w * ds - dsdw
+            fp = min(_step_length(x, dx), _step_length(s, ds))
+            fd = min(_step_length(w, dw), _step_length(z, dz))
+
+        x += fp * dx
+        s += fp * ds
+        y += fd * dy
+        w += fd * dw
+        z += fd * dz
+        gap = -np.dot(endog, x) - np.dot(y, b) + w.sum()
+        history['params'].append(-y)
+        history['gap'].append(gap)
+
+    return -y, n_iter, converged, history
+
+
+def _preprocessed(endog, exog, q, xx_chol, start_params, max_iter, tol,
+                  random_state, m_factor=0.8):
+    """
+    Interior point fit with the preprocessing of Portnoy and Koenker (1997)
+
+    Observations far below and above the band around the current estimate
+    of the quantile hyperplane are replaced by one pseudo-observation each.
+    The band is scaled by sqrt(x_i' (X'X)^{-1} x_i), `xx_chol` is the
+    Cholesky factor of X'X. If `start_params` is None, the starting
+    estimate is the fit on a random subsample.
+    """
+    nobs, k_vars = exog.shape
+    m = int(round(((k_vars + 1.) * nobs)**(2. / 3)))
+    band = np.sqrt((solve_triangular(xx_chol, exog.T, lower=True)**2
+                    ).sum(0))
+    band = np.maximum(band, 1e-10)
+    beta = start_params
+    n_iter = 0
+    while m < nobs:
+        if beta is None:
+            idx = random_state.permutation(nobs)[:m]
+            beta, it, _, _ = _interior_point(endog[idx], exog[idx], q,
+                                             max_iter=max_iter, tol=tol)
+            n_iter += it
+        resid = endog - np.dot(exog, beta)
+        M = m_factor * m
+        lo = max(1. / nobs, q - M / (2. * nobs))
+        hi = min(q + M / (2. * nobs), (nobs - 1.) / nobs)
+        kappa = np.percentile(resid / band, [100 * lo, 100 * hi])
+        below = resid < band * kappa[0]
+        above = resid > band * kappa[1]
+
+        while True:
+            keep = ~(below | above)
+            endog_sub = [endog[keep]]
+            exog_sub = [exog[keep]]
+            for glob in (below, above):
+                if glob.any():
+                    endog_sub.append([endog[glob].sum()])
+                    exog_sub.append(exog[glob].sum(0)[None, :])
+            beta, it, converged, history = _interior_point(
+                np.concatenate(endog_sub), np.concatenate(exog_sub), q,
+                max_iter=max_iter, tol=tol)
+            n_iter += it
+            resid = endog - np.dot(exog, beta)
+            bad_below = below & (resid > 0)
+            bad_above = above & (resid < 0)
+            n_bad = bad_below.sum() + bad_above.sum()
+            if n_bad == 0:
+                return beta, n_iter, converged, history
+            if n_bad > 0.1 * M:
+                # too many fixups, start over with a larger subset
+                m *= 2
+                break
+            below &= ~bad_below
+            above &= ~bad_above
+
+    beta, it, converged, history = _interior_point(
+        endog, exog, q, max_iter=max_iter, tol=tol)
+    return beta, n_iter + it, converged, history
+
+
+def _xy_bootstrap(endog, exog, q, params, n_boot, random_state, n_jobs=1):
+    """
+    Parameter draws of the xy-pair bootstrap
+
+    A resample is represented by the counts of the observations, the check
+    function is positively homogeneous so that the fit on the distinct
+    observations scaled by their counts is the fit on the resample. Every
+    replication is warm started at `params` through the preprocessing.
+    """
+    nobs = exog.shape[0]
+    # one seed per replication, the draws do not depend on n_jobs
+    seeds = random_state.randint(0, 2**31 - 1, size=n_boot)
+
+    def _replicate(seeds):
+        draws = np.empty((len(seeds), len(params)))
+        for i, seed in enumerate(seeds):
+            rs = np.random.RandomState(seed)
+            counts = np.bincount(rs.randint(nobs, size=nobs), minlength=nobs)
+            idx = np.flatnonzero(counts)
+            w = counts[idx].astype(float)
+            exog_w = exog[idx] * w[:, None]
+            xx_chol = np.linalg.cholesky(np.dot(exog_w.T, exog_w))
+            draws[i] = _preprocessed(endog[idx] * w, exog_w, q, xx_chol,
+                                     params, 100, 1e-10, rs)[0]
+        return draws
+
+    return np.concatenate(map_blocks(
+        lambda start, stop: _replicate(seeds[start:stop]), n_boot, n_jobs))
+
+
+def _mcmb(endog, exog, q, params, n_boot, random_state):
+    """
+    Parameter draws of the Markov chain marginal bootstrap
+
+    MCMB-A of Kocherginsky, He and Mu (2005): the design is transformed to
+    orthonormal columns, then each step of the chain solves the marginal
+    estimating equation of one parameter, with the other parameters at
+    their current values, for a bootstrapped score. The marginal equation
+    is solved by a weighted quantile of the partial residuals.
+    """
+    nobs, k_vars = exog.shape
+    eigval, eigvec = np.linalg.eigh(np.dot(exog.T, exog))
+    transf = np.dot(eigvec / np.sqrt(eigval), eigvec.T)
+    z = np.dot(exog, transf)
+    theta = np.linalg.solve(transf, params)
+    fitted = np.dot(z, theta)
+
+    # score contributions at the estimate
+    psi = z * (q - (endog - fitted < 0))[:, None]
+    abs_z = np.abs(z)
+    total = abs_z.sum(0)
+    # sum_i z_ij psi_q(r_i - z_ij b) = const_j - sum_i |z_ij| 1(t_i < b)
+    # for t_i = r_i / z_ij
+    const = q * z.sum(0) - np.minimum(z, 0).sum(0)
+    # observations with z_ij == 0 do not enter the equation of parameter j
+    nonzero = [np.flatnonzero(z[:, j]) for j in range(k_vars)]
+
+    draws = np.empty((n_boot, k_vars))
+    for b in range(n_boot):
+        for j in range(k_vars):
+            score = psi[random_state.randint(nobs, size=nobs), j].sum()
+            nz = nonzero[j]
+            zj = z[nz, j]
+            t = (endog[nz] - fitted[nz]) / zj + theta[j]
+            order = np.argsort(t)
+            cumw = np.cumsum(abs_z[nz[order], j])
+            pos = np.searchsorted(cumw, const[j] - score)
+            new = t[order[min(pos, len(nz) - 1)]]
+            fitted += z[:, j] * (new - theta[j])
+            theta[j] = new
+        draws[b] = theta
+    return np.dot(draws, transf.T)
+
+
 def _parzen(u):
     z = np.where(np.abs(u) <= .5, 4./3 - 8. * u**2 + 8. * np.abs(u)**3,
                  8. * (1 - np.abs(u))**3 / 3.)
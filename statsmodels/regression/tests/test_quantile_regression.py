@@ -2,7 +2,8 @@
 import scipy.stats
 import numpy as np
 import statsmodels.api as sm
-from numpy.testing import assert_allclose, assert_equal, assert_almost_equal
+from numpy.testing import (assert_allclose, assert_equal, assert_almost_equal,
+                           assert_raises, assert_)
 from patsy import dmatrices   # pylint: disable=E0611
 from statsmodels.regression.quantile_regression import QuantReg
 from .results_quantile_regression import (
@@ -208,3 +209,99 @@ class TestParzeneHsheather(CheckModelResultsMixin):
     #@classmethod
     #def setUp(cls):
         #cls.res1, cls.res2 = setup_fun('tri', 'hsheather')
+
+
+class TestInteriorPointEpanechnikovHsheather(CheckModelResultsMixin):
+    @classmethod
+    def setUp(cls):
+        data = sm.datasets.engel.load_pandas().data
+        y, X = dmatrices('foodexp ~ income', data, return_type='dataframe')
+        cls.res1 = QuantReg(y, X).fit(vcov='iid', kernel='epa',
+                                      bandwidth='hsheather',
+                                      method='interior_point')
+        cls.res2 = epan2_hsheather
+
+
+def test_interior_point_fitted():
+    data = sm.datasets.engel.load_pandas().data
+    y, X = dmatrices('foodexp ~ income', data, return_type='dataframe')
+    res = QuantReg(y, X).fit(q=.1, method='interior_point')
+    assert_almost_equal(np.array(res.fittedvalues), Rquantreg.fittedvalues, 5)
+    assert_raises(ValueError, QuantReg(y, X).fit, q=0,
+                  method='interior_point')
+
+
+def test_fit_quantiles():
+    rs = np.random.RandomState(12345)
+    nobs = 2000
+    exog = sm.add_constant(rs.randn(nobs, 2))
+    endog = (np.dot(exog, [1., 0.5, -1.]) +
+             rs.standard_t(3, nobs) * (1 + np.abs(exog[:, 1])))
+    mod = QuantReg(endog, exog)
+    qs = [0.75, 0.1, 0.5, 0.25]
+    res_full = mod.fit_quantiles(qs, preprocess=False)
+    res_pre = mod.fit_quantiles(qs, preprocess=True, random_state=0)
+    for q, r1, r2 in zip(qs, res_full, res_pre):
+        res = mod.fit(q=q, method='interior_point')
+        assert_equal(r1.q, q)
+        assert_equal(r2.q, q)
+        assert_allclose(r1.params, res.params, rtol=1e-8)
+        assert_allclose(r2.params, res.params, rtol=1e-6)
+        assert_allclose(r2.bse, res.bse, rtol=1e-2)
+        # the objective is minimized, compare with irls
+        res_irls = mod.fit(q=q)
+        check = lambda e: np.sum(np.where(e < 0, (q - 1) * e, q * e))
+        assert_(check(r2.resid) <= check(res_irls.resid) + 1e-8)
+
+
+def test_bootstrap():
+    data = sm.datasets.engel.load_pandas().data
+    y, X = dmatrices('foodexp ~ income', data, return_type='dataframe')
+    mod = QuantReg(y, X)
+    res_robust = mod.fit(q=.5)
+    res = mod.fit(q=.5, vcov='bootstrap', n_boot=100, random_state=3)
+    res_threads = mod.fit(q=.5, vcov='bootstrap', n_boot=100,
+                          random_state=3, n_jobs=2)
+    assert_equal(res.bootstrap_results.shape, (100, 2))
+    assert_allclose(res_threads.bootstrap_results, res.bootstrap_results)
+    assert_allclose(res.params, res_robust.params)
+    assert_allclose(res.bootstrap_results.mean(0), res.params, rtol=0.1)
+
+    # the replications are exact fits of the weighted resample
+    rs = np.random.RandomState(0)
+    counts = np.bincount(rs.randint(len(y), size=len(y)),
+                         minlength=len(y))
+    idx = np.repeat(np.arange(len(y)), counts)
+    res_resample = QuantReg(np.asarray(y)[idx], np.asarray(X)[idx]).fit(
+        q=.5, method='interior_point')
+    from statsmodels.regression.quantile_regression import _preprocessed
+    exog = np.asarray(X) * counts[:, None]
+    params = _preprocessed(np.asarray(y)[:, 0] * counts, exog, .5,
+                           np.linalg.cholesky(np.dot(exog.T, exog)),
+                           res_robust.params.values, 100, 1e-10, rs)[0]
+    assert_allclose(params, res_resample.params, rtol=1e-6)
+
+    res = mod.fit(q=.5, vcov='mcmb', n_boot=500, random_state=3)
+    assert_equal(res.bootstrap_results.shape, (500, 2))
+
+    # dummy regressors without constant, the orthonormalized design has
+    # zeros in the columns
+    rs = np.random.RandomState(0)
+    d = (rs.uniform(size=30) < 0.2).astype(float)
+    exog = np.column_stack((d, 1 - d))
+    endog = np.dot(exog, [1., 2.]) + rs.randn(30)
+    res = QuantReg(endog, exog).fit(q=.5, method='interior_point',
+                                    vcov='mcmb', n_boot=50, random_state=0)
+    assert_(np.isfinite(res.bootstrap_results).all())
+
+    # with iid errors both bootstraps agree with the kernel estimate
+    rs = np.random.RandomState(12345)
+    nobs = 2000
+    exog = sm.add_constant(rs.randn(nobs, 2))
+    endog = np.dot(exog, [1., 0.5, -1.]) + rs.standard_t(3, nobs)
+    mod = QuantReg(endog, exog)
+    res_robust = mod.fit(q=.7, method='interior_point')
+    for vcov, n_boot in [('bootstrap', 200), ('mcmb', 1000)]:
+        res = mod.fit(q=.7, method='interior_point', vcov=vcov,
+                      n_boot=n_boot, random_state=0)
+        assert_allclose(res.bse, res_robust.bse, rtol=0.2)
@@ -975,6 +975,40 @@ def test_summary():
     assert_equal(table, expected)
 
 
+def test_wls_solver():
+    from statsmodels.regression.linear_model import _WLSSolver
+    np.random.seed(12345)
+    nobs = 50
+    exog = add_constant(np.random.randn(nobs, 2))
+    endog = np.dot(exog, [1., 2., -1.]) + np.random.randn(nobs)
+    weights = np.random.uniform(0, 1, size=nobs)
+    # weights that leave only two observations with a nonzero weight make
+    # X'WX singular
+    weights_singular = np.zeros(nobs)
+    weights_singular[:2] = 1
+    for exog_, full_rank in [(exog, True),
+                             (np.column_stack((exog, exog[:, 1])), False)]:
+        solver = _WLSSolver(exog_, full_rank=full_rank, blocksize=7)
+        for w in [weights, weights_singular]:
+            res_wls = WLS(endog, exog_, weights=w).fit()
+            assert_allclose(solver.solve(endog, w), res_wls.params,
+                            rtol=1e-10, atol=1e-10)
+            assert_allclose(solver.normalized_cov_params(),
+                            res_wls.normalized_cov_params,
+                            rtol=1e-8, atol=1e-10)
+
+    # the collinear longley design is solved by QR
+    data = longley.load()
+    exog = add_constant(data.exog, prepend=False)
+    w = np.linspace(1, 2, len(data.endog))
+    solver = _WLSSolver(exog, blocksize=5)
+    res_wls = WLS(data.endog, exog, weights=w).fit()
+    assert_allclose(solver.solve(data.endog, w), res_wls.params, rtol=1e-9)
+    assert_equal(solver._factor[0], 'qr')
+    assert_allclose(solver.normalized_cov_params(),
+                    res_wls.normalized_cov_params, rtol=1e-7)
+
+
 
 if __name__=="__main__":
 
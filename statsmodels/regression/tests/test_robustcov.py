@@ -9,7 +9,8 @@ Author: Josef Perktold
 import numpy as np
 from scipy import stats
 
-from numpy.testing import assert_allclose, assert_equal, assert_warns
+from numpy.testing import (assert_allclose, assert_equal, assert_warns,
+                           assert_raises, assert_)
 
 from statsmodels.regression.linear_model import OLS, WLS
 import statsmodels.stats.sandwich_covariance as sw
@@ -636,3 +637,57 @@ class TestWLSOLSRobustSmall(object):
             ft2 = res2.f_test(mat)
             assert_allclose(ft1.fvalue, ft2.fvalue, rtol=1e-13)
             assert_allclose(ft1.pvalue, ft2.pvalue, rtol=1e-12)
+
+
+def test_cov_params_by_cov():
+    from statsmodels.datasets import grunfeld
+
+    dtapa = grunfeld.data.load_pandas()
+    dtapa_endog = dtapa.endog[:200]
+    dtapa_exog = dtapa.exog[:200]
+    exog = add_constant(dtapa_exog[['value', 'capital']], prepend=False)
+    res_ols = OLS(dtapa_endog, exog).fit()
+    groups = np.unique(np.asarray(dtapa_exog[['firm']], 'S20'),
+                       return_inverse=True)[1]
+    time = np.asarray(dtapa_exog['year']).astype(int)
+    time -= time.min()
+
+    all_cov = [('HC0', dict()), ('HC3', dict()),
+               ('HAC', dict(maxlags=4, use_correction=True)),
+               ('cluster', dict(groups=groups)),
+               ('cluster', dict(groups=(groups, time))),
+               ('nw-groupsum', dict(time=time, maxlags=2)),
+               ('nw-panel', dict(time=time, maxlags=2))]
+
+    assert_allclose(res_ols.bse_by_cov('nonrobust'), res_ols.bse, rtol=1e-13)
+    for cov_type, kwds in all_cov:
+        res = res_ols.get_robustcov_results(cov_type, **kwds)
+        assert_allclose(res_ols.cov_params_by_cov(cov_type, **kwds),
+                        res.cov_params(), rtol=1e-13)
+        assert_allclose(res_ols.bse_by_cov(cov_type, **kwds), res.bse,
+                        rtol=1e-13)
+        assert_allclose(res.bse_by_cov('nonrobust'), res_ols.bse, rtol=1e-13)
+
+    # cached, and the scores are computed only once
+    res_ols_ = res_ols._results
+    xu = res_ols_._cache['_sandwich_arrays'][0]
+    cov = res_ols_.cov_params_by_cov('cluster', groups=groups)
+    assert_(res_ols_.cov_params_by_cov('cluster', groups=groups) is cov)
+    res = res_ols_.get_robustcov_results('cluster', groups=groups)
+    assert_(res.cov_params_default is cov)
+    assert_(res._sandwich_arrays[0] is xu)
+
+    # the cluster results have a different scale, the cached nonrobust and
+    # HC covariances are those of the original fit
+    res_ols2 = OLS(dtapa_endog, exog).fit()
+    res = res_ols2.get_robustcov_results('cluster', groups=groups)
+    assert_(res.scale != res_ols2.scale)
+    assert_allclose(res.bse_by_cov('nonrobust'), res_ols2.bse, rtol=1e-13)
+    assert_allclose(res.bse_by_cov('HC1'), res_ols2.HC1_se, rtol=1e-13)
+    assert_allclose(res_ols2.bse_by_cov('nonrobust'), res_ols2.bse,
+                    rtol=1e-13)
+
+    # pandas labels
+    bse = res_ols.bse_by_cov('HC1')
+    assert_equal(list(bse.index), list(exog.columns))
+    assert_raises(ValueError, res_ols.cov_params_by_cov, 'HC4')
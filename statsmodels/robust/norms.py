@@ -205,10 +205,9 @@ class HuberT(RobustNorm):
 
             rho(z) = \|z\|*t - .5*t**2    for \|z\| > t
         """
-        z = np.asarray(z)
-        test = self._subset(z)
-        return (test * 0.5 * z**2 +
-                (1 - test) * (np.fabs(z) * self.t - 0.5 * self.t**2))
+        absz = np.fabs(z)
+        clipped = np.minimum(absz, self.t)
+        return clipped * (absz - 0.5 * clipped)
 
     def psi(self, z):
         """
@@ -228,9 +227,7 @@ class HuberT(RobustNorm):
 
             psi(z) = sign(z)*t for \|z\| > t
         """
-        z = np.asarray(z)
-        test = self._subset(z)
-        return test * z + (1 - test) * self.t * np.sign(z)
+        return np.clip(z, -self.t, self.t)
 
     def weights(self, z):
         """
@@ -250,11 +247,7 @@ class HuberT(RobustNorm):
 
             weights(z) = t/\|z\|      for \|z\| > t
         """
-        z = np.asarray(z)
-        test = self._subset(z)
-        absz = np.fabs(z)
-        absz[test] = 1.0
-        return test + (1 - test) * self.t / absz
+        return self.t / np.maximum(np.fabs(z), self.t)
 
     def psi_deriv(self, z):
         """
@@ -22,9 +22,9 @@ from statsmodels.tools.decorators import (cache_readonly,
 import statsmodels.regression.linear_model as lm
 import statsmodels.robust.norms as norms
 import statsmodels.robust.scale as scale
+from statsmodels.robust.s_estimator import fast_s
 import statsmodels.base.model as base
 import statsmodels.base.wrapper as wrap
-from statsmodels.compat.numpy import np_matrix_rank
 
 __all__ = ['RLM']
 
@@ -32,6 +32,7 @@ def _check_convergence(criterion, iteration, tol, maxiter):
     return not (np.any(np.fabs(criterion[iteration] -
                 criterion[iteration-1]) > tol) and iteration < maxiter)
 
+
 class RLM(base.LikelihoodModel):
     __doc__ = """
     Robust Linear Models
@@ -124,12 +125,18 @@ class RLM(base.LikelihoodModel):
 
         Resets the history and number of iterations.
         """
-        self.pinv_wexog = np.linalg.pinv(self.exog)
-        self.normalized_cov_params = np.dot(self.pinv_wexog,
-                                        np.transpose(self.pinv_wexog))
-        self.df_resid = (np.float(self.exog.shape[0] -
-                         np_matrix_rank(self.exog)))
-        self.df_model = np.float(np_matrix_rank(self.exog)-1)
+        # pseudoinverse and rank from one singular value decomposition
+        u, sv, vt = np.linalg.svd(self.exog, full_matrices=False)
+        nobs, k_exog = self.exog.shape
+        rank = np.sum(sv > sv.max() * max(nobs, k_exog) *
+                      np.finfo(sv.dtype).eps)
+        sv_inv = np.zeros_like(sv)
+        mask = sv > 1e-15 * sv.max()
+        sv_inv[mask] = 1. / sv[mask]
+        self.pinv_wexog = np.dot(vt.T * sv_inv, u.T)
+        self.normalized_cov_params = np.dot(vt.T * sv_inv**2, vt)
+        self.df_resid = np.float(nobs - rank)
+        self.df_model = np.float(rank - 1)
         self.nobs = float(self.endog.shape[0])
 
     def score(self, params):
@@ -172,17 +179,6 @@ class RLM(base.LikelihoodModel):
         return self.M((self.endog - tmp_results.fittedvalues) /
                           tmp_results.scale).sum()
 
-    def _update_history(self, tmp_results, history, conv):
-        history['params'].append(tmp_results.params)
-        history['scale'].append(tmp_results.scale)
-        if conv == 'dev':
-            history['deviance'].append(self.deviance(tmp_results))
-        elif conv == 'sresid':
-            history['sresid'].append(tmp_results.resid/tmp_results.scale)
-        elif conv == 'weights':
-            history['weights'].append(tmp_results.model.weights)
-        return history
-
     def _estimate_scale(self, resid):
         """
         Estimates the scale based on the option provided to the fit method.
@@ -220,10 +216,17 @@ class RLM(base.LikelihoodModel):
             'H1', 'H2', or 'H3'
             Indicates how the covariance matrix is estimated.  Default is 'H1'.
             See rlm.RLMResults for more information.
-        init : string
-            Specifies method for the initial estimates of the parameters.
+        init : None, string, array-like or results instance
+            Specifies the initial estimates of the parameters.
             Default is None, which means that the least squares estimate
-            is used.  Currently it is the only available choice.
+            is used. 'fast_s' uses the high breakdown S-estimate and its
+            scale, computed with a fixed seed, see
+            statsmodels.robust.s_estimator.fast_s. An array is
+            used as initial parameters. An instance with attributes params
+            and scale, such as the result of fast_s or of a previous fit,
+            provides the initial parameters and scale. MM-estimation uses
+            an S-estimate with `update_scale` False and a redescending
+            norm such as TukeyBiweight.
         maxiter : int
             The maximum number of iterations to try. Default is 50.
         scale_est : string or HuberScale()
@@ -261,9 +264,32 @@ class RLM(base.LikelihoodModel):
             warn("stand_mad is deprecated and will be removed in 0.7.0",
                  FutureWarning)
 
-        wls_results = lm.WLS(self.endog, self.exog).fit()
-        if not init:
-            self.scale = self._estimate_scale(wls_results.resid)
+        endog = self.endog
+        exog = self.exog
+        df_resid = self.df_resid
+
+        # the weighted least squares problems are solved with preallocated
+        # buffers and results are only created for the final estimate
+        init_scale = None
+        if init is None:
+            params = np.dot(self.pinv_wexog, endog)
+        elif isinstance(init, string_types):
+            if init.lower() != 'fast_s':
+                raise ValueError("init %s not understood" % init)
+            init = fast_s(endog, exog, random_state=0)
+            params, init_scale = init.params, init.scale
+        elif hasattr(init, 'params'):
+            params, init_scale = init.params, init.scale
+        else:
+            params = init
+        params = np.array(params, dtype=np.float64)
+        fittedvalues = np.dot(exog, params)
+        resid = endog - fittedvalues
+        weights = np.ones(exog.shape[0])
+        if init_scale is None:
+            self.scale = self._estimate_scale(resid)
+        else:
+            self.scale = init_scale
 
         history = dict(params = [np.inf], scale = [])
         if conv == 'coefs':
@@ -278,20 +304,35 @@ class RLM(base.LikelihoodModel):
             history.update(dict(weights = [np.inf]))
             criterion = history['weights']
 
+        def update_history(params, resid, weights):
+            # scale of the weighted least squares fit
+            wls_scale = np.dot(weights * resid, resid) / df_resid
+            history['params'].append(params)
+            history['scale'].append(wls_scale)
+            if conv == 'dev':
+                history['deviance'].append(self.M(resid / wls_scale).sum())
+            elif conv == 'sresid':
+                history['sresid'].append(resid / wls_scale)
+            elif conv == 'weights':
+                history['weights'].append(weights)
+
         # done one iteration so update
-        history = self._update_history(wls_results, history, conv)
+        update_history(params, resid, weights)
+        solver = lm._WLSSolver(exog,
+                               full_rank=self.df_model + 1 == exog.shape[1])
         iteration = 1
         converged = 0
         while not converged:
-            self.weights = self.M.weights(wls_results.resid/self.scale)
-            wls_results = lm.WLS(self.endog, self.exog,
-                                 weights=self.weights).fit()
+            self.weights = weights = self.M.weights(resid / self.scale)
+            params = solver.solve(endog, weights)
+            np.dot(exog, params, out=fittedvalues)
+            np.subtract(endog, fittedvalues, out=resid)
             if update_scale is True:
-                self.scale = self._estimate_scale(wls_results.resid)
-            history = self._update_history(wls_results, history, conv)
+                self.scale = self._estimate_scale(resid)
+            update_history(params, resid, weights)
             iteration += 1
             converged = _check_convergence(criterion, iteration, tol, maxiter)
-        results = RLMResults(self, wls_results.params,
+        results = RLMResults(self, params,
                             self.normalized_cov_params, self.scale)
 
         history['iteration'] = iteration
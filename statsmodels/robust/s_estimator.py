@@ -0,0 +1,341 @@
+"""
+S-estimator of regression computed by the fast-S algorithm
+
+The S-estimator minimizes an M-estimator of the scale of the residuals,
+here with Tukey's biweight function. With the default tuning constant it
+has a breakdown point of 50% and serves as high breakdown starting value
+and scale for MM-estimation with RLM.
+
+References
+----------
+Salibian-Barrera, M. and Yohai, V. J. 2006. 'A fast algorithm for
+    S-regression estimates.' Journal of Computational and Graphical
+    Statistics, 15(2), 414-427.
+
+Rousseeuw, P. J. and Van Driessen, K. 2006. 'Computing LTS regression for
+    large data sets.' Data Mining and Knowledge Discovery, 12(1), 29-45.
+"""
+from statsmodels.compat.python import range, lzip
+import numpy as np
+from statsmodels.tools.parallel import map_blocks
+from statsmodels.tools.tools import check_random_state
+
+__all__ = ['fast_s', 'm_scale', 'SEstimatorResults']
+
+
+def _rho(u, c):
+    """Tukey's biweight rho of u / c, normalized to a maximum of one"""
+    v = np.square(u / c)
+    np.minimum(v, 1, out=v)
+    np.subtract(1, v, out=v)
+    rho = v * v
+    rho *= v
+    np.subtract(1, rho, out=rho)
+    return rho
+
+
+def _weights(u, c):
+    """Tukey's biweight weights psi(u) / u up to a constant"""
+    v = np.square(u / c)
+    np.minimum(v, 1, out=v)
+    np.subtract(1, v, out=v)
+    v *= v
+    return v
+
+
+def m_scale(resid, c=1.547645, b=0.5, scale=None, maxiter=100, tol=1e-8):
+    """
+    M-estimator of scale of the columns of resid
+
+    Solves mean(rho(resid / scale)) = b for each column with Tukey's
+    biweight rho normalized to a maximum of one.
+
+    Parameters
+    ----------
+    resid : array
+        1d or 2d array of residuals, the scales are computed for the
+        columns.
+    c : float
+        Tuning constant of the biweight. The default together with b=0.5
+        gives a consistent estimate at the normal distribution with a
+        breakdown point of 50%.
+    b : float
+        Expected value of rho at the standard normal distribution.
+    scale : float or array, optional
+        Starting value. The default is the normalized median absolute
+        residual.
+    maxiter : int
+        Maximum number of fixed point iterations.
+    tol : float
+        Relative convergence tolerance.
+
+    Returns
+    -------
+    scale : float or array
+        The M-scale of each column.
+    """
+    resid = np.asarray(resid)
+    if scale is None:
+        scale = np.median(np.abs(resid), axis=0) / 0.6744897501960817
+    tiny = np.finfo(np.float64).tiny
+    scale = np.maximum(scale, tiny)
+    for _ in range(maxiter):
+        scale_new = scale * np.sqrt(_rho(resid / scale, c).mean(0) / b)
+        scale_new = np.maximum(scale_new, tiny)
+        if np.all(np.abs(scale_new - scale) <= tol * scale):
+            return scale_new
+        scale = scale_new
+    return scale
+
+
+def _wls(endog, exog, weights):
+    """weighted least squares, least squares if X'WX is singular"""
+    wexog = exog * weights[:, None]
+    try:
+        return np.linalg.solve(np.dot(wexog.T, exog), np.dot(endog, wexog))
+    except np.linalg.LinAlgError:
+        sqrt_weights = np.sqrt(weights)
+        return np.linalg.lstsq(exog * sqrt_weights[:, None],
+                               endog * sqrt_weights)[0]
+
+
+def _elemental_params(endog, exog, subsets):
+    """
+    Exact fits to the rows in each row of subsets, singular ones are dropped
+    """
+    exog_sub = exog[subsets]
+    endog_sub = endog[subsets]
+    try:
+        return np.linalg.solve(exog_sub, endog_sub)
+    except np.linalg.LinAlgError:
+        params = []
+        for x, y in lzip(exog_sub, endog_sub):
+            try:
+                params.append(np.linalg.solve(x, y))
+            except np.linalg.LinAlgError:
+                pass
+        return np.array(params).reshape(-1, exog.shape[1])
+
+
+def _i_steps(endog, exog, params, c, b, n_steps):
+    """
+    Concentration steps for a set of candidates
+
+    Each step computes the scale of the residuals of all candidates at once
+    and does one weighted least squares fit with the biweight weights for
+    each candidate. The scale is one fixed point iteration from the median
+    absolute residual.
+    """
+    for _ in range(n_steps):
+        resid = endog[:, None] - np.dot(exog, params.T)
+        scale = m_scale(resid, c, b, maxiter=1)
+        wts = _weights(resid / scale, c)
+        params = np.array([_wls(endog, exog, wts[:, j])
+                           for j in range(params.shape[0])])
+    return params
+
+
+def _search(endog, exog, subsets, c, b, k_steps, n_best, chunksize):
+    """
+    Best candidates by scale from elemental subsets after k_steps
+    concentration steps, the candidates are processed in chunks.
+
+    As in fast-S the scale of a candidate is only computed if it is smaller
+    than the largest scale of the current best candidates, which is the
+    case if the mean of rho of its residuals at that scale is less than b.
+    """
+    best_params = np.empty((0, exog.shape[1]))
+    best_scale = np.empty(0)
+    for start in range(0, subsets.shape[0], chunksize):
+        params = _elemental_params(endog, exog,
+                                   subsets[start:start + chunksize])
+        if params.shape[0] == 0:
+            continue
+        params = _i_steps(endog, exog, params, c, b, k_steps)
+        resid = endog[:, None] - np.dot(exog, params.T)
+        if best_scale.shape[0] < n_best:
+            # fill the best candidates by the approximate scale
+            scale = m_scale(resid, c, b, maxiter=1)
+            idx = np.argsort(scale)[:n_best - best_scale.shape[0]]
+            best_params = np.vstack((best_params, params[idx]))
+            best_scale = np.r_[best_scale, m_scale(resid[:, idx], c, b)]
+            params = np.delete(params, idx, axis=0)
+            resid = np.delete(resid, idx, axis=1)
+        smaller = _rho(resid / best_scale.max(), c).mean(0) < b
+        if smaller.any():
+            best_params = np.vstack((best_params, params[smaller]))
+            best_scale = np.r_[best_scale, m_scale(resid[:, smaller], c, b)]
+            idx = np.argsort(best_scale)[:n_best]
+            best_params, best_scale = best_params[idx], best_scale[idx]
+    return best_params, best_scale
+
+
+def _refine(endog, exog, params, c, b, maxiter, tol):
+    """
+    Concentration steps until the scale converges
+
+    Returns params, scale, number of iterations and whether the scale
+    converged.
+    """
+    resid = endog - np.dot(exog, params)
+    scale = m_scale(resid, c, b)
+    for iteration in range(1, maxiter + 1):
+        params = _wls(endog, exog, _weights(resid / scale, c))
+        resid = endog - np.dot(exog, params)
+        scale_new = m_scale(resid, c, b, scale=scale)
+        if np.abs(scale_new - scale) <= tol * scale:
+            return params, scale_new, iteration, True
+        scale = scale_new
+    return params, scale, maxiter, False
+
+
+class SEstimatorResults(object):
+    """
+    Results of fast_s
+
+    Attributes
+    ----------
+    params : array
+        The S-estimate of the regression parameters.
+    scale : float
+        The M-scale of the residuals at params, computed with the
+        denominator nobs - k_vars.
+    iterations : int
+        Number of concentration steps of the final refinement.
+    converged : bool
+        Whether the scale converged in the final refinement.
+    """
+
+    def __init__(self, params, scale, iterations, converged):
+        self.params = params
+        self.scale = scale
+        self.iterations = iterations
+        self.converged = converged
+
+
+def fast_s(endog, exog, n_candidates=500, n_best=5, k_steps=2,
+           c=1.547645, b=0.5, max_search_obs=5000, maxiter=100, tol=1e-8,
+           random_state=None, n_jobs=1):
+    """
+    S-estimator of a linear regression with Tukey's biweight
+
+    Parameters
+    ----------
+    endog : array-like
+        1d endogenous response variable.
+    exog : array-like
+        2d design matrix, an intercept is not included by default.
+    n_candidates : int
+        Number of random elemental subsets of exog.shape[1] observations
+        that are used as starting values.
+    n_best : int
+        Number of candidates with the smallest scale that are refined until
+        convergence.
+    k_steps : int
+        Number of concentration steps for each candidate before the scales
+        are compared.
+    c : float
+        Tuning constant of the biweight.
+    b : float
+        Expected value of the biweight rho, normalized to a maximum of one,
+        at the standard normal distribution. The defaults of `c` and `b`
+        give a breakdown point of 50%.
+    max_search_obs : int
+        The candidates are searched and refined on a random subsample of
+        this many observations if there are more observations. The best
+        candidate is then refined on all observations.
+    maxiter : int
+        Maximum number of concentration steps in the refinements.
+    tol : float
+        Relative convergence tolerance for the scale.
+    random_state : None, int or np.random.RandomState
+        Seed or random number generator for the subsets.
+    n_jobs : int
+        Number of threads that search the candidates, -1 uses all
+        processors. The subsets are drawn before they are split among the
+        threads, so that the estimate does not depend on n_jobs.
+
+    Returns
+    -------
+    results : SEstimatorResults
+        Instance with attributes params and scale. It can be used as `init`
+        in `RLM.fit`.
+
+    Notes
+    -----
+    The search follows the fast-S algorithm. For each elemental subset the
+    exact fit is improved by `k_steps` concentration steps, each a weighted
+    least squares fit with the biweight weights of the current residuals.
+    The residuals and scales of many candidates are computed at once. The
+    `n_best` candidates with the smallest scale are refined until the
+    scale converges, and the one with the smallest scale is the estimate.
+    As in the R package robustbase the M-scale of the residuals solves
+    sum(rho(resid / scale)) = (nobs - k_vars) * b.
+
+    An MM-estimator uses the S-estimate as starting value and fixed scale
+    for an efficient M-estimator, for example
+
+    >>> mod = RLM(endog, exog, M=norms.TukeyBiweight())
+    >>> res = mod.fit(init=fast_s(endog, exog), update_scale=False)
+
+    References
+    ----------
+    Salibian-Barrera, M. and Yohai, V. J. 2006. 'A fast algorithm for
+        S-regression estimates.' Journal of Computational and Graphical
+        Statistics, 15(2), 414-427.
+    """
+    endog = np.asarray(endog, dtype=np.float64)
+    exog = np.asarray(exog, dtype=np.float64)
+    nobs, k_vars = exog.shape
+    if nobs <= k_vars:
+        raise ValueError("fast_s requires more observations than "
+                         "regressors")
+    random_state = check_random_state(random_state)
+
+    if nobs > max_search_obs:
+        idx = np.sort(random_state.permutation(nobs)[:max_search_obs])
+        endog_search, exog_search = endog[idx], exog[idx]
+    else:
+        endog_search, exog_search = endog, exog
+    nobs_search = endog_search.shape[0]
+
+    # elemental subsets without repeated observations
+    subsets = random_state.randint(0, nobs_search, size=(n_candidates,
+                                                         k_vars))
+    repeated = (np.diff(np.sort(subsets, 1), axis=1) == 0).any(1)
+    while repeated.any():
+        subsets[repeated] = random_state.randint(0, nobs_search,
+                                                 size=(repeated.sum(),
+                                                       k_vars))
+        repeated = (np.diff(np.sort(subsets, 1), axis=1) == 0).any(1)
+
+    # bound the size of the residual arrays of a chunk of candidates
+    chunksize = max(1, min(n_candidates, 2**20 // nobs_search))
+
+    # the M-scale of the residuals uses the denominator nobs - k_vars
+    b_search = b * (nobs_search - k_vars) / float(nobs_search)
+
+    def search(start, stop):
+        return _search(endog_search, exog_search, subsets[start:stop], c,
+                       b_search, k_steps, n_best, chunksize)
+
+    blocks = map_blocks(search, n_candidates, n_jobs)
+    if len(blocks) == 1:
+        best_params = blocks[0][0]
+    else:
+        best_params = np.vstack([block[0] for block in blocks])
+        best_scale = np.concatenate([block[1] for block in blocks])
+        best_params = best_params[np.argsort(best_scale)[:n_best]]
+    if best_params.shape[0] == 0:
+        raise ValueError("all elemental subsets of exog are singular")
+
+    refined = [_refine(endog_search, exog_search, params, c, b_search,
+                       maxiter, tol) for params in best_params]
+    params, scale, iterations, converged = min(refined,
+                                               key=lambda res: res[1])
+    if nobs > max_search_obs:
+        b_full = b * (nobs - k_vars) / float(nobs)
+        params, scale, iterations, converged = _refine(endog, exog, params,
+                                                       c, b_full, maxiter,
+                                                       tol)
+    return SEstimatorResults(params, scale, iterations, converged)
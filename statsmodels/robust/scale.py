@@ -41,7 +41,8 @@ def mad(a, c=Gaussian.ppf(3/4.), axis=0, center=np.median):
     a = np.asarray(a)
     if callable(center):
         center = np.apply_over_axes(center, a, axis)
-    return np.median((np.fabs(a-center))/c, axis=axis)
+    # the deviations are a temporary, the median can select in place
+    return np.median(np.fabs(a - center), axis=axis, overwrite_input=True) / c
 
 def stand_mad(a, c=Gaussian.ppf(3/4.), axis=0):
     from warnings import warn
@@ -0,0 +1,79 @@
+"""
+Tests for the fast-S estimator and MM-estimation with RLM
+"""
+import numpy as np
+from numpy.testing import assert_allclose, assert_equal, assert_
+import statsmodels.api as sm
+from statsmodels.robust import norms
+from statsmodels.robust.robust_linear_model import RLM
+from statsmodels.robust.s_estimator import fast_s, m_scale
+
+
+def test_mm_stackloss():
+    # R robustbase 0.92, lmrob(stack.loss ~ ., data=stackloss)
+    params_r = [-41.5246, 0.9388, 0.5796, -0.1129]
+    scale_r = 1.912
+    data = sm.datasets.stackloss.load()
+    exog = sm.add_constant(data.exog, prepend=True)
+    res_s = fast_s(data.endog, exog, random_state=0)
+    assert_(res_s.converged)
+    mod = RLM(data.endog, exog, M=norms.TukeyBiweight(4.685061))
+    res = mod.fit(init=res_s, update_scale=False, conv='coefs', tol=1e-10)
+    assert_allclose(res.params, params_r, atol=1e-4)
+    assert_allclose(res.scale, scale_r, atol=1e-3)
+
+    res2 = mod.fit(init='fast_s', update_scale=False, conv='coefs',
+                   tol=1e-10)
+    assert_allclose(res2.params, res.params, rtol=1e-6)
+
+
+def test_m_scale():
+    np.random.seed(4321)
+    resid = np.random.randn(10000, 2)
+    resid[:, 1] *= 3
+    scale = m_scale(resid)
+    assert_allclose(scale, [1, 3], rtol=0.05)
+    # the scale solves the estimating equation
+    u = np.minimum((resid / scale / 1.547645)**2, 1)
+    assert_allclose((1 - (1 - u)**3).mean(0), 0.5, rtol=1e-6)
+    assert_allclose(m_scale(resid[:, 1]), scale[1], rtol=1e-6)
+
+
+class TestFastSContaminated(object):
+
+    @classmethod
+    def setup_class(cls):
+        rs = np.random.RandomState(987)
+        nobs = 2000
+        exog = sm.add_constant(rs.randn(nobs, 2), prepend=True)
+        endog = np.dot(exog, [1., 2., -1.]) + rs.randn(nobs)
+        # 30% bad leverage points
+        n_bad = int(0.3 * nobs)
+        exog[:n_bad, 1] += 5
+        endog[:n_bad] = rs.randn(n_bad) - 15
+        cls.endog, cls.exog = endog, exog
+        cls.res = fast_s(endog, exog, random_state=5)
+
+    def test_params(self):
+        assert_(self.res.converged)
+        assert_allclose(self.res.params, [1, 2, -1], atol=0.15)
+        res_ols = sm.OLS(self.endog, self.exog).fit()
+        assert_(np.abs(res_ols.params[1] - 2) > 1)
+
+    def test_n_jobs(self):
+        res = fast_s(self.endog, self.exog, random_state=5, n_jobs=3)
+        assert_equal(res.params, self.res.params)
+
+    def test_search_subsample(self):
+        # search on a subsample and refine on all observations
+        res = fast_s(self.endog, self.exog, random_state=5,
+                     max_search_obs=500)
+        # the refinement stops on the relative change in the scale
+        assert_allclose(res.params, self.res.params, atol=1e-3)
+        assert_allclose(res.scale, self.res.scale, rtol=1e-6)
+
+    def test_mm(self):
+        mod = RLM(self.endog, self.exog, M=norms.TukeyBiweight())
+        res = mod.fit(init=self.res, update_scale=False)
+        assert_allclose(res.params, [1, 2, -1], atol=0.1)
+        assert_equal(res.scale, self.res.scale)
@@ -607,13 +607,17 @@ class TukeyHSDResults(object):
     Other attributes contain information about the data from the
     MultiComparison instance: data, df_total, groups, groupsunique, variance.
 
+    The summary table is only created when it is requested, with many groups
+    `summary_frame` is a cheaper alternative to the SimpleTable.
+
     """
     def __init__(self, mc_object, results_table, q_crit, reject=None,
                  meandiffs=None, std_pairs=None, confint=None, df_total=None,
-                 reject2=None, variance=None):
+                 reject2=None, variance=None, alpha=None):
 
         self._multicomp = mc_object
-        self._results_table = results_table
+        self._table = results_table
+        self.alpha = alpha
         self.q_crit = q_crit
         self.reject = reject
         self.meandiffs = meandiffs
@@ -627,6 +631,31 @@ class TukeyHSDResults(object):
         self.groups =self._multicomp.groups
         self.groupsunique = self._multicomp.groupsunique
 
+    @property
+    def _results_table(self):
+        if self._table is None:
+            resarr = self._results_array()
+            self._table = SimpleTable(resarr, headers=resarr.dtype.names)
+            self._table.title = ('Multiple Comparison of Means - Tukey HSD,' +
+                                 'FWER=%4.2f' % self.alpha)
+        return self._table
+
+    def _results_array(self):
+        i1, i2 = self._multicomp.pairindices
+        resarr = np.empty(len(i1), dtype=[('group1', object),
+                                          ('group2', object),
+                                          ('meandiff', float),
+                                          ('lower', float),
+                                          ('upper', float),
+                                          ('reject', np.bool8)])
+        resarr['group1'] = self.groupsunique[i1]
+        resarr['group2'] = self.groupsunique[i2]
+        resarr['meandiff'] = np.round(self.meandiffs, 4)
+        resarr['lower'] = np.round(self.confint[:, 0], 4)
+        resarr['upper'] = np.round(self.confint[:, 1], 4)
+        resarr['reject'] = self.reject
+        return resarr
+
     def __str__(self):
         return str(self._results_table)
 
@@ -635,6 +664,26 @@ class TukeyHSDResults(object):
         '''
         return self._results_table
 
+    def summary_frame(self):
+        '''Summary of the pairwise comparisons as a DataFrame
+
+        Returns
+        -------
+        frame : pandas DataFrame
+            group labels, mean differences, confidence interval and reject
+            decision for each pair of groups, without rounding.
+        '''
+        import pandas as pd
+        i1, i2 = self._multicomp.pairindices
+        return pd.DataFrame({'group1': self.groupsunique[i1],
+                             'group2': self.groupsunique[i2],
+                             'meandiff': self.meandiffs,
+                             'lower': self.confint[:, 0],
+                             'upper': self.confint[:, 1],
+                             'reject': self.reject},
+                            columns=['group1', 'group2', 'meandiff', 'lower',
+                                     'upper', 'reject'])
+
 
     def _simultaneous_ci(self):
         """Compute simultaneous confidence intervals for comparison of means.
@@ -717,10 +766,8 @@ class TukeyHSDResults(object):
         means = self._multicomp.groupstats.groupmean
 
 
-        sigidx = []
-        nsigidx = []
-        minrange = [means[i] - self.halfwidths[i] for i in range(len(means))]
-        maxrange = [means[i] + self.halfwidths[i] for i in range(len(means))]
+        minrange = means - self.halfwidths
+        maxrange = means + self.halfwidths
 
         if comparison_name is None:
             ax1.errorbar(means, lrange(len(means)), xerr=self.halfwidths,
@@ -729,14 +776,12 @@ class TukeyHSDResults(object):
             if comparison_name not in self.groupsunique:
                 raise ValueError('comparison_name not found in group names.')
             midx = np.where(self.groupsunique==comparison_name)[0]
-            for i in range(len(means)):
-                if self.groupsunique[i] == comparison_name:
-                    continue
-                if (min(maxrange[i], maxrange[midx]) -
-                                         max(minrange[i], minrange[midx]) < 0):
-                    sigidx.append(i)
-                else:
-                    nsigidx.append(i)
+            # intervals that do not overlap with the comparison interval
+            sig = (np.minimum(maxrange, maxrange[midx]) -
+                   np.maximum(minrange, minrange[midx]) < 0)
+            others = self.groupsunique != comparison_name
+            sigidx = np.nonzero(sig & others)[0]
+            nsigidx = np.nonzero(~sig & others)[0]
             #Plot the master comparison
             ax1.errorbar(means[midx], midx, xerr=self.halfwidths[midx],
                          marker='o', linestyle='None', color='b', ecolor='b')
@@ -789,19 +834,32 @@ class MultiComparison(object):
         if group_order is None:
             self.groupsunique, self.groupintlab = np.unique(groups,
                                                             return_inverse=True)
+            valid = None
         else:
+            groupsunique, intlab = np.unique(groups, return_inverse=True)
             #check if group_order has any names not in groups
-            for grp in group_order:
-                if grp not in groups:
-                    raise ValueError(
-                            "group_order value '%s' not found in groups"%grp)
+            missing = ~np.in1d(group_order, groupsunique)
+            if missing.any():
+                raise ValueError("group_order value '%s' not found in groups"
+                                 % np.asarray(group_order)[missing][0])
             self.groupsunique = np.array(group_order)
-            self.groupintlab = np.zeros(len(data))
-            for name in self.groupsunique:
-                idx = np.where(self.groups == name)[0]
-                self.groupintlab[idx] = np.where(self.groupsunique == name)[0]
-
-        self.datali = [data[self.groups == k] for k in self.groupsunique]
+            # position of each unique label in group_order
+            sorter = np.argsort(self.groupsunique)
+            pos = np.searchsorted(self.groupsunique, groupsunique,
+                                  sorter=sorter)
+            pos = sorter[np.minimum(pos, len(sorter) - 1)]
+            found = self.groupsunique[pos] == groupsunique
+            # observations with labels not in group_order get label 0
+            self.groupintlab = np.where(found, pos, 0)[intlab].astype(float)
+            valid = found[intlab]
+
+        # split the data by group with one sort instead of one pass per group
+        intlab = self.groupintlab.astype(int)
+        sortind = np.argsort(intlab, kind='mergesort')
+        if valid is not None:
+            sortind = sortind[valid[sortind]]
+        counts = np.bincount(intlab[sortind], minlength=len(self.groupsunique))
+        self.datali = np.split(self.data[sortind], np.cumsum(counts)[:-1])
         self.pairindices = np.triu_indices(len(self.groupsunique), 1)  #tuple
         self.nobs = self.data.shape[0]
         self.ngroups = len(self.groupsunique)
@@ -949,23 +1007,10 @@ class MultiComparison(object):
         #6:df_total, 7:reject2
         res = tukeyhsd(gmeans, gnobs, var_, df=None, alpha=alpha, q_crit=None)
 
-        resarr = np.array(lzip(self.groupsunique[res[0][0]], self.groupsunique[res[0][1]],
-                                  np.round(res[2],4),
-                                  np.round(res[4][:, 0],4),
-                                  np.round(res[4][:, 1],4),
-                                  res[1]),
-                       dtype=[('group1', object),
-                              ('group2', object),
-                              ('meandiff',float),
-                              ('lower',float),
-                              ('upper',float),
-                              ('reject', np.bool8)])
-        results_table = SimpleTable(resarr, headers=resarr.dtype.names)
-        results_table.title = 'Multiple Comparison of Means - Tukey HSD,' + \
-                              'FWER=%4.2f' % alpha
-
-        return TukeyHSDResults(self, results_table, res[5], res[1], res[2],
-                               res[3], res[4], res[6], res[7], var_)
+        # the summary table is created by the results instance on demand
+        return TukeyHSDResults(self, None, res[5], res[1], res[2],
+                               res[3], res[4], res[6], res[7], var_,
+                               alpha=alpha)
 
 
 
@@ -1224,30 +1269,29 @@ def tukeyhsd(mean_all, nobs_all, var_all, df=None, alpha=0.05, q_crit=None):
     else:
         df_total = np.sum(df)
 
+    #select all pairs from upper triangle of matrix, the pairwise statistics
+    #are computed only for these pairs
+    idx1, idx2 = np.triu_indices(n_means, 1)
+
     if (np.size(nobs_all) == 1) and (np.size(var_all) == 1):
         #balanced sample sizes and homogenous variance
-        var_pairs = 1. * var_all / nobs_all * np.ones((n_means, n_means))
+        var_pairs = 1. * var_all / nobs_all * np.ones(len(idx1))
 
     elif np.size(var_all) == 1:
         #unequal sample sizes and homogenous variance
-        var_pairs = var_all * varcorrection_pairs_unbalanced(nobs_all,
-                                                             srange=True)
+        nobs_all = np.asarray(nobs_all)
+        var_pairs = var_all * (1. / nobs_all[idx1] + 1. / nobs_all[idx2]) / 2.
+
     elif np.size(var_all) > 1:
         var_pairs, df_sum = varcorrection_pairs_unequal(nobs_all, var_all, df)
-        var_pairs /= 2.
+        var_pairs = var_pairs[idx1, idx2] / 2.
         #check division by two for studentized range
 
     else:
         raise ValueError('not supposed to be here')
 
-    #meandiffs_ = mean_all[:,None] - mean_all
-    meandiffs_ = mean_all - mean_all[:,None]  #reverse sign, check with R example
-    std_pairs_ = np.sqrt(var_pairs)
-
-    #select all pairs from upper triangle of matrix
-    idx1, idx2 = np.triu_indices(n_means, 1)
-    meandiffs = meandiffs_[idx1, idx2]
-    std_pairs = std_pairs_[idx1, idx2]
+    meandiffs = mean_all[idx2] - mean_all[idx1]  #sign checked with R example
+    std_pairs = np.sqrt(var_pairs)
 
     st_range = np.abs(meandiffs) / std_pairs #studentized range statistic
 
@@ -1311,19 +1355,16 @@ def simultaneous_ci(q_crit, var, groupnobs, pairindices=None):
 
     d12 = np.sqrt(gvar[pairindices[0]] + gvar[pairindices[1]])
 
-    # Create the full d matrix given all known dij vals
-    d = np.zeros((ng, ng))
-    d[pairindices] = d12
-    d = d + d.conj().T
-
-    # Compute the two global sums from hochberg eq 3.32
+    # Compute the two global sums from hochberg eq 3.32, sum2 is the sum
+    # over all pairs that include the group
     sum1 = np.sum(d12)
-    sum2 = np.sum(d, axis=0)
+    sum2 = (np.bincount(pairindices[0], weights=d12, minlength=ng) +
+            np.bincount(pairindices[1], weights=d12, minlength=ng))
 
     if (ng > 2):
         w = ((ng-1.) * sum2 - sum1) / ((ng - 1.) * (ng - 2.))
     else:
-        w = sum1 * ones(2, 1) / 2.
+        w = sum1 * np.ones(2) / 2.
 
     return (q_crit / np.sqrt(2))*w
 
@@ -1,6 +1,9 @@
 '''using scipy signal and numpy correlate to calculate some time series
 statistics
 
+Note: moving window statistics are available in statsmodels.tsa.movstat,
+which updates the windows incrementally instead of recomputing them.
+
 original developer notes
 
 see also scikits.timeseries  (movstat is partially inspired by it)
@@ -12,7 +12,8 @@ from .diagnostic import (
             )
 
 from . import multicomp
-from .multitest import (multipletests, fdrcorrection, fdrcorrection_twostage)
+from .multitest import (multipletests, multipletests_families, fdrcorrection,
+                        fdrcorrection_twostage)
 from .multicomp import tukeyhsd
 from . import gof
 from .gof import (powerdiscrepancy, gof_chisquare_discrete,
@@ -22,7 +23,8 @@ from .stattools import durbin_watson, omni_normtest, jarque_bera
 
 from . import sandwich_covariance
 from .sandwich_covariance import (
-            cov_cluster, cov_cluster_2groups, cov_nw_panel,
+            cov_cluster, cov_cluster_2groups, cov_cluster_multiway,
+            cov_nw_panel,
             cov_hac, cov_white_simple,
             cov_hc0, cov_hc1, cov_hc2, cov_hc3,
             se_cov
@@ -23,16 +23,14 @@ see:
     http://www.stata.com/stb/stb46/dm64/sturng.pdf
 """
 from __future__ import print_function
-from statsmodels.compat.python import lrange, map
+from statsmodels.compat.python import lrange
 import math
 import scipy.stats
 import numpy as np
 
-from scipy.optimize import fminbound
-
 inf = np.inf
 
-__version__ = '0.2.3'
+__version__ = '0.3'
 
 # changelog
 # 0.1   - initial release
@@ -44,6 +42,8 @@ __version__ = '0.2.3'
 #         select_vs
 #       - pysturng tester added.
 # 0.2.3 - uses np.inf and np.isinf
+# 0.3   - A table as array, table lookup and interpolation vectorized
+#         over arrays, psturng by vectorized bisection
 
 # Gleason's table was derived using least square estimation on the tabled
 # r values for combinations of p and v. In total there are 206
@@ -374,17 +374,19 @@ p_keys = [.1,.5,.675,.75,.8,.85,.9,.95,.975,.99,.995,.999]
 # v values that are defined in the A table
 v_keys = lrange(2, 21) + [24, 30, 40, 60, 120, inf]
 
-def _isfloat(x):
-    """
-    returns True if x is a float,
-    returns False otherwise
-    """
-    try:
-        float(x)
-    except:
-        return False
+# the A table as an array indexed by p, v, coefficient. v = 1 is only
+# tabled for p >= .9, the missing entries are nan
+_p_arr = np.array(p_keys)
+_v_arr = np.array([1.] + v_keys)
+_A_arr = np.empty((len(_p_arr), len(_v_arr), 4))
+_A_arr.fill(np.nan)
+for (_p, _v), _a in A.items():
+    _A_arr[p_keys.index(_p), list(_v_arr).index(_v)] = _a
+del _p, _v, _a
 
-    return True
+# lower bounds of p for the choice of the 3 closest tabled p values,
+# p_keys[i:i+3] is used if p is in [_p_breaks[i-1], _p_breaks[i])
+_p_breaks = np.array([.5, .675, .7625, .825, .875, .9125, .95, .975, .99])
 
 ##def _phi(p):
 ##    """returns the pth quantile inverse norm"""
@@ -414,11 +416,13 @@ def _phi( p ):
     Time-stamp:  2000-07-19 18:26:14
     E-mail:      pjacklam@online.no
     WWW URL:     http://home.online.no/~pjacklam
-    """
 
-    if p <= 0 or p >= 1:
+    Vectorized, p can be an array.
+    """
+    p = np.asarray(p, dtype=float)
+    if np.any((p <= 0) | (p >= 1)):
         # The original perl code exits here, we'll throw an exception instead
-        raise ValueError( "Argument to ltqnorm %f must be in open interval (0,1)" % p )
+        raise ValueError("Argument to ltqnorm must be in open interval (0,1)")
 
     # Coefficients in rational approximations.
     a = (-3.969683028665376e+01,  2.209460984245205e+02, \
@@ -437,23 +441,19 @@ def _phi( p ):
     plow  = 0.02425
     phigh = 1 - plow
 
-    # Rational approximation for lower region:
-    if p < plow:
-       q  = math.sqrt(-2*math.log(p))
-       return -(((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
-               ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
-
-    # Rational approximation for upper region:
-    if phigh < p:
-       q  = math.sqrt(-2*math.log(1-p))
-       return (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
-                ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+    # Rational approximation for the lower and upper region, the sign
+    # differs
+    q = np.sqrt(-2*np.log(np.minimum(p, 1-p)))
+    x_tail = (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
+             ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+    x_tail = np.where(p < plow, -x_tail, x_tail)
 
     # Rational approximation for central region:
     q = p - 0.5
     r = q*q
-    return -(((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / \
-           (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
+    x = -(((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / \
+         (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
+    return np.where((p < plow) | (phigh < p), x_tail, x)
 
 def _ptransform(p):
     """function for p-value abcissa transformation"""
@@ -463,59 +463,51 @@ def _func(a, p, r, v):
     """
     calculates f-hat for the coefficients in a, probability p,
     sample mean difference r, and degrees of freedom v.
+
+    a has the coefficients in the last axis, the other arguments are
+    broadcast.
     """
     # eq. 2.3
-    f = a[0]*math.log(r-1.) + \
-        a[1]*math.log(r-1.)**2 + \
-        a[2]*math.log(r-1.)**3 + \
-        a[3]*math.log(r-1.)**4
+    log_r = np.log(r - 1.)
+    f = a[..., 0]*log_r + \
+        a[..., 1]*log_r**2 + \
+        a[..., 2]*log_r**3 + \
+        a[..., 3]*log_r**4
 
     # eq. 2.7 and 2.8 corrections
-    if r == 3:
-        f += -0.002 / (1. + 12. * _phi(p)**2)
-
-        if v <= 4.364:
-            f += 1./517. - 1./(312.*(v,1e38)[np.isinf(v)])
-        else:
-            f += 1./(191.*(v,1e38)[np.isinf(v)])
+    v = np.where(np.isinf(v), 1e38, v)
+    corr = -0.002 / (1. + 12. * _phi(p)**2) + \
+           np.where(v <= 4.364, 1./517. - 1./(312.*v), 1./(191.*v))
+    f = f + np.where(r == 3, corr, 0)
 
     return -f
 
-def _select_ps(p):
-    # There are more generic ways of doing this but profiling
-    # revealed that selecting these points is one of the slow
-    # things that is easy to change. This is about 11 times
-    # faster than the generic algorithm it is replacing.
-    #
-    # it is possible that different break points could yield
-    # better estimates, but the function this is refactoring
-    # just used linear distance.
-    """returns the points to use for interpolating p"""
-    if p >= .99:
-        return .990, .995, .999
-    elif p >= .975:
-        return .975, .990, .995
-    elif p >= .95:
-        return .950, .975, .990
-    elif p >= .9125:
-        return .900, .950, .975
-    elif p >= .875:
-        return .850, .900, .950
-    elif p >= .825:
-        return .800, .850, .900
-    elif p >= .7625:
-        return .750, .800, .850
-    elif p >= .675:
-        return .675, .750, .800
-    elif p >= .500:
-        return .500, .675, .750
-    else:
-        return .100, .500, .675
-
-def _interpolate_p(p, r, v):
+def _quad_interpolate(x, x0, x1, x2, y0, y1, y2, upper):
+    """quadratic interpolation through 3 points, evaluated at x
+
+    The first derivative is taken from the upper interval if `upper` is
+    true, otherwise from the lower interval.
+    """
+    d2 = 2.*((y2-y1)/(x2-x1) - (y1-y0)/(x1-x0))/(x2-x0)
+    d1 = np.where(upper, (y2-y1)/(x2-x1) - 0.5*d2*(x2-x1),
+                         (y1-y0)/(x1-x0) + 0.5*d2*(x1-x0))
+    return (d2/2.) * (x-x1)**2 + d1 * (x-x1) + y1
+
+def _select_ps(p, v):
+    """returns the index in p_keys of the first of the 3 points to use for
+    interpolating p
+
+    Only p >= .9 have table values for v = 1, the points are shifted up
+    if they are needed for v < 2.5.
+    """
+    ip = np.searchsorted(_p_breaks, p, side='right')
+    return np.where((p >= .9) & (v < 2.5) & (v != 2), np.maximum(ip, 6), ip)
+
+def _interpolate_p(p, r, v, iv, ip):
     """
     interpolates p based on the values in the A table for the
-    scalar value of r and the scalar value of v
+    values of r and the tabled values v, with index iv in the table,
+    using the tabled p values starting at index ip
     """
 
     # interpolate p (v should be in table)
@@ -523,240 +515,127 @@ def _interpolate_p(p, r, v):
     # if p > .75 use quadratic interpolation in log(y + r/v)
     # by -1. / (1. + 1.5 * _phi((1. + p)/2.))
 
-    # find the 3 closest v values
-    p0, p1, p2 = _select_ps(p)
-    try:
-        y0 = _func(A[(p0, v)], p0, r, v) + 1.
-    except:
-        print(p,r,v)
-    y1 = _func(A[(p1, v)], p1, r, v) + 1.
-    y2 = _func(A[(p2, v)], p2, r, v) + 1.
+    p0, p1, p2 = _p_arr[ip], _p_arr[ip + 1], _p_arr[ip + 2]
+    y0 = _func(_A_arr[ip, iv], p0, r, v) + 1.
+    y1 = _func(_A_arr[ip + 1, iv], p1, r, v) + 1.
+    y2 = _func(_A_arr[ip + 2, iv], p2, r, v) + 1.
 
-    y_log0 = math.log(y0 + float(r)/float(v))
-    y_log1 = math.log(y1 + float(r)/float(v))
-    y_log2 = math.log(y2 + float(r)/float(v))
+    r_v = r / v
+    y_log0 = np.log(y0 + r_v)
+    y_log1 = np.log(y1 + r_v)
+    y_log2 = np.log(y2 + r_v)
+    upper = (p2+p0) >= (p1+p1)
 
     # If p < .85 apply only the ordinate transformation
     # if p > .85 apply the ordinate and the abcissa transformation
     # In both cases apply quadratic interpolation
-    if p > .85:
-        p_t  = _ptransform(p)
-        p0_t = _ptransform(p0)
-        p1_t = _ptransform(p1)
-        p2_t = _ptransform(p2)
-
-        # calculate derivatives for quadratic interpolation
-        d2 = 2*((y_log2-y_log1)/(p2_t-p1_t) - \
-                (y_log1-y_log0)/(p1_t-p0_t))/(p2_t-p0_t)
-        if (p2+p0)>=(p1+p1):
-            d1 = (y_log2-y_log1)/(p2_t-p1_t) - 0.5*d2*(p2_t-p1_t)
-        else:
-            d1 = (y_log1-y_log0)/(p1_t-p0_t) + 0.5*d2*(p1_t-p0_t)
-        d0 = y_log1
-
-        # interpolate value
-        y_log = (d2/2.) * (p_t-p1_t)**2. + d1 * (p_t-p1_t) + d0
-
-        # transform back to y
-        y = math.exp(y_log) - float(r)/float(v)
-
-    elif p > .5:
-        # calculate derivatives for quadratic interpolation
-        d2 = 2*((y_log2-y_log1)/(p2-p1) - \
-                (y_log1-y_log0)/(p1-p0))/(p2-p0)
-        if (p2+p0)>=(p1+p1):
-            d1 = (y_log2-y_log1)/(p2-p1) - 0.5*d2*(p2-p1)
-        else:
-            d1 = (y_log1-y_log0)/(p1-p0) + 0.5*d2*(p1-p0)
-        d0 = y_log1
-
-        # interpolate values
-        y_log = (d2/2.) * (p-p1)**2. + d1 * (p-p1) + d0
-
-        # transform back to y
-        y = math.exp(y_log) - float(r)/float(v)
-
-    else:
+    transform = p > .85
+    p_t = np.where(transform, _ptransform(p), p)
+    p0_t = np.where(transform, _ptransform(p0), p0)
+    p1_t = np.where(transform, _ptransform(p1), p1)
+    p2_t = np.where(transform, _ptransform(p2), p2)
+    y_log = _quad_interpolate(p_t, p0_t, p1_t, p2_t,
+                              y_log0, y_log1, y_log2, upper)
+    # transform back to y
+    y = np.exp(y_log) - r_v
+
+    linear = p <= .5
+    if np.any(linear):
         # linear interpolation in q and p
-        q0 = math.sqrt(2) * -y0 * \
-             scipy.stats.t.isf((1.+p0)/2., (v,1e38)[v>1e38])
-        q1 = math.sqrt(2) * -y1 * \
-             scipy.stats.t.isf((1.+p1)/2., (v,1e38)[v>1e38])
-
-        d1 = (q1-q0)/(p1-p0)
+        lin = np.nonzero(linear)
+        v_ = np.minimum(v[lin], 1e38)
+        q0 = math.sqrt(2) * -y0[lin] * \
+             scipy.stats.t.isf((1.+p0[lin])/2., v_)
+        q1 = math.sqrt(2) * -y1[lin] * \
+             scipy.stats.t.isf((1.+p1[lin])/2., v_)
+
+        d1 = (q1-q0)/(p1[lin]-p0[lin])
         d0 = q0
 
         # interpolate values
-        q = d1 * (p-p0) + d0
+        q = d1 * (p[lin]-p0[lin]) + d0
 
         # transform back to y
-        y = -q / (math.sqrt(2) * \
-                  scipy.stats.t.isf((1.+p)/2., (v,1e38)[v>1e38]))
+        y[lin] = -q / (math.sqrt(2) * \
+                       scipy.stats.t.isf((1.+p[lin])/2., v_))
 
     return y
 
 def _select_vs(v, p):
-    # This one is is about 30 times faster than
-    # the generic algorithm it is replacing.
-    """returns the points to use for interpolating v"""
-
-    if v >= 120.:
-        return 60, 120, inf
-    elif v >= 60.:
-        return 40, 60, 120
-    elif v >= 40.:
-        return 30, 40, 60
-    elif v >= 30.:
-        return 24, 30, 40
-    elif v >= 24.:
-        return 20, 24, 30
-    elif v >= 19.5:
-        return 19, 20, 24
-
-    if p >= .9:
-        if v < 2.5:
-            return 1, 2, 3
-    else:
-        if v < 3.5:
-            return 2, 3, 4
-
-    vi = int(round(v))
-    return vi - 1, vi, vi + 1
-
-def _interpolate_v(p, r, v):
-
+    """returns the index in the table of the first of the 3 points to use
+    for interpolating v"""
+    # index of round(v) - 1
+    iv = np.floor(v + .5) - 2
+    iv = np.select([v >= 120., v >= 60., v >= 40., v >= 30., v >= 24.,
+                    v >= 19.5, (p >= .9) & (v < 2.5), (p < .9) & (v < 3.5)],
+                   [23, 22, 21, 20, 19, 18, 0, 1], iv)
+    return iv.astype(int)
+
+def _interpolate_v(v, v0, v1, v2, y0_sq, y1_sq, y2_sq):
     """
-    interpolates v based on the values in the A table for the
-    scalar value of r and th
+    interpolates v given the squared values y**2 at the tabled values
+    v0, v1 and v2
     """
-    # interpolate v (p should be in table)
     # ordinate: y**2
     # abcissa:  1./v
 
-    # find the 3 closest v values
-    # only p >= .9 have table values for 1 degree of freedom.
-    # The boolean is used to index the tuple and append 1 when
-    # p >= .9
-    v0, v1, v2 = _select_vs(v, p)
-
-    # y = f - 1.
-    y0_sq = (_func(A[(p,v0)], p, r, v0) + 1.)**2.
-    y1_sq = (_func(A[(p,v1)], p, r, v1) + 1.)**2.
-    y2_sq = (_func(A[(p,v2)], p, r, v2) + 1.)**2.
-
     # if v2 is inf set to a big number so interpolation
     # calculations will work
-    if v2 > 1e38: v2 = 1e38
+    v_, v0_, v1_, v2_ = [1. / np.minimum(vi, 1e38) for vi in (v, v0, v1, v2)]
 
-    # transform v
-    v_, v0_, v1_, v2_ = 1./v, 1./v0, 1./v1, 1./v2
-
-    # calculate derivatives for quadratic interpolation
-    d2 = 2.*((y2_sq-y1_sq)/(v2_-v1_) - \
-             (y0_sq-y1_sq)/(v0_-v1_)) / (v2_-v0_)
-    if (v2_ + v0_) >= (v1_ + v1_):
-        d1 = (y2_sq-y1_sq) / (v2_-v1_) - 0.5*d2*(v2_-v1_)
-    else:
-        d1 = (y1_sq-y0_sq) / (v1_-v0_) + 0.5*d2*(v1_-v0_)
-    d0 = y1_sq
-
-    # calculate y
-    y = math.sqrt((d2/2.)*(v_-v1_)**2. + d1*(v_-v1_)+ d0)
-
-    return y
+    y_sq = _quad_interpolate(v_, v0_, v1_, v2_, y0_sq, y1_sq, y2_sq,
+                             (v2_ + v0_) >= (v1_ + v1_))
+    return np.sqrt(y_sq)
 
 def _qsturng(p, r, v):
-    """scalar version of qsturng"""
-##    print 'q',p
-    # r is interpolated through the q to y here we only need to
-    # account for when p and/or v are not found in the table.
-    global A, p_keys, v_keys
+    """qsturng for arrays of the same shape
 
-    if p < .1 or p > .999:
+    r is interpolated through the q to y here we only need to account
+    for when p and/or v are not found in the table. If neither is tabled,
+    then quadratic interpolation in p at the 3 closest tabled v is
+    followed by quadratic interpolation in v.
+    """
+    if np.any((p < .1) | (p > .999)):
         raise ValueError('p must be between .1 and .999')
-
-    if p < .9:
-        if v < 2:
-            raise ValueError('v must be > 2 when p < .9')
-    else:
-        if v < 1:
-            raise ValueError('v must be > 1 when p >= .9')
-
-    # The easy case. A tabled value is requested.
-
-    #numpy 1.4.1: TypeError: unhashable type: 'numpy.ndarray' :
-    p = float(p)
-    if isinstance(v, np.ndarray):
-        v = v.item()
-    if (p,v) in A:
-        y = _func(A[(p,v)], p, r, v) + 1.
-
-    elif p not in p_keys and v not in v_keys+([],[1])[p>=.90]:
-        # apply bilinear (quadratic) interpolation
-        #
-        #   p0,v2 +        o         + p1,v2    + p2,v2
-        #                    r2
-        #
-        # 1
-        # -                 (p,v)
-        # v                x
-        #
-        #                    r1
-        #   p0,v1 +        o         + p1,v1    + p2,v1
-        #
-        #
-        #   p0,v0 +        o r0      + p1,v0    + p2,v0
-        #
-        #             _ptransform(p)
-        #
-        # (p1 and v1 may be below or above (p,v). The algorithm
-        # works in both cases. For diagramatic simplicity it is
-        # shown as above)
-        #
-        # 1. at v0, v1, and v2 use quadratic interpolation
-        #    to find r0, r1, r2
-        #
-        # 2. use r0, r1, r2 and quadratic interpolaiton
-        #    to find y and (p,v)
-
-        # find the 3 closest v values
-        v0, v1, v2 = _select_vs(v, p)
-
-        # find the 3 closest p values
-        p0, p1, p2 = _select_ps(p)
-
-        # calculate r0, r1, and r2
-        r0_sq = _interpolate_p(p, r, v0)**2
-        r1_sq = _interpolate_p(p, r, v1)**2
-        r2_sq = _interpolate_p(p, r, v2)**2
-
-        # transform v
-        v_, v0_, v1_, v2_ = 1./v, 1./v0, 1./v1, 1./v2
-
-        # calculate derivatives for quadratic interpolation
-        d2 = 2.*((r2_sq-r1_sq)/(v2_-v1_) - \
-                 (r0_sq-r1_sq)/(v0_-v1_)) / (v2_-v0_)
-        if (v2_ + v0_) >= (v1_ + v1_):
-            d1 = (r2_sq-r1_sq) / (v2_-v1_) - 0.5*d2*(v2_-v1_)
-        else:
-            d1 = (r1_sq-r0_sq) / (v1_-v0_) + 0.5*d2*(v1_-v0_)
-        d0 = r1_sq
-
-        # calculate y
-        y = math.sqrt((d2/2.)*(v_-v1_)**2. + d1*(v_-v1_)+ d0)
-
-    elif v not in v_keys+([],[1])[p>=.90]:
-        y = _interpolate_v(p, r, v)
-
-    elif p not in p_keys:
-        y = _interpolate_p(p, r, v)
+    if np.any((p < .9) & (v < 2)):
+        raise ValueError('v must be > 2 when p < .9')
+    if np.any(v < 1):
+        raise ValueError('v must be > 1 when p >= .9')
+    if np.any(r <= 1):
+        raise ValueError('r must be > 1')
+
+    ip = np.minimum(np.searchsorted(_p_arr, p), len(_p_arr) - 1)
+    p_tabled = _p_arr[ip] == p
+    iv = np.minimum(np.searchsorted(_v_arr, v), len(_v_arr) - 1)
+    v_tabled = (_v_arr[iv] == v) & ((v != 1) | (p >= .9))
+
+    ip0 = _select_ps(p, v)
+    iv0 = _select_vs(v, p)
+
+    def y_at(iv_):
+        # y at tabled v, interpolated in p if p is not tabled
+        vi = _v_arr[iv_]
+        y_tabled = _func(_A_arr[ip, iv_], p, r, vi) + 1.
+        y_interp = _interpolate_p(p, r, vi, iv_, ip0)
+        return np.where(p_tabled, y_tabled, y_interp)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # the interpolation in v is not needed for tabled v, it can use
+        # points that are not in the table
+        y = _interpolate_v(v, _v_arr[iv0], _v_arr[iv0 + 1], _v_arr[iv0 + 2],
+                           y_at(iv0)**2, y_at(iv0 + 1)**2, y_at(iv0 + 2)**2)
+        if np.any(v_tabled):
+            y = np.where(v_tabled, y_at(iv), y)
 
     return math.sqrt(2) * -y * \
-           scipy.stats.t.isf((1.+p)/2., (v,1e38)[v>1e38])
+           scipy.stats.t.isf((1.+p)/2., np.minimum(v, 1e38))
 
-# make a qsturng functinon that will accept list-like objects
-_vqsturng = np.vectorize(_qsturng)
-_vqsturng.__doc__ = """vector version of qsturng"""
+def _broadcast_args(*args):
+    """float arrays of the broadcast shape and whether all are scalar"""
+    args = [np.asarray(x, dtype=float) for x in args]
+    is_scalar = all(x.ndim == 0 for x in args)
+    args = [np.atleast_1d(x) for x in np.broadcast_arrays(*args)]
+    return args, is_scalar
 
 def qsturng(p, r, v):
     """Approximates the quantile p for a studentized range
@@ -785,11 +664,17 @@ def qsturng(p, r, v):
     q : (scalar, array_like)
         approximation of the Studentized Range
 
-    """
+    Notes
+    -----
+    The arguments are broadcast against each other and the table lookup
+    and interpolation are vectorized over all elements.
 
-    if all(map(_isfloat, [p, r, v])):
-        return _qsturng(p, r, v)
-    return _vqsturng(p, r, v)
+    """
+    (p, r, v), is_scalar = _broadcast_args(p, r, v)
+    q = _qsturng(p, r, v)
+    if is_scalar:
+        return float(q[0])
+    return q
 
 ##def _qsturng0(p, r, v):
 ####    print 'q0',p
@@ -816,28 +701,36 @@ def qsturng(p, r, v):
 ##        q += math.log10(r) * 2.25 * (.85-p)
 ##    return q
 
-def _psturng(q, r, v):
-    """scalar version of psturng"""
-    if q < 0.:
-        raise ValueError('q should be >= 0')
-
-    opt_func = lambda p, r, v : abs(_qsturng(p, r, v) - q)
+def _psturng(q, r, v, tol=1e-10):
+    """psturng for arrays of the same shape
 
-    if v == 1:
-        if q < _qsturng(.9, r, 1):
-            return .1
-        elif q > _qsturng(.999, r, 1):
-            return .001
-        return 1. - fminbound(opt_func, .9, .999, args=(r,v))
-    else:
-        if q < _qsturng(.1, r, v):
-            return .9
-        elif q > _qsturng(.999, r, v):
-            return .001
-        return 1. - fminbound(opt_func, .1, .999, args=(r,v))
+    qsturng is increasing in p, the p with qsturng(p, r, v) = q is found
+    by bisection on all elements at once.
+    """
+    if np.any(q < 0.):
+        raise ValueError('q should be >= 0')
 
-_vpsturng = np.vectorize(_psturng)
-_vpsturng.__doc__ = """vector version of psturng"""
+    # only p >= .9 is available if v == 1
+    p_lo = np.where(v == 1, .9, .1)
+    p_hi = np.ones(q.shape) * .999
+    below = q < _qsturng(p_lo, r, v)
+    above = q > _qsturng(p_hi, r, v)
+
+    lo, hi = p_lo, p_hi
+    mask = ~(below | above)
+    for _ in range(int(np.ceil(np.log2((.999 - .1) / tol)))):
+        if not mask.any():
+            break
+        mid = (lo + hi) / 2.
+        smaller = np.zeros(q.shape, bool)
+        smaller[mask] = _qsturng(mid[mask], r[mask], v[mask]) < q[mask]
+        lo = np.where(smaller, mid, lo)
+        hi = np.where(smaller | ~mask, hi, mid)
+
+    p = 1. - (lo + hi) / 2.
+    p[below] = 1. - p_lo[below]
+    p[above] = .001
+    return p
 
 def psturng(q, r, v):
     """Evaluates the probability from 0 to q for a studentized
@@ -867,10 +760,17 @@ def psturng(q, r, v):
         and .1, when v > 1, p is bound between .001 and .9.
         Values between .5 and .9 are 1st order appoximations.
 
+    Notes
+    -----
+    The inverse of qsturng is computed by a vectorized bisection, so the
+    cost is a fixed number of vectorized evaluations of qsturng.
+
     """
-    if all(map(_isfloat, [q, r, v])):
-        return _psturng(q, r, v)
-    return _vpsturng(q, r, v)
+    (q, r, v), is_scalar = _broadcast_args(q, r, v)
+    p = _psturng(q, r, v)
+    if is_scalar:
+        return float(p[0])
+    return p
 
 ##p, r, v = .9, 10, 20
 ##print
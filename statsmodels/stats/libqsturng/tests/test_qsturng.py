@@ -36,6 +36,19 @@ class test_qsturng(TestCase):
                                           [6, 6, 6]),
                                   5)
 
+    def test_broadcast(self):
+        # array arguments are broadcast, elements agree with scalar calls
+        ps = np.array([.1, .5, .6, .9, .905, .95, .999])
+        rs = np.array([2, 3, 10, 150])[:, None]
+        vs = np.array([1, 2, 2.4, 7.5, 24, 500, np.inf])
+        vs = np.where(ps < .9, np.maximum(vs, 2), vs)
+        res = qsturng(ps, rs, vs)
+        assert_equal(res.shape, (4, 7))
+        for i in range(4):
+            for j in range(7):
+                assert_almost_equal(res[i, j], qsturng(ps[j], rs[i, 0], vs[j]),
+                                    13)
+
     def test_invalid_parameters(self):
         # p < .1
         assert_raises(ValueError, qsturng, -.1,5,6)
@@ -148,6 +161,15 @@ class test_psturng(TestCase):
     def test_v_equal_one(self):
         assert_almost_equal(.1, psturng(.2,5,1), 5)
 
+    def test_inverse_vector(self):
+        ps = np.linspace(.11, .995, 25)
+        rs = np.arange(2, 27)
+        vs = np.linspace(2, 500, 25)
+        qs = qsturng(ps, rs, vs)
+        assert_array_almost_equal(psturng(qs, rs, vs), 1. - ps, 8)
+        # bounds
+        assert_array_almost_equal(psturng([0.01, 100.], 5, 10), [.9, .001])
+
     def test_invalid_parameters(self):
         # q < .1
         assert_raises(ValueError, psturng, -.1,5,6)
@@ -24,6 +24,174 @@ def _ecdf(x):
     nobs = len(x)
     return np.arange(1,nobs+1)/float(nobs)
 
+def _segments(codes, nobs):
+    '''group size and 1-based rank of each observation within its group
+
+    `codes` are integer labels of contiguous groups in ascending order, or
+    None for a single group.
+    '''
+    if codes is None:
+        return nobs, np.arange(1, nobs + 1)
+    starts = np.concatenate(([0], np.nonzero(np.diff(codes))[0] + 1))
+    sizes = np.diff(np.concatenate((starts, [nobs])))
+    group_idx = np.repeat(np.arange(len(starts)), sizes)
+    rank = np.arange(1, nobs + 1) - starts[group_idx]
+    return sizes[group_idx], rank
+
+
+def _complex_key(codes, x):
+    key = np.empty(len(x), np.complex128)
+    key.real = codes
+    key.imag = x
+    return key
+
+
+def _segment_accumulate(func, x, codes=None, reverse=False):
+    '''cumulative maximum or minimum within contiguous groups
+
+    `func` is np.maximum or np.minimum. With reverse=True the accumulation
+    runs from the end of each group. The groups are separated by using the
+    group code as real part of a complex key, which numpy compares
+    lexicographically, so the accumulation restarts at each new group.
+    '''
+    if reverse:
+        x = x[::-1]
+    if codes is None:
+        res = func.accumulate(x)
+    else:
+        if reverse:
+            codes = codes[::-1]
+        # the real part has to move towards the winner at each new group
+        sign = 1 if (func is np.maximum) != reverse else -1
+        res = func.accumulate(_complex_key(sign * codes, x)).imag
+        res = res.astype(x.dtype)
+    if reverse:
+        res = res[::-1]
+    return res
+
+
+def _segment_searchsorted(a, v, codes_a=None, codes_v=None, side='left'):
+    '''searchsorted of `v` in `a` within groups, `a` sorted in each group
+    '''
+    if codes_a is None:
+        return np.searchsorted(a, v, side=side)
+    return np.searchsorted(_complex_key(codes_a, a), _complex_key(codes_v, v),
+                           side=side)
+
+
+def _lower_hull(x, y, codes=None):
+    '''indices of the vertices of the lower convex hull of each group
+
+    The points have to be sorted by x within contiguous groups. Points that
+    are not below the chord of their neighbors are dropped in vectorized
+    passes, the few remaining candidates are finished with a monotone chain
+    if the passes stop making progress.
+    '''
+    nobs = len(x)
+    is_first = np.zeros(nobs, bool)
+    is_last = np.zeros(nobs, bool)
+    if codes is None:
+        is_first[0] = is_last[-1] = True
+    else:
+        change = np.diff(codes) != 0
+        is_first[0] = is_last[-1] = True
+        is_first[1:] = change
+        is_last[:-1] |= change
+    is_end = is_first | is_last
+
+    cand = np.arange(nobs)
+    xc, yc, endc = x, y, is_end
+    while len(cand) > 2:
+        dx, dy = np.diff(xc), np.diff(yc)
+        cross = dx[:-1] * dy[1:] - dy[:-1] * dx[1:]
+        keep = (cross > 0) | endc[1:-1]
+        n_remove = len(keep) - keep.sum()
+        if n_remove == 0:
+            return cand
+        keep = np.concatenate(([True], keep, [True]))
+        cand, xc, yc, endc = cand[keep], xc[keep], yc[keep], endc[keep]
+        if n_remove < 0.01 * len(cand):
+            break
+    if len(cand) <= 2:
+        return cand
+
+    hull = []
+    for i in cand:
+        if not is_first[i]:
+            while len(hull) >= 2 and not is_first[hull[-1]]:
+                i0, i1 = hull[-2], hull[-1]
+                if ((x[i1] - x[i0]) * (y[i] - y[i0]) -
+                        (y[i1] - y[i0]) * (x[i] - x[i0])) > 0:
+                    break
+                hull.pop()
+        hull.append(i)
+    return np.asarray(hull)
+
+
+def _hommel(pvals, codes=None):
+    '''Hommel adjusted p-values of sorted p-values
+
+    The adjusted p-values are computed from the Simes tests of the subsets
+    of the j largest p-values, c_j = min_k j p_(m-j+k) / k, for all j at
+    once. j p_(m-j+k) / k is a slope from the point (m-j, 0) to the point
+    (m-j+k, p_(m-j+k)), so the minimum over k is attained at the tangent
+    vertex of the lower convex hull of the points (i, p_(i)), which is
+    found by a binary search. With d_j = max_{l >= j} c_l the adjusted
+    p-value of p_(i) is min_j max(d_{j+1}, j p_(i)), the crossing of a
+    decreasing and an increasing sequence, which is again a binary search.
+    Total cost is O(m log m).
+
+    Parameters
+    ----------
+    pvals : ndarray, 1-D
+        p-values sorted in ascending order within each group
+    codes : None or ndarray
+        integer labels of contiguous groups in ascending order, each group
+        is a separate family
+
+    Returns
+    -------
+    pvals_corrected : ndarray
+        Hommel adjusted p-values, not truncated at 1
+    '''
+    nobs = len(pvals)
+    if nobs == 0:
+        return pvals.copy()
+    n, rank = _segments(codes, nobs)
+    xx = rank.astype(pvals.dtype)
+
+    hull = _lower_hull(xx, pvals, codes)
+    xh, yh = xx[hull], pvals[hull]
+    codes_h = None if codes is None else codes[hull]
+    # x-intercept of the edge leaving each vertex, the vertex is the
+    # tangent point for queries (s, 0) with s <= intercept
+    intercept = xh.copy()
+    if len(hull) > 1:
+        same = (np.ones(len(hull) - 1, bool) if codes is None
+                else codes_h[:-1] == codes_h[1:])
+        inner = np.nonzero(same & (yh[:-1] > 0))[0]
+        slope = (yh[inner + 1] - yh[inner]) / (xh[inner + 1] - xh[inner])
+        flat = slope == 0
+        intercept[inner[flat]] = -np.inf
+        inner = inner[~flat]
+        intercept[inner] = xh[inner] - yh[inner] / slope[~flat]
+
+    # Simes statistic c_j of the j largest p-values, query point (n - j, 0)
+    s = (n - rank).astype(pvals.dtype)
+    k = np.maximum(_segment_searchsorted(intercept, s, codes_h, codes),
+                   _segment_searchsorted(xh, s, codes_h, codes,
+                                         side='right'))
+    c = rank * yh[k] / (xh[k] - s)
+
+    d = _segment_accumulate(np.maximum, c, codes, reverse=True)
+    d_next = np.empty_like(d)
+    d_next[:-1] = d[1:]
+    d_next[rank == n] = 0
+    # first j with d_{j+1} / j <= p_i, decreasing in j within groups
+    jstar = _segment_searchsorted(-d_next / rank, -pvals, codes, codes)
+    return np.minimum(rank[jstar] * pvals, d[jstar])
+
+
 multitest_methods_names = {'b': 'Bonferroni',
                            's': 'Sidak',
                            'h': 'Holm',
@@ -129,8 +297,12 @@ def multipletests(pvals, alpha=0.05, method='hs', is_sorted=False,
     efficient to presort the pvalues, and put the results back into the
     original order outside of the function.
 
-    Method='hommel' is very slow for large arrays, since it requires the
-    evaluation of n partitions, where n is the number of p-values.
+    Method='hommel' uses the lower convex hull of the sorted p-values to
+    compute the Simes tests of all partitions at once, see `_hommel`, and
+    is O(n log n) in the number of p-values.
+
+    `multipletests_families` corrects many families of p-values, given as
+    rows of an array or by group labels, in one vectorized pass.
 
     there will be API changes.
 
@@ -206,14 +378,8 @@ def multipletests(pvals, alpha=0.05, method='hs', is_sorted=False,
         del pvals_corrected_raw
 
     elif method.lower() in ['ho', 'hommel']:
-        # we need a copy because we overwrite it in a loop
-        a = pvals.copy()
-        for m in range(ntests, 1, -1):
-            cim = np.min(m * pvals[-m:] / np.arange(1,m+1.))
-            a[-m:] = np.maximum(a[-m:], cim)
-            a[:-m] = np.maximum(a[:-m], np.minimum(m * pvals[:-m], cim))
-        pvals_corrected = a
-        reject = a <= alphaf
+        pvals_corrected = _hommel(pvals)
+        reject = pvals_corrected <= alphaf
 
     elif method.lower() in ['fdr_bh', 'fdr_i', 'fdr_p', 'fdri', 'fdrp']:
         # delegate, call with sorted pvals
@@ -267,6 +433,205 @@ def multipletests(pvals, alpha=0.05, method='hs', is_sorted=False,
         return reject_, pvals_corrected_, alphacSidak, alphacBonf
 
 
+def multipletests_families(pvals, alpha=0.05, method='hs', groups=None,
+                           axis=-1, dtype=None, out=None):
+    '''p-value correction for many families of tests in one pass
+
+    The p-values of all families are sorted once, and the corrections of
+    all families are computed with vectorized operations that restart at
+    the boundaries of the families. The results for each family are the
+    same as those of `multipletests`.
+
+    Parameters
+    ----------
+    pvals : array_like
+        uncorrected p-values. If groups is None, then each 1-d slice along
+        `axis` is a family of tests. Otherwise `pvals` and `groups` have
+        the same shape and the families are defined by the group labels.
+    alpha : float
+        FWER, family-wise error rate, or FDR, e.g. 0.1
+    method : string
+        Method used for testing and adjustment of pvalues, any of the
+        methods and aliases of `multipletests`.
+    groups : None or array_like
+        labels of the family of each p-value.
+    axis : int
+        axis along which the families are defined if groups is None.
+    dtype : None or dtype
+        floating point dtype of the computations and of the corrected
+        p-values, e.g. np.float32 to halve the memory requirement. The
+        default is the dtype of pvals if it is floating point, and float64
+        otherwise.
+    out : None or ndarray
+        array of the same shape as `pvals` in which the corrected p-values
+        are placed. This can be `pvals` itself to correct in place.
+
+    Returns
+    -------
+    reject : ndarray, boolean
+        true for hypothesis that can be rejected for given alpha
+    pvals_corrected : ndarray
+        p-values corrected for multiple tests within each family, `out`
+        if it is given
+
+    See Also
+    --------
+    multipletests
+
+    Notes
+    -----
+    The two stage FDR methods use the non-iterated procedure, as in
+    `multipletests`. Sidak corrections are computed with log1p and expm1,
+    so they are accurate also for very small p-values.
+    '''
+    try:
+        method = multitest_alias[method.lower()]
+    except KeyError:
+        raise ValueError('method not recognized')
+    pvals = np.asarray(pvals)
+    if dtype is None:
+        dtype = (pvals.dtype if np.issubdtype(pvals.dtype, np.floating)
+                 else np.float64)
+    if groups is None:
+        if pvals.ndim == 0:
+            raise ValueError('pvals needs to be at least 1-dimensional')
+        pvals_ = np.rollaxis(pvals, axis, pvals.ndim)
+        shape = pvals_.shape
+        pvals_ = pvals_.reshape(-1, shape[-1])
+        n_families, n_tests = pvals_.shape
+        sortind = np.argsort(pvals_, axis=1)
+        sortind += np.arange(0, n_families * n_tests, n_tests)[:, None]
+        sortind = sortind.ravel()
+        codes = np.repeat(np.arange(n_families), n_tests)
+        pvals_ = pvals_.ravel()
+    else:
+        groups = np.asarray(groups)
+        if groups.shape != pvals.shape:
+            raise ValueError('pvals and groups need to have the same shape')
+        shape = pvals.shape
+        pvals_ = pvals.ravel()
+        labels = groups.ravel()
+        if not (np.issubdtype(labels.dtype, np.integer) or
+                np.issubdtype(labels.dtype, np.floating)):
+            labels = np.unique(labels, return_inverse=True)[1]
+        # sort by group and p-value in one pass, faster than lexsort
+        sortind = np.argsort(_complex_key(labels, pvals_))
+        labels = labels[sortind]
+        codes = np.zeros(len(labels), np.intp)
+        np.cumsum(labels[1:] != labels[:-1], out=codes[1:])
+    pvals_sorted = pvals_[sortind].astype(dtype)
+    del pvals_
+
+    with np.errstate(divide='ignore'):
+        reject_, pvals_corrected_ = _multipletests_sorted(pvals_sorted, codes,
+                                                          alpha, method)
+    del pvals_sorted
+
+    if out is None:
+        out = np.empty(pvals.shape, dtype)
+    elif out.shape != pvals.shape:
+        raise ValueError('out needs to have the same shape as pvals')
+    reject = np.empty(pvals.shape, bool)
+    for target, values in [(out, pvals_corrected_), (reject, reject_)]:
+        if groups is None:
+            target = np.rollaxis(target, axis, pvals.ndim)
+        if target.flags.c_contiguous:
+            # scatter directly into the output, the reshape is a view
+            target.reshape(-1)[sortind] = values
+        else:
+            res = np.empty_like(values)
+            res[sortind] = values
+            target[...] = res.reshape(shape)
+    return reject, out
+
+
+def _multipletests_sorted(pvals, codes, alpha, method):
+    '''corrections for families of sorted p-values in contiguous groups
+
+    This is the vectorized computation behind `multipletests_families`.
+    `codes` are the integer labels of the families in ascending order and
+    `method` is the canonical method name of `multitest_alias`.
+    '''
+    ntests, rank = _segments(codes, len(pvals))
+    ntests = ntests.astype(pvals.dtype)
+    rank = rank.astype(pvals.dtype)
+    stepdown = ntests - rank + 1
+
+    if method == 'b':
+        reject = pvals <= alpha / ntests
+        pvals_corrected = pvals * ntests
+
+    elif method == 's':
+        reject = pvals <= -np.expm1(np.log1p(-alpha) / ntests)
+        pvals_corrected = -np.expm1(ntests * np.log1p(-pvals))
+
+    elif method in ['hs', 'h']:
+        if method == 'hs':
+            notreject = pvals > -np.expm1(np.log1p(-alpha) / stepdown)
+            pvals_corrected_raw = -np.expm1(stepdown * np.log1p(-pvals))
+        else:
+            notreject = pvals > alpha / stepdown
+            pvals_corrected_raw = pvals * stepdown
+        # step-down: stop rejecting at the first nonrejection
+        reject = ~_segment_accumulate(np.maximum, notreject, codes)
+        pvals_corrected = _segment_accumulate(np.maximum,
+                                              pvals_corrected_raw, codes)
+
+    elif method == 'sh':
+        reject = _segment_accumulate(np.maximum, pvals <= alpha / stepdown,
+                                     codes, reverse=True)
+        pvals_corrected = _segment_accumulate(np.minimum, pvals * stepdown,
+                                              codes, reverse=True)
+
+    elif method == 'ho':
+        pvals_corrected = _hommel(pvals, codes)
+        reject = pvals_corrected <= alpha
+
+    elif method in ['fdr_bh', 'fdr_by']:
+        ecdffactor = rank / ntests
+        if method == 'fdr_by':
+            harmonic = np.cumsum(1. / np.arange(1, ntests.max() + 1))
+            ecdffactor /= harmonic[ntests.astype(int) - 1]
+        reject = _segment_accumulate(np.maximum, pvals <= ecdffactor * alpha,
+                                     codes, reverse=True)
+        pvals_corrected = _segment_accumulate(np.minimum, pvals / ecdffactor,
+                                              codes, reverse=True)
+
+    elif method in ['fdr_tsbh', 'fdr_tsbky']:
+        fact = 1. + alpha if method == 'fdr_tsbky' else 1.
+        alpha_prime = alpha / fact
+        ecdffactor = rank / ntests
+        pvals_corrected = _segment_accumulate(np.minimum, pvals / ecdffactor,
+                                              codes, reverse=True)
+        np.minimum(pvals_corrected, 1, out=pvals_corrected)
+        # the BH corrected p-values do not depend on alpha, the stages only
+        # change the number of rejections of the step-up procedure
+        reject = _segment_accumulate(np.maximum,
+                                     pvals <= ecdffactor * alpha_prime,
+                                     codes, reverse=True)
+        n = np.bincount(codes)
+        r1 = np.bincount(codes, reject)
+        ntests0 = np.where((r1 > 0) & (r1 < n), n - r1, n)[codes]
+        alpha_star = alpha_prime * ntests / ntests0
+        reject = _segment_accumulate(np.maximum,
+                                     pvals <= ecdffactor * alpha_star,
+                                     codes, reverse=True)
+        pvals_corrected *= ntests0 / ntests * fact
+
+    elif method == 'fdr_gbs':
+        q = (ntests + 1. - rank) / rank * pvals / (1. - pvals)
+        pvals_corrected_raw = _segment_accumulate(np.maximum, q, codes)
+        pvals_corrected = _segment_accumulate(np.minimum, pvals_corrected_raw,
+                                              codes, reverse=True)
+        reject = pvals_corrected <= alpha
+
+    else:
+        raise ValueError('method not recognized')
+
+    np.minimum(pvals_corrected, 1, out=pvals_corrected)
+    return reject, pvals_corrected.astype(pvals.dtype, copy=False)
+
+
 def fdrcorrection(pvals, alpha=0.05, method='indep', is_sorted=False):
     '''pvalue correction for false discovery rate
 
@@ -421,14 +786,16 @@ def fdrcorrection_twostage(pvals, alpha=0.05, method='bky', iter=False,
         return rej, pvalscorr * fact, ntests - r1, alpha_stages
     ri_old = r1
 
+    # the corrected p-values do not depend on alpha, each stage only needs
+    # the number of rejections of the step-up procedure at alpha_star
+    ecdffactor = _ecdf(pvals)
     while True:
         ntests0 = 1.0 * ntests - ri_old
         alpha_star = alpha_prime * ntests / ntests0
         alpha_stages.append(alpha_star)
         #print ntests0, alpha_star
-        rej, pvalscorr = fdrcorrection(pvals, alpha=alpha_star, method='indep',
-                                       is_sorted=True)
-        ri = rej.sum()
+        below = np.nonzero(pvals <= ecdffactor * alpha_star)[0]
+        ri = below[-1] + 1 if below.size else 0
         if (not iter) or ri == ri_old:
             break
         elif ri < ri_old:
@@ -436,6 +803,7 @@ def fdrcorrection_twostage(pvals, alpha=0.05, method='bky', iter=False,
             raise RuntimeError(" oops - shouldn't be here")
         ri_old = ri
 
+    rej = np.arange(ntests) < ri
     # make adjustment to pvalscorr to reflect estimated number of Non-Null cases
     # decision is then pvalscorr < alpha  (or <=)
     pvalscorr *= ntests0 * 1.0 /  ntests
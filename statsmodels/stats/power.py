@@ -31,10 +31,29 @@ refactoring
 
 """
 from __future__ import print_function
-from statsmodels.compat.python import iteritems
+from statsmodels.compat.python import iteritems, string_types
+import warnings
 import numpy as np
 from scipy import stats, optimize
-from statsmodels.tools.rootfinding import brentq_expanding
+from statsmodels.tools.rootfinding import (brentq_expanding,
+                                           regula_falsi_expanding)
+from statsmodels.tools.sm_exceptions import (ConvergenceWarning,
+                                             convergence_doc)
+
+def _nct_private(method, crit, df, nc):
+    '''evaluate a private method of stats.nct, nan where crit is nan
+
+    This avoids an endless loop for nan arguments elementwise,
+    https://github.com/scipy/scipy/issues/2667
+    '''
+    if not np.any(np.isnan(crit)):
+        return method(crit, df, nc)
+    crit, df, nc = np.broadcast_arrays(crit, df, nc)
+    valid = ~np.isnan(crit)
+    res = np.empty(crit.shape)
+    res.fill(np.nan)
+    res[valid] = method(crit[valid], df[valid], nc[valid])
+    return res[()]
 
 def ttest_power(effect_size, nobs, alpha, df=None, alternative='two-sided'):
     '''Calculate power of a ttest
@@ -56,18 +75,11 @@ def ttest_power(effect_size, nobs, alpha, df=None, alternative='two-sided'):
         crit_upp = stats.t.isf(alpha_, df)
         #print crit_upp, df, d*np.sqrt(nobs)
         # use private methods, generic methods return nan with negative d
-        if np.any(np.isnan(crit_upp)):
-            # avoid endless loop, https://github.com/scipy/scipy/issues/2667
-            pow_ = np.nan
-        else:
-            pow_ = stats.nct._sf(crit_upp, df, d*np.sqrt(nobs))
+        pow_ = _nct_private(stats.nct._sf, crit_upp, df, d*np.sqrt(nobs))
     if alternative in ['two-sided', '2s', 'smaller']:
         crit_low = stats.t.ppf(alpha_, df)
         #print crit_low, df, d*np.sqrt(nobs)
-        if np.any(np.isnan(crit_low)):
-            pow_ = np.nan
-        else:
-            pow_ += stats.nct._cdf(crit_low, df, d*np.sqrt(nobs))
+        pow_ += _nct_private(stats.nct._cdf, crit_low, df, d*np.sqrt(nobs))
     return pow_
 
 def normal_power(effect_size, nobs, alpha, alternative='two-sided', sigma=1.):
@@ -193,7 +205,9 @@ class Power(object):
         for t-test the keywords are:
             effect_size, nobs, alpha, power
 
-        exactly one needs to be ``None``, all others need numeric values
+        exactly one needs to be ``None``, all others need numeric values.
+        Numeric values can also be arrays that broadcast against each other,
+        in which case an array of solutions is returned.
 
         *attaches*
 
@@ -219,6 +233,9 @@ class Power(object):
             del kwds['power']
             return self.power(**kwds)
 
+        if any(np.ndim(v) > 0 for v in kwds.values()):
+            return self._solve_power_vectorized(key, kwds)
+
         self._counter = 0
         def func(x):
             kwds[key] = x
@@ -274,9 +291,6 @@ class Power(object):
                     success = 0
 
         if not success == 1:
-            import warnings
-            from statsmodels.tools.sm_exceptions import (ConvergenceWarning,
-                convergence_doc)
             warnings.warn(convergence_doc, ConvergenceWarning)
 
         #attach fit_res, for reading only, should be needed only for debugging
@@ -284,6 +298,60 @@ class Power(object):
         self.cache_fit_res = fit_res
         return val
 
+    def _solve_power_vectorized(self, key, kwds, fit_kwds=None):
+        '''solve for ``key`` elementwise if some arguments are arrays
+
+        All root finding problems are solved at the same time with
+        ``regula_falsi_expanding``, using the same starting bounds as the
+        scalar case. Problems for which no bracket is found are solved
+        separately with the scalar ``solve_power``. Elements that cannot be
+        solved are nan.
+        '''
+        names = [k for k, v in iteritems(kwds)
+                 if k != key and not isinstance(v, string_types)]
+        fixed = dict((k, v) for k, v in iteritems(kwds) if k not in names)
+        arrays = np.broadcast_arrays(*[np.asarray(kwds[k], float)
+                                       for k in names])
+        shape = arrays[0].shape
+        flat = dict((k, a.ravel()) for k, a in zip(names, arrays))
+        nobs = arrays[0].size
+
+        if fit_kwds is None:
+            fit_kwds = self.start_bqexp[key]
+        fit_kwds = dict((k, (np.zeros(shape) + v).ravel())
+                        for k, v in iteritems(fit_kwds))
+
+        def func(x, idx):
+            kw = dict((k, a[idx]) for k, a in iteritems(flat))
+            kw.update(fixed)
+            kw[key] = x
+            fval = self._power_identity(**kw)
+            return np.where(np.isnan(fval), np.inf, fval)
+
+        val, res = regula_falsi_expanding(func, nobs, full_output=True,
+                                          **fit_kwds)
+
+        # backup: scalar solver for problems that did not converge
+        success = res.converged.copy()
+        for i in np.nonzero(~res.converged)[0]:
+            kw = dict((k, a[i]) for k, a in iteritems(flat))
+            kw.update(fixed)
+            try:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore', ConvergenceWarning)
+                    val[i] = self.solve_power(**kw)
+                success[i] = self.cache_fit_res[0] == 1
+            except (ValueError, RuntimeError):
+                success[i] = False
+            if not success[i]:
+                val[i] = np.nan
+
+        if not success.all():
+            warnings.warn(convergence_doc, ConvergenceWarning)
+
+        self.cache_fit_res = [int(success.all()), res]
+        return val.reshape(shape)
+
     def plot_power(self, dep_var='nobs', nobs=None, effect_size=None,
                    alpha=0.05, ax=None, title=None, plt_kwds=None, **kwds):
         '''plot power with number of observations or effect size on x-axis
@@ -338,29 +406,32 @@ class Power(object):
         colormap = plt.cm.Dark2 #pylint: disable-msg=E1101
         plt_alpha = 1 #0.75
         lw = 2
+        # all curves in one call, one row of ``power`` for each curve
         if dep_var == 'nobs':
+            effect_size = np.asarray(effect_size)
             colors = rainbow(len(effect_size))
             colors = [colormap(i) for i in np.linspace(0, 0.9, len(effect_size))]
+            power = self.power(effect_size[:, None], nobs, alpha, **kwds)
             for ii, es in enumerate(effect_size):
-                power = self.power(es, nobs, alpha, **kwds)
-                ax.plot(nobs, power, lw=lw, alpha=plt_alpha,
+                ax.plot(nobs, power[ii], lw=lw, alpha=plt_alpha,
                         color=colors[ii], label='es=%4.2F' % es)
                 xlabel = 'Number of Observations'
         elif dep_var in ['effect size', 'effect_size', 'es']:
+            nobs = np.asarray(nobs)
             colors = rainbow(len(nobs))
             colors = [colormap(i) for i in np.linspace(0, 0.9, len(nobs))]
+            power = self.power(effect_size, nobs[:, None], alpha, **kwds)
             for ii, n in enumerate(nobs):
-                power = self.power(effect_size, n, alpha, **kwds)
-                ax.plot(effect_size, power, lw=lw, alpha=plt_alpha,
+                ax.plot(effect_size, power[ii], lw=lw, alpha=plt_alpha,
                         color=colors[ii], label='N=%4.2F' % n)
                 xlabel = 'Effect Size'
         elif dep_var in ['alpha']:
             # experimental nobs as defining separate lines
+            nobs = np.asarray(nobs)
             colors = rainbow(len(nobs))
-
+            power = self.power(effect_size, nobs[:, None], alpha, **kwds)
             for ii, n in enumerate(nobs):
-                power = self.power(effect_size, n, alpha, **kwds)
-                ax.plot(alpha, power, lw=lw, alpha=plt_alpha,
+                ax.plot(alpha, power[ii], lw=lw, alpha=plt_alpha,
                         color=colors[ii], label='N=%4.2F' % n)
                 xlabel = 'alpha'
         else:
@@ -471,6 +542,11 @@ class TTestPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        If some of the arguments are arrays, then the power equation is solved
+        elementwise for the broadcasted arguments, with all problems solved at
+        the same time by ``regula_falsi_expanding``. Elements for which this
+        fails are solved separately as above, and are nan if that also fails.
+
         '''
         # for debugging
         #print 'calling ttest solve with', (effect_size, nobs, alpha, power, alternative)
@@ -587,6 +663,11 @@ class TTestIndPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        If some of the arguments are arrays, then the power equation is solved
+        elementwise for the broadcasted arguments, with all problems solved at
+        the same time by ``regula_falsi_expanding``. Elements for which this
+        fails are solved separately as above, and are nan if that also fails.
+
         '''
         return super(TTestIndPower, self).solve_power(effect_size=effect_size,
                                                       nobs1=nobs1,
@@ -646,7 +727,13 @@ class NormalIndPower(Power):
         ddof = self.ddof  # for correlation, ddof=3
 
         # get effective nobs, factor for std of test statistic
-        if ratio > 0:
+        if np.ndim(ratio) > 0:
+            # elementwise, ratio=0 gives 1 / inf for the second sample
+            ratio = np.asarray(ratio, float)
+            with np.errstate(divide='ignore'):
+                inv2 = np.where(ratio > 0, 1. / (nobs1 * ratio - ddof), 0)
+            nobs = 1./ (1. / (nobs1 - ddof) + inv2)
+        elif ratio > 0:
             nobs2 = nobs1*ratio
             #equivalent to nobs = n1*n2/(n1+n2)=n1*ratio/(1+ratio)
             nobs = 1./ (1. / (nobs1 - ddof) + 1. / (nobs2 - ddof))
@@ -710,6 +797,11 @@ class NormalIndPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        If some of the arguments are arrays, then the power equation is solved
+        elementwise for the broadcasted arguments, with all problems solved at
+        the same time by ``regula_falsi_expanding``. Elements for which this
+        fails are solved separately as above, and are nan if that also fails.
+
         '''
         return super(NormalIndPower, self).solve_power(effect_size=effect_size,
                                                       nobs1=nobs1,
@@ -812,6 +904,11 @@ class FTestPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        If some of the arguments are arrays, then the power equation is solved
+        elementwise for the broadcasted arguments, with all problems solved at
+        the same time by ``regula_falsi_expanding``. Elements for which this
+        fails are solved separately as above, and are nan if that also fails.
+
         '''
         return super(FTestPower, self).solve_power(effect_size=effect_size,
                                                       df_num=df_num,
@@ -893,6 +990,11 @@ class FTestAnovaPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        If some of the arguments are arrays, then the power equation is solved
+        elementwise for the broadcasted arguments, with all problems solved at
+        the same time by ``regula_falsi_expanding``. Elements for which this
+        fails are solved separately as above, and are nan if that also fails.
+
         '''
         # update start values for root finding
         if not k_groups is None:
@@ -917,6 +1019,12 @@ class FTestAnovaPower(Power):
                            power=None, k_groups=2):
         '''experimental, test failure in solve_power for effect_size
         '''
+        kwds = dict(effect_size=effect_size, nobs=nobs, alpha=alpha,
+                    power=power, k_groups=k_groups)
+        if any(np.ndim(v) > 0 for v in kwds.values()):
+            return self._solve_power_vectorized('effect_size', kwds,
+                                    fit_kwds=dict(low=1e-8, upp=1 - 1e-8))
+
         def func(x):
             effect_size = x
             return self._power_identity(effect_size=effect_size,
@@ -1012,6 +1120,11 @@ class GofChisquarePower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        If some of the arguments are arrays, then the power equation is solved
+        elementwise for the broadcasted arguments, with all problems solved at
+        the same time by ``regula_falsi_expanding``. Elements for which this
+        fails are solved separately as above, and are nan if that also fails.
+
         '''
         return super(GofChisquarePower, self).solve_power(effect_size=effect_size,
                                                       nobs=nobs,
@@ -1122,6 +1235,11 @@ class _GofChisquareIndPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        If some of the arguments are arrays, then the power equation is solved
+        elementwise for the broadcasted arguments, with all problems solved at
+        the same time by ``regula_falsi_expanding``. Elements for which this
+        fails are solved separately as above, and are nan if that also fails.
+
         '''
         return super(_GofChisquareIndPower, self).solve_power(effect_size=effect_size,
                                                       nobs1=nobs1,
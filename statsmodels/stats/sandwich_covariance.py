@@ -102,12 +102,14 @@ Statistics 90, no. 3 (2008): 414–427.
 
 """
 from statsmodels.compat.python import range
+from itertools import combinations
 import numpy as np
 
-from statsmodels.tools.grouputils import Group
+from statsmodels.tools.grouputils import group_sums
 from statsmodels.stats.moment_helpers import se_cov
 
-__all__ = ['cov_cluster', 'cov_cluster_2groups', 'cov_hac', 'cov_nw_panel',
+__all__ = ['cov_cluster', 'cov_cluster_2groups', 'cov_cluster_multiway',
+           'cov_hac', 'cov_nw_panel',
            'cov_white_simple',
            'cov_hc0', 'cov_hc1', 'cov_hc2', 'cov_hc3',
            'se_cov', 'weights_bartlett', 'weights_uniform']
@@ -225,8 +227,8 @@ def _get_sandwich_arrays(results):
 
     if isinstance(results, tuple):
         # assume we have jac and hessian_inv
-        jac, hessian_inv = results
-        jac = np.asarray(jac)
+        xu, hessian_inv = results
+        xu = np.asarray(xu)
         hessian_inv = np.asarray(hessian_inv)
     elif hasattr(results, 'model'):
         if hasattr(results, '_results'):
@@ -371,6 +373,9 @@ def S_hac_simple(x, nlags=None, weights_func=weights_bartlett):
 
     options might change when other kernels besides Bartlett are available.
 
+    For more than 50 lags the lag window is applied to the cross periodogram
+    computed by FFT, which takes the same time for any number of lags.
+
     '''
 
     if x.ndim == 1:
@@ -381,6 +386,9 @@ def S_hac_simple(x, nlags=None, weights_func=weights_bartlett):
 
     weights = weights_func(nlags)
 
+    if nlags > 50:
+        return _S_hac_fft(x, weights)
+
     S = weights[0] * np.dot(x.T, x)  #weights[0] just for completeness, is 1
 
     for lag in range(1, nlags+1):
@@ -389,6 +397,31 @@ def S_hac_simple(x, nlags=None, weights_func=weights_bartlett):
 
     return S
 
+def _S_hac_fft(x, weights):
+    '''inner HAC matrix with all lags at once in the frequency domain
+
+    S_ab = sum_{|l| <= nlags} w_|l| sum_t x_a[t + l] x_b[t] is the average
+    over frequencies of the cross periodogram of x_a and x_b times the
+    transfer function of the lag window. The series are zero padded so that
+    the lags do not wrap around.
+    '''
+    n_periods = x.shape[0]
+    weights = np.asarray(weights, dtype=float)
+    nlags = len(weights) - 1
+    nfft = 2**int(np.ceil(np.log2(n_periods + nlags)))
+    fx = np.fft.rfft(np.ascontiguousarray(x.T), n=nfft)
+
+    window = np.zeros(nfft)
+    window[:nlags + 1] = weights
+    if nlags > 0:
+        window[-nlags:] = weights[:0:-1]
+    transfer = np.fft.rfft(window).real
+    # each interior frequency stands for itself and its mirror image
+    transfer[1:-1] *= 2
+    S = np.dot(fx * transfer, fx.conj().T).real / nfft
+    return (S + S.T) / 2.
+
+
 def S_white_simple(x):
     '''inner covariance matrix for White heteroscedastistity sandwich
 
@@ -415,24 +448,6 @@ def S_white_simple(x):
 
 
 
-def group_sums(x, group):
-    '''sum x for each group, simple bincount version, again
-
-    group : array, integer
-        assumed to be consecutive integers
-
-    no dtype checking because I want to raise in that case
-
-    uses loop over columns of x
-
-    #TODO: remove this, already copied to tools/grouputils
-    '''
-
-    #TODO: transpose return in group_sum, need test coverage first
-    return np.array([np.bincount(group, weights=x[:, col])
-                            for col in range(x.shape[1])])
-
-
 def S_hac_groupsum(x, time, nlags=None, weights_func=weights_bartlett):
     '''inner covariance matrix for HAC over group sums sandwich
 
@@ -498,6 +513,43 @@ def cov_crosssection_0(results, group):
     cov = _HCCM1(results, scale)
     return cov
 
+def _group_codes(group):
+    '''integer codes of the groups and the number of nonempty groups
+
+    integer groups are used as codes, other groups are coded by np.unique
+    '''
+    group = np.asarray(group)
+    if group.dtype != np.dtype('int'):
+        clusters, group = np.unique(group, return_inverse=True)
+        return group, len(clusters)
+    return group, np.count_nonzero(np.bincount(group))
+
+
+def _intersection_codes(group0, group1):
+    '''codes for the intersection of two groupings given by integer codes
+    '''
+    group = group0 * (group1.max() + 1) + group1
+    if group.max() > 4 * len(group):
+        # too sparse for bincount
+        group = np.unique(group, return_inverse=True)[1]
+    return _group_codes(group)
+
+
+def _cov_cluster(xu, hessian_inv, group, n_groups, use_correction=True):
+    '''cluster robust covariance from sandwich arrays and group codes'''
+    scale = S_crosssection(xu, group)
+
+    nobs, k_params = xu.shape
+
+    cov_c = _HCCM2(hessian_inv, scale)
+
+    if use_correction:
+        cov_c *= (n_groups / (n_groups - 1.) *
+                  ((nobs-1.) / float(nobs - k_params)))
+
+    return cov_c
+
+
 def cov_cluster(results, group, use_correction=True):
     '''cluster robust covariance matrix
 
@@ -525,23 +577,11 @@ def cov_cluster(results, group, use_correction=True):
     #TODO: currently used version of groupsums requires 2d resid
     xu, hessian_inv = _get_sandwich_arrays(results)
 
-    if not hasattr(group, 'dtype') or group.dtype != np.dtype('int'):
-        clusters, group = np.unique(group, return_inverse=True)
-    else:
-        clusters = np.unique(group)
-
-    scale = S_crosssection(xu, group)
+    #replace with stored group attributes if available
+    group, n_groups = _group_codes(group)
 
-    nobs, k_params = xu.shape
-    n_groups = len(clusters) #replace with stored group attributes if available
-
-    cov_c = _HCCM2(hessian_inv, scale)
-
-    if use_correction:
-        cov_c *= (n_groups / (n_groups - 1.) *
-                  ((nobs-1.) / float(nobs - k_params)))
-
-    return cov_c
+    return _cov_cluster(xu, hessian_inv, group, n_groups,
+                        use_correction=use_correction)
 
 def cov_cluster_2groups(results, group, group2=None, use_correction=True):
     '''cluster robust covariance matrix for two groups/clusters
@@ -581,18 +621,20 @@ def cov_cluster_2groups(results, group, group2=None, use_correction=True):
     else:
         group0 = group
         group1 = group2
-        group = (group0, group1)
 
+    xu, hessian_inv = _get_sandwich_arrays(results)
+    group0, n_groups0 = _group_codes(group0)
+    group1, n_groups1 = _group_codes(group1)
 
-    cov0 = cov_cluster(results, group0, use_correction=use_correction)
-    #[0] because we get still also returns bse
-    cov1 = cov_cluster(results, group1, use_correction=use_correction)
+    cov0 = _cov_cluster(xu, hessian_inv, group0, n_groups0,
+                        use_correction=use_correction)
+    cov1 = _cov_cluster(xu, hessian_inv, group1, n_groups1,
+                        use_correction=use_correction)
 
-    group_intersection = Group(group)
     #cov of cluster formed by intersection of two groups
-    cov01 = cov_cluster(results,
-                        group_intersection.group_int,
-                        use_correction=use_correction)
+    group01, n_groups01 = _intersection_codes(group0, group1)
+    cov01 = _cov_cluster(xu, hessian_inv, group01, n_groups01,
+                         use_correction=use_correction)
 
     #robust cov matrix for union of groups
     cov_both = cov0 + cov1 - cov01
@@ -601,6 +643,64 @@ def cov_cluster_2groups(results, group, group2=None, use_correction=True):
     return cov_both, cov0, cov1
 
 
+def cov_cluster_multiway(results, groups, use_correction=True):
+    '''cluster robust covariance matrix for any number of clusterings
+
+    Parameters
+    ----------
+    results : result instance
+       result of a regression, uses results.model.exog and results.resid
+       TODO: this should use wexog instead
+    groups : ndarray, (nobs, n_clusterings) or list of 1d arrays
+        group indicators of each clustering
+    use_correction : bool
+       If true (default), then the small sample correction factor is used.
+
+    Returns
+    -------
+    cov : ndarray, (k_vars, k_vars)
+        cluster robust covariance matrix for parameter estimates
+
+    Notes
+    -----
+    This is the multiway cluster covariance of Cameron, Gelbach and Miller
+    (2011), the sum over all nonempty subsets of clusterings of the cluster
+    covariance for the intersection of the clusterings in the subset, with
+    sign +1 for subsets of odd size and -1 otherwise. Each term has the small
+    sample correction of `cov_cluster`. For two clusterings this is the
+    first return of `cov_cluster_2groups`.
+
+    The result is not guaranteed to be positive semidefinite.
+    '''
+    if isinstance(groups, (list, tuple)):
+        groups = [np.asarray(g) for g in groups]
+    else:
+        groups = np.asarray(groups)
+        if groups.ndim == 1:
+            groups = groups[:, None]
+        groups = [groups[:, i] for i in range(groups.shape[1])]
+
+    xu, hessian_inv = _get_sandwich_arrays(results)
+    n_ways = len(groups)
+    # codes of intersections, keyed by the tuple of clusterings, each is the
+    # intersection of a previously computed one and one clustering
+    codes = {}
+    for i in range(n_ways):
+        codes[(i,)] = _group_codes(groups[i])
+
+    cov = np.zeros((xu.shape[1], xu.shape[1]))
+    for size in range(1, n_ways + 1):
+        sign = 1 if size % 2 else -1
+        for subset in combinations(range(n_ways), size):
+            if subset not in codes:
+                codes[subset] = _intersection_codes(codes[subset[:-1]][0],
+                                                    codes[subset[-1:]][0])
+            group, n_groups = codes[subset]
+            cov += sign * _cov_cluster(xu, hessian_inv, group, n_groups,
+                                       use_correction=use_correction)
+    return cov
+
+
 def cov_white_simple(results, use_correction=True):
     '''
     heteroscedasticity robust covariance matrix (White)
@@ -695,22 +795,40 @@ cov_hac = cov_hac_simple   #alias for users
 #I think this is pure within group HAC: apply HAC to each group member
 #separately
 
+def _group_labels(groupidx, nobs):
+    '''labels 1, 2, ... for observations in the groups of groupidx, 0 for
+    observations that are in no group
+    '''
+    bounds = np.asarray(groupidx, dtype=int).reshape(-1, 2)
+    bounds = bounds[bounds[:, 1] > bounds[:, 0]]
+    marks = np.zeros(nobs + 1, dtype=int)
+    ids = np.arange(1, len(bounds) + 1)
+    marks[bounds[:, 0]] += ids
+    marks[bounds[:, 1]] -= ids
+    return np.cumsum(marks[:-1])
+
+
+def _lagged_mask(labels, lag):
+    '''mask of observations whose lag is in the same group'''
+    nobs = len(labels)
+    valid = labels[lag:] == labels[:nobs - lag]
+    valid &= labels[lag:] > 0
+    if not valid.any():
+        raise ValueError('all groups are empty taking lags')
+    return valid
+
+
+def _lagged_pairs(x, lag, labels):
+    '''observations and their lags within the same group'''
+    valid = _lagged_mask(labels, lag)
+    return x[lag:][valid], x[:len(labels) - lag][valid]
+
+
 def lagged_groups(x, lag, groupidx):
     '''
     assumes sorted by time, groupidx is tuple of start and end values
-    not optimized, just to get a working version, loop over groups
     '''
-    out0 = []
-    out_lagged = []
-    for l,u in groupidx:
-        if l+lag < u: #group is longer than lag
-            out0.append(x[l+lag:u])
-            out_lagged.append(x[l:u-lag])
-
-    if out0 == []:
-        raise ValueError('all groups are empty taking lags')
-    #return out0, out_lagged
-    return np.vstack(out0), np.vstack(out_lagged)
+    return _lagged_pairs(x, lag, _group_labels(groupidx, len(x)))
 
 
 
@@ -722,11 +840,21 @@ def S_nw_panel(xw, weights, groupidx):
     no reference for this, just accounting for time indices
     '''
     nlags = len(weights)-1
+    labels = _group_labels(groupidx, xw.shape[0])
 
     S = weights[0] * np.dot(xw.T, xw)  #weights just for completeness
+    nobs = xw.shape[0]
     for lag in range(1, nlags+1):
-        xw0, xwlag = lagged_groups(xw, lag, groupidx)
-        s = np.dot(xw0.T, xwlag)
+        valid = _lagged_mask(labels, lag)
+        invalid = ~valid
+        n_invalid = invalid.sum()
+        if n_invalid < nobs // 2:
+            # remove the few pairs that cross groups from the full product
+            s = np.dot(xw[lag:].T, xw[:nobs - lag])
+            if n_invalid:
+                s -= np.dot(xw[lag:][invalid].T, xw[:nobs - lag][invalid])
+        else:
+            s = np.dot(xw[lag:][valid].T, xw[:nobs - lag][valid])
         S += weights[lag] * (s + s.T)
     return S
 
@@ -18,7 +18,9 @@ from numpy.testing import (assert_almost_equal, assert_equal, assert_,
                           assert_allclose)
 
 from statsmodels.stats.multitest import (multipletests, fdrcorrection,
-                                         fdrcorrection_twostage)
+                                         fdrcorrection_twostage,
+                                         multipletests_families,
+                                         multitest_methods_names)
 from statsmodels.stats.multicomp import tukeyhsd
 
 pval0 = np.array([0.838541367553 , 0.642193923795 , 0.680845947633 ,
@@ -313,6 +315,64 @@ def test_issorted():
         assert_allclose(res2[0][sortrevind], res1[0], rtol=1e-10)
 
 
+def test_hommel_partitions():
+    # compare with the loop over all partitions of the previous version
+    def hommel_loop(pvals):
+        ntests = len(pvals)
+        a = pvals.copy()
+        for m in range(ntests, 1, -1):
+            cim = np.min(m * pvals[-m:] / np.arange(1, m + 1.))
+            a[-m:] = np.maximum(a[-m:], cim)
+            a[:-m] = np.maximum(a[:-m], np.minimum(m * pvals[:-m], cim))
+        a[a > 1] = 1
+        return a
+
+    np.random.seed(987125)
+    for ntests in [1, 2, 5, 50, 500]:
+        for decimals in [1, 3, 10]:
+            # rounding creates ties
+            pvals = np.round(np.random.beta(0.3, 1, size=ntests), decimals)
+            pvals = np.sort(pvals)
+            res = multipletests(pvals, method='hommel', is_sorted=True)[1]
+            assert_allclose(res, hommel_loop(pvals), rtol=1e-13, atol=1e-15)
+
+
+def test_multipletests_families():
+    np.random.seed(987126)
+    sizes = [1, 7, 30, 2, 15]
+    pvals = np.round(np.random.beta(0.3, 1, size=sum(sizes)), 4)
+    groups = np.repeat(['e', 'b', 'c', 'a', 'd'], sizes)
+    idx = np.random.permutation(len(pvals))
+    pvals, groups = pvals[idx], groups[idx]
+    pvals2d = np.random.beta(0.3, 1, size=(25, 4))
+
+    for method in multitest_methods_names:
+        reject, pvals_corrected = multipletests_families(
+                            pvals, alpha=0.1, method=method, groups=groups)
+        for g in np.unique(groups):
+            mask = groups == g
+            res = multipletests(pvals[mask], alpha=0.1, method=method)
+            assert_equal(reject[mask], res[0])
+            assert_allclose(pvals_corrected[mask], res[1], rtol=1e-13,
+                            atol=1e-14)
+
+        reject, pvals_corrected = multipletests_families(
+                            pvals2d, alpha=0.1, method=method, axis=0)
+        for i in range(pvals2d.shape[1]):
+            res = multipletests(pvals2d[:, i], alpha=0.1, method=method)
+            assert_equal(reject[:, i], res[0])
+            assert_allclose(pvals_corrected[:, i], res[1], rtol=1e-13,
+                            atol=1e-14)
+
+        # float32 and in place
+        pvals32 = pvals2d.T.astype(np.float32)
+        res32 = multipletests_families(pvals32, alpha=0.1, method=method,
+                                       out=pvals32)
+        assert_(res32[1] is pvals32)
+        assert_equal(pvals32.dtype, np.float32)
+        assert_allclose(pvals32, pvals_corrected.T, rtol=1e-5)
+
+
 def test_tukeyhsd():
     #example multicomp in R p 83
 
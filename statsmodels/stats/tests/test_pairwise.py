@@ -177,6 +177,17 @@ class CheckTuckeyHSDMixin(object):
         res = pairwise_tukeyhsd(self.endog, self.groups, alpha=self.alpha)
         assert_almost_equal(res.confint, self.res.confint, decimal=14)
 
+    def test_summary_frame(self):
+        frame = self.res.summary_frame()
+        assert_almost_equal(frame['meandiff'], self.res.meandiffs, decimal=14)
+        assert_almost_equal(frame[['lower', 'upper']], self.res.confint,
+                            decimal=14)
+        assert_equal(frame['reject'].values, self.res.reject)
+        t = self.res.summary()
+        for i in range(len(frame)):
+            assert_equal(t[i + 1][0].data, frame['group1'].iloc[i])
+            assert_equal(t[i + 1][1].data, frame['group2'].iloc[i])
+
 
 class TestTuckeyHSD2(CheckTuckeyHSDMixin):
 
@@ -291,3 +302,24 @@ class TestTuckeyHSD4(CheckTuckeyHSDMixin):
 
     def test_hochberg_intervals(self):
         assert_almost_equal(self.res.halfwidths, self.halfwidth2, 14)
+
+
+def test_many_groups():
+    # pairwise statistics for many groups against the group data split
+    np.random.seed(987123)
+    n_groups = 60
+    groups = np.random.randint(0, n_groups, size=1500)
+    endog = np.random.randn(1500) + 0.01 * groups
+    group_order = np.random.permutation(n_groups)
+    mc = MultiComparison(endog, groups, group_order=group_order)
+    for g, data in zip(group_order, mc.datali):
+        assert_equal(data, endog[groups == g])
+
+    res = mc.tukeyhsd()
+    i1, i2 = np.triu_indices(n_groups, 1)
+    means = np.array([x.mean() for x in mc.datali])
+    assert_almost_equal(res.meandiffs, means[i2] - means[i1], decimal=12)
+    nobs = np.array([len(x) for x in mc.datali])
+    std_pairs = np.sqrt(res.variance * (1. / nobs[i1] + 1. / nobs[i2]) / 2.)
+    assert_almost_equal(res.std_pairs, std_pairs, decimal=12)
+    assert_equal(res.reject, np.abs(res.meandiffs) / std_pairs > res.q_crit)
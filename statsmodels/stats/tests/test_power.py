@@ -14,7 +14,7 @@ import copy
 
 import numpy as np
 from numpy.testing import (assert_almost_equal, assert_allclose, assert_raises,
-                           assert_equal, assert_warns)
+                           assert_equal, assert_warns, assert_)
 
 
 import statsmodels.stats.power as smp
@@ -90,6 +90,23 @@ class CheckPowerMixin(object):
             #yield assert_allclose, result, value, 0.001, 0, key+' failed'
             kwds[key] = value  # reset dict
 
+    def test_roots_vectorized(self):
+        kwds = copy.copy(self.kwds)
+        kwds.update(self.kwds_extra)
+
+        # solve two identical problems, broadcast through another argument
+        for key in self.kwds:
+            value = kwds[key]
+            kwds[key] = None
+            other = 'alpha' if key != 'alpha' else 'power'
+            kwds[other] = np.array([kwds[other]] * 2)
+
+            result = self.cls().solve_power(**kwds)
+            assert_equal(result.shape, (2,))
+            assert_allclose(result, value, rtol=0.001, err_msg=key+' failed')
+            kwds[key] = value  # reset dict
+            kwds[other] = kwds[other][0]
+
     @dec.skipif(not have_matplotlib)
     def test_power_plot(self):
         if self.cls == smp.FTestPower:
@@ -715,6 +732,51 @@ def test_power_solver():
     assert_raises(ValueError, nip.solve_power, None, nobs1=1600, alpha=0.01,
                   power=0.005, ratio=1, alternative='larger')
 
+def test_solve_power_grid():
+    # grid of effect sizes and sample sizes, roundtrip through power
+    effect_size = np.linspace(0.1, 1, 10)[:, None]
+    nobs1 = np.array([10, 20, 50, 100])
+    alpha = np.array([0.01, 0.05, 0.1, 0.05])
+
+    for cls in [smp.TTestIndPower, smp.NormalIndPower]:
+        pwr = cls().power(effect_size, nobs1, alpha, ratio=2)
+        pwr = np.clip(pwr, 0.05, 0.95)
+        pow_class = cls()
+        res = pow_class.solve_power(effect_size=effect_size, nobs1=None,
+                                    alpha=alpha, power=pwr, ratio=2)
+        assert_equal(res.shape, (10, 4))
+        assert_equal(pow_class.cache_fit_res[0], 1)
+        assert_allclose(cls().power(effect_size, res, alpha, ratio=2), pwr,
+                        rtol=1e-10)
+
+        res_es = cls().solve_power(effect_size=None, nobs1=nobs1,
+                                   alpha=alpha, power=pwr, ratio=2)
+        assert_allclose(cls().power(res_es, nobs1, alpha, ratio=2), pwr,
+                        rtol=1e-10)
+
+        # elementwise equal to the scalar solver
+        res0 = cls().solve_power(effect_size=effect_size[3, 0], nobs1=None,
+                                 alpha=alpha[1], power=pwr[3, 1], ratio=2)
+        assert_allclose(res[3, 1], res0, rtol=1e-5)
+
+    # ratio=0 is the one sample test
+    nip = smp.NormalIndPower()
+    pwr = nip.power(0.2, 100, 0.05, ratio=np.array([0, 1]))
+    assert_allclose(pwr, [nip.power(0.2, 100, 0.05, ratio=0),
+                          nip.power(0.2, 100, 0.05, ratio=1)], rtol=1e-13)
+
+    # negative effect size cannot reach the power, solution is nan
+    tip = smp.TTestIndPower()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        res = tip.solve_power(effect_size=np.array([0.5, -0.5]), nobs1=None,
+                              alpha=0.05, power=0.8, alternative='larger')
+    assert_equal(tip.cache_fit_res[0], 0)
+    assert_(np.isnan(res[1]))
+    assert_allclose(res[0], tip.solve_power(0.5, nobs1=None, alpha=0.05,
+                                            power=0.8, alternative='larger'),
+                    rtol=1e-5)
+
 def test_power_solver_warn():
     # messing up the solver to trigger warning
     # I wrote this with scipy 0.9,
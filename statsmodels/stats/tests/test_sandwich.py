@@ -89,6 +89,66 @@ def test_hac_simple():
     cov4 = sw.cov_hac_simple(res_olsg, nlags=4, use_correction=False)
     assert_almost_equal(cov3, cov4, decimal=14)
 
+def test_cov_cluster_multiway():
+    import os
+    from statsmodels.tools.grouputils import Group
+    cur_dir = os.path.abspath(os.path.dirname(__file__))
+    fpath = os.path.join(cur_dir,"test_data.txt")
+    pet = np.genfromtxt(fpath)
+    endog = pet[:,-1]
+    group = pet[:,0].astype(int)
+    time = pet[:,1].astype(int)
+    exog = add_constant(pet[:,2])
+    res = OLS(endog, exog).fit()
+
+    cov01 = sw.cov_cluster_2groups(res, group, group2=time)[0]
+    cov = sw.cov_cluster_multiway(res, np.column_stack((group, time)))
+    assert_almost_equal(cov, cov01, decimal=15)
+    assert_almost_equal(sw.cov_cluster_multiway(res, [group]),
+                        sw.cov_cluster(res, group), decimal=15)
+
+    # three way by inclusion-exclusion of intersections
+    group2 = (np.arange(len(endog)) % 7).astype(float)
+    groups = (group, time, group2)
+    cov = sw.cov_cluster_multiway(res, groups)
+    cov_ie = 0
+    for subset, sign in [((0,), 1), ((1,), 1), ((2,), 1), ((0, 1), -1),
+                         ((0, 2), -1), ((1, 2), -1), ((0, 1, 2), 1)]:
+        g = Group(np.column_stack([groups[i] for i in subset])).group_int
+        cov_ie = cov_ie + sign * sw.cov_cluster(res, g)
+    assert_almost_equal(cov, cov_ie, decimal=15)
+
+def test_hac_fft():
+    np.random.seed(987125)
+    x = np.random.randn(500, 3)
+    x[1:] += 0.5 * x[:-1]
+    for nlags in [60, 200]:
+        weights = sw.weights_bartlett(nlags)
+        S = weights[0] * np.dot(x.T, x)
+        for lag in range(1, nlags + 1):
+            s = np.dot(x[lag:].T, x[:-lag])
+            S += weights[lag] * (s + s.T)
+        assert_almost_equal(sw.S_hac_simple(x, nlags=nlags), S, decimal=10)
+
+def test_nw_panel_lags():
+    np.random.seed(987125)
+    x = np.random.randn(40, 2)
+    groupidx = [(0, 5), (5, 5), (5, 7), (7, 20), (20, 40)]
+    weights = sw.weights_bartlett(3)
+    S = weights[0] * np.dot(x.T, x)
+    for lag in range(1, 4):
+        s = 0
+        for l, u in groupidx:
+            if l + lag < u:
+                s = s + np.dot(x[l+lag:u].T, x[l:u-lag])
+        S += weights[lag] * (s + s.T)
+    assert_almost_equal(sw.S_nw_panel(x, weights, groupidx), S, decimal=13)
+    x0, xlag = sw.lagged_groups(x, 3, groupidx)
+    assert_almost_equal(x0, np.vstack((x[3:5], x[10:20], x[23:40])),
+                        decimal=15)
+    assert_almost_equal(xlag, np.vstack((x[:2], x[7:17], x[20:37])),
+                        decimal=15)
+
 if __name__ == '__main__':
     import nose
     nose.runmodule(argv=[__file__, '-vvs', '-x'], exit=False)
@@ -93,7 +93,8 @@ def group_sums(x, group, use_bincount=True):
 
     no dtype checking because I want to raise in that case
 
-    uses loop over columns of x
+    if group is sorted, then all columns of x are summed at once with
+    np.add.reduceat, otherwise this uses a bincount loop over columns of x
 
     for comparison, simple python loop
     '''
@@ -104,13 +105,36 @@ def group_sums(x, group, use_bincount=True):
         raise ValueError('not implemented yet')
 
     if use_bincount:
+        group = np.asarray(group)
+        if len(group) > 0 and (group[1:] >= group[:-1]).all():
+            # raise on the same labels as np.bincount
+            if group.dtype.kind not in 'biu':
+                raise TypeError('group labels need to be integers')
+            if group[0] < 0:
+                raise ValueError('group labels need to be non-negative')
+            # segmented sums, e.g. for stacked panels
+            starts = np.nonzero(np.concatenate(([True],
+                                group[1:] != group[:-1])))[0]
+            if len(starts) == len(group):
+                # only singletons
+                sums = np.array(x, dtype=float)
+            else:
+                sums = np.asarray(np.add.reduceat(x, starts, axis=0),
+                                  dtype=float)
+            labels = group[starts]
+            if labels[-1] + 1 == len(labels):
+                # all levels are present
+                return sums.T
+            result = np.zeros((labels[-1] + 1, x.shape[1]))
+            result[labels] = sums
+            return result.T
         return np.array([np.bincount(group, weights=x[:, col])
                          for col in range(x.shape[1])])
     else:
         uniques = np.unique(group)
         result = np.zeros([len(uniques)] + list(x.shape[1:]))
         for ii, cat in enumerate(uniques):
-            result[ii] = x[g == cat].sum(0)
+            result[ii] = x[group == cat].sum(0)
         return result
 
 
@@ -73,3 +73,43 @@ def parallel_func(func, n_jobs, verbose=5):
         my_func = func
         parallel = list
     return parallel, my_func, n_jobs
+
+
+def map_blocks(func, n, n_jobs=1):
+    """Results of func(start, stop) for blocks that partition range(n)
+
+    The blocks are processed in threads, which run in parallel if func
+    spends its time in numpy or scipy functions that release the GIL.
+
+    Parameters
+    ----------
+    func: callable
+        Function of the start and stop of a block.
+    n: int
+        Number of items.
+    n_jobs: int
+        Number of threads, -1 uses all CPUs. There are at most n blocks.
+
+    Returns
+    -------
+    results: list
+        The results of func in the order of the blocks.
+    """
+    if n_jobs == -1:
+        try:
+            import multiprocessing
+            n_jobs = multiprocessing.cpu_count()
+        except (ImportError, NotImplementedError):
+            n_jobs = 1
+    n_jobs = max(1, min(n_jobs, n))
+    if n_jobs == 1:
+        return [func(0, n)]
+
+    from multiprocessing.pool import ThreadPool
+    bounds = [n * i // n_jobs for i in range(n_jobs + 1)]
+    pool = ThreadPool(n_jobs)
+    try:
+        return pool.map(lambda b: func(*b),
+                        list(zip(bounds[:-1], bounds[1:])))
+    finally:
+        pool.close()
@@ -227,3 +227,243 @@ def brentq_expanding(func, low=None, upp=None, args=(), xtol=1e-5,
 
 
 
+def regula_falsi_expanding(func, nobs, low=None, upp=None, start_low=None,
+                           start_upp=None, increasing=None, xtol=2e-12,
+                           rtol=4 * np.finfo(float).eps, max_it=100,
+                           maxiter=100, factor=10, full_output=False):
+    '''find the roots of many monotonic functions at once by expanding and
+    Illinois regula falsi
+
+    This is a vectorized version of ``brentq_expanding`` for ``nobs``
+    independent root finding problems. The bounds are expanded and the bracket
+    is refined for all problems at the same time, so that the function is
+    called once per iteration with an array of trial values instead of once
+    per problem and iteration.
+
+    Parameters
+    ----------
+    func : callable
+        ``func(x, idx)`` returns the function values for the problems with
+        (flat integer) index ``idx`` at the trial values ``x``. ``x`` and
+        ``idx`` are 1-dimensional arrays of the same length.
+    nobs : int
+        number of root finding problems
+    low : None, float or array_like
+        lower bound of the bracket. Arrays have to broadcast to ``(nobs,)``.
+    upp : None, float or array_like
+        upper bound of the bracket. Arrays have to broadcast to ``(nobs,)``.
+    start_low : None, float (negative) or array_like
+        starting bound for the expansion with decreasing ``x``.
+        If None, then it is set to -1.
+    start_upp : None, float (positive) or array_like
+        starting bound for the expansion with increasing ``x``.
+        If None, then it is set to 1.
+    increasing : None, bool or array_like of bool
+        If None, then the function is evaluated at the initial bounds to
+        determine wether the function is increasing or not, separately for
+        each problem.
+    xtol, rtol : float
+        absolute and relative tolerance for the width of the bracket, or for
+        the distance between the last two trial points if they have function
+        values of opposite sign.
+    max_it : int
+        maximum number of expansion steps.
+    maxiter : int
+        maximum number of regula falsi iterations.
+    factor : float
+        expansion factor for step of shifting the bounds interval, default is
+        10.
+    full_output : bool, optional
+        If full_output is True, then a Bunch with convergence information is
+        returned in addition to the roots.
+
+    Returns
+    -------
+    x : ndarray, 1-D
+        roots of the function, ``x`` is nan for problems where no bracket
+        could be found.
+    info : Bunch (optional)
+        returned if ``full_output`` is True.
+        attributes:
+
+         - bracketed : boolean array, True if the expansion found a bracket
+         - converged : boolean array, True if the root converged
+         - increasing : boolean array, direction used in the expansion
+         - iterations_expand : number of iterations in expansion stage
+         - iterations : number of regula falsi iterations
+
+    Notes
+    -----
+    The bounds and the inference of ``increasing`` follow the same rules as
+    in ``brentq_expanding``. The refinement step is the Illinois variant of
+    regula falsi, which keeps the root bracketed and converges superlinearly.
+    If the same end of the bracket is replaced three times in a row, then a
+    bisection step is used instead, so the bracket shrinks at least by half
+    every three iterations.
+    Trial points that fall outside of the bracket, for example because of
+    infinite function values, are replaced by the midpoint of the bracket.
+    A problem whose function value is nan at a trial point is not converged
+    and its root is nan.
+
+    '''
+    idx_all = np.arange(nobs)
+
+    def full(value):
+        return np.zeros(nobs) + value
+
+    # start_upp first because of possible sl = -1 > upp
+    if upp is not None:
+        su = full(upp)
+    elif start_upp is not None:
+        if np.any(np.asarray(start_upp) < 0):
+            raise ValueError('start_upp needs to be positive')
+        su = full(start_upp)
+    else:
+        su = np.ones(nobs)
+
+    if low is not None:
+        sl = full(low)
+    elif start_low is not None:
+        if np.any(np.asarray(start_low) > 0):
+            raise ValueError('start_low needs to be negative')
+        sl = full(start_low)
+    else:
+        sl = np.minimum(-1., su - 1.)
+
+    if upp is None:
+        su = np.maximum(su, sl + 1.)
+
+    if increasing is None:
+        if (low is None) or (upp is None):
+            f_low = func(sl, idx_all)
+            f_upp = func(su, idx_all)
+
+            # special case for functions that are symmetric around zero
+            with np.errstate(invalid='ignore'):
+                symm = ((np.abs(f_upp - f_low) < 1e-15) & (sl == -1) &
+                        (su == 1))
+            if symm.any():
+                sl[symm] = 1e-8
+                f_low[symm] = func(sl[symm], idx_all[symm])
+
+            # possibly func returns nan, try 3 more points
+            delta = su - sl
+            for fval, bound in [(f_low, sl), (f_upp, su)]:
+                for fraction in [0.25, 0.5, 0.75]:
+                    mask = np.isnan(fval)
+                    if not mask.any():
+                        break
+                    fval[mask] = func(bound[mask] + fraction * delta[mask],
+                                      idx_all[mask])
+            with np.errstate(invalid='ignore'):
+                increasing = f_low < f_upp
+        else:
+            # both bounds are fixed, only the bracket matters
+            increasing = np.ones(nobs, bool)
+    else:
+        increasing = np.zeros(nobs, bool) | increasing
+
+    # ``a`` is the end with negative, ``b`` with positive function value
+    a = np.where(increasing, sl, su)
+    b = np.where(increasing, su, sl)
+    fixed_a = np.where(increasing, low is not None, upp is not None)
+    fixed_b = np.where(increasing, upp is not None, low is not None)
+
+    n_it = 0
+    active = (~fixed_a) & (a != 0)
+    while active.any() and n_it < max_it:
+        ii = idx_all[active]
+        with np.errstate(invalid='ignore'):
+            move = func(a[ii], ii) > 0
+        active[ii[~move]] = False
+        ii = ii[move]
+        b[ii] = a[ii]
+        fixed_b[ii] = True
+        a[ii] *= factor
+        n_it += 1
+
+    active = (~fixed_b) & (b != 0)
+    while active.any() and n_it < max_it:
+        ii = idx_all[active]
+        with np.errstate(invalid='ignore'):
+            move = func(b[ii], ii) < 0
+        active[ii[~move]] = False
+        ii = ii[move]
+        a[ii] = b[ii]
+        b[ii] *= factor
+        n_it += 1
+
+    fa = func(a, idx_all)
+    fb = func(b, idx_all)
+    # orient the brackets so that fa <= 0 <= fb
+    with np.errstate(invalid='ignore'):
+        swap = (fa > 0) & (fb < 0)
+        bracketed = ((fa <= 0) & (fb >= 0)) | swap
+    a[swap], b[swap] = b[swap], a[swap]
+    fa[swap], fb[swap] = fb[swap], fa[swap]
+
+    x = np.empty(nobs)
+    x.fill(np.nan)
+    converged = np.zeros(nobs, bool)
+    for fval, bound in [(fa, a), (fb, b)]:
+        mask = (fval == 0) & ~converged
+        x[mask] = bound[mask]
+        converged |= mask
+
+    # side of the last update, -1 for a, 1 for b, and how often in a row
+    side = np.zeros(nobs, np.int8)
+    repeat = np.zeros(nobs, np.int8)
+    active = bracketed & ~converged
+    x[active] = a[active]
+    n_iter = 0
+    while active.any() and n_iter < maxiter:
+        ii = idx_all[active]
+        ai, bi, fai, fbi = a[ii], b[ii], fa[ii], fb[ii]
+        with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+            xi = bi - fbi * (bi - ai) / (fbi - fai)
+        lower = np.minimum(ai, bi)
+        upper = np.maximum(ai, bi)
+        # bisect if the secant step is not useful or stalls on one side
+        outside = ~((xi > lower) & (xi < upper)) | (repeat[ii] >= 2)
+        xi[outside] = 0.5 * (ai[outside] + bi[outside])
+        fxi = func(xi, ii)
+        step = np.abs(xi - x[ii])
+        x[ii] = xi
+
+        fail = np.isnan(fxi)
+        x[ii[fail]] = np.nan
+        with np.errstate(invalid='ignore'):
+            neg = (fxi < 0)
+            pos = (fxi > 0)
+        # Illinois: halve the retained end if the same end is replaced twice
+        halve_b = neg & (side[ii] == -1)
+        halve_a = pos & (side[ii] == 1)
+        fb[ii[halve_b]] *= 0.5
+        fa[ii[halve_a]] *= 0.5
+        a[ii[neg]] = xi[neg]
+        fa[ii[neg]] = fxi[neg]
+        b[ii[pos]] = xi[pos]
+        fb[ii[pos]] = fxi[pos]
+        same = (neg & (side[ii] == -1)) | (pos & (side[ii] == 1))
+        # the root is between two consecutive trial points of opposite sign
+        cross = (neg & (side[ii] == 1)) | (pos & (side[ii] == -1))
+        repeat[ii] = np.where(same, repeat[ii] + 1, 0)
+        side[ii[neg]] = -1
+        side[ii[pos]] = 1
+
+        tol = xtol + rtol * np.abs(xi)
+        done = ((fxi == 0) | (np.abs(b[ii] - a[ii]) <= tol) |
+                (cross & (step <= tol)))
+        done &= ~fail
+        converged[ii[done]] = True
+        active[ii[done | fail]] = False
+        n_iter += 1
+
+    if full_output:
+        from statsmodels.tools.tools import Bunch
+        info = Bunch(bracketed=bracketed, converged=converged,
+                     increasing=increasing, iterations_expand=n_it,
+                     iterations=n_iter)
+        return x, info
+    else:
+        return x
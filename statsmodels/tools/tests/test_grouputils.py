@@ -248,3 +248,27 @@ def test_init_api():
     grouping = Grouping(list_groups)
     np.testing.assert_array_equal(grouping.group_names,
                                   ['group0', 'group1', 'group2'])
+
+
+def test_group_sums():
+    from statsmodels.tools.grouputils import group_sums
+    np.random.seed(12345)
+    x = np.random.randn(50, 3)
+    for group in [np.random.randint(0, 6, size=50),
+                  np.sort(np.random.randint(0, 6, size=50)),
+                  np.sort(np.random.randint(0, 60, size=50)),
+                  np.arange(50)]:
+        expected = np.array([[x[group == g, col].sum()
+                              for g in range(group.max() + 1)]
+                             for col in range(3)])
+        np.testing.assert_allclose(group_sums(x, group), expected,
+                                   rtol=1e-13, atol=1e-13)
+        np.testing.assert_allclose(group_sums(x[:, 0], group),
+                                   expected[:1], rtol=1e-13, atol=1e-13)
+
+    # invalid labels raise for sorted and unsorted groups
+    x = np.ones((4, 2))
+    for group in [np.array([-1, -1, 0, 1]), np.array([0, 1, -1, -1])]:
+        np.testing.assert_raises(ValueError, group_sums, x, group)
+    for group in [np.array([0., 0.5, 1, 1]), np.array([1., 0, 0.5, 1])]:
+        np.testing.assert_raises(TypeError, group_sums, x, group)
@@ -1,6 +1,6 @@
 from statsmodels.compat.python import range
 import warnings
-from statsmodels.tools.parallel import parallel_func
+from statsmodels.tools.parallel import parallel_func, map_blocks
 from numpy import arange, testing
 from math import sqrt
 
@@ -11,3 +11,10 @@ def test_parallel():
         parallel, p_func, n_jobs = parallel_func(sqrt, n_jobs=-1, verbose=0)
         y = parallel(p_func(i**2) for i in range(10))
     testing.assert_equal(x,y)
+
+def test_map_blocks():
+    x = arange(10.)
+    for n_jobs, n_blocks in [(1, 1), (3, 3), (20, 10)]:
+        blocks = map_blocks(lambda start, stop: x[start:stop], 10, n_jobs)
+        testing.assert_equal(len(blocks), n_blocks)
+        testing.assert_equal(sum(map(list, blocks), []), x)
@@ -7,9 +7,11 @@ Author: Josef Perktold
 """
 
 import numpy as np
-from statsmodels.tools.rootfinding import brentq_expanding
+from statsmodels.tools.rootfinding import (brentq_expanding,
+                                           regula_falsi_expanding)
 
-from numpy.testing import assert_allclose, assert_equal, assert_raises
+from numpy.testing import (assert_allclose, assert_equal, assert_raises,
+                           assert_)
 
 def func(x, a):
     f = (x - a)**3
@@ -84,3 +86,48 @@ def test_brentq_expanding():
         assert_equal(info1[k], info.__dict__[k])
 
     assert_allclose(info.root, a, rtol=1e-5)
+
+
+def test_regula_falsi_expanding():
+    cases = [
+        (0, {}),
+        (50, {}),
+        (-50, {}),
+        (500000, dict(low=10000)),
+        (-50000, dict(upp=-1000)),
+        (500000, dict(low=300000, upp=700000)),
+        (-50000, dict(low= -70000, upp=-1000))
+        ]
+
+    funcs = [(func, None),
+             (func, True),
+             (funcn, None),
+             (funcn, False)]
+
+    # several problems at once, roots are scaled versions of a
+    scale = np.array([1., 1.1, 1.2])
+    for f, inc in funcs:
+        for a, kwds in cases:
+            kw = {'increasing':inc}
+            kw.update(kwds)
+            # the cubic has a triple root, convergence is only linear
+            res = regula_falsi_expanding(lambda x, idx: f(x, a * scale[idx]),
+                                         3, maxiter=300, **kw)
+            assert_allclose(res, a * scale, rtol=1e-10, atol=1e-10)
+
+    # low upp given, but doesn't bound root
+    res, info = regula_falsi_expanding(lambda x, idx: funcn(x, -50000.), 1,
+                                       low=-40000, upp=-10000,
+                                       full_output=True)
+    assert_(np.isnan(res[0]))
+    assert_equal(info.bracketed, [False])
+    assert_equal(info.converged, [False])
+
+    # array bounds, simple roots converge fast
+    a = np.array([5., 50, 500, 5000])
+    res, info = regula_falsi_expanding(lambda x, idx: np.log(x / a[idx]), 4,
+                                       low=1e-3 * a, start_upp=1,
+                                       full_output=True)
+    assert_allclose(res, a, rtol=1e-12)
+    assert_(info.converged.all())
+    assert_(info.iterations < 20)
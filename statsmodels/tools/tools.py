@@ -562,3 +562,24 @@ class Bunch(dict):
     def __init__(self, **kw):
         dict.__init__(self, kw)
         self.__dict__  = self
+
+
+def check_random_state(random_state):
+    """
+    Random number generator from a seed or RandomState
+
+    Parameters
+    ----------
+    random_state : None, int or np.random.RandomState
+        If None, the global numpy random number generator is returned, an
+        integer is used as seed for a new RandomState.
+
+    Returns
+    -------
+    random_state : np.random.RandomState
+    """
+    if random_state is None:
+        return np.random.mtrand._rand
+    if isinstance(random_state, np.random.RandomState):
+        return random_state
+    return np.random.RandomState(random_state)
@@ -0,0 +1,538 @@
+#cython: boundscheck = False
+#cython: wraparound = False
+#cython: cdivision = True
+
+'''
+Moving window statistics with bounded memory
+
+The window holds at most `windowsize` observations. Order statistics use an
+indexable skiplist with O(log w) insertion, deletion and selection, moving
+minimum and maximum use monotone deques, and moments are updated with
+Welford-style add and remove steps. Non-finite observations take a place
+in the window but are not used in the statistics.
+
+References
+----------
+Pebay, P. (2008) "Formulas for Robust, One-Pass Parallel Computation of
+Covariances and Arbitrary-Order Statistical Moments". Sandia Report
+SAND2008-6212.
+
+Pugh, W. (1990) "Skip lists: a probabilistic alternative to balanced
+trees". Communications of the ACM 33 (6): 668-676.
+'''
+
+import numpy as np
+cimport numpy as np
+cimport cython
+from libc.math cimport sqrt, floor
+from libc.stdlib cimport malloc, free
+from libc.stdint cimport uint64_t
+
+# statistics computed by _MovingWindow
+STAT_MEAN = 0
+STAT_VAR = 1
+STAT_SKEW = 2
+STAT_QUANTILE = 3
+STAT_MAD = 4
+STAT_MIN = 5
+STAT_MAX = 6
+
+cdef enum:
+    MEAN = 0
+    VAR = 1
+    SKEW = 2
+    QUANTILE = 3
+    MAD = 4
+    MIN = 5
+    MAX = 6
+
+cdef enum:
+    MAXLEVELS = 32
+
+# index of the end of a skiplist level
+cdef Py_ssize_t NIL = -1
+
+cdef double NAN = np.nan
+
+# isfinite is not available with older windows SDKs
+cdef inline bint isfinite(double x) nogil: return x - x == 0
+
+
+cdef class _IndexableSkiplist:
+    '''
+    Sorted multiset of at most `capacity` doubles with selection by rank.
+
+    Every link stores its width, the number of level-0 steps it skips, so
+    that the k-th smallest value can be found in O(log n). Nodes are taken
+    from a preallocated pool, node 0 is the head.
+    '''
+    cdef:
+        Py_ssize_t capacity, size, nlevels, nfree
+        double *value
+        int *levels
+        Py_ssize_t *nxt
+        Py_ssize_t *width
+        Py_ssize_t *free_nodes
+        uint64_t state
+
+    def __cinit__(self, Py_ssize_t capacity):
+        cdef Py_ssize_t i
+        self.capacity = capacity
+        self.size = 0
+        self.nlevels = 1
+        while (1 << self.nlevels) < capacity and self.nlevels < MAXLEVELS:
+            self.nlevels += 1
+        self.value = <double *>malloc((capacity + 1) * sizeof(double))
+        self.levels = <int *>malloc((capacity + 1) * sizeof(int))
+        self.nxt = <Py_ssize_t *>malloc((capacity + 1) * self.nlevels *
+                                        sizeof(Py_ssize_t))
+        self.width = <Py_ssize_t *>malloc((capacity + 1) * self.nlevels *
+                                          sizeof(Py_ssize_t))
+        self.free_nodes = <Py_ssize_t *>malloc(capacity * sizeof(Py_ssize_t))
+        if (self.value == NULL or self.levels == NULL or self.nxt == NULL or
+                self.width == NULL or self.free_nodes == NULL):
+            raise MemoryError()
+        self.state = 88172645463325252ULL
+        self.clear()
+
+    def __dealloc__(self):
+        free(self.value)
+        free(self.levels)
+        free(self.nxt)
+        free(self.width)
+        free(self.free_nodes)
+
+    cdef void clear(self) nogil:
+        cdef Py_ssize_t i
+        self.size = 0
+        self.levels[0] = self.nlevels
+        for i in range(self.nlevels):
+            self.nxt[i] = NIL
+            self.width[i] = 1
+        self.nfree = self.capacity
+        for i in range(self.capacity):
+            self.free_nodes[i] = self.capacity - i
+
+    cdef int _random_level(self) nogil:
+        # xorshift64, each additional level has probability 1/2
+        cdef:
+            int d = 1
+            uint64_t bits
+        self.state ^= self.state << 13
+        self.state ^= self.state >> 7
+        self.state ^= self.state << 17
+        bits = self.state
+        while d < self.nlevels and (bits & 1):
+            d += 1
+            bits >>= 1
+        return d
+
+    cdef void insert(self, double v) nogil:
+        cdef:
+            Py_ssize_t chain[MAXLEVELS]
+            Py_ssize_t steps_at_level[MAXLEVELS]
+            Py_ssize_t node = 0, nxt, newnode, steps = 0
+            Py_ssize_t L = self.nlevels
+            int level, d
+
+        # find the last node on each level with value <= v
+        for level in range(L - 1, -1, -1):
+            steps_at_level[level] = 0
+            nxt = self.nxt[node * L + level]
+            while nxt != NIL and self.value[nxt] <= v:
+                steps_at_level[level] += self.width[node * L + level]
+                node = nxt
+                nxt = self.nxt[node * L + level]
+            chain[level] = node
+
+        # link the new node on its levels
+        d = self._random_level()
+        self.nfree -= 1
+        newnode = self.free_nodes[self.nfree]
+        self.value[newnode] = v
+        self.levels[newnode] = d
+        for level in range(d):
+            node = chain[level]
+            self.nxt[newnode * L + level] = self.nxt[node * L + level]
+            self.nxt[node * L + level] = newnode
+            self.width[newnode * L + level] = (self.width[node * L + level] -
+                                               steps)
+            self.width[node * L + level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(d, L):
+            self.width[chain[level] * L + level] += 1
+        self.size += 1
+
+    cdef void remove(self, double v) nogil:
+        '''remove one node with value v, v has to be in the list'''
+        cdef:
+            Py_ssize_t chain[MAXLEVELS]
+            Py_ssize_t node = 0, nxt, target
+            Py_ssize_t L = self.nlevels
+            int level, d
+
+        # find the last node on each level with value < v
+        for level in range(L - 1, -1, -1):
+            nxt = self.nxt[node * L + level]
+            while nxt != NIL and self.value[nxt] < v:
+                node = nxt
+                nxt = self.nxt[node * L + level]
+            chain[level] = node
+
+        target = self.nxt[chain[0] * L]
+        d = self.levels[target]
+        for level in range(d):
+            node = chain[level]
+            self.width[node * L + level] += (self.width[target * L + level] -
+                                             1)
+            self.nxt[node * L + level] = self.nxt[target * L + level]
+        for level in range(d, L):
+            self.width[chain[level] * L + level] -= 1
+        self.free_nodes[self.nfree] = target
+        self.nfree += 1
+        self.size -= 1
+
+    cdef double get(self, Py_ssize_t i) nogil:
+        '''the i-th smallest value, 0 <= i < size'''
+        cdef:
+            Py_ssize_t node = 0, nxt
+            Py_ssize_t L = self.nlevels
+            int level
+
+        i += 1
+        for level in range(L - 1, -1, -1):
+            nxt = self.nxt[node * L + level]
+            while nxt != NIL and self.width[node * L + level] <= i:
+                i -= self.width[node * L + level]
+                node = nxt
+                nxt = self.nxt[node * L + level]
+        return self.value[node]
+
+    cdef Py_ssize_t count_less(self, double v) nogil:
+        '''number of values that are smaller than v'''
+        cdef:
+            Py_ssize_t node = 0, nxt, count = 0
+            Py_ssize_t L = self.nlevels
+            int level
+
+        for level in range(L - 1, -1, -1):
+            nxt = self.nxt[node * L + level]
+            while nxt != NIL and self.value[nxt] < v:
+                count += self.width[node * L + level]
+                node = nxt
+                nxt = self.nxt[node * L + level]
+        return count
+
+    cdef double quantile(self, double q) nogil:
+        '''quantile with linear interpolation as in numpy.percentile'''
+        cdef:
+            double pos = q * (self.size - 1)
+            Py_ssize_t lo = <Py_ssize_t>floor(pos)
+            double vlo, vhi
+        if lo >= self.size - 1:
+            return self.get(self.size - 1)
+        vlo = self.get(lo)
+        if pos == lo:
+            return vlo
+        vhi = self.get(lo + 1)
+        return vlo + (vhi - vlo) * (pos - lo)
+
+    cdef double _deviation(self, double center, Py_ssize_t p,
+                           Py_ssize_t i, bint left) nogil:
+        # i-th smallest distance to center on the left or right of rank p
+        if left:
+            return center - self.get(p - 1 - i)
+        return self.get(p + i) - center
+
+    cdef double kth_deviation(self, double center, Py_ssize_t k) nogil:
+        '''
+        k-th smallest absolute deviation from center
+
+        The deviations to the left and to the right of center are two sorted
+        sequences, the k-th smallest of their union is found by bisection on
+        the number of elements taken from the left sequence.
+        '''
+        cdef:
+            Py_ssize_t p = self.count_less(center)
+            Py_ssize_t r = self.size - p
+            Py_ssize_t lo, hi, i, j
+            double res
+
+        lo = k + 1 - r if k + 1 > r else 0
+        hi = k + 1 if k + 1 < p else p
+        while True:
+            i = (lo + hi) // 2
+            j = k + 1 - i
+            if (i > 0 and j < r and
+                    self._deviation(center, p, i - 1, True) >
+                    self._deviation(center, p, j, False)):
+                hi = i - 1
+            elif (j > 0 and i < p and
+                    self._deviation(center, p, j - 1, False) >
+                    self._deviation(center, p, i, True)):
+                lo = i + 1
+            else:
+                break
+        res = -1.0
+        if i > 0:
+            res = self._deviation(center, p, i - 1, True)
+        if j > 0 and self._deviation(center, p, j - 1, False) > res:
+            res = self._deviation(center, p, j - 1, False)
+        return res
+
+
+cdef class _MovingWindow:
+    '''
+    _MovingWindow(windowsize, stat, q=0.5, ddof=0, scale=1.)
+
+    Streaming engine for one moving window statistic.
+
+    `push` appends observations and returns the statistic of the window
+    ending at each of them, `drain` removes the oldest observations one at
+    a time and returns the statistic of the remaining shrinking windows.
+    The memory used is proportional to windowsize.
+    '''
+    cdef:
+        readonly Py_ssize_t windowsize
+        readonly int stat
+        double q, scale
+        Py_ssize_t ddof
+        # ring buffer of the last windowsize observations
+        double *ring
+        # number of observations pushed and of the oldest in the window
+        Py_ssize_t nobs, start
+        # number of finite values in the window
+        Py_ssize_t count
+        # moment accumulators of the values minus shift, the largest m2
+        # and the number of removals since they were last recomputed from
+        # the ring buffer
+        double shift, mean, m2, m3, m2_max
+        Py_ssize_t nremoved
+        # positions of the monotone deque for min and max
+        Py_ssize_t *deque
+        Py_ssize_t dq_head, dq_size
+        _IndexableSkiplist skiplist
+
+    def __cinit__(self, Py_ssize_t windowsize, int stat, double q=0.5,
+                  Py_ssize_t ddof=0, double scale=1.):
+        if windowsize < 1:
+            raise ValueError('windowsize must be positive')
+        if stat < MEAN or stat > MAX:
+            raise ValueError('unknown statistic')
+        self.windowsize = windowsize
+        self.stat = stat
+        self.q = q
+        self.ddof = ddof
+        self.scale = scale
+        self.ring = <double *>malloc(windowsize * sizeof(double))
+        self.deque = <Py_ssize_t *>malloc(windowsize * sizeof(Py_ssize_t))
+        if self.ring == NULL or self.deque == NULL:
+            raise MemoryError()
+        if stat == QUANTILE or stat == MAD:
+            self.skiplist = _IndexableSkiplist(windowsize)
+        self.nobs = 0
+        self.start = 0
+        self.count = 0
+        self.shift = self.mean = self.m2 = self.m3 = self.m2_max = 0.
+        self.nremoved = 0
+        self.dq_head = self.dq_size = 0
+
+    def __dealloc__(self):
+        free(self.ring)
+        free(self.deque)
+
+    property nobs_window:
+        '''number of observations in the window, including non-finite'''
+        def __get__(self):
+            return self.nobs - self.start
+
+    def push(self, double[::1] x, double[::1] out, np.int64_t[::1] counts):
+        '''
+        push(x, out, counts)
+
+        Append the observations in x, out[i] and counts[i] are set to the
+        statistic and the number of finite values of the window ending at
+        x[i].
+        '''
+        cdef Py_ssize_t i, n = x.shape[0]
+        if out.shape[0] < n or counts.shape[0] < n:
+            raise ValueError('out and counts need to be as long as x')
+        with nogil:
+            for i in range(n):
+                if self.nobs - self.start == self.windowsize:
+                    self._remove_oldest()
+                self._add(x[i])
+                out[i] = self._statistic()
+                counts[i] = self.count
+
+    def drain(self, double[::1] out, np.int64_t[::1] counts):
+        '''
+        drain(out, counts)
+
+        Remove the oldest observations one at a time, out[i] and counts[i]
+        are set to the statistic and the number of finite values of the
+        remaining window. Stops when out is full or the window is empty.
+        Returns the number of windows written.
+        '''
+        cdef Py_ssize_t i = 0, n = out.shape[0]
+        if counts.shape[0] < n:
+            raise ValueError('counts needs to be as long as out')
+        with nogil:
+            while i < n and self.nobs > self.start:
+                self._remove_oldest()
+                out[i] = self._statistic()
+                counts[i] = self.count
+                i += 1
+        return i
+
+    def reset(self):
+        '''remove all observations'''
+        self.nobs = self.start = self.count = 0
+        self.shift = self.mean = self.m2 = self.m3 = self.m2_max = 0.
+        self.nremoved = 0
+        self.dq_head = self.dq_size = 0
+        if self.skiplist is not None:
+            self.skiplist.clear()
+
+    cdef inline double _value(self, Py_ssize_t pos) nogil:
+        return self.ring[pos % self.windowsize]
+
+    cdef void _add(self, double v) nogil:
+        cdef:
+            Py_ssize_t pos = self.nobs
+            Py_ssize_t n1
+            double delta, delta_n, term1
+        self.ring[pos % self.windowsize] = v
+        self.nobs += 1
+        if not isfinite(v):
+            return
+        self.count += 1
+        if self.stat == QUANTILE or self.stat == MAD:
+            self.skiplist.insert(v)
+        elif self.stat == MIN or self.stat == MAX:
+            # drop the positions that can no longer be the extreme value
+            while self.dq_size > 0:
+                if self.stat == MIN:
+                    if self._value(self._dq_back()) < v:
+                        break
+                elif self._value(self._dq_back()) > v:
+                    break
+                self.dq_size -= 1
+            self.deque[(self.dq_head + self.dq_size) % self.windowsize] = pos
+            self.dq_size += 1
+        else:
+            # shifting by a value in the window keeps the updates accurate
+            # for series with a large level
+            if self.count == 1:
+                self.shift = v
+            v -= self.shift
+            n1 = self.count - 1
+            delta = v - self.mean
+            delta_n = delta / self.count
+            term1 = delta * delta_n * n1
+            self.mean += delta_n
+            self.m3 += term1 * delta_n * (self.count - 2) - 3 * delta_n * self.m2
+            self.m2 += term1
+            if self.m2 > self.m2_max:
+                self.m2_max = self.m2
+
+    cdef void _remove_oldest(self) nogil:
+        cdef:
+            double v = self._value(self.start)
+            Py_ssize_t n1
+            double delta, delta_n, term1
+        self.start += 1
+        if not isfinite(v):
+            return
+        self.count -= 1
+        if self.stat == QUANTILE or self.stat == MAD:
+            self.skiplist.remove(v)
+        elif self.stat == MIN or self.stat == MAX:
+            if self.dq_size > 0 and self.deque[self.dq_head] < self.start:
+                self.dq_head = (self.dq_head + 1) % self.windowsize
+                self.dq_size -= 1
+        elif self.count == 0:
+            self.mean = self.m2 = self.m3 = 0.
+        else:
+            # inverse of the update in _add
+            v -= self.shift
+            n1 = self.count
+            self.mean = (self.mean * (n1 + 1) - v) / n1
+            delta = v - self.mean
+            delta_n = delta / (n1 + 1)
+            term1 = delta * delta_n * n1
+            self.m2 -= term1
+            if self.m2 < 0:
+                self.m2 = 0.
+            self.m3 -= (term1 * delta_n * (n1 - 1) - 3 * delta_n * self.m2)
+            # remove the rounding errors where the moments are known
+            if n1 <= 2:
+                self.m3 = 0.
+                if n1 == 1:
+                    self.m2 = 0.
+            # the downdates accumulate rounding errors, and lose precision
+            # when large values leave the window, recompute the moments
+            # every windowsize removals or after m2 drops by a large factor
+            self.nremoved += 1
+            if (self.nremoved >= self.windowsize or
+                    self.m2 < 1e-4 * self.m2_max):
+                self._recompute_moments()
+
+    cdef void _recompute_moments(self) nogil:
+        cdef:
+            Py_ssize_t pos
+            double v, d, total = 0., m2 = 0., m3 = 0.
+        self.nremoved = 0
+        if self.count == 0:
+            self.mean = self.m2 = self.m3 = self.m2_max = 0.
+            return
+        for pos in range(self.start, self.nobs):
+            v = self._value(pos)
+            if isfinite(v):
+                total += v
+        # shift by the mean, the second pass corrects its rounding error
+        self.shift = total / self.count
+        total = 0.
+        for pos in range(self.start, self.nobs):
+            v = self._value(pos)
+            if isfinite(v):
+                total += v - self.shift
+        self.mean = total / self.count
+        for pos in range(self.start, self.nobs):
+            v = self._value(pos)
+            if isfinite(v):
+                d = v - self.shift - self.mean
+                m2 += d * d
+                m3 += d * d * d
+        self.m2 = self.m2_max = m2
+        self.m3 = m3
+
+    cdef inline Py_ssize_t _dq_back(self) nogil:
+        return self.deque[(self.dq_head + self.dq_size - 1) % self.windowsize]
+
+    cdef double _statistic(self) nogil:
+        cdef:
+            Py_ssize_t n = self.count
+            double med
+        if n == 0:
+            return NAN
+        if self.stat == MEAN:
+            return self.shift + self.mean
+        elif self.stat == VAR:
+            if n - self.ddof <= 0:
+                return NAN
+            return self.m2 / (n - self.ddof)
+        elif self.stat == SKEW:
+            # constant windows have zero skew as in scipy.stats.skew
+            if self.m2 == 0:
+                return 0.
+            return sqrt(n) * self.m3 / (self.m2 * sqrt(self.m2))
+        elif self.stat == QUANTILE:
+            return self.skiplist.quantile(self.q)
+        elif self.stat == MAD:
+            med = self.skiplist.quantile(0.5)
+            return ((self.skiplist.kth_deviation(med, (n - 1) // 2) +
+                     self.skiplist.kth_deviation(med, n // 2)) / 2. /
+                    self.scale)
+        else:
+            return self._value(self.deque[self.dq_head])
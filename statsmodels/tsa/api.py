@@ -9,6 +9,7 @@ from . import tsatools
 from .tsatools import (add_trend, detrend, lagmat, lagmat2ds, add_lag)
 from . import interp
 from . import stattools
+from . import movstat
 from .stattools import *
 from .base import datetools
 from .seasonal import seasonal_decompose
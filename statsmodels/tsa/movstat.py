@@ -0,0 +1,318 @@
+"""
+Moving window statistics
+
+Moving (rolling) mean, variance, skewness, median, quantiles, median
+absolute deviation, minimum and maximum of time series. The windows are
+updated incrementally in compiled code, order statistics in O(log w) and
+minimum, maximum and moments in O(1) amortized time per observation, so
+that the cost does not grow with the product of the number of observations
+and the window size.
+
+`MovingWindow` computes the same statistics on a stream of observations
+that arrive in chunks, with memory proportional to the window size.
+
+Non-finite observations count towards the window size but are ignored in
+the statistics.
+"""
+from statsmodels.compat.python import range
+import numpy as np
+from scipy.stats import norm
+
+from ._movstat import (_MovingWindow, STAT_MEAN, STAT_VAR, STAT_SKEW,
+                       STAT_QUANTILE, STAT_MAD, STAT_MIN, STAT_MAX)
+
+__all__ = ['movmean', 'movvar', 'movskew', 'movmedian', 'movquantile',
+           'movmad', 'movmin', 'movmax', 'MovingWindow']
+
+_stats = {'mean': STAT_MEAN, 'var': STAT_VAR, 'skew': STAT_SKEW,
+          'median': STAT_QUANTILE, 'quantile': STAT_QUANTILE,
+          'mad': STAT_MAD, 'min': STAT_MIN, 'max': STAT_MAX}
+
+
+def _get_engine(stat, windowsize, q=0.5, ddof=0, c=1.):
+    if stat not in _stats:
+        raise ValueError('stat %s not understood' % stat)
+    windowsize = int(windowsize)
+    if windowsize < 1:
+        raise ValueError('windowsize must be a positive integer')
+    if stat == 'median':
+        q = 0.5
+    if not 0 <= q <= 1:
+        raise ValueError('q must be between 0 and 1')
+    return _MovingWindow(windowsize, _stats[stat], q, ddof, c)
+
+
+def _check_min_periods(min_periods, windowsize):
+    if min_periods is None:
+        return windowsize
+    if not 0 <= min_periods <= windowsize:
+        raise ValueError('min_periods must be between 0 and windowsize')
+    return max(min_periods, 1)
+
+
+def _movstat(x, stat, windowsize, lag='lagged', min_periods=None, axis=0,
+             **kwds):
+    """moving statistic along axis
+
+    The window of observation t is [t - windowsize + 1, t] if lag is
+    'lagged', [t - (windowsize - 1) // 2, t + windowsize // 2] if lag is
+    'centered' and [t, t + windowsize - 1] if lag is 'leading'.
+    """
+    x = np.asarray(x, dtype=float)
+    windowsize = int(windowsize)
+    engine = _get_engine(stat, windowsize, **kwds)
+    min_periods = _check_min_periods(min_periods, windowsize)
+    if lag == 'lagged':
+        offset = 0
+    elif lag == 'centered':
+        offset = windowsize // 2
+    elif lag == 'leading':
+        offset = windowsize - 1
+    else:
+        raise ValueError("lag must be 'lagged', 'centered' or 'leading'")
+
+    xt = np.rollaxis(x, axis)
+    nobs = xt.shape[0]
+    x2d = xt.reshape(nobs, -1)
+    # the windows ending at each observation, followed by the windows
+    # after the last observation that lose their oldest observations
+    full = np.empty(nobs + offset)
+    counts = np.empty(nobs + offset, dtype=np.int64)
+    res = np.empty(x2d.shape)
+    for col in range(x2d.shape[1]):
+        engine.reset()
+        engine.push(np.ascontiguousarray(x2d[:, col]), full, counts)
+        if offset:
+            ndrained = engine.drain(full[nobs:], counts[nobs:])
+            counts[nobs + ndrained:] = 0
+        full[counts < min_periods] = np.nan
+        res[:, col] = full[offset:]
+
+    res = res.reshape(xt.shape)
+    return np.rollaxis(res, 0, axis % max(x.ndim, 1) + 1)
+
+
+_params_doc = """x : array_like
+        time series data
+    windowsize : int
+        number of observations in the window
+    lag : 'lagged', 'centered', or 'leading'
+        location of window relative to current position. The window of
+        observation t is [t - windowsize + 1, t] if 'lagged',
+        [t - (windowsize - 1) // 2, t + windowsize // 2] if 'centered' and
+        [t, t + windowsize - 1] if 'leading'.
+    min_periods : None or int
+        minimum number of finite observations in the window, the statistic
+        is nan for windows with fewer observations. The default is
+        windowsize, so that the statistic is nan for incomplete windows.
+    axis : int
+        axis along which the statistic is computed"""
+
+
+def movmean(x, windowsize=3, lag='lagged', min_periods=None, axis=0):
+    return _movstat(x, 'mean', windowsize, lag, min_periods, axis)
+
+
+def movvar(x, windowsize=3, lag='lagged', min_periods=None, axis=0,
+           ddof=0):
+    return _movstat(x, 'var', windowsize, lag, min_periods, axis, ddof=ddof)
+
+
+def movskew(x, windowsize=3, lag='lagged', min_periods=None, axis=0):
+    return _movstat(x, 'skew', windowsize, lag, min_periods, axis)
+
+
+def movmedian(x, windowsize=3, lag='lagged', min_periods=None, axis=0):
+    return _movstat(x, 'median', windowsize, lag, min_periods, axis)
+
+
+def movquantile(x, q, windowsize=3, lag='lagged', min_periods=None, axis=0):
+    return _movstat(x, 'quantile', windowsize, lag, min_periods, axis, q=q)
+
+
+def movmad(x, windowsize=3, lag='lagged', min_periods=None, axis=0,
+           c=norm.ppf(3/4.)):
+    return _movstat(x, 'mad', windowsize, lag, min_periods, axis, c=c)
+
+
+def movmin(x, windowsize=3, lag='lagged', min_periods=None, axis=0):
+    return _movstat(x, 'min', windowsize, lag, min_periods, axis)
+
+
+def movmax(x, windowsize=3, lag='lagged', min_periods=None, axis=0):
+    return _movstat(x, 'max', windowsize, lag, min_periods, axis)
+
+
+movmean.__doc__ = """moving window mean
+
+    Parameters
+    ----------
+    %s
+
+    Returns
+    -------
+    res : ndarray
+        moving mean, with same shape as x
+    """ % _params_doc
+
+movvar.__doc__ = """moving window variance
+
+    Parameters
+    ----------
+    %s
+    ddof : int
+        degrees of freedom correction, the sum of squared deviations is
+        divided by nobs - ddof, where nobs is the number of finite
+        observations in the window.
+
+    Returns
+    -------
+    res : ndarray
+        moving variance, with same shape as x
+    """ % _params_doc
+
+movskew.__doc__ = """moving window skewness
+
+    Parameters
+    ----------
+    %s
+
+    Returns
+    -------
+    res : ndarray
+        moving skewness, with same shape as x. This is the biased estimate
+        as in scipy.stats.skew, zero if the values in a window are constant.
+    """ % _params_doc
+
+movmedian.__doc__ = """moving window median
+
+    Parameters
+    ----------
+    %s
+
+    Returns
+    -------
+    res : ndarray
+        moving median, with same shape as x
+    """ % _params_doc
+
+movquantile.__doc__ = """moving window quantile
+
+    Parameters
+    ----------
+    q : float
+        quantile between 0 and 1, interpolated linearly between order
+        statistics as in numpy.percentile
+    %s
+
+    Returns
+    -------
+    res : ndarray
+        moving quantile, with same shape as x
+    """ % _params_doc
+
+movmad.__doc__ = """moving window median absolute deviation
+
+    Parameters
+    ----------
+    %s
+    c : float
+        The normalization constant, the default is norm.ppf(3/4.), as in
+        statsmodels.robust.scale.mad
+
+    Returns
+    -------
+    res : ndarray
+        median(abs(x - median(x))) / c of the windows, with same shape as x
+    """ % _params_doc
+
+movmin.__doc__ = """moving window minimum
+
+    Parameters
+    ----------
+    %s
+
+    Returns
+    -------
+    res : ndarray
+        moving minimum, with same shape as x
+    """ % _params_doc
+
+movmax.__doc__ = """moving window maximum
+
+    Parameters
+    ----------
+    %s
+
+    Returns
+    -------
+    res : ndarray
+        moving maximum, with same shape as x
+    """ % _params_doc
+
+
+class MovingWindow(object):
+    """moving window statistic of a stream of observations
+
+    Parameters
+    ----------
+    stat : str
+        'mean', 'var', 'skew', 'median', 'quantile', 'mad', 'min' or 'max'
+    windowsize : int
+        number of observations in the window
+    min_periods : None or int
+        minimum number of finite observations in the window, the default
+        is windowsize.
+    q : float
+        quantile if stat is 'quantile'
+    ddof : int
+        degrees of freedom correction if stat is 'var'
+    c : float
+        normalization constant if stat is 'mad'
+
+    Notes
+    -----
+    The windows are lagged, each value returned by `update` is the statistic
+    of the window that ends at the corresponding new observation. Only the
+    last windowsize observations are kept, so the memory does not depend on
+    the length of the stream.
+
+    Examples
+    --------
+    >>> mw = MovingWindow('median', 1000)
+    >>> for chunk in chunks:
+    ...     med = mw.update(chunk)
+    """
+
+    def __init__(self, stat, windowsize, min_periods=None, q=0.5, ddof=0,
+                 c=norm.ppf(3/4.)):
+        if stat != 'mad':
+            c = 1.
+        self._engine = _get_engine(stat, windowsize, q=q, ddof=ddof, c=c)
+        self.stat = stat
+        self.windowsize = int(windowsize)
+        self.min_periods = _check_min_periods(min_periods, self.windowsize)
+
+    def update(self, x):
+        """add new observations
+
+        Parameters
+        ----------
+        x : array_like, 1-D
+            new observations
+
+        Returns
+        -------
+        res : ndarray
+            statistic of the window ending at each new observation
+        """
+        x = np.ascontiguousarray(x, dtype=float).ravel()
+        res = np.empty(x.shape[0])
+        counts = np.empty(x.shape[0], dtype=np.int64)
+        self._engine.push(x, res, counts)
+        res[counts < self.min_periods] = np.nan
+        return res
+
+    def reset(self):
+        """remove all observations from the window"""
+        self._engine.reset()
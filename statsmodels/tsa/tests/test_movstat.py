@@ -0,0 +1,116 @@
+import numpy as np
+from numpy.testing import (assert_allclose, assert_equal, assert_raises,
+                           assert_)
+from scipy import stats
+
+from statsmodels.robust.scale import mad
+from statsmodels.tsa import movstat
+
+
+def _brute(x, windowsize, func, lag, min_periods):
+    # apply func to the finite values of each window
+    nobs = len(x)
+    res = np.empty(nobs)
+    res.fill(np.nan)
+    for t in range(nobs):
+        if lag == 'lagged':
+            lo, hi = t - windowsize + 1, t
+        elif lag == 'centered':
+            lo, hi = t - (windowsize - 1) // 2, t + windowsize // 2
+        else:
+            lo, hi = t, t + windowsize - 1
+        v = x[max(lo, 0):hi + 1]
+        v = v[np.isfinite(v)]
+        if len(v) >= min_periods:
+            res[t] = func(v)
+    return res
+
+
+class TestMovstat(object):
+
+    @classmethod
+    def setupClass(cls):
+        np.random.seed(987125)
+        x = np.random.standard_t(3, size=150)
+        # ties and missing values
+        x[::13] = np.round(x[::13])
+        x[[20, 21, 90]] = np.nan
+        cls.x = x
+
+    def check(self, name, func, **kwds):
+        x = self.x
+        for windowsize in [1, 2, 6, 25]:
+            for lag in ['lagged', 'centered', 'leading']:
+                for min_periods in [None, 1]:
+                    res = getattr(movstat, name)(x, windowsize=windowsize,
+                                                 lag=lag,
+                                                 min_periods=min_periods,
+                                                 **kwds)
+                    mp = windowsize if min_periods is None else min_periods
+                    res_brute = _brute(x, windowsize, func, lag, mp)
+                    assert_equal(np.isnan(res), np.isnan(res_brute))
+                    assert_allclose(res, res_brute, rtol=1e-10, atol=1e-7)
+
+    def test_moments(self):
+        self.check('movmean', np.mean)
+        self.check('movvar', np.var)
+        self.check('movvar', lambda v: np.var(v, ddof=1) if len(v) > 1
+                   else np.nan, ddof=1)
+        self.check('movskew', stats.skew)
+
+    def test_order(self):
+        self.check('movmedian', np.median)
+        self.check('movmin', np.min)
+        self.check('movmax', np.max)
+        self.check('movmad', mad)
+        self.check('movquantile', lambda v: np.percentile(v, 90), q=0.9)
+        self.check('movquantile', lambda v: np.percentile(v, 0), q=0)
+
+    def test_axis(self):
+        x = self.x[:120].reshape(3, 40)
+        res = movstat.movmedian(x, 5, axis=1, lag='centered')
+        for i in range(3):
+            assert_equal(res[i], movstat.movmedian(x[i], 5, lag='centered'))
+        assert_equal(movstat.movmax(x.T, 5), movstat.movmax(x, 5, axis=-1).T)
+
+    def test_streaming(self):
+        x = self.x
+        for stat, func in [('median', movstat.movmedian),
+                           ('mad', movstat.movmad),
+                           ('min', movstat.movmin),
+                           ('skew', movstat.movskew)]:
+            mw = movstat.MovingWindow(stat, 7, min_periods=3)
+            res = np.concatenate([mw.update(chunk)
+                                  for chunk in np.array_split(x, 11)])
+            assert_allclose(res, func(x, 7, min_periods=3), rtol=1e-12)
+            mw.reset()
+            assert_allclose(mw.update(x[:10]), func(x[:10], 7, min_periods=3),
+                            rtol=1e-12)
+
+    def test_long_series(self):
+        # rounding errors of the updates do not accumulate
+        rs = np.random.RandomState(12345)
+        windowsize = 100
+        for x in [np.r_[1e9 * rs.randn(1000), rs.randn(200000)],
+                  1e8 + rs.randn(200000)]:
+            # direct computation for all windows after the first 1100
+            xw = np.lib.stride_tricks.as_strided(x[1000:],
+                    shape=(len(x) - 1000 - windowsize + 1, windowsize),
+                    strides=(x.strides[0], x.strides[0]))
+            # two pass with corrected mean, more precise than stats.skew
+            d = xw - xw.mean(1)[:, None]
+            d -= d.mean(1)[:, None]
+            m2 = (d**2).mean(1)
+            res = movstat.movvar(x, windowsize)[1000 + windowsize - 1:]
+            assert_allclose(res, m2, rtol=1e-10)
+            res = movstat.movskew(x, windowsize)[1000 + windowsize - 1:]
+            assert_allclose(res, (d**3).mean(1) / m2**1.5, rtol=1e-8,
+                            atol=1e-10)
+
+    def test_errors(self):
+        x = self.x
+        assert_raises(ValueError, movstat.movmedian, x, 0)
+        assert_raises(ValueError, movstat.movmedian, x, 3, lag='future')
+        assert_raises(ValueError, movstat.movmedian, x, 3, min_periods=4)
+        assert_raises(ValueError, movstat.movquantile, x, 1.5)
+        assert_raises(ValueError, movstat.MovingWindow, 'mode', 3)